@@ -0,0 +1,298 @@
+"""Batch woning recommendations: score every active tenant against every listing.
+
+``MatchingService.calculateMatchScore`` scores one tenant/listing pair at a
+time. This job computes the same score for all pairs at once with NumPy and
+stores the best ``TOP_K`` listings per tenant in ``woning_aanbevelingen``,
+which ``MatchingService.getRecommendations`` / ``getMatches`` read.
+
+Score terms (same weights and semantics as ``calculateMatchScore``):
+
+* budget (30) – ``huurprijs <= max_huur`` (a missing ``max_huur`` counts as 0)
+* location (25) – the listing's ``stad`` is in ``locatie_voorkeur``
+* rooms (15) – ``aantal_slaapkamers >= min_kamers`` (``Property.bedrooms``; a missing or
+  0 ``min_kamers`` counts as 1, a missing ``aantal_slaapkamers`` as 0)
+* furnishing (10) – ``woningvoorkeur.meubilering == meubilering``
+* type (20) – ``woningvoorkeur.type == woning_type``
+
+For furnishing and type, a tenant without a preference matches a listing
+without a value, as ``undefined === undefined`` does in ``calculateMatchScore``.
+
+Tenants are processed in blocks sized so that one block holds at most
+``PAIR_BLOCK`` tenant×listing pairs. Each term is a broadcast comparison
+between a tenant column vector and a listing row vector; the location term
+gathers a per-block tenant×city matrix by listing city. Ties are broken by
+listing id so runs are reproducible. Pairs scoring 0 are not stored.
+
+Run it on the same schedule as the ``subscription-maintenance`` edge function
+(e.g. nightly), with the database URL of the project:
+
+    SUPABASE_DB_URL=postgresql://... python scripts/match_recommendations.py
+    python scripts/match_recommendations.py --db-url postgresql://... --top-k 20
+
+Requires ``numpy`` and ``psycopg`` (3).
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+logger = logging.getLogger("match_recommendations")
+
+TOP_K = int(os.environ.get("RECOMMENDATIONS_TOP_K", "10"))
+# Tenant×listing pairs scored at once; bounds the memory of one block (about 15 bytes per pair)
+PAIR_BLOCK = int(os.environ.get("RECOMMENDATIONS_PAIR_BLOCK", "8000000"))
+# Processes scoring blocks in parallel
+WORKERS = int(os.environ.get("RECOMMENDATIONS_WORKERS", str(os.cpu_count() or 1)))
+# Tenants whose recommendations are replaced per transaction
+WRITE_BATCH = int(os.environ.get("RECOMMENDATIONS_WRITE_BATCH", "50000"))
+
+WEIGHT_BUDGET = 30
+WEIGHT_LOCATION = 25
+WEIGHT_ROOMS = 15
+WEIGHT_FURNISHED = 10
+WEIGHT_TYPE = 20
+
+# Categorical codes: a tenant preference no listing has (never equals a listing code), and no value
+# on either side. MISSING equals MISSING, like undefined === undefined in calculateMatchScore.
+UNKNOWN = -1
+MISSING = -2
+
+LISTINGS_SQL = """
+    SELECT w.id::text, w.huurprijs::float8, w.stad, coalesce(w.aantal_slaapkamers, 0)::float8, w.meubilering, w.woning_type
+    FROM public.woningen w
+    WHERE w.status = 'actief' AND coalesce(w.is_actief, true)
+    ORDER BY w.id
+"""
+TENANTS_SQL = """
+    SELECT h.id::text, coalesce(h.max_huur, 0)::float8, coalesce(h.locatie_voorkeur, '{}'),
+           coalesce(nullif(h.min_kamers, 0), 1)::float8,
+           h.woningvoorkeur ->> 'meubilering', h.woningvoorkeur ->> 'type'
+    FROM public.huurders h
+    WHERE EXISTS (SELECT 1 FROM public.actieve_huurders a WHERE a.id = h.id)
+    ORDER BY h.id
+"""
+
+
+@dataclass
+class Listings:
+    ids: list
+    rent: np.ndarray  # float64
+    city: np.ndarray  # int32 index into cities
+    rooms: np.ndarray  # float64
+    furnished: np.ndarray  # int32 code
+    kind: np.ndarray  # int32 code
+    cities: dict  # city name -> index
+    furnishings: dict
+    kinds: dict
+
+    def __len__(self):
+        return len(self.ids)
+
+
+@dataclass
+class Tenants:
+    ids: list
+    max_rent: np.ndarray  # float64
+    min_rooms: np.ndarray  # float64
+    furnished: np.ndarray  # int32 code
+    kind: np.ndarray  # int32 code
+    # Preferred cities in CSR form: tenant i prefers cities[location_indptr[i]:location_indptr[i + 1]]
+    location_indptr: np.ndarray
+    location_indices: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    def slice(self, start, stop):
+        first, last = self.location_indptr[start], self.location_indptr[stop]
+        return Tenants(
+            ids=self.ids[start:stop], max_rent=self.max_rent[start:stop], min_rooms=self.min_rooms[start:stop],
+            furnished=self.furnished[start:stop], kind=self.kind[start:stop],
+            location_indptr=self.location_indptr[start:stop + 1] - first, location_indices=self.location_indices[first:last],
+        )
+
+
+def _encode(values, vocabulary, extend):
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = MISSING
+        elif value in vocabulary:
+            codes[i] = vocabulary[value]
+        elif extend:
+            codes[i] = vocabulary[value] = len(vocabulary)
+        else:
+            codes[i] = UNKNOWN
+    return codes
+
+
+def make_listings(rows):
+    """``Listings`` from ``(id, huurprijs, stad, aantal_slaapkamers, meubilering, woning_type)`` rows."""
+    ids, rent, cities, rooms, furnished, kinds = zip(*rows) if rows else ((),) * 6
+    vocabularies = ({}, {}, {})
+    return Listings(
+        ids=list(ids), rent=np.asarray(rent, dtype=np.float64), city=_encode(cities, vocabularies[0], True),
+        rooms=np.asarray(rooms, dtype=np.float64), furnished=_encode(furnished, vocabularies[1], True),
+        kind=_encode(kinds, vocabularies[2], True),
+        cities=vocabularies[0], furnishings=vocabularies[1], kinds=vocabularies[2],
+    )
+
+
+def make_tenants(rows, listings):
+    """``Tenants`` from ``(id, max_huur, locatie_voorkeur, min_kamers, meubilering, type)`` rows."""
+    ids, max_rent, locations, min_rooms, furnished, kinds = zip(*rows) if rows else ((),) * 6
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    indices = []
+    for i, preferred in enumerate(locations):
+        known = {listings.cities[city] for city in preferred if city in listings.cities}
+        indices.extend(sorted(known))
+        indptr[i + 1] = len(indices)
+    return Tenants(
+        ids=list(ids), max_rent=np.asarray(max_rent, dtype=np.float64), min_rooms=np.asarray(min_rooms, dtype=np.float64),
+        furnished=_encode(furnished, listings.furnishings, False), kind=_encode(kinds, listings.kinds, False),
+        location_indptr=indptr, location_indices=np.asarray(indices, dtype=np.int32),
+    )
+
+
+def block_size(listing_count, pair_block=PAIR_BLOCK):
+    return max(1, pair_block // max(1, listing_count))
+
+
+def score_block(tenants, listings, start, stop):
+    """``calculateMatchScore`` for tenants ``start:stop`` against every listing, as a uint8 matrix."""
+    n = stop - start
+    score = np.zeros((n, len(listings)), dtype=np.uint8)
+    score += (listings.rent[None, :] <= tenants.max_rent[start:stop, None]).view(np.uint8) * np.uint8(WEIGHT_BUDGET)
+    score += (listings.rooms[None, :] >= tenants.min_rooms[start:stop, None]).view(np.uint8) * np.uint8(WEIGHT_ROOMS)
+    score += (listings.furnished[None, :] == tenants.furnished[start:stop, None]).view(np.uint8) * np.uint8(WEIGHT_FURNISHED)
+    score += (listings.kind[None, :] == tenants.kind[start:stop, None]).view(np.uint8) * np.uint8(WEIGHT_TYPE)
+
+    # Dense tenant×city preference matrix for this block, gathered by listing city
+    preferred = np.zeros((n, max(1, len(listings.cities))), dtype=np.uint8)
+    first, last = tenants.location_indptr[start], tenants.location_indptr[stop]
+    rows = np.repeat(np.arange(n), np.diff(tenants.location_indptr[start:stop + 1]))
+    preferred[rows, tenants.location_indices[first:last]] = WEIGHT_LOCATION
+    score += preferred[:, listings.city]
+    return score
+
+
+def top_k(score, k):
+    """Indices and scores of the ``k`` best listings per row, best first; ties go to the lower listing index."""
+    listing_count = score.shape[1]
+    k = min(k, listing_count)
+    if k == 0:
+        empty = np.empty((score.shape[0], 0), dtype=np.int64)
+        return empty, empty.astype(np.uint8)
+    # One int32 key per pair: the score, then the reversed listing index as tie-breaker
+    key = score.astype(np.int32) * listing_count + (listing_count - 1 - np.arange(listing_count, dtype=np.int32))
+    best = np.argpartition(key, listing_count - k, axis=1)[:, listing_count - k:]
+    order = np.argsort(-np.take_along_axis(key, best, axis=1), axis=1)
+    best = np.take_along_axis(best, order, axis=1)
+    return best, np.take_along_axis(score, best, axis=1)
+
+
+_worker_listings = None
+
+
+def _init_worker(listings):
+    global _worker_listings
+    _worker_listings = listings
+
+
+def _rank_slice(task):
+    start, block, k = task
+    return (start, start + len(block), *top_k(score_block(block, _worker_listings, 0, len(block)), k))
+
+
+def rank(tenants, listings, k=TOP_K, pair_block=PAIR_BLOCK, workers=WORKERS):
+    """Yield ``(start, stop, listing_indices, scores)`` per tenant block, in tenant order.
+
+    With ``workers > 1`` the blocks are scored in a process pool; each worker
+    receives the listings once and only a tenant slice per block.
+    """
+    step = block_size(len(listings), pair_block)
+    starts = range(0, len(tenants), step)
+    if workers <= 1:
+        for start in starts:
+            stop = min(start + step, len(tenants))
+            yield (start, stop, *top_k(score_block(tenants, listings, start, stop), k))
+        return
+    tasks = ((start, tenants.slice(start, min(start + step, len(tenants))), k) for start in starts)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(listings,)) as pool:
+        yield from pool.map(_rank_slice, tasks, chunksize=4)
+
+
+def _write(conn, tenant_ids, rows):
+    with conn.transaction(), conn.cursor() as cursor:
+        cursor.execute("DELETE FROM public.woning_aanbevelingen WHERE huurder_id = ANY(%s::uuid[])", (tenant_ids,))
+        with cursor.copy("COPY public.woning_aanbevelingen (huurder_id, rang, woning_id, score, berekend_op) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def run(conn, k=TOP_K, pair_block=PAIR_BLOCK, write_batch=WRITE_BATCH, workers=WORKERS):
+    """Recompute ``woning_aanbevelingen``; returns timing and volume metrics."""
+    started = time.perf_counter()
+    computed_at = datetime.now(timezone.utc)
+    listings = make_listings(conn.execute(LISTINGS_SQL).fetchall())
+    tenants = make_tenants(conn.execute(TENANTS_SQL).fetchall(), listings)
+    loaded = time.perf_counter()
+    logger.info("Loaded %d tenants and %d listings in %.1fs", len(tenants), len(listings), loaded - started)
+
+    scoring_s = 0.0
+    pending_ids, pending_rows, stored = [], [], 0
+    block_started = time.perf_counter()
+    for start, stop, best, scores in rank(tenants, listings, k, pair_block, workers):
+        scoring_s += time.perf_counter() - block_started
+        for offset, (indices, values) in enumerate(zip(best, scores)):
+            tenant_id = tenants.ids[start + offset]
+            pending_ids.append(tenant_id)
+            pending_rows.extend(
+                (tenant_id, rang, listings.ids[index], int(value), computed_at)
+                for rang, (index, value) in enumerate(zip(indices, values), start=1) if value > 0
+            )
+        if len(pending_ids) >= write_batch or stop == len(tenants):
+            _write(conn, pending_ids, pending_rows)
+            stored += len(pending_rows)
+            pending_ids, pending_rows = [], []
+        block_started = time.perf_counter()
+    # Tenants that are no longer active (or have no listings left) keep no stale rows
+    conn.execute("DELETE FROM public.woning_aanbevelingen WHERE berekend_op < %s", (computed_at,))
+
+    elapsed = time.perf_counter() - started
+    pairs = len(tenants) * len(listings)
+    metrics = {
+        "tenants": len(tenants), "listings": len(listings), "pairs": pairs, "stored": stored,
+        "load_s": round(loaded - started, 3), "score_s": round(scoring_s, 3), "total_s": round(elapsed, 3),
+        "pairs_per_s": round(pairs / scoring_s) if scoring_s else None,
+    }
+    logger.info("Stored %d recommendations: %s", stored, json.dumps(metrics))
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default=os.environ.get("SUPABASE_DB_URL"), help="Postgres URL (default: SUPABASE_DB_URL)")
+    parser.add_argument("--top-k", type=int, default=TOP_K, help="recommendations stored per tenant")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="scoring processes")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if not args.db_url:
+        parser.error("set SUPABASE_DB_URL or pass --db-url")
+
+    import psycopg
+
+    with psycopg.connect(args.db_url, autocommit=True) as conn:
+        print(json.dumps(run(conn, args.top_k, workers=args.workers)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
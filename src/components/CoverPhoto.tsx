@@ -9,6 +9,8 @@ import { Progress } from '@/components/ui/progress';
 interface CoverPhotoProps {
   userId: string;
   currentImageUrl?: string;
+  /** srcset of the thumbnail/card/full variants, when the photo was uploaded with them */
+  currentImageSrcSet?: string;
   onImageUploaded: (url: string) => void;
   className?: string;
 }
@@ -16,6 +18,7 @@ interface CoverPhotoProps {
 export const CoverPhoto: React.FC<CoverPhotoProps> = ({
   userId,
   currentImageUrl,
+  currentImageSrcSet,
   onImageUploaded,
   className = ''
 }) => {
@@ -61,6 +64,8 @@ export const CoverPhoto: React.FC<CoverPhotoProps> = ({
           {getImageUrl() ? (
             <img
               src={getImageUrl()}
+              srcSet={currentImageSrcSet || undefined}
+              sizes="(min-width: 896px) 896px, 100vw"
               alt="Cover foto"
               className="w-full h-full object-cover"
             />
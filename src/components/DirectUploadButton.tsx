@@ -4,6 +4,7 @@ import { Upload, Loader2 } from 'lucide-react';
 import { useToast } from '@/hooks/use-toast';
 import { directUploadService } from '@/lib/direct-upload';
 import { supabase } from '@/integrations/supabase/client';
+import { queryCache } from '@/lib/queryCache';
 
 interface DirectUploadButtonProps {
   userId: string;
@@ -43,32 +44,13 @@ export const DirectUploadButton: React.FC<DirectUploadButtonProps> = ({
         return;
       }
 
-      // Generate file path
+      // Upload straight to R2 through a presigned URL
       const uploadResult = await directUploadService.uploadFile(file, userId, folder);
       
       if (!uploadResult.success || !uploadResult.url) {
         throw uploadResult.error || new Error('Upload failed');
       }
 
-      // Create FormData for direct upload
-      const formData = new FormData();
-      formData.append('file', file);
-
-      // Use the URL from uploadResult
-      const response = await fetch(uploadResult.url, {
-        method: 'PUT',
-        headers: {
-          'Content-Type': file.type,
-          'x-amz-acl': 'public-read',
-        },
-        body: file,
-      });
-
-      if (!response.ok) {
-        throw new Error(`Upload failed: ${response.status}`);
-      }
-
-      // Update database with the new URL
       const publicUrl = uploadResult.url;
       
       // Update the appropriate table based on folder
@@ -77,6 +59,7 @@ export const DirectUploadButton: React.FC<DirectUploadButtonProps> = ({
           .from('huurders')
           .update({ profiel_foto: publicUrl })
           .eq('id', userId);
+        queryCache.invalidate('huurders');
       } else if (folder.startsWith('properties/')) {
         // Handle property images
         const propertyId = folder.split('/')[1];
@@ -84,6 +67,7 @@ export const DirectUploadButton: React.FC<DirectUploadButtonProps> = ({
           .from('woningen')
           .update({ foto_urls: [publicUrl] }) // Use foto_urls array
           .eq('id', propertyId);
+        queryCache.invalidate('woningen');
       }
 
       onUploadComplete(publicUrl);
@@ -9,7 +9,7 @@ import { Loader2 } from 'lucide-react';
 
 export const PhotoSection: React.FC<{ children?: React.ReactNode }> = ({ children }) => {
   const { user } = useAuthStore();
-  const { profilePictureUrl, coverPhotoUrl, refresh, isLoading } = useHuurder();
+  const { profilePictureUrl, coverPhotoUrl, profilePictureSrcSet, coverPhotoSrcSet, refresh, isLoading } = useHuurder();
   const { toast } = useToast();
 
   const handleProfilePictureUploaded = async (url: string) => {
@@ -70,6 +70,7 @@ export const PhotoSection: React.FC<{ children?: React.ReactNode }> = ({ childre
         <CoverPhoto
           userId={user?.id || ''}
           currentImageUrl={getCurrentCoverUrl()}
+          currentImageSrcSet={coverPhotoSrcSet ?? undefined}
           onImageUploaded={handleCoverPhotoUploaded}
         />
       </div>
@@ -80,6 +81,7 @@ export const PhotoSection: React.FC<{ children?: React.ReactNode }> = ({ childre
           <ProfilePicture
             userId={user?.id || ''}
             currentImageUrl={profilePictureUrl}
+            currentImageSrcSet={profilePictureSrcSet ?? undefined}
             onImageUploaded={handleProfilePictureUploaded}
             size="large"
           />
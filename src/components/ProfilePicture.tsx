@@ -10,6 +10,8 @@ import { Progress } from '@/components/ui/progress';
 interface ProfilePictureProps {
   userId: string;
   currentImageUrl?: string;
+  /** srcset of the thumbnail/card/full variants, when the photo was uploaded with them */
+  currentImageSrcSet?: string;
   onImageUploaded: (url: string) => void;
   size?: 'small' | 'medium' | 'large';
   className?: string;
@@ -18,6 +20,7 @@ interface ProfilePictureProps {
 export const ProfilePicture: React.FC<ProfilePictureProps> = ({
   userId,
   currentImageUrl,
+  currentImageSrcSet,
   onImageUploaded,
   size = 'large',
   className = ''
@@ -38,6 +41,13 @@ export const ProfilePicture: React.FC<ProfilePictureProps> = ({
     large: 'w-36 h-36 sm:w-48 sm:h-48'
   };
 
+  // Rendered widths of the classes above, so the browser picks the smallest variant that is sharp enough
+  const imageSizes = {
+    small: '(min-width: 640px) 128px, 96px',
+    medium: '(min-width: 640px) 160px, 128px',
+    large: '(min-width: 640px) 192px, 144px'
+  };
+
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     accept: {
       'image/jpeg': ['.jpg', '.jpeg'],
@@ -73,6 +83,8 @@ export const ProfilePicture: React.FC<ProfilePictureProps> = ({
         )}>
           <AvatarImage 
             src={getImageUrl() || undefined} 
+            srcSet={currentImageSrcSet || undefined}
+            sizes={imageSizes[size]}
             alt="Profiel foto"
             className="object-cover"
           />
@@ -1,4 +1,4 @@
-import React, { useState, useRef } from 'react';
+import React, { useState, useRef, useEffect } from 'react';
 import { useDropzone } from 'react-dropzone';
 import { Upload, X, Camera, Loader2 } from 'lucide-react';
 import { useToast } from '@/hooks/use-toast';
@@ -56,13 +56,16 @@ export const ProfilePictureUpload: React.FC<ProfilePictureUploadProps> = ({
     }
   });
 
+  // An object URL previews the file without base64-encoding megabytes of photo on the main thread
+  useEffect(() => {
+    return () => {
+      if (previewUrl) URL.revokeObjectURL(previewUrl);
+    };
+  }, [previewUrl]);
+
   const handleFileSelect = (file: File) => {
     setSelectedFile(file);
-    const reader = new FileReader();
-    reader.onloadend = () => {
-      setPreviewUrl(reader.result as string);
-    };
-    reader.readAsDataURL(file);
+    setPreviewUrl(URL.createObjectURL(file));
   };
 
   const handleUpload = async () => {
@@ -26,6 +26,8 @@ interface DocumentReviewModalProps {
   open: boolean;
   onOpenChange: (open: boolean) => void;
   document: any;
+  /** Signed URL of the file, when it was signed together with the queue */
+  documentUrl?: string;
   onApprove: (documentId: string, notes?: string) => void;
   onReject: (documentId: string, reason: string) => void;
 }
@@ -34,6 +36,7 @@ const DocumentReviewModal = ({
   open, 
   onOpenChange, 
   document,
+  documentUrl,
   onApprove,
   onReject 
 }: DocumentReviewModalProps) => {
@@ -171,7 +174,12 @@ const DocumentReviewModal = ({
                     <Button variant="outline" size="sm">
                       <RotateCw className="w-4 h-4" />
                     </Button>
-                    <Button variant="outline" size="sm">
+                    <Button
+                      variant="outline"
+                      size="sm"
+                      disabled={!documentUrl}
+                      onClick={() => window.open(documentUrl, '_blank', 'noopener')}
+                    >
                       <Download className="w-4 h-4" />
                     </Button>
                   </div>
@@ -3,10 +3,12 @@ import { useAuthStore } from '@/store/authStore';
 import { documentService } from '@/services/DocumentService';
 import { Document } from '@/services/DocumentService';
 import { logger } from '@/lib/logger';
+import { getDocumentUrls } from '@/lib/storageAccess';
 
 export const useBeoordelaarDashboard = () => {
   const { user } = useAuthStore();
   const [documents, setDocuments] = useState<Document[]>([]);
+  const [documentUrls, setDocumentUrls] = useState<Record<string, string | null>>({});
   const [loading, setLoading] = useState(true);
 
   const loadDocuments = async () => {
@@ -15,7 +17,10 @@ export const useBeoordelaarDashboard = () => {
     try {
       const response = await documentService.getDocumentsForReview();
       if (response.success) {
-        setDocuments(response.data || []);
+        const queue = response.data || [];
+        setDocuments(queue);
+        // Sign the whole queue in one request instead of one per document when it is opened
+        getDocumentUrls(queue.map(doc => doc.bestand_url)).then(setDocumentUrls);
       } else {
         logger.error('Failed to fetch document queue:', response.error);
       }
@@ -30,5 +35,5 @@ export const useBeoordelaarDashboard = () => {
     loadDocuments();
   }, [user]);
 
-  return { documents, loading, refresh: loadDocuments };
+  return { documents, documentUrls, loading, refresh: loadDocuments };
 };
@@ -20,6 +20,8 @@ export const useHuurder = () => {
   const [subscription, setSubscription] = useState<Subscription | null>(null);
   const [profilePictureUrl, setProfilePictureUrl] = useState<string | null>(null);
   const [coverPhotoUrl, setCoverPhotoUrl] = useState<string | null>(null);
+  const [profilePictureSrcSet, setProfilePictureSrcSet] = useState<string | null>(null);
+  const [coverPhotoSrcSet, setCoverPhotoSrcSet] = useState<string | null>(null);
   const [hasProfile, setHasProfile] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
   const [isLoadingStats, setIsLoadingStats] = useState(true);
@@ -28,7 +30,7 @@ export const useHuurder = () => {
   const [isLookingForPlace, setIsLookingForPlace] = useState(true);
   const [isUpdatingStatus, setIsUpdatingStatus] = useState(false);
 
-  const loadDashboardData = useCallback(async () => {
+  const loadDashboardData = useCallback(async (force = false) => {
     if (!user?.id) return;
     setIsLoading(true);
     setIsLoadingStats(true);
@@ -36,10 +38,10 @@ export const useHuurder = () => {
     
     try {
       // Single API call to get all dashboard data
-      const response = await consolidatedDashboardService.getHuurderDashboardData(user.id);
+      const response = await consolidatedDashboardService.getHuurderDashboardData(user.id, force);
       
       if (response.success && response.data) {
-        const { stats, documents, tenantProfile: mappedProfile, subscription, profilePictureUrl, coverPhotoUrl, hasProfile } = response.data;
+        const { stats, documents, tenantProfile: mappedProfile, subscription, profilePictureUrl, coverPhotoUrl, profilePictureSrcSet, coverPhotoSrcSet, hasProfile } = response.data;
         
         setStats(stats);
         setUserDocuments(Array.isArray(documents) ? documents : []);
@@ -47,6 +49,8 @@ export const useHuurder = () => {
         setSubscription(subscription);
         setProfilePictureUrl(profilePictureUrl);
         setCoverPhotoUrl(coverPhotoUrl);
+        setProfilePictureSrcSet(profilePictureSrcSet);
+        setCoverPhotoSrcSet(coverPhotoSrcSet);
         setHasProfile(hasProfile);
 
         // Fetch latest expiration date if subscription is active
@@ -112,7 +116,7 @@ export const useHuurder = () => {
   }, [loadDashboardData]);
 
   const refresh = useCallback(() => {
-    loadDashboardData();
+    loadDashboardData(true);
     if(refreshAuth) refreshAuth();
   }, [loadDashboardData, refreshAuth]);
 
@@ -252,6 +256,8 @@ export const useHuurder = () => {
     isLoadingStats,
     profilePictureUrl,
     coverPhotoUrl,
+    profilePictureSrcSet,
+    coverPhotoSrcSet,
     tenantProfile,
     isLookingForPlace,
     isUpdatingStatus,
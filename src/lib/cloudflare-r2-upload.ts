@@ -1,4 +1,7 @@
 import { supabase } from '@/integrations/supabase/client';
+import { queryCache } from '@/lib/queryCache';
+import { multipartUploadService, type R2UploadOptions } from '@/lib/multipartUpload';
+import { ImageOptimizer, type ImageVariantKind } from '@/lib/image-optimization';
 
 export interface UploadResult {
   url: string | null;
@@ -129,26 +132,46 @@ export class CloudflareR2UploadService {
   }
 
   /* ------------------------------------------------------------------ */
+  // Photos are resized into thumbnail/card/full variants in a worker and uploaded straight to R2;
+  // the huurder row stores the `full` URL and the other variants sit next to it
+  private async uploadPhoto(
+    file: File,
+    userId: string,
+    kind: ImageVariantKind,
+    folder: 'Profile' | 'Cover'
+  ): Promise<UploadResult> {
+    try {
+      const variants = await ImageOptimizer.createVariants(file, kind);
+      const uploaded = await multipartUploadService.uploadVariants(file.name, variants, { folder });
+      return { url: uploaded.full.url, error: null, success: true };
+    } catch (err) {
+      console.warn('Uploading photo variants failed, uploading the original:', err);
+    }
+
+    const result = await this.uploadViaEdge(file, userId, folder);
+    if (!result.success || !result.url) return result;
+
+    // Convert R2 URL to custom domain URL
+    return { ...result, url: this.getPublicUrl(this.extractFilePathFromUrl(result.url)) };
+  }
+
   async uploadProfilePicture(file: File, userId: string): Promise<UploadResult> {
     const validation = this.validateFile(file, 'profile');
     if (!validation.isValid) return { url: null, error: new Error(validation.error), success: false };
     if (!userId) return { url: null, error: new Error('User not authenticated'), success: false };
 
-    const result = await this.uploadViaEdge(file, userId, 'Profile');
+    const result = await this.uploadPhoto(file, userId, 'profile', 'Profile');
     if (!result.success || !result.url) return result;
 
-    // Convert R2 URL to custom domain URL
-    const filePath = this.extractFilePathFromUrl(result.url);
-    const customDomainUrl = this.getPublicUrl(filePath);
-    
     const { error } = await supabase
       .from('huurders')
-      .update({ profiel_foto: customDomainUrl })
+      .update({ profiel_foto: result.url })
       .eq('id', userId);
     if (error) {
       console.error('Error updating profiel_foto:', error);
       return { url: null, error: new Error('Kon profielfoto niet opslaan in database.'), success: false };
     }
+    queryCache.invalidate('huurders');
     return result;
   }
 
@@ -157,31 +180,33 @@ export class CloudflareR2UploadService {
     if (!validation.isValid) return { url: null, error: new Error(validation.error), success: false };
     if (!userId) return { url: null, error: new Error('User not authenticated'), success: false };
 
-    const result = await this.uploadViaEdge(file, userId, 'Cover');
+    const result = await this.uploadPhoto(file, userId, 'cover', 'Cover');
     if (!result.success || !result.url) return result;
 
-    // Convert R2 URL to custom domain URL
-    const filePath = this.extractFilePathFromUrl(result.url);
-    const customDomainUrl = this.getPublicUrl(filePath);
-    
     const { error } = await supabase
       .from('huurders')
-      .update({ cover_foto: customDomainUrl })
+      .update({ cover_foto: result.url })
       .eq('id', userId);
     if (error) {
       console.error('Error updating cover_foto:', error);
       return { url: null, error: new Error('Kon coverfoto niet opslaan in database.'), success: false };
     }
+    queryCache.invalidate('huurders');
     return result;
   }
 
   /* NEW: documents ----------------------------------------------------- */
-  async uploadDocument(file: File, userId: string): Promise<UploadResult> {
+  // Documents go straight to R2 (multipart above 8 MB, resumable) instead of through the edge function
+  async uploadDocument(
+    file: File,
+    userId: string,
+    options: Pick<R2UploadOptions, 'signal' | 'onProgress'> = {}
+  ): Promise<UploadResult> {
     const validation = this.validateFile(file, 'document');
     if (!validation.isValid) return { url: null, error: new Error(validation.error), success: false };
     if (!userId) return { url: null, error: new Error('User not authenticated'), success: false };
 
-    const result = await this.uploadViaEdge(file, userId, 'Documents', 'cloudflare-r2-upload-documents');
+    const result = await multipartUploadService.upload(file, { folder: 'Documents', ...options });
     if (!result.success || !result.url) return result;
 
     /* Optional: store in your documents table */
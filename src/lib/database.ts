@@ -2,6 +2,14 @@
 import { supabase } from '../integrations/supabase/client.ts';
 import { PostgrestError } from '@supabase/supabase-js';
 import { logger } from '../lib/logger.ts';
+import { queryCache, QueryCacheOptions } from './queryCache.ts';
+
+// Audit log table names that differ from the tables the mutation actually wrote
+const AUDITED_TABLES: Record<string, string[]> = {
+  profiles: ['gebruikers'],
+  tenant_profiles: ['huurders', 'gebruikers'],
+  user_roles: ['gebruiker_rollen', 'gebruikers'],
+};
 
 export interface DatabaseResponse<T> {
   data: T | null;
@@ -53,6 +61,28 @@ export class DatabaseService {
     }
   }
 
+  /**
+   * executeQuery through the shared query cache: identical concurrent calls share one
+   * request and results are reused until their TTL passes. `query` names the service
+   * method (e.g. 'DashboardService.getAdminStats'); tag the result with the tables it
+   * reads so mutations can invalidate it.
+   */
+  protected cachedQuery<T>(
+    query: string,
+    args: unknown[],
+    queryFn: () => Promise<{ data: T | null; error: PostgrestError | Error | null }>,
+    options: QueryCacheOptions = {}
+  ): Promise<DatabaseResponse<T>> {
+    return queryCache.fetch(query, args, () => this.executeQuery(queryFn), options);
+  }
+
+  /**
+   * Drop cached query results that read `tableName`; called for every audited mutation
+   */
+  protected invalidateCachedQueries(tableName: string): void {
+    queryCache.invalidate(...(AUDITED_TABLES[tableName] ?? [tableName]));
+  }
+
   /**
    * Apply pagination to a query
    */
@@ -133,6 +163,7 @@ export class DatabaseService {
     oldValues?: any,
     newValues?: any
   ): Promise<void> {
+    this.invalidateCachedQueries(tableName);
     try {
       const userId = await this.getCurrentUserId();
       
@@ -849,6 +849,58 @@ export type Database = {
       }
     }
     Functions: {
+      bereken_compatibiliteit: {
+        Args: {
+          locatie_voorkeur: string[] | null
+          max_huur: number | null
+          huisdieren: boolean | null
+          roken: boolean | null
+          zoekfilters: Json
+        }
+        Returns: {
+          locatie: number
+          budget: number
+          leefstijl: number
+          totaal: number
+        }
+      }
+      bericht_gesprekken: {
+        Args: {
+          voor_op?: string | null
+          voor_id?: string | null
+          page_size?: number | null
+        }
+        Returns: {
+          other_user_id: string
+          other_user_name: string
+          other_user_email: string
+          latest_message_id: string
+          latest_message: string
+          latest_message_date: string
+          unread_count: number
+          woning_id: string | null
+          woning_titel: string | null
+        }[]
+      }
+      berichten_gesprek: {
+        Args: {
+          ander: string
+          in_woning?: string | null
+          voor_op?: string | null
+          voor_id?: string | null
+          page_size?: number | null
+        }
+        Returns: {
+          id: string
+          verzender_id: string
+          ontvanger_id: string
+          woning_id: string | null
+          onderwerp: string | null
+          inhoud: string
+          gelezen: boolean
+          aangemaakt_op: string
+        }[]
+      }
       check_profiel_volledigheid: {
         Args: { huurder_uuid: string }
         Returns: boolean
@@ -862,6 +914,48 @@ export type Database = {
         }
         Returns: undefined
       }
+      huurder_dashboard: {
+        Args: Record<PropertyKey, never>
+        Returns: Json
+      }
+      huurders_voor_zoekopdracht: {
+        Args: {
+          zoekopdracht: string
+          after_totaal?: number | null
+          after_id?: string | null
+          page_size?: number | null
+        }
+        Returns: {
+          huurder: Tables<'actieve_huurders'>
+          locatie: number
+          budget: number
+          leefstijl: number
+          totaal: number
+        }[]
+      }
+      is_beoordelaar_or_admin: {
+        Args: { user_id: string }
+        Returns: boolean
+      }
+      ongelezen_aantallen: {
+        Args: Record<PropertyKey, never>
+        Returns: {
+          notificaties: number
+          berichten: number
+        }[]
+      }
+      statistieken: {
+        Args: {
+          in_bron?: string | null
+          vanaf?: string | null
+        }
+        Returns: {
+          bron: string
+          sleutel: string
+          maand: string
+          aantal: number
+        }[]
+      }
       zoek_huurders: {
         Args: {
           in_city?: string | null
@@ -872,6 +966,18 @@ export type Database = {
         }
         Returns: Tables<'actieve_huurders'>[]
       }
+      zoek_huurders_pagina: {
+        Args: {
+          in_city?: string | null
+          min_budget?: number | null
+          max_budget?: number | null
+          huisdieren?: boolean | null
+          roken?: boolean | null
+          after_id?: string | null
+          page_size?: number | null
+        }
+        Returns: Tables<'actieve_huurders'>[]
+      }
     }
     Enums: {
       abonnement_status: "actief" | "gepauzeerd" | "geannuleerd" | "verlopen"
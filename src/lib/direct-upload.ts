@@ -1,3 +1,5 @@
+import { multipartUploadService } from './multipartUpload';
+
 export interface UploadResult {
   url: string | null;
   path: string | null;
@@ -39,59 +41,34 @@ export class DirectUploadService {
   }
 
   /**
-   * Upload file directly to Cloudflare R2 using presigned URL approach
-   * This uses a simpler method that works with Cloudflare's dashboard
+   * Upload file directly to Cloudflare R2 with URLs presigned by the generate-upload-url
+   * edge function (the object key is placed under the signed-in user's id)
    */
   async uploadFile(
     file: File,
     userId: string,
     folder: string = 'general'
   ): Promise<UploadResult> {
-    try {
-      // Validate file
-      const validation = this.validateFile(file);
-      if (!validation.isValid) {
-        return {
-          url: null,
-          path: null,
-          error: new Error(validation.error),
-          success: false
-        };
-      }
-
-      // Generate unique file path
-      const timestamp = Date.now();
-      const randomString = Math.random().toString(36).substring(2, 15);
-      const sanitizedName = file.name.replace(/[^a-zA-Z0-9.-]/g, '_');
-      const filePath = `${folder}/${userId}/${timestamp}_${randomString}_${sanitizedName}`;
-
-      // Use environment variables
-      const accountId = import.meta.env.VITE_CLOUDFLARE_ACCOUNT_ID;
-      const bucket = import.meta.env.VITE_CLOUDFLARE_R2_BUCKET || 'documents';
-      
-      if (!accountId) {
-        throw new Error('Cloudflare Account ID not configured');
-      }
-      
-      // Create public URL
-      const publicUrl = `https://${accountId}.r2.cloudflarestorage.com/${bucket}/${filePath}`;
-
+    // Validate file
+    const validation = this.validateFile(file);
+    if (!validation.isValid) {
       return {
-        url: publicUrl,
-        path: filePath,
-        error: null,
-        success: true,
+        url: null,
+        path: null,
+        error: new Error(validation.error),
+        success: false
       };
-
-    } catch (error) {
-      console.error('Upload error:', error);
+    }
+    if (!userId) {
       return {
         url: null,
         path: null,
-        error: error as Error,
+        error: new Error('User not authenticated'),
         success: false
       };
     }
+
+    return multipartUploadService.upload(file, { folder });
   }
 
   /**
@@ -1,13 +1,124 @@
+import type { ResizedVariant, ResizeRequest, ResizeResponse, VariantSpec } from '@/workers/imageResize.worker';
+
+export type { ResizedVariant, VariantSpec };
+
 export interface ImageOptimizationOptions {
   maxWidth?: number;
   maxHeight?: number;
   quality?: number;
-  format?: 'jpeg' | 'png' | 'webp';
+  format?: 'jpeg' | 'png' | 'webp' | 'avif';
 }
 
+export type ImageVariantKind = 'profile' | 'cover';
+
+/**
+ * Variants generated at upload time. `full` is what is stored on the huurder; the
+ * smaller ones are offered through srcset so avatars and cards do not download it.
+ */
+export const IMAGE_VARIANTS: Record<ImageVariantKind, VariantSpec[]> = {
+  profile: [
+    { name: 'thumbnail', maxWidth: 128, maxHeight: 128, quality: 0.75 },
+    { name: 'card', maxWidth: 320, maxHeight: 320, quality: 0.8 },
+    { name: 'full', maxWidth: 800, maxHeight: 800, quality: 0.85 },
+  ],
+  cover: [
+    { name: 'thumbnail', maxWidth: 480, maxHeight: 480, quality: 0.75 },
+    { name: 'card', maxWidth: 960, maxHeight: 960, quality: 0.8 },
+    { name: 'full', maxWidth: 1920, maxHeight: 1080, quality: 0.85 },
+  ],
+};
+
+// AVIF is the smallest but not every browser can encode it; WebP and JPEG are the fallbacks
+const VARIANT_FORMATS = ['image/avif', 'image/webp', 'image/jpeg'];
+
 export class ImageOptimizer {
+  private static worker: Worker | null = null;
+  private static nextRequestId = 1;
+  private static pending = new Map<number, { resolve: (variants: ResizedVariant[]) => void; reject: (error: Error) => void }>();
+
   /**
-   * Resize and compress image using canvas
+   * Decoding and resizing a 12 MP photo takes hundreds of milliseconds; do it in a
+   * worker when the browser supports OffscreenCanvas, so the page keeps responding
+   */
+  static supportsWorker(): boolean {
+    return typeof Worker !== 'undefined'
+      && typeof OffscreenCanvas !== 'undefined'
+      && typeof createImageBitmap === 'function'
+      && 'convertToBlob' in OffscreenCanvas.prototype;
+  }
+
+  private static getWorker(): Worker {
+    if (!this.worker) {
+      const worker = new Worker(new URL('../workers/imageResize.worker.ts', import.meta.url), { type: 'module' });
+      worker.onmessage = ({ data }: MessageEvent<ResizeResponse>) => {
+        const request = this.pending.get(data.id);
+        if (!request) return;
+        this.pending.delete(data.id);
+        if ('error' in data) {
+          request.reject(new Error(data.error));
+        } else {
+          request.resolve(data.variants);
+        }
+      };
+      worker.onerror = (event) => {
+        // A worker that fails to load rejects everything in flight; the next call starts a new one
+        const error = new Error(event.message || 'Image worker failed');
+        this.pending.forEach(request => request.reject(error));
+        this.pending.clear();
+        worker.terminate();
+        this.worker = null;
+      };
+      this.worker = worker;
+    }
+    return this.worker;
+  }
+
+  private static resizeInWorker(file: Blob, specs: VariantSpec[], formats: string[]): Promise<ResizedVariant[]> {
+    const worker = this.getWorker();
+    const id = this.nextRequestId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      const request: ResizeRequest = { id, file, specs, formats };
+      worker.postMessage(request);
+    });
+  }
+
+  /**
+   * Resize image to each variant spec, off the main thread where possible
+   */
+  static async createVariants(
+    file: File,
+    specs: VariantSpec[] | ImageVariantKind
+  ): Promise<ResizedVariant[]> {
+    const list = typeof specs === 'string' ? IMAGE_VARIANTS[specs] : specs;
+    if (this.supportsWorker()) {
+      try {
+        return await this.resizeInWorker(file, list, VARIANT_FORMATS);
+      } catch (error) {
+        console.warn('Image worker failed, resizing on the main thread:', error);
+      }
+    }
+    const variants: ResizedVariant[] = [];
+    for (const spec of list) {
+      const blob = await this.resizeOnMainThread(file, { ...spec, format: 'webp' });
+      const { width, height } = await this.getImageDimensions(blob);
+      variants.push({ name: spec.name, blob, width, height, type: blob.type });
+    }
+    return variants;
+  }
+
+  /**
+   * srcset value for variant URLs keyed by variant name
+   */
+  static srcSet(urls: Partial<Record<string, string>>, kind: ImageVariantKind): string {
+    return IMAGE_VARIANTS[kind]
+      .filter(spec => urls[spec.name])
+      .map(spec => `${urls[spec.name]} ${spec.maxWidth}w`)
+      .join(', ');
+  }
+
+  /**
+   * Resize and compress image
    */
   static async optimizeImage(
     file: File,
@@ -20,6 +131,28 @@ export class ImageOptimizer {
       format = 'jpeg'
     } = options;
 
+    if (this.supportsWorker()) {
+      try {
+        const [variant] = await this.resizeInWorker(
+          file,
+          [{ name: 'optimized', maxWidth, maxHeight, quality }],
+          [`image/${format}`]
+        );
+        return variant.blob;
+      } catch (error) {
+        console.warn('Image worker failed, resizing on the main thread:', error);
+      }
+    }
+    return this.resizeOnMainThread(file, { maxWidth, maxHeight, quality, format });
+  }
+
+  /**
+   * Resize using a canvas on the main thread, for browsers without OffscreenCanvas
+   */
+  private static resizeOnMainThread(
+    file: Blob,
+    { maxWidth = 1920, maxHeight = 1080, quality = 0.8, format = 'jpeg' }: ImageOptimizationOptions
+  ): Promise<Blob> {
     return new Promise((resolve, reject) => {
       const img = new Image();
       const canvas = document.createElement('canvas');
@@ -30,7 +163,10 @@ export class ImageOptimizer {
         return;
       }
 
+      const url = URL.createObjectURL(file);
+
       img.onload = () => {
+        URL.revokeObjectURL(url);
         let { width, height } = img;
 
         // Calculate new dimensions while maintaining aspect ratio
@@ -61,10 +197,11 @@ export class ImageOptimizer {
       };
 
       img.onerror = () => {
+        URL.revokeObjectURL(url);
         reject(new Error('Failed to load image'));
       };
 
-      img.src = URL.createObjectURL(file);
+      img.src = url;
     });
   }
 
@@ -86,16 +223,19 @@ export class ImageOptimizer {
   /**
    * Get image dimensions
    */
-  static async getImageDimensions(file: File): Promise<{ width: number; height: number }> {
+  static async getImageDimensions(file: Blob): Promise<{ width: number; height: number }> {
     return new Promise((resolve, reject) => {
       const img = new Image();
+      const url = URL.createObjectURL(file);
       img.onload = () => {
+        URL.revokeObjectURL(url);
         resolve({ width: img.width, height: img.height });
       };
       img.onerror = () => {
+        URL.revokeObjectURL(url);
         reject(new Error('Failed to load image'));
       };
-      img.src = URL.createObjectURL(file);
+      img.src = url;
     });
   }
 
@@ -0,0 +1,330 @@
+import { supabase } from '@/integrations/supabase/client';
+import { logger } from './logger';
+
+export interface UploadResult {
+  url: string | null;
+  path: string | null;
+  error: Error | null;
+  success: boolean;
+}
+
+export interface UploadProgress {
+  uploadedBytes: number;
+  totalBytes: number;
+  partsDone: number;
+  partsTotal: number;
+}
+
+export interface R2UploadOptions {
+  /** Object folder, e.g. `documents/income` or `Profile`; the user id is added by the server */
+  folder: string;
+  /** Part size for multipart uploads (at least 5 MiB) */
+  partSize?: number;
+  /** Parts uploaded at the same time */
+  concurrency?: number;
+  /** Aborting stops the upload; uploaded parts are kept and the next upload of the same file resumes */
+  signal?: AbortSignal;
+  onProgress?: (progress: UploadProgress) => void;
+}
+
+export interface VariantUpload {
+  name: string;
+  blob: Blob;
+}
+
+interface Part {
+  partNumber: number;
+  start: number;
+  end: number;
+  sha256: string;
+  etag?: string;
+}
+
+interface StoredUpload {
+  key: string;
+  uploadId: string;
+  publicUrl: string;
+  partSize: number;
+  startedAt: number;
+}
+
+const MiB = 1024 * 1024;
+const DEFAULT_PART_SIZE = 8 * MiB;
+const MIN_PART_SIZE = 5 * MiB;
+const DEFAULT_CONCURRENCY = 4;
+const SIGN_BATCH = 100;
+const MAX_ATTEMPTS = 4;
+const RETRY_BASE_MS = 500;
+const STORAGE_PREFIX = 'huurly:upload:';
+// R2 removes unfinished multipart uploads after seven days; do not try to resume older ones
+const RESUME_MAX_AGE_MS = 6 * 24 * 60 * 60 * 1000;
+
+class HttpError extends Error {
+  constructor(message: string, public status: number) {
+    super(message);
+  }
+}
+
+const toBase64 = (buffer: ArrayBuffer): string => {
+  let binary = '';
+  const bytes = new Uint8Array(buffer);
+  for (let i = 0; i < bytes.length; i += 0x8000) {
+    binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+  }
+  return btoa(binary);
+};
+
+const sha256 = async (blob: Blob): Promise<string> =>
+  toBase64(await crypto.subtle.digest('SHA-256', await blob.arrayBuffer()));
+
+const sleep = (ms: number, signal?: AbortSignal) =>
+  new Promise<void>((resolve, reject) => {
+    const timer = setTimeout(resolve, ms);
+    signal?.addEventListener('abort', () => {
+      clearTimeout(timer);
+      reject(signal.reason ?? new DOMException('Aborted', 'AbortError'));
+    }, { once: true });
+  });
+
+// Retrying while the device is offline only burns attempts; wait for the connection to come back
+const waitForOnline = (signal?: AbortSignal) =>
+  typeof navigator === 'undefined' || navigator.onLine
+    ? Promise.resolve()
+    : new Promise<void>((resolve, reject) => {
+        window.addEventListener('online', () => resolve(), { once: true });
+        signal?.addEventListener('abort', () => reject(signal.reason ?? new DOMException('Aborted', 'AbortError')), { once: true });
+      });
+
+const isAbort = (error: unknown) => error instanceof DOMException && error.name === 'AbortError';
+
+/**
+ * Direct browser → R2 uploads through the generate-upload-url edge function. Files up to
+ * one part are sent with a single presigned PUT; larger files are split into parts that are
+ * uploaded in parallel, each signed with its SHA-256 so R2 rejects corrupted parts. The upload
+ * id is kept in localStorage, so after a disconnect or reload the same file continues with the
+ * parts R2 does not have yet. The bucket CORS policy must expose the ETag header.
+ */
+export class MultipartUploadService {
+  async upload(file: File, options: R2UploadOptions): Promise<UploadResult> {
+    const partSize = Math.max(options.partSize ?? DEFAULT_PART_SIZE, MIN_PART_SIZE);
+    try {
+      const result = file.size <= partSize
+        ? await this.uploadSingle(file, options)
+        : await this.uploadMultipart(file, { ...options, partSize });
+      return { ...result, error: null, success: true };
+    } catch (error) {
+      if (!isAbort(error)) {
+        logger.error('R2 upload error:', error);
+      }
+      return { url: null, path: null, error: error as Error, success: false };
+    }
+  }
+
+  /**
+   * Upload the resized variants of one photo in parallel, each with a single PUT.
+   * Returns the public URL and path per variant name.
+   */
+  async uploadVariants(
+    fileName: string,
+    variants: VariantUpload[],
+    options: Pick<R2UploadOptions, 'folder' | 'signal'>
+  ): Promise<Record<string, { url: string; path: string }>> {
+    const hashes = await Promise.all(variants.map(({ blob }) => sha256(blob)));
+    const { uploads } = await this.invoke('put-variants', {
+      fileName,
+      folder: options.folder,
+      variants: variants.map(({ name, blob }, i) => ({ name, fileType: blob.type, fileSize: blob.size, sha256: hashes[i] })),
+    });
+    const blobs = new Map(variants.map(({ name, blob }) => [name, blob]));
+    await Promise.all(uploads.map((upload: any) =>
+      this.withRetries(() => this.put(upload.signedUrl, blobs.get(upload.name)!, upload.headers, options.signal), options.signal)
+    ));
+    return Object.fromEntries(uploads.map((upload: any) => [upload.name, { url: upload.publicUrl, path: upload.filePath }]));
+  }
+
+  /**
+   * Abort an interrupted upload of `file` and drop its parts from R2
+   */
+  async discard(file: File, folder: string): Promise<void> {
+    const stored = this.loadState(file, folder);
+    if (!stored) return;
+    this.clearState(file, folder);
+    await this.invoke('abort', { key: stored.key, uploadId: stored.uploadId }).catch(error =>
+      logger.warn('Aborting multipart upload failed:', error)
+    );
+  }
+
+  private async uploadSingle(file: File, options: R2UploadOptions) {
+    const hash = await sha256(file);
+    const signed = await this.invoke('put', {
+      fileName: file.name,
+      fileType: file.type,
+      fileSize: file.size,
+      folder: options.folder,
+      sha256: hash,
+    });
+    await this.withRetries(() => this.put(signed.signedUrl, file, signed.headers, options.signal), options.signal);
+    options.onProgress?.({ uploadedBytes: file.size, totalBytes: file.size, partsDone: 1, partsTotal: 1 });
+    return { url: signed.publicUrl as string, path: signed.filePath as string };
+  }
+
+  private async uploadMultipart(file: File, options: R2UploadOptions & { partSize: number }) {
+    const { folder, partSize, signal } = options;
+    const parts = await this.hashParts(file, partSize);
+    const upload = await this.resumeOrCreate(file, folder, partSize, parts);
+
+    const pending = parts.filter(part => !part.etag);
+    let uploadedBytes = parts.filter(part => part.etag).reduce((sum, part) => sum + part.end - part.start, 0);
+    let done = 0;
+    const report = () => options.onProgress?.({
+      uploadedBytes,
+      totalBytes: file.size,
+      partsDone: parts.length - pending.length + done,
+      partsTotal: parts.length,
+    });
+    report();
+
+    const urls = new Map<number, string>();
+    const signBatch = async (from: Part[]) => {
+      const { urls: signed } = await this.invoke('sign-parts', {
+        key: upload.key,
+        uploadId: upload.uploadId,
+        parts: from.map(({ partNumber, sha256 }) => ({ partNumber, sha256 })),
+      });
+      for (const { partNumber, url } of signed) urls.set(partNumber, url);
+    };
+    for (let i = 0; i < pending.length; i += SIGN_BATCH) {
+      await signBatch(pending.slice(i, i + SIGN_BATCH));
+    }
+
+    const queue = [...pending];
+    const worker = async () => {
+      for (let part = queue.shift(); part; part = queue.shift()) {
+        const current = part;
+        current.etag = await this.withRetries(async () => {
+          try {
+            return await this.put(urls.get(current.partNumber)!, file.slice(current.start, current.end),
+              { 'x-amz-checksum-sha256': current.sha256 }, signal);
+          } catch (error) {
+            // The URL expired while the upload was paused: sign this part again
+            if (error instanceof HttpError && error.status === 403) await signBatch([current]);
+            throw error;
+          }
+        }, signal);
+        uploadedBytes += current.end - current.start;
+        done++;
+        report();
+      }
+    };
+    await Promise.all(Array.from({ length: Math.min(options.concurrency ?? DEFAULT_CONCURRENCY, queue.length) }, worker));
+
+    const completed = await this.invoke('complete', {
+      key: upload.key,
+      uploadId: upload.uploadId,
+      fileSize: file.size,
+      parts: parts.map(({ partNumber, etag, sha256 }) => ({ partNumber, etag, sha256 })),
+    });
+    this.clearState(file, folder);
+    return { url: completed.url as string, path: completed.path as string };
+  }
+
+  private async hashParts(file: File, partSize: number): Promise<Part[]> {
+    const parts: Part[] = [];
+    for (let start = 0, partNumber = 1; start < file.size; start += partSize, partNumber++) {
+      const end = Math.min(start + partSize, file.size);
+      parts.push({ partNumber, start, end, sha256: await sha256(file.slice(start, end)) });
+    }
+    return parts;
+  }
+
+  /**
+   * Continue the stored upload of this file (marking the parts R2 already has, if their
+   * checksum still matches) or start a new one
+   */
+  private async resumeOrCreate(file: File, folder: string, partSize: number, parts: Part[]): Promise<StoredUpload> {
+    const stored = this.loadState(file, folder);
+    if (stored && stored.partSize === partSize && Date.now() - stored.startedAt < RESUME_MAX_AGE_MS) {
+      try {
+        const { parts: uploaded } = await this.invoke('list-parts', { key: stored.key, uploadId: stored.uploadId });
+        for (const remote of uploaded) {
+          const part = parts[remote.partNumber - 1];
+          if (part && remote.sha256 === part.sha256 && remote.size === part.end - part.start) {
+            part.etag = remote.etag;
+          }
+        }
+        logger.info(`Resuming upload of ${file.name}: ${parts.filter(part => part.etag).length}/${parts.length} parts already uploaded`);
+        return stored;
+      } catch (error) {
+        logger.warn('Stored upload cannot be resumed, starting over:', error);
+      }
+    }
+
+    const created = await this.invoke('create', {
+      fileName: file.name,
+      fileType: file.type,
+      fileSize: file.size,
+      folder,
+      partSize,
+    });
+    const upload = { key: created.key, uploadId: created.uploadId, publicUrl: created.publicUrl, partSize, startedAt: Date.now() };
+    this.saveState(file, folder, upload);
+    return upload;
+  }
+
+  private async put(url: string, body: Blob, headers: Record<string, string>, signal?: AbortSignal): Promise<string> {
+    const response = await fetch(url, { method: 'PUT', headers, body, signal });
+    if (!response.ok) {
+      throw new HttpError(`Upload failed: ${response.status} ${response.statusText}`, response.status);
+    }
+    return response.headers.get('ETag') ?? '';
+  }
+
+  /**
+   * Retry network errors, 403 (expired URL) and 5xx with exponential backoff
+   */
+  private async withRetries<T>(attempt: () => Promise<T>, signal?: AbortSignal): Promise<T> {
+    for (let n = 1; ; n++) {
+      try {
+        return await attempt();
+      } catch (error) {
+        const retryable = !isAbort(error) && (!(error instanceof HttpError) || error.status === 403 || error.status >= 500);
+        if (!retryable || n >= MAX_ATTEMPTS) throw error;
+        await waitForOnline(signal);
+        await sleep(RETRY_BASE_MS * 2 ** (n - 1), signal);
+      }
+    }
+  }
+
+  private async invoke(action: string, body: Record<string, unknown>): Promise<any> {
+    const { data, error } = await supabase.functions.invoke('generate-upload-url', { body: { action, ...body } });
+    if (error) throw error;
+    if (data?.error) throw new Error(data.error);
+    return data;
+  }
+
+  private storageKey(file: File, folder: string): string {
+    return `${STORAGE_PREFIX}${folder}|${file.name}|${file.size}|${file.lastModified}`;
+  }
+
+  private loadState(file: File, folder: string): StoredUpload | null {
+    try {
+      return JSON.parse(localStorage.getItem(this.storageKey(file, folder)) ?? 'null');
+    } catch {
+      return null;
+    }
+  }
+
+  private saveState(file: File, folder: string, upload: StoredUpload): void {
+    try {
+      localStorage.setItem(this.storageKey(file, folder), JSON.stringify(upload));
+    } catch {
+      // Private mode or full storage: the upload still works, it just cannot be resumed
+    }
+  }
+
+  private clearState(file: File, folder: string): void {
+    localStorage.removeItem(this.storageKey(file, folder));
+  }
+}
+
+export const multipartUploadService = new MultipartUploadService();
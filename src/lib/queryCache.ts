@@ -0,0 +1,242 @@
+import { logger } from './logger';
+
+export interface QueryCacheOptions {
+  /** How long a result is served without refetching */
+  ttlMs?: number;
+  /** How long after the TTL a stale result is still served while it is refetched in the background */
+  staleMs?: number;
+  /** Tables the result was read from; invalidate(table) drops it after a mutation */
+  tags?: string[];
+  /** Skip the cache and refetch (the result is still stored) */
+  force?: boolean;
+}
+
+interface InFlightRequest<T = unknown> {
+  request: Promise<T>;
+  tags: string[];
+  /** Set when the tables changed while loading; the result is then returned but not stored */
+  invalidated: boolean;
+}
+
+interface CacheEntry<T = unknown> {
+  value: T;
+  fetchedAt: number;
+  ttlMs: number;
+  staleMs: number;
+  tags: string[];
+}
+
+export interface QueryCacheCounters {
+  hits: number;
+  staleHits: number;
+  misses: number;
+  deduplicated: number;
+  revalidations: number;
+  invalidations: number;
+}
+
+export interface QueryCacheStats extends QueryCacheCounters {
+  entries: number;
+  inFlight: number;
+  byQuery: Record<string, QueryCacheCounters>;
+}
+
+const DEFAULT_TTL_MS = 30 * 1000;
+const DEFAULT_STALE_MS = 5 * 60 * 1000;
+
+const emptyCounters = (): QueryCacheCounters => ({
+  hits: 0,
+  staleHits: 0,
+  misses: 0,
+  deduplicated: 0,
+  revalidations: 0,
+  invalidations: 0,
+});
+
+/**
+ * Failed service responses ({ success: false } or { error }) are returned but never cached,
+ * so a transient error is retried on the next call
+ */
+const isCacheable = (value: any): boolean =>
+  !(value && typeof value === 'object' && (value.success === false || (value.error !== undefined && value.error !== null)));
+
+/**
+ * Shared result cache for service reads. Results are keyed by query name and arguments
+ * (e.g. `DashboardService.getAdminStats` + `[]`); concurrent identical calls share one
+ * request, results past their TTL are served stale while they are refetched, and
+ * mutations drop every result read from the tables they changed.
+ */
+class QueryCache {
+  private entries = new Map<string, CacheEntry>();
+  private inFlight = new Map<string, InFlightRequest>();
+  private counters = emptyCounters();
+  private queryCounters = new Map<string, QueryCacheCounters>();
+
+  static key(query: string, args: unknown[] = []): string {
+    return `${query}:${JSON.stringify(args)}`;
+  }
+
+  /**
+   * Return the cached result of `query(args)` or load it with `loader`
+   */
+  async fetch<T>(query: string, args: unknown[], loader: () => Promise<T>, options: QueryCacheOptions = {}): Promise<T> {
+    const key = QueryCache.key(query, args);
+    const entry = this.entries.get(key) as CacheEntry<T> | undefined;
+    const now = Date.now();
+
+    if (entry && !options.force) {
+      const age = now - entry.fetchedAt;
+      if (age < entry.ttlMs) {
+        this.count(query, 'hits');
+        return entry.value;
+      }
+      if (age < entry.ttlMs + entry.staleMs) {
+        this.count(query, 'staleHits');
+        if (!this.inFlight.has(key)) {
+          this.count(query, 'revalidations');
+          this.load(key, loader, options).catch(error => logger.warn(`Revalidating ${query} failed:`, error));
+        }
+        return entry.value;
+      }
+    }
+
+    const pending = this.inFlight.get(key) as InFlightRequest<T> | undefined;
+    if (pending && !options.force) {
+      this.count(query, 'deduplicated');
+      return pending.request;
+    }
+
+    this.count(query, 'misses');
+    return this.load(key, loader, options);
+  }
+
+  /**
+   * Store a result that was fetched elsewhere (e.g. as part of a larger payload)
+   */
+  set<T>(query: string, args: unknown[], value: T, options: QueryCacheOptions = {}): void {
+    this.entries.set(QueryCache.key(query, args), {
+      value,
+      fetchedAt: Date.now(),
+      ttlMs: options.ttlMs ?? DEFAULT_TTL_MS,
+      staleMs: options.staleMs ?? DEFAULT_STALE_MS,
+      tags: options.tags ?? [],
+    });
+  }
+
+  /**
+   * Drop every result tagged with one of `tags` (call after a mutation of those tables)
+   */
+  invalidate(...tags: string[]): void {
+    for (const [key, entry] of this.entries) {
+      if (entry.tags.some(tag => tags.includes(tag))) {
+        this.entries.delete(key);
+        this.count(key.slice(0, key.indexOf(':')), 'invalidations');
+      }
+    }
+    for (const [key, flight] of this.inFlight) {
+      if (flight.tags.some(tag => tags.includes(tag))) {
+        flight.invalidated = true;
+        this.inFlight.delete(key);
+      }
+    }
+  }
+
+  /**
+   * Drop the cached results of one query, for all arguments or for `args` only
+   */
+  invalidateQuery(query: string, args?: unknown[]): void {
+    const exact = args ? QueryCache.key(query, args) : null;
+    for (const key of this.entries.keys()) {
+      if (exact ? key === exact : key.startsWith(`${query}:`)) {
+        this.entries.delete(key);
+        this.count(query, 'invalidations');
+      }
+    }
+  }
+
+  /**
+   * Drop everything, e.g. when the signed-in user changes
+   */
+  clear(): void {
+    this.entries.clear();
+    for (const flight of this.inFlight.values()) {
+      flight.invalidated = true;
+    }
+    this.inFlight.clear();
+  }
+
+  /**
+   * Remove results that can no longer be served, not even stale
+   */
+  prune(): void {
+    const now = Date.now();
+    for (const [key, entry] of this.entries) {
+      if (now - entry.fetchedAt >= entry.ttlMs + entry.staleMs) {
+        this.entries.delete(key);
+      }
+    }
+  }
+
+  stats(): QueryCacheStats {
+    return {
+      ...this.counters,
+      entries: this.entries.size,
+      inFlight: this.inFlight.size,
+      byQuery: Object.fromEntries(Array.from(this.queryCounters, ([query, counters]) => [query, { ...counters }])),
+    };
+  }
+
+  resetStats(): void {
+    this.counters = emptyCounters();
+    this.queryCounters.clear();
+  }
+
+  private load<T>(key: string, loader: () => Promise<T>, options: QueryCacheOptions): Promise<T> {
+    const flight = { tags: options.tags ?? [], invalidated: false } as InFlightRequest<T>;
+    flight.request = loader()
+      .then(value => {
+        if (!flight.invalidated && isCacheable(value)) {
+          this.entries.set(key, {
+            value,
+            fetchedAt: Date.now(),
+            ttlMs: options.ttlMs ?? DEFAULT_TTL_MS,
+            staleMs: options.staleMs ?? DEFAULT_STALE_MS,
+            tags: options.tags ?? [],
+          });
+        }
+        return value;
+      })
+      .finally(() => {
+        if (this.inFlight.get(key) === flight) {
+          this.inFlight.delete(key);
+        }
+      });
+    this.inFlight.set(key, flight);
+    return flight.request;
+  }
+
+  private count(query: string, counter: keyof QueryCacheCounters): void {
+    this.counters[counter]++;
+    let perQuery = this.queryCounters.get(query);
+    if (!perQuery) {
+      perQuery = emptyCounters();
+      this.queryCounters.set(query, perQuery);
+    }
+    perQuery[counter]++;
+  }
+}
+
+export const queryCache = new QueryCache();
+
+// Read-only handle for the Playwright tests (testsprite_tests/harness/query_cache.py)
+if (typeof window !== 'undefined') {
+  (window as any).__huurlyQueryCache = {
+    stats: () => queryCache.stats(),
+    resetStats: () => queryCache.resetStats(),
+  };
+}
+
+// Drop results that expired completely every 10 minutes
+setInterval(() => {
+  queryCache.prune();
+}, 10 * 60 * 1000);
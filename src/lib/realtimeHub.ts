@@ -0,0 +1,223 @@
+import type { RealtimeChannel, RealtimePostgresChangesPayload } from '@supabase/supabase-js';
+import { supabase } from '@/integrations/supabase/client';
+import { logger } from './logger';
+import { queryCache } from './queryCache';
+
+/**
+ * Tables pushed over the session channel, with the column that holds the recipient.
+ * Every binding is part of the one channel join, so adding a table here costs no extra socket traffic.
+ */
+const USER_TABLES = {
+  notificaties: 'gebruiker_id',
+} as const;
+
+export type RealtimeTable = keyof typeof USER_TABLES;
+
+export interface RealtimeEvent<T = Record<string, any>> {
+  table: RealtimeTable;
+  eventType: 'INSERT' | 'UPDATE' | 'DELETE';
+  new: T;
+  old: Partial<T>;
+  receivedAt: number;
+}
+
+export interface RealtimeBatchInfo {
+  /**
+   * Events were dropped (queue overflow) or may have been missed (reconnect);
+   * the consumer should reload instead of applying the batch
+   */
+  resync: boolean;
+}
+
+export type RealtimeBatchHandler<T = Record<string, any>> = (events: RealtimeEvent<T>[], info: RealtimeBatchInfo) => void;
+
+export interface RealtimeHubStats {
+  received: number;
+  delivered: number;
+  dropped: number;
+  batches: number;
+  resyncs: number;
+  subscribers: number;
+  connected: boolean;
+}
+
+// Events arriving within this window are handed to consumers as one batch (one render per burst)
+const BATCH_WINDOW_MS = 50;
+// Queue bound: when a burst is larger, the oldest events are dropped and consumers reload instead
+const MAX_QUEUE = 500;
+
+const emptyCounters = () => ({ received: 0, delivered: 0, dropped: 0, batches: 0, resyncs: 0 });
+
+/**
+ * One Supabase Realtime channel per signed-in session, shared by every component that needs
+ * live updates. Changes to the user's rows are queued, delivered in batches per table and drop
+ * the matching query cache entries, so consumers neither poll nor open channels of their own.
+ */
+class RealtimeHub {
+  private channel: RealtimeChannel | null = null;
+  private userId: string | null = null;
+  private handlers = new Map<RealtimeTable, Set<RealtimeBatchHandler<any>>>();
+  private queue: RealtimeEvent[] = [];
+  private overflowed = false;
+  private timer: ReturnType<typeof setTimeout> | null = null;
+  private wasSubscribed = false;
+  private connected = false;
+  private counters = emptyCounters();
+
+  /**
+   * Receive batches of changes to `table` for `userId`. Returns the unsubscribe function;
+   * the channel is closed when its last subscriber leaves.
+   */
+  subscribe<T = Record<string, any>>(userId: string, table: RealtimeTable, handler: RealtimeBatchHandler<T>): () => void {
+    if (this.userId !== userId) {
+      this.disconnect();
+      this.userId = userId;
+    }
+    let handlers = this.handlers.get(table);
+    if (!handlers) {
+      handlers = new Set();
+      this.handlers.set(table, handlers);
+    }
+    handlers.add(handler);
+    if (!this.channel) {
+      this.connect(userId);
+    }
+
+    return () => {
+      handlers!.delete(handler);
+      if (this.subscriberCount() === 0) {
+        this.disconnect();
+      }
+    };
+  }
+
+  /**
+   * Close the channel, e.g. on logout
+   */
+  disconnect(): void {
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+    if (this.channel) {
+      supabase.removeChannel(this.channel);
+      this.channel = null;
+    }
+    this.queue = [];
+    this.overflowed = false;
+    this.wasSubscribed = false;
+    this.connected = false;
+    this.handlers.clear();
+    this.userId = null;
+  }
+
+  /**
+   * Whether changes are currently being pushed; cached reads can then live longer
+   */
+  isConnected(): boolean {
+    return this.connected;
+  }
+
+  stats(): RealtimeHubStats {
+    return { ...this.counters, subscribers: this.subscriberCount(), connected: this.connected };
+  }
+
+  resetStats(): void {
+    this.counters = emptyCounters();
+  }
+
+  private connect(userId: string): void {
+    let channel = supabase.channel(`huurly:${userId}`);
+    for (const [table, column] of Object.entries(USER_TABLES) as [RealtimeTable, string][]) {
+      channel = channel.on(
+        'postgres_changes',
+        { event: '*', schema: 'public', table, filter: `${column}=eq.${userId}` },
+        (payload: RealtimePostgresChangesPayload<Record<string, any>>) => this.enqueue(table, payload)
+      );
+    }
+    this.channel = channel.subscribe(status => {
+      if (status === 'SUBSCRIBED') {
+        // Changes made while the socket was down were not pushed: tell consumers to reload
+        if (this.wasSubscribed) {
+          this.overflowed = true;
+          this.schedule();
+        }
+        this.wasSubscribed = true;
+        this.connected = true;
+      } else {
+        this.connected = false;
+        if (status === 'CHANNEL_ERROR' || status === 'TIMED_OUT') {
+          logger.warn(`Realtime channel huurly:${userId} ${status}; reconnecting`);
+        }
+      }
+    });
+  }
+
+  private enqueue(table: RealtimeTable, payload: RealtimePostgresChangesPayload<Record<string, any>>): void {
+    this.counters.received++;
+    this.queue.push({
+      table,
+      eventType: payload.eventType,
+      new: payload.new as Record<string, any>,
+      old: payload.old as Record<string, any>,
+      receivedAt: Date.now(),
+    });
+    if (this.queue.length > MAX_QUEUE) {
+      const excess = this.queue.length - MAX_QUEUE;
+      this.queue.splice(0, excess);
+      this.counters.dropped += excess;
+      this.overflowed = true;
+    }
+    this.schedule();
+  }
+
+  private schedule(): void {
+    if (!this.timer) {
+      this.timer = setTimeout(() => this.flush(), BATCH_WINDOW_MS);
+    }
+  }
+
+  private flush(): void {
+    this.timer = null;
+    const events = this.queue;
+    const resync = this.overflowed;
+    this.queue = [];
+    this.overflowed = false;
+    if (resync) this.counters.resyncs++;
+
+    const byTable = new Map<RealtimeTable, RealtimeEvent[]>();
+    for (const event of events) {
+      byTable.set(event.table, [...(byTable.get(event.table) ?? []), event]);
+    }
+    const tables = resync ? Object.keys(USER_TABLES) as RealtimeTable[] : [...byTable.keys()];
+    for (const table of tables) {
+      queryCache.invalidate(table);
+      const batch = byTable.get(table) ?? [];
+      for (const handler of this.handlers.get(table) ?? []) {
+        try {
+          handler(batch, { resync });
+        } catch (error) {
+          logger.error(`Realtime handler for ${table} failed:`, error);
+        }
+      }
+      this.counters.delivered += batch.length;
+      this.counters.batches++;
+    }
+  }
+
+  private subscriberCount(): number {
+    let count = 0;
+    this.handlers.forEach(handlers => { count += handlers.size; });
+    return count;
+  }
+}
+
+export const realtimeHub = new RealtimeHub();
+
+// Read-only handle for the Playwright tests (testsprite_tests/harness/bench_realtime.py)
+if (typeof window !== 'undefined') {
+  (window as any).__huurlyRealtime = {
+    stats: () => realtimeHub.stats(),
+    resetStats: () => realtimeHub.resetStats(),
+  };
+}
@@ -1,4 +1,5 @@
 import { supabase } from '@/integrations/supabase/client'
+import { logger } from './logger';
 
 export interface UploadResult {
   url: string | null;
@@ -12,10 +13,189 @@ export interface FileValidation {
   error?: string;
 }
 
+interface CachedUrl {
+  url: string | null;
+  expiresAt: number;
+  /** Restored from sessionStorage after a reload */
+  restored?: boolean;
+}
+
+export interface SignedUrlStats {
+  hits: number;
+  /** Hits on URLs restored from sessionStorage */
+  sessionHits: number;
+  misses: number;
+  refreshes: number;
+  /** Calls to the sign-urls function */
+  requests: number;
+  /** Paths signed by those calls */
+  signed: number;
+  entries: number;
+}
+
+const SIGNED_URL_TTL_S = 60 * 60;
+// Hand out URLs with at least this much validity left; closer to expiry they are re-signed
+const REFRESH_MARGIN_MS = 5 * 60 * 1000;
+// Paths denied by the server are not asked for again for a while
+const DENIED_TTL_MS = 60 * 1000;
+// Calls made within this window (e.g. while a list renders) are signed together
+const BATCH_WINDOW_MS = 10;
+const MAX_BATCH = 200;
+const SESSION_KEY = 'huurly:signed-urls';
+
+const emptyStats = () => ({ hits: 0, sessionHits: 0, misses: 0, refreshes: 0, requests: 0, signed: 0 });
+
 export class SignedUrlStorageService {
   private readonly MAX_FILE_SIZE = 5 * 1024 * 1024; // 5MB
   private readonly ALLOWED_TYPES = ['jpg', 'jpeg', 'png', 'webp', 'gif', 'pdf'];
 
+  private urls = new Map<string, CachedUrl>();
+  private inFlight = new Map<string, Promise<string | null>>();
+  private queue = new Map<string, { resolve: (url: string | null) => void; reject: (error: unknown) => void }[]>();
+  private flushTimer: ReturnType<typeof setTimeout> | null = null;
+  private counters = emptyStats();
+  private sessionLoaded = false;
+
+  /**
+   * Presigned read URL for a stored file (object key or stored public URL).
+   * Returns null when the current user may not read it.
+   */
+  async getSignedUrl(path: string): Promise<string | null> {
+    return (await this.getSignedUrls([path]))[path] ?? null;
+  }
+
+  /**
+   * Presigned read URLs for many stored files. Cached URLs (in memory, then in sessionStorage)
+   * are reused until shortly before they expire; the rest are signed in one request together
+   * with every other path asked for in the same tick.
+   */
+  async getSignedUrls(paths: string[]): Promise<Record<string, string | null>> {
+    this.loadSession();
+    const now = Date.now();
+    const unique = [...new Set(paths.filter(Boolean))];
+    const results = await Promise.all(unique.map(path => {
+      const cached = this.urls.get(path);
+      if (cached && cached.url === null && cached.expiresAt > now) {
+        // Denied recently: not asked again until DENIED_TTL_MS has passed
+        this.counters.hits++;
+        return null;
+      }
+      if (cached && cached.expiresAt - now > REFRESH_MARGIN_MS) {
+        this.counters[cached.restored ? 'sessionHits' : 'hits']++;
+        return cached.url;
+      }
+      if (cached && cached.url && cached.expiresAt > now) {
+        // Still usable: return it and re-sign in the background
+        this.counters.refreshes++;
+        this.request(path).catch(error => logger.warn('Refreshing signed URL failed:', error));
+        return cached.url;
+      }
+      this.counters.misses++;
+      return this.request(path);
+    }));
+    return Object.fromEntries(unique.map((path, i) => [path, results[i]]));
+  }
+
+  /**
+   * Drop cached URLs, e.g. when the signed-in user changes
+   */
+  clearSignedUrls(): void {
+    this.urls.clear();
+    this.inFlight.clear();
+    try {
+      sessionStorage.removeItem(SESSION_KEY);
+    } catch {
+      // sessionStorage unavailable
+    }
+  }
+
+  signedUrlStats(): SignedUrlStats {
+    return { ...this.counters, entries: this.urls.size };
+  }
+
+  resetSignedUrlStats(): void {
+    this.counters = emptyStats();
+  }
+
+  private request(path: string): Promise<string | null> {
+    const pending = this.inFlight.get(path);
+    if (pending) return pending;
+    const request = new Promise<string | null>((resolve, reject) => {
+      const waiting = this.queue.get(path) ?? [];
+      waiting.push({ resolve, reject });
+      this.queue.set(path, waiting);
+    }).finally(() => this.inFlight.delete(path));
+    this.inFlight.set(path, request);
+    if (this.queue.size >= MAX_BATCH) {
+      this.flush();
+    } else if (!this.flushTimer) {
+      this.flushTimer = setTimeout(() => this.flush(), BATCH_WINDOW_MS);
+    }
+    return request;
+  }
+
+  private async flush(): Promise<void> {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    const batch = new Map(this.queue);
+    this.queue.clear();
+    if (batch.size === 0) return;
+
+    try {
+      this.counters.requests++;
+      const { data, error } = await supabase.functions.invoke('sign-urls', {
+        body: { paths: [...batch.keys()], expiresIn: SIGNED_URL_TTL_S },
+      });
+      if (error) throw error;
+      if (data?.error) throw new Error(data.error);
+      const expiresAt = Date.parse(data.expiresAt);
+      for (const [path, waiting] of batch) {
+        const url: string | null = data.urls?.[path] ?? null;
+        this.urls.set(path, { url, expiresAt: url ? expiresAt : Date.now() + DENIED_TTL_MS });
+        if (url) this.counters.signed++;
+        waiting.forEach(({ resolve }) => resolve(url));
+      }
+      this.saveSession();
+    } catch (error) {
+      logger.error('Error signing URLs:', error);
+      for (const waiting of batch.values()) {
+        waiting.forEach(({ reject }) => reject(error));
+      }
+    }
+  }
+
+  // URLs survive reloads within the tab, so a refreshed list does not sign everything again
+  private loadSession(): void {
+    if (this.sessionLoaded) return;
+    this.sessionLoaded = true;
+    try {
+      const stored: Record<string, CachedUrl> = JSON.parse(sessionStorage.getItem(SESSION_KEY) ?? '{}');
+      const now = Date.now();
+      for (const [path, entry] of Object.entries(stored)) {
+        if (entry.url && entry.expiresAt - now > REFRESH_MARGIN_MS && !this.urls.has(path)) {
+          this.urls.set(path, { url: entry.url, expiresAt: entry.expiresAt, restored: true });
+        }
+      }
+    } catch {
+      // Missing or corrupt entry: start empty
+    }
+  }
+
+  private saveSession(): void {
+    const now = Date.now();
+    for (const [path, entry] of this.urls) {
+      if (entry.expiresAt <= now) this.urls.delete(path);
+    }
+    try {
+      const valid = Array.from(this.urls).filter(([, entry]) => entry.url);
+      sessionStorage.setItem(SESSION_KEY, JSON.stringify(Object.fromEntries(valid)));
+    } catch {
+      // Private mode or full storage: the memory cache still works
+    }
+  }
+
   /**
    * Validate file before upload
    */
@@ -230,3 +410,11 @@ export class SignedUrlStorageService {
 
 // Export singleton instance
 export const signedStorageService = new SignedUrlStorageService();
+
+// Read-only handle for the Playwright tests (testsprite_tests/harness/signing.py)
+if (typeof window !== 'undefined') {
+  (window as any).__huurlySignedUrls = {
+    stats: () => signedStorageService.signedUrlStats(),
+    resetStats: () => signedStorageService.resetSignedUrlStats(),
+  };
+}
@@ -1,8 +1,8 @@
 import { supabase } from '@/integrations/supabase/client';
 import { r2Client, R2_BUCKET, R2_PUBLIC_BASE } from '@/integrations/cloudflare/client';
-import { PutObjectCommand, GetObjectCommand } from '@aws-sdk/client-s3';
-import { getSignedUrl } from '@aws-sdk/s3-request-presigner';
+import { PutObjectCommand } from '@aws-sdk/client-s3';
 import { logger } from '@/lib/logger';
+import { signedStorageService } from '@/lib/storage-signed';
 
 /**
  * Check if the currently authenticated user may view the documents of `userId`.
@@ -23,18 +23,15 @@ export async function canViewDocument(userId: string): Promise<boolean> {
       return true;
     }
 
-    const { data, error } = await supabase
-      .from('gebruiker_rollen')
-      .select('role')
-      .eq('user_id', currentUser.id)
-      .in('role', ['reviewer', 'admin']);
+    // Same rule as the documenten RLS policy (gebruikers.rol beoordelaar or admin)
+    const { data, error } = await supabase.rpc('is_beoordelaar_or_admin', { user_id: currentUser.id });
 
     if (error) {
       logger.error('Role check error:', error);
       return false;
     }
 
-    return (data ?? []).length > 0;
+    return data === true;
   } catch (err) {
     logger.error('canViewDocument error:', err);
     return false;
@@ -42,28 +39,27 @@ export async function canViewDocument(userId: string): Promise<boolean> {
 }
 
 /**
- * Return a signed URL for a document if the viewer has access. The viewer is
- * determined via `supabase.auth`. The owner id is extracted from the file path.
+ * Return a signed URL for a document if the viewer has access. Access is checked
+ * by the sign-urls edge function with the same rules as `canViewDocument`.
  */
 export async function getDocumentUrl(
   filePath: string,
 ): Promise<string | null> {
-  const ownerId = filePath.split('/')[0];
-  const allowed = await canViewDocument(ownerId);
-  if (!allowed) {
-    return null;
-  }
+  return (await getDocumentUrls([filePath]))[filePath] ?? null;
+}
 
+/**
+ * Signed URLs for many documents in one request (cached until shortly before
+ * they expire). Documents the viewer may not see map to null.
+ */
+export async function getDocumentUrls(
+  filePaths: string[],
+): Promise<Record<string, string | null>> {
   try {
-    const url = await getSignedUrl(
-      r2Client,
-      new GetObjectCommand({ Bucket: R2_BUCKET, Key: filePath }),
-      { expiresIn: 60 * 60 }
-    );
-    return url;
+    return await signedStorageService.getSignedUrls(filePaths);
   } catch (error) {
     logger.error('Signed URL error:', error);
-    return null;
+    return Object.fromEntries(filePaths.map(filePath => [filePath, null]));
   }
 }
 
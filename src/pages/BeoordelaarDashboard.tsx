@@ -15,7 +15,7 @@ interface BeoordelaarDashboardProps {
 }
 
 const BeoordelaarDashboard: React.FC<BeoordelaarDashboardProps> = ({ user }) => {
-  const { documents, loading: dataLoading, refresh } = useBeoordelaarDashboard();
+  const { documents, documentUrls, loading: dataLoading, refresh } = useBeoordelaarDashboard();
   const actions = useBeoordelaarActions();
   const [selectedDocument, setSelectedDocument] = React.useState<Document | null>(null);
   const [isModalOpen, setIsModalOpen] = React.useState(false);
@@ -44,6 +44,7 @@ const BeoordelaarDashboard: React.FC<BeoordelaarDashboardProps> = ({ user }) =>
       {selectedDocument && (
         <DocumentReviewModal
           document={selectedDocument}
+          documentUrl={documentUrls[selectedDocument.bestand_url] ?? undefined}
           open={isModalOpen}
           onOpenChange={setIsModalOpen}
           onApprove={async (docId, notes) => {
@@ -308,6 +308,7 @@ export abstract class BaseService extends DatabaseService {
     newData?: any,
     userId?: string
   ): Promise<void> {
+    this.invalidateCachedQueries(table);
     try {
       const currentUserId = userId || await this.getCurrentUserId();
       if (currentUserId) {
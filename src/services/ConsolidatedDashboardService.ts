@@ -4,6 +4,10 @@ import { logger } from '../lib/logger';
 import { TenantProfile, TenantDashboardData } from '../types';
 import { Document } from './DocumentService';
 import { optimizedSubscriptionService } from './OptimizedSubscriptionService';
+import { queryCache } from '../lib/queryCache';
+import { ImageOptimizer } from '../lib/image-optimization';
+
+const DASHBOARD_QUERY = 'ConsolidatedDashboardService.getHuurderDashboardData';
 
 interface ConsolidatedDashboardData {
   stats: TenantDashboardData;
@@ -12,6 +16,8 @@ interface ConsolidatedDashboardData {
   subscription: any;
   profilePictureUrl: string | null;
   coverPhotoUrl: string | null;
+  profilePictureSrcSet: string | null;
+  coverPhotoSrcSet: string | null;
   hasProfile: boolean;
 }
 
@@ -165,56 +171,28 @@ export class ConsolidatedDashboardService extends DatabaseService {
   }
 
   /**
-   * Fetch all dashboard data in a single optimized query
+   * Fetch all dashboard data in a single round trip. The huurder-dashboard edge function
+   * returns the huurder_dashboard() payload (profile, user, documents, active subscription)
+   * with presigned photo URLs; the subscription primes the subscription cache so the
+   * dashboard's expiry checks do not query again. Results go through the shared query
+   * cache; pass `force` to bypass it (e.g. on an explicit refresh).
    */
-  async getHuurderDashboardData(userId: string): Promise<DatabaseResponse<ConsolidatedDashboardData>> {
-    return this.executeQuery(async () => {
+  async getHuurderDashboardData(userId: string, force = false): Promise<DatabaseResponse<ConsolidatedDashboardData>> {
+    return this.cachedQuery(DASHBOARD_QUERY, [userId], async () => {
       logger.info('Fetching consolidated dashboard data for user:', userId);
 
       try {
-        // Execute all queries in parallel for maximum performance
-        const [
-          documentsResult,
-          profileResult,
-          userResult,
-          subscriptionResult,
-          profilePictureResult
-        ] = await Promise.allSettled([
-          // Get user documents
-          supabase
-            .from('documenten')
-            .select('*')
-            .eq('huurder_id', userId)
-            .order('aangemaakt_op', { ascending: false }),
-          
-          // Get tenant profile
-          supabase
-            .from('huurders')
-            .select('*')
-            .eq('id', userId)
-            .maybeSingle(),
+        const { data: payload, error } = await supabase.functions.invoke('huurder-dashboard');
 
-          // Get basic user info
-          supabase
-            .from('gebruikers')
-            .select('*')
-            .eq('id', userId)
-            .maybeSingle(),
-          
-          // Get active subscription using optimized service
-          optimizedSubscriptionService.checkSubscriptionStatus(userId),
-          
-          // Get profile and cover photo URLs from database
-          this.getPhotoUrls(userId)
-        ]);
+        if (error) {
+          logger.error('Error fetching consolidated dashboard data:', error);
+          return { data: null, error: error as Error };
+        }
 
-        // Process results
         const stats = { profileViews: 0, invitations: 0, applications: 0, acceptedApplications: 0 };
 
-        const rawDocuments = documentsResult.status === 'fulfilled' && documentsResult.value.data
-          ? documentsResult.value.data
-          : [];
-        
+        const rawDocuments: any[] = Array.isArray(payload?.documenten) ? payload.documenten : [];
+
         // Type guard to filter documents with a non-null huurder_id
         const isDocumentWithHuurder = (doc: any): doc is any & { huurder_id: string } =>
           doc.huurder_id !== null;
@@ -234,36 +212,33 @@ export class ConsolidatedDashboardService extends DatabaseService {
             bijgewerkt_op: doc.bijgewerkt_op,
           }));
 
-        const rawTenant = profileResult.status === 'fulfilled' && profileResult.value.data
-          ? profileResult.value.data
-          : null;
-
-        const userRow = userResult.status === 'fulfilled' && userResult.value.data
-          ? userResult.value.data
-          : null;
+        const rawTenant = payload?.huurder ?? null;
+        const userRow = payload?.gebruiker ?? null;
 
         const tenantProfile = rawTenant && userRow
           ? this.mapTenantProfile(rawTenant, userRow)
           : null;
 
-        const subscription = subscriptionResult.status === 'fulfilled' && subscriptionResult.value.success && subscriptionResult.value.data?.hasActiveSubscription
-          ? { status: 'active', ...subscriptionResult.value.data }
+        optimizedSubscriptionService.cacheSubscription(userId, payload?.abonnement ?? null);
+        const subscriptionResult = await optimizedSubscriptionService.checkSubscriptionStatus(userId);
+        const subscription = subscriptionResult.success && subscriptionResult.data?.hasActiveSubscription
+          ? { status: 'active', ...subscriptionResult.data }
           : null;
 
-        const photoUrls = profilePictureResult.status === 'fulfilled'
-          ? profilePictureResult.value
-          : { profilePictureUrl: null, coverPhotoUrl: null };
-
-        const hasProfile = !!rawTenant;
-
         const consolidatedData: ConsolidatedDashboardData = {
           stats,
           documents,
           tenantProfile,
           subscription,
-          profilePictureUrl: photoUrls.profilePictureUrl,
-          coverPhotoUrl: photoUrls.coverPhotoUrl,
-          hasProfile
+          profilePictureUrl: payload?.profiel_foto_url ?? null,
+          coverPhotoUrl: payload?.cover_foto_url ?? null,
+          profilePictureSrcSet: payload?.profiel_foto_varianten
+            ? ImageOptimizer.srcSet(payload.profiel_foto_varianten, 'profile')
+            : null,
+          coverPhotoSrcSet: payload?.cover_foto_varianten
+            ? ImageOptimizer.srcSet(payload.cover_foto_varianten, 'cover')
+            : null,
+          hasProfile: !!rawTenant
         };
 
         logger.info('Successfully fetched consolidated dashboard data');
@@ -273,28 +248,7 @@ export class ConsolidatedDashboardService extends DatabaseService {
         logger.error('Error fetching consolidated dashboard data:', error);
         return { data: null, error: error as Error };
       }
-    });
-  }
-
-  /**
-   * Get profile picture and cover photo URLs from database
-   */
-  private async getPhotoUrls(userId: string): Promise<{ profilePictureUrl: string | null; coverPhotoUrl: string | null }> {
-    try {
-      const { data: tenant } = await supabase
-        .from('huurders')
-        .select('profiel_foto, cover_foto')
-        .eq('id', userId)
-        .single();
-
-      return {
-        profilePictureUrl: tenant?.profiel_foto || null,
-        coverPhotoUrl: tenant?.cover_foto || null
-      };
-    } catch (error) {
-      logger.error('Error getting photo URLs:', error);
-      return { profilePictureUrl: null, coverPhotoUrl: null };
-    }
+    }, { tags: ['huurders', 'gebruikers', 'documenten', 'abonnementen'], force });
   }
 
   /**
@@ -303,6 +257,7 @@ export class ConsolidatedDashboardService extends DatabaseService {
   async refreshSubscriptionStatus(userId: string): Promise<DatabaseResponse<any>> {
     return this.executeQuery(async () => {
       // Use optimized subscription service with cache refresh
+      queryCache.invalidateQuery(DASHBOARD_QUERY, [userId]);
       const result = await optimizedSubscriptionService.refreshSubscriptionStatus(userId);
       
       if (result.success && result.data?.hasActiveSubscription) {
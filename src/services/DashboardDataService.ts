@@ -3,6 +3,7 @@ import { supabase } from '../integrations/supabase/client';
 import { DatabaseService, DatabaseResponse } from '../lib/database';
 import { ErrorHandler } from '../lib/errors';
 import { logger } from '../lib/logger';
+import { statisticsService } from './StatisticsService';
 import { Property } from '@/types';
 
 export interface DashboardData {
@@ -20,21 +21,13 @@ export interface DashboardData {
 
 export class DashboardDataService extends DatabaseService {
   async getAdminDashboardData(): Promise<DatabaseResponse<DashboardData>> {
-    return this.executeQuery(async () => {
+    return this.cachedQuery('DashboardDataService.getAdminDashboardData', [], async () => {
       const [
-        usersResult,
-        tenantsResult,
-        landlordsResult,
-        documentsResult,
-        subscriptionsResult,
+        countsResult,
         recentActivityResult,
         documentQueueResult
       ] = await Promise.all([
-        supabase.from('gebruikers').select('id', { count: 'exact', head: true }),
-        supabase.from('gebruikers').select('id', { count: 'exact', head: true }).eq('rol', 'huurder'),
-        supabase.from('gebruikers').select('id', { count: 'exact', head: true }).eq('rol', 'verhuurder'),
-        supabase.from('documenten').select('status'),
-        supabase.from('abonnementen').select('id').eq('status', 'actief'),
+        statisticsService.getAggregateCounts(),
         supabase.from('notificaties').select('*').order('aangemaakt_op', { ascending: false }).limit(5),
         supabase.from('documenten').select(`
           *,
@@ -42,25 +35,26 @@ export class DashboardDataService extends DatabaseService {
         `).eq('status', 'wachtend').order('aangemaakt_op', { ascending: true }).limit(10)
       ]);
 
-      const documents = documentsResult.data || [];
-      const pendingDocuments = documents.filter(doc => doc.status === 'wachtend').length;
-      const approvedDocuments = documents.filter(doc => doc.status === 'goedgekeurd').length;
+      const counts = countsResult.data;
+      if (countsResult.error || !counts) {
+        throw countsResult.error;
+      }
 
       const dashboardData: DashboardData = {
         stats: {
-          totalUsers: usersResult.count || 0,
-          totalTenants: tenantsResult.count || 0,
-          totalLandlords: landlordsResult.count || 0,
-          pendingDocuments,
-          approvedDocuments,
-          activeSubscriptions: subscriptionsResult.data?.length || 0,
+          totalUsers: counts.gebruikers.total,
+          totalTenants: counts.gebruikers.byKey.huurder || 0,
+          totalLandlords: counts.gebruikers.byKey.verhuurder || 0,
+          pendingDocuments: counts.documenten.byKey.wachtend || 0,
+          approvedDocuments: counts.documenten.byKey.goedgekeurd || 0,
+          activeSubscriptions: counts.abonnementen.byKey.actief || 0,
         },
         recentActivity: recentActivityResult.data || [],
         documentQueue: documentQueueResult.data || [],
       };
 
       return { data: dashboardData, error: null };
-    });
+    }, { tags: ['gebruikers', 'documenten', 'abonnementen', 'notificaties'] });
   }
 
   async getTenantDashboardData(userId: string): Promise<DatabaseResponse<any>> {
@@ -73,7 +67,7 @@ export class DashboardDataService extends DatabaseService {
       };
     }
 
-    return this.executeQuery(async () => {
+    return this.cachedQuery('DashboardDataService.getTenantDashboardData', [userId], async () => {
       const [
         profileResult,
         documentsResult,
@@ -101,7 +95,7 @@ export class DashboardDataService extends DatabaseService {
       };
 
       return { data: dashboardData, error: null };
-    });
+    }, { tags: ['huurders', 'documenten', 'abonnementen'] });
   }
 
   async getVerhuurderDashboardData(userId: string): Promise<DatabaseResponse<any>> {
@@ -114,7 +108,7 @@ export class DashboardDataService extends DatabaseService {
       };
     }
 
-    return this.executeQuery(async () => {
+    return this.cachedQuery('DashboardDataService.getVerhuurderDashboardData', [userId], async () => {
       const [
         profileResult,
         tenantsResult
@@ -136,7 +130,7 @@ export class DashboardDataService extends DatabaseService {
       };
 
       return { data: dashboardData, error: null };
-    });
+    }, { tags: ['verhuurders', 'huurders'] });
   }
 
   async updateDocumentStatus(
@@ -184,7 +178,7 @@ export class DashboardDataService extends DatabaseService {
    */
   static async getLandlordDashboardStats(userId: string): Promise<DatabaseResponse<any>> {
     const service = new DashboardDataService();
-    return service.executeQuery(async () => {
+    return service.cachedQuery('DashboardDataService.getLandlordDashboardStats', [userId], async () => {
       const [propertiesResult, viewsResult] = await Promise.all([
         supabase.from('verhuurders').select('aantal_woningen').eq('id', userId).single(),
         supabase.from('profiel_weergaves').select('id').eq('verhuurder_id', userId)
@@ -198,7 +192,7 @@ export class DashboardDataService extends DatabaseService {
       };
 
       return { data, error: null };
-    });
+    }, { tags: ['verhuurders', 'profiel_weergaves'] });
   }
 
   /**
@@ -206,7 +200,7 @@ export class DashboardDataService extends DatabaseService {
    */
   static async getLandlordProperties(userId: string): Promise<DatabaseResponse<Property[]>> {
     const service = new DashboardDataService();
-    return service.executeQuery(async () => {
+    return service.cachedQuery('DashboardDataService.getLandlordProperties', [userId], async () => {
       const { data, error } = await supabase
         .from('woningen')
         .select('*')
@@ -218,7 +212,7 @@ export class DashboardDataService extends DatabaseService {
       }
 
       return { data: (data || []) as any[], error: null };
-    });
+    }, { tags: ['woningen'] });
   }
 }
 
@@ -3,6 +3,7 @@ import { supabase } from '@/integrations/supabase/client';
 import { DatabaseService, DatabaseResponse } from '../lib/database';
 import { ErrorHandler } from '../lib/errors';
 import { logger } from '../lib/logger';
+import { statisticsService } from './StatisticsService';
 
 export interface DashboardStats {
   totalUsers: number;
@@ -24,37 +25,26 @@ export interface TenantStats {
 
 export class DashboardService extends DatabaseService {
   async getAdminStats(): Promise<DatabaseResponse<DashboardStats>> {
-    return this.executeQuery(async () => {
-      const [
-        usersResult,
-        tenantsResult,
-        landlordsResult,
-        documentsResult,
-        subscriptionsResult
-      ] = await Promise.all([
-        supabase.from('gebruikers').select('id', { count: 'exact', head: true }),
-        supabase.from('gebruikers').select('id', { count: 'exact', head: true }).eq('rol', 'huurder'),
-        supabase.from('gebruikers').select('id', { count: 'exact', head: true }).eq('rol', 'verhuurder'),
-        supabase.from('documenten').select('status'),
-        supabase.from('abonnementen').select('id').eq('status', 'actief')
-      ]);
+    return this.cachedQuery('DashboardService.getAdminStats', [], async () => {
+      const { data: counts, error } = await statisticsService.getAggregateCounts();
 
-      const documents = documentsResult.data || [];
-      const pendingDocuments = documents.filter(doc => doc.status === 'wachtend').length;
-      const approvedDocuments = documents.filter(doc => doc.status === 'goedgekeurd').length;
+      if (error || !counts) {
+        throw error;
+      }
 
+      const activeSubscriptions = counts.abonnementen.byKey.actief || 0;
       const stats: DashboardStats = {
-        totalUsers: usersResult.count || 0,
-        totalTenants: tenantsResult.count || 0,
-        totalLandlords: landlordsResult.count || 0,
-        pendingDocuments,
-        approvedDocuments,
-        activeSubscriptions: subscriptionsResult.data?.length || 0,
-        totalRevenue: (subscriptionsResult.data?.length || 0) * 65
+        totalUsers: counts.gebruikers.total,
+        totalTenants: counts.gebruikers.byKey.huurder || 0,
+        totalLandlords: counts.gebruikers.byKey.verhuurder || 0,
+        pendingDocuments: counts.documenten.byKey.wachtend || 0,
+        approvedDocuments: counts.documenten.byKey.goedgekeurd || 0,
+        activeSubscriptions,
+        totalRevenue: activeSubscriptions * 65
       };
 
       return { data: stats, error: null };
-    });
+    }, { tags: ['gebruikers', 'documenten', 'abonnementen'] });
   }
 
   async getTenantStats(userId: string): Promise<DatabaseResponse<TenantStats>> {
@@ -67,7 +57,7 @@ export class DashboardService extends DatabaseService {
       };
     }
 
-    return this.executeQuery(async () => {
+    return this.cachedQuery('DashboardService.getTenantStats', [userId], async () => {
       const [documentsResult, subscriptionResult] = await Promise.all([
         supabase.from('documenten').select('status').eq('huurder_id', userId),
         supabase.from('abonnementen').select('status').eq('huurder_id', userId).eq('status', 'actief').single()
@@ -87,11 +77,11 @@ export class DashboardService extends DatabaseService {
       };
 
       return { data: stats, error: null };
-    });
+    }, { tags: ['documenten', 'abonnementen'] });
   }
 
   async getRecentActivity(limit: number = 10): Promise<DatabaseResponse<any[]>> {
-    return this.executeQuery(async () => {
+    return this.cachedQuery('DashboardService.getRecentActivity', [limit], async () => {
       const { data, error } = await supabase
         .from('notificaties')
         .select(`
@@ -109,11 +99,11 @@ export class DashboardService extends DatabaseService {
       }
 
       return { data: data || [], error: null };
-    });
+    }, { tags: ['notificaties'] });
   }
 
   async getDocumentQueue(): Promise<DatabaseResponse<any[]>> {
-    return this.executeQuery(async () => {
+    return this.cachedQuery('DashboardService.getDocumentQueue', [], async () => {
       const { data, error } = await supabase
         .from('documenten')
         .select(`
@@ -131,7 +121,7 @@ export class DashboardService extends DatabaseService {
       }
 
       return { data: data || [], error: null };
-    });
+    }, { tags: ['documenten'] });
   }
 }
 
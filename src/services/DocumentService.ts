@@ -2,6 +2,9 @@
 import { supabase } from '../integrations/supabase/client';
 import { BaseService, ServiceResponse, ValidationError, PermissionError } from './BaseService';
 import { storageService } from '../lib/storage';
+import { multipartUploadService } from '../lib/multipartUpload';
+import { signedStorageService } from '../lib/storage-signed';
+import { statisticsService } from './StatisticsService';
 import { 
   DocumentType, 
   DocumentStatus, 
@@ -54,8 +57,8 @@ export class DocumentService extends BaseService {
       // Ensure huurder record exists before upload
       await this.ensureHuurderExists(userId);
 
-      // Upload to Cloudflare R2 using storage service with proper path
-      const uploadResult = await storageService.uploadFile(file, userId, DOCUMENT_STORAGE_PATHS[documentType]);
+      // Upload straight to Cloudflare R2 (resumable multipart upload for large scans) under the document type's path
+      const uploadResult = await multipartUploadService.upload(file, { folder: DOCUMENT_STORAGE_PATHS[documentType] });
       
       if (!uploadResult.success || !uploadResult.path) {
         throw new Error(uploadResult.error?.message || 'Bestand upload mislukt');
@@ -209,13 +212,14 @@ export class DocumentService extends BaseService {
         throw this.handleDatabaseError(error);
       }
 
-      const signedUrlResult = await storageService.getSignedUrl(document.bestand_url, 300);
+      // Signed by the sign-urls function (which checks access) and cached until shortly before expiry
+      const signedUrl = await signedStorageService.getSignedUrl(document.bestand_url);
 
-      if (!signedUrlResult.url) {
+      if (!signedUrl) {
         throw new Error('Kon geen toegang verkrijgen tot document');
       }
 
-      return signedUrlResult.url;
+      return signedUrl;
     }, 'getDocumentUrl', documentId, { userId });
   }
 
@@ -226,19 +230,18 @@ export class DocumentService extends BaseService {
     rejected: number;
   }>> {
     return this.executeServiceOperation(async () => {
-      const { data, error } = await supabase
-        .from('documenten')
-        .select('status');
+      const { data: counts, error } = await statisticsService.getAggregateCounts('documenten');
 
-      if (error) {
-        throw this.handleDatabaseError(error);
+      if (error || !counts) {
+        throw error;
       }
 
+      const documents = counts.documenten;
       const stats = {
-        total: data.length,
-        pending: data.filter(doc => doc.status === 'wachtend').length,
-        approved: data.filter(doc => doc.status === 'goedgekeurd').length,
-        rejected: data.filter(doc => doc.status === 'afgekeurd').length,
+        total: documents.total,
+        pending: documents.byKey.wachtend || 0,
+        approved: documents.byKey.goedgekeurd || 0,
+        rejected: documents.byKey.afgekeurd || 0,
       };
 
       return stats;
@@ -3,52 +3,61 @@ import { supabase } from '../integrations/supabase/client.ts';
 import { logger } from '../lib/logger.ts';
 
 export class MatchingService {
+  /**
+   * Listings recommended for a tenant, best match first. Rankings are computed in bulk by
+   * scripts/match_recommendations.py with calculateMatchScore's weights and stored in
+   * woning_aanbevelingen, so this is a single indexed read.
+   */
   static async getMatches(tenantId: string) {
     try {
-      // Get tenant profile first
-      const { data: tenant, error: tenantError } = await supabase
-        .from('huurders')
-        .select('*')
-        .eq('id', tenantId)
-        .single();
-
-      if (tenantError) {
-        logger.error('Error fetching tenant profile:', tenantError);
-        return [];
-      }
-
-      // Since the 'panden' table doesn't exist, return empty array
-      // This would be the proper implementation when the properties table exists:
-      logger.info('MatchingService: Properties table not available, returning empty matches');
-      return [];
+      const { data, error } = await supabase
+        .from('woning_aanbevelingen')
+        .select('score, rang, berekend_op, woning:woningen(*)')
+        .eq('huurder_id', tenantId)
+        .order('rang');
+
+      if (error) throw error;
 
-      // Future implementation:
-      /*
-      const { data: properties, error: propertiesError } = await supabase
-        .from('properties')
-        .select('*')
-        .gte('rent_price', tenant.max_huur ?? 0)
-        .lte('rent_price', tenant.max_huur ?? Number.MAX_SAFE_INTEGER)
-        .overlaps('location', tenant.locatie_voorkeur ?? [])
-        .gte('bedrooms', tenant.min_kamers ?? 1);
-
-      if (propertiesError) throw propertiesError;
-      return properties || [];
-      */
+      return (data || [])
+        .filter((row: any) => row.woning)
+        .map((row: any) => ({ ...row.woning, match_score: row.score, rang: row.rang, berekend_op: row.berekend_op }));
     } catch (error) {
       logger.error('Error getting matches:', error);
       return [];
     }
   }
 
-  static async getRecommendations(tenantId: string) {
+  static async getRecommendations(tenantId: string, limit = 10) {
+    const matches = await MatchingService.getMatches(tenantId);
+    return matches.slice(0, limit);
+  }
+
+  /**
+   * Active tenants for a saved search, best compatibility first. Scores come from the
+   * compatibiliteit_scores store, so ordering holds across pages; pass the returned
+   * nextCursor to fetch the next page.
+   */
+  static async getRankedTenants(zoekopdrachtId: string, cursor: string | null = null, pageSize = 20) {
     try {
-      // For now, return empty array since properties table doesn't exist
-      logger.info('MatchingService: Properties table not available, returning empty recommendations');
-      return [];
+      const [afterTotaal, afterId] = cursor ? cursor.split('|') : [null, null];
+      const { data, error } = await supabase.rpc('huurders_voor_zoekopdracht', {
+        zoekopdracht: zoekopdrachtId,
+        after_totaal: afterTotaal !== null ? Number(afterTotaal) : null,
+        after_id: afterId,
+        page_size: pageSize
+      });
+
+      if (error) throw error;
+
+      const rows = data || [];
+      const last = rows[rows.length - 1];
+      return {
+        tenants: rows,
+        nextCursor: last && rows.length === pageSize ? `${last.totaal}|${last.huurder.id}` : null
+      };
     } catch (error) {
-      logger.error('Error getting recommendations:', error);
-      return [];
+      logger.error('Error getting ranked tenants:', error);
+      return { tenants: [], nextCursor: null };
     }
   }
 
@@ -26,6 +26,7 @@ export interface MessageThread {
   other_user_id: string;
   other_user_name: string;
   other_user_email: string;
+  latest_message_id: string;
   latest_message: string;
   latest_message_date: string;
   unread_count: number;
@@ -33,6 +34,39 @@ export interface MessageThread {
   woning_titel?: string;
 }
 
+export interface PageOptions {
+  /** Keyset pagination: null for the first page, then the previous response's nextCursor */
+  cursor?: string | null;
+  /** Page size, capped at 100 threads or 200 messages */
+  limit?: number;
+}
+
+export interface MessagePage {
+  /** Oldest first, so a page can be rendered as is; nextCursor loads the older messages before it */
+  messages: Message[];
+  nextCursor: string | null;
+}
+
+export interface MessageThreadPage {
+  /** Most recent thread first */
+  threads: MessageThread[];
+  nextCursor: string | null;
+}
+
+// Same caps as the page_size clamps in bericht_gesprekken and berichten_gesprek; a larger limit
+// would return fewer rows than asked for and end the paging early
+const MAX_THREAD_PAGE = 100;
+const MAX_MESSAGE_PAGE = 200;
+const pageSize = (limit: number, max: number) => Math.min(Math.max(Math.floor(limit) || 1, 1), max);
+
+const parseCursor = (cursor?: string | null) => {
+  if (!cursor) {
+    return { voor_op: null, voor_id: null };
+  }
+  const [createdAt, id] = cursor.split('|');
+  return { voor_op: createdAt, voor_id: id };
+};
+
 export class MessageService extends DatabaseService {
   async sendMessage(data: CreateMessageData): Promise<DatabaseResponse<Message>> {
     const currentUserId = await this.getCurrentUserId();
@@ -82,7 +116,12 @@ export class MessageService extends DatabaseService {
     });
   }
 
-  async getMessages(otherUserId: string, woningId?: string): Promise<DatabaseResponse<Message[]>> {
+  async getMessages(
+    otherUserId: string,
+    woningId?: string,
+    { cursor = null, limit: requestedLimit = 50 }: PageOptions = {}
+  ): Promise<DatabaseResponse<MessagePage>> {
+    const limit = pageSize(requestedLimit, MAX_MESSAGE_PAGE);
     const currentUserId = await this.getCurrentUserId();
     if (!currentUserId) {
       return {
@@ -93,35 +132,40 @@ export class MessageService extends DatabaseService {
     }
 
     return this.executeQuery(async () => {
-      let query = supabase
-        .from('berichten')
-        .select('*')
-        .or(`and(verzender_id.eq.${currentUserId},ontvanger_id.eq.${otherUserId}),and(verzender_id.eq.${otherUserId},ontvanger_id.eq.${currentUserId})`)
-        .order('aangemaakt_op', { ascending: true });
-
-      if (woningId) {
-        query = query.eq('woning_id', woningId);
-      }
-
-      const { data, error } = await query;
+      // Newest page first over idx_berichten_gesprek; older pages follow the cursor
+      const { data, error } = await supabase.rpc('berichten_gesprek', {
+        ander: otherUserId,
+        in_woning: woningId ?? null,
+        page_size: limit,
+        ...parseCursor(cursor),
+      });
 
       if (error) {
         throw ErrorHandler.handleDatabaseError(error);
       }
 
-      // Mark messages from other user as read
-      await supabase
-        .from('berichten')
-        .update({ gelezen: true })
-        .eq('verzender_id', otherUserId)
-        .eq('ontvanger_id', currentUserId)
-        .eq('gelezen', false);
+      const rows = (data || []) as Message[];
+      const oldest = rows[rows.length - 1];
+      const nextCursor = oldest && rows.length === limit ? `${oldest.aangemaakt_op}|${oldest.id}` : null;
+
+      // Opening the conversation marks the other user's messages as read; older pages don't need to
+      if (!cursor) {
+        await supabase
+          .from('berichten')
+          .update({ gelezen: true })
+          .eq('verzender_id', otherUserId)
+          .eq('ontvanger_id', currentUserId)
+          .eq('gelezen', false);
+      }
 
-      return { data: data || [], error: null };
+      return { data: { messages: rows.reverse(), nextCursor }, error: null };
     });
   }
 
-  async getMessageThreads(): Promise<DatabaseResponse<MessageThread[]>> {
+  async getMessageThreads(
+    { cursor = null, limit: requestedLimit = 20 }: PageOptions = {}
+  ): Promise<DatabaseResponse<MessageThreadPage>> {
+    const limit = pageSize(requestedLimit, MAX_THREAD_PAGE);
     const currentUserId = await this.getCurrentUserId();
     if (!currentUserId) {
       return {
@@ -132,67 +176,28 @@ export class MessageService extends DatabaseService {
     }
 
     return this.executeQuery(async () => {
-      // Get all messages where current user is sender or receiver
-      const { data: messages, error } = await supabase
-        .from('berichten')
-        .select(`
-          *,
-          verzender:gebruikers!berichten_verzender_id_fkey(naam, email),
-          ontvanger:gebruikers!berichten_ontvanger_id_fkey(naam, email),
-          woning:woningen(titel)
-        `)
-        .or(`verzender_id.eq.${currentUserId},ontvanger_id.eq.${currentUserId}`)
-        .order('aangemaakt_op', { ascending: false });
+      // One row per conversation partner and woning, built in the database (bericht_gesprekken)
+      const { data, error } = await supabase.rpc('bericht_gesprekken', {
+        page_size: limit,
+        ...parseCursor(cursor),
+      });
 
       if (error) {
         throw ErrorHandler.handleDatabaseError(error);
       }
 
-      // Group messages by conversation partner
-      const threadMap = new Map();
-
-      messages?.forEach((message: any) => {
-        const isCurrentUserSender = message.verzender_id === currentUserId;
-        const otherUserId = isCurrentUserSender ? message.ontvanger_id : message.verzender_id;
-        const otherUser = isCurrentUserSender ? message.ontvanger : message.verzender;
-
-        const threadKey = `${otherUserId}-${message.woning_id || 'general'}`;
-
-        if (!threadMap.has(threadKey)) {
-          threadMap.set(threadKey, {
-            other_user_id: otherUserId,
-            other_user_name: otherUser?.naam || 'Onbekend',
-            other_user_email: otherUser?.email || '',
-            latest_message: message.inhoud,
-            latest_message_date: message.aangemaakt_op,
-            unread_count: 0,
-            woning_id: message.woning_id,
-            woning_titel: message.woning?.titel,
-            messages: []
-          });
-        }
-
-        const thread = threadMap.get(threadKey);
-        thread.messages.push(message);
-
-        // Count unread messages (messages from other user that are unread)
-        if (!isCurrentUserSender && !message.gelezen) {
-          thread.unread_count++;
-        }
-
-        // Update latest message if this one is newer
-        if (new Date(message.aangemaakt_op) > new Date(thread.latest_message_date)) {
-          thread.latest_message = message.inhoud;
-          thread.latest_message_date = message.aangemaakt_op;
-        }
-      });
-
-      const threads = Array.from(threadMap.values()).map(thread => {
-        const { messages, ...threadWithoutMessages } = thread;
-        return threadWithoutMessages;
-      });
-
-      return { data: threads, error: null };
+      const threads: MessageThread[] = (data || []).map((thread: any) => ({
+        ...thread,
+        unread_count: Number(thread.unread_count),
+        woning_id: thread.woning_id ?? undefined,
+        woning_titel: thread.woning_titel ?? undefined,
+      }));
+      const last = threads[threads.length - 1];
+      const nextCursor = last && threads.length === limit
+        ? `${last.latest_message_date}|${last.latest_message_id}`
+        : null;
+
+      return { data: { threads, nextCursor }, error: null };
     });
   }
 
@@ -239,17 +244,14 @@ export class MessageService extends DatabaseService {
     }
 
     return this.executeQuery(async () => {
-      const { count, error } = await supabase
-        .from('berichten')
-        .select('*', { count: 'exact', head: true })
-        .eq('ontvanger_id', currentUserId)
-        .eq('gelezen', false);
+      // Primary-key lookup of the trigger-maintained counter instead of counting berichten
+      const { data, error } = await supabase.rpc('ongelezen_aantallen');
 
       if (error) {
         throw ErrorHandler.handleDatabaseError(error);
       }
 
-      return { data: count || 0, error: null };
+      return { data: Number(data?.[0]?.berichten ?? 0), error: null };
     });
   }
 
@@ -1,7 +1,7 @@
 import { supabase } from '@/integrations/supabase/client';
 import { DatabaseService, DatabaseResponse } from '@/lib/database';
 import { ErrorHandler } from '@/lib/errors';
-import { logger } from '@/lib/logger';
+import { realtimeHub, RealtimeBatchInfo } from '@/lib/realtimeHub';
 
 export type NotificationType = 
   | 'document_goedgekeurd' 
@@ -35,6 +35,11 @@ export interface CreateNotificationData {
   actie_url?: string;
 }
 
+// Rows per insert request in createBulkNotifications
+const BULK_INSERT_CHUNK = 500;
+// While the realtime channel is up, changes invalidate the cache, so reads can be kept longer
+const LIVE_CACHE_TTL_MS = 5 * 60 * 1000;
+
 export class NotificationService extends DatabaseService {
   /**
    * Create a single notification
@@ -58,42 +63,40 @@ export class NotificationService extends DatabaseService {
         throw ErrorHandler.handleDatabaseError(error);
       }
 
-      // Trigger real-time notification
-      await this.triggerRealTimeNotification(data.gebruiker_id, notification);
-
+      // The recipient receives the insert through their realtime channel (see realtimeHub)
       return { data: notification, error: null };
     });
   }
 
   /**
-   * Create notifications for multiple users
+   * Create notifications for multiple users. Rows are inserted in chunks, one request per
+   * chunk, and pushed to the recipients by Realtime as they are committed.
    */
   async createBulkNotifications(notifications: CreateNotificationData[]): Promise<DatabaseResponse<Notification[]>> {
     return this.executeQuery(async () => {
-      const { data, error } = await supabase
-        .from('notificaties')
-        .insert(
-          notifications.map(n => ({
-            gebruiker_id: n.gebruiker_id,
-            type: n.type as any,
-            titel: n.titel,
-            inhoud: n.inhoud,
-            actie_url: n.actie_url,
-            gelezen: false,
-          }))
-        )
-        .select();
-
-      if (error) {
-        throw ErrorHandler.handleDatabaseError(error);
+      const created: Notification[] = [];
+      for (let i = 0; i < notifications.length; i += BULK_INSERT_CHUNK) {
+        const { data, error } = await supabase
+          .from('notificaties')
+          .insert(
+            notifications.slice(i, i + BULK_INSERT_CHUNK).map(n => ({
+              gebruiker_id: n.gebruiker_id,
+              type: n.type as any,
+              titel: n.titel,
+              inhoud: n.inhoud,
+              actie_url: n.actie_url,
+              gelezen: false,
+            }))
+          )
+          .select();
+
+        if (error) {
+          throw ErrorHandler.handleDatabaseError(error);
+        }
+        created.push(...((data || []) as Notification[]));
       }
 
-      // Trigger real-time notifications for all users
-      for (const notification of data) {
-        await this.triggerRealTimeNotification(notification.gebruiker_id, notification);
-      }
-
-      return { data: data || [], error: null };
+      return { data: created, error: null };
     });
   }
 
@@ -110,7 +113,7 @@ export class NotificationService extends DatabaseService {
       };
     }
 
-    return this.executeQuery(async () => {
+    return this.cachedQuery('NotificationService.getUserNotifications', [userId, limit], async () => {
       const { data, error } = await supabase
         .from('notificaties')
         .select('*')
@@ -123,7 +126,7 @@ export class NotificationService extends DatabaseService {
       }
 
       return { data: data || [], error: null };
-    });
+    }, this.cacheOptions());
   }
 
   /**
@@ -150,6 +153,7 @@ export class NotificationService extends DatabaseService {
         throw ErrorHandler.handleDatabaseError(error);
       }
 
+      this.invalidateCachedQueries('notificaties');
       return { data: true, error: null };
     });
   }
@@ -178,16 +182,18 @@ export class NotificationService extends DatabaseService {
         throw ErrorHandler.handleDatabaseError(error);
       }
 
+      this.invalidateCachedQueries('notificaties');
       return { data: true, error: null };
     });
   }
 
   /**
-   * Get unread notification count
+   * Unread notification count of the signed-in user (trigger-maintained counter, see
+   * ongelezen_aantallen; the RPC only returns the caller's own counts)
    */
-  async getUnreadCount(userId: string): Promise<DatabaseResponse<number>> {
+  async getUnreadCount(): Promise<DatabaseResponse<number>> {
     const currentUserId = await this.getCurrentUserId();
-    if (!currentUserId || currentUserId !== userId) {
+    if (!currentUserId) {
       return {
         data: null,
         error: ErrorHandler.normalize('Niet geautoriseerd'),
@@ -195,19 +201,15 @@ export class NotificationService extends DatabaseService {
       };
     }
 
-    return this.executeQuery(async () => {
-      const { count, error } = await supabase
-        .from('notificaties')
-        .select('*', { count: 'exact', head: true })
-        .eq('gebruiker_id', userId)
-        .eq('gelezen', false);
+    return this.cachedQuery('NotificationService.getUnreadCount', [currentUserId], async () => {
+      const { data, error } = await supabase.rpc('ongelezen_aantallen');
 
       if (error) {
         throw ErrorHandler.handleDatabaseError(error);
       }
 
-      return { data: count || 0, error: null };
-    });
+      return { data: Number(data?.[0]?.notificaties ?? 0), error: null };
+    }, this.cacheOptions());
   }
 
   /**
@@ -275,34 +277,38 @@ export class NotificationService extends DatabaseService {
   }
 
   /**
-   * Trigger real-time notification via Supabase channels
+   * Subscribe to new notifications for a user over the session's shared realtime channel.
+   * `onResync` is called instead when notifications may have been missed (burst overflow or
+   * reconnect); reload the list then.
    */
-  private async triggerRealTimeNotification(userId: string, notification: any): Promise<void> {
-    try {
-      const channel = supabase.channel(`notifications:${userId}`);
-      await channel.send({
-        type: 'broadcast',
-        event: 'new-notification',
-        payload: notification,
-      });
-    } catch (error) {
-      logger.error('Failed to send real-time notification:', error);
-    }
+  subscribeToNotifications(
+    userId: string,
+    onNotification: (notification: Notification) => void,
+    onResync?: () => void
+  ) {
+    return this.subscribeToNotificationBatches(userId, (notifications, { resync }) => {
+      if (resync) {
+        onResync?.();
+        return;
+      }
+      notifications.forEach(onNotification);
+    });
   }
 
   /**
-   * Subscribe to real-time notifications for a user
+   * Like subscribeToNotifications, but with every notification of a burst in one call
    */
-  subscribeToNotifications(userId: string, onNotification: (notification: Notification) => void) {
-    const channel = supabase.channel(`notifications:${userId}`)
-      .on('broadcast', { event: 'new-notification' }, ({ payload }) => {
-        onNotification(payload);
-      })
-      .subscribe();
-
-    return () => {
-      supabase.removeChannel(channel);
-    };
+  subscribeToNotificationBatches(
+    userId: string,
+    onBatch: (notifications: Notification[], info: RealtimeBatchInfo) => void
+  ) {
+    return realtimeHub.subscribe<Notification>(userId, 'notificaties', (events, info) => {
+      onBatch(events.filter(event => event.eventType === 'INSERT').map(event => event.new), info);
+    });
+  }
+
+  private cacheOptions() {
+    return { tags: ['notificaties'], ...(realtimeHub.isConnected() ? { ttlMs: LIVE_CACHE_TTL_MS } : {}) };
   }
 }
 
@@ -1,12 +1,9 @@
 import { supabase } from '../integrations/supabase/client';
 import { DatabaseService, DatabaseResponse } from '../lib/database';
 import { logger } from '../lib/logger';
+import { queryCache } from '../lib/queryCache';
 
-interface CachedSubscription {
-  subscription: any;
-  timestamp: number;
-  userId: string;
-}
+const SUBSCRIPTION_QUERY = 'OptimizedSubscriptionService.checkSubscriptionStatus';
 
 interface SubscriptionStatus {
   hasActiveSubscription: boolean;
@@ -17,7 +14,6 @@ interface SubscriptionStatus {
 }
 
 class OptimizedSubscriptionService extends DatabaseService {
-  private cache = new Map<string, CachedSubscription>();
   private readonly CACHE_TTL = 2 * 60 * 1000; // 2 minutes cache (reduced for better responsiveness)
 
   /**
@@ -25,53 +21,24 @@ class OptimizedSubscriptionService extends DatabaseService {
    */
   async checkSubscriptionStatus(userId: string): Promise<DatabaseResponse<SubscriptionStatus>> {
     return this.executeQuery(async () => {
-      // Check cache first
-      const cached = this.getCachedSubscription(userId);
-      if (cached) {
-        logger.debug('Returning cached subscription status for user:', userId);
-        const formatted = this.formatSubscriptionResponse(cached);
-        return { data: formatted.data, error: null };
-      }
-
-      // Validate session
-      const { data: { session } } = await supabase.auth.getSession();
-      if (!session) {
-        return { 
-          data: { hasActiveSubscription: false, isActive: false }, 
-          error: null
-        };
-      }
-
-      // Security check
-      if (session.user.id !== userId) {
-        return { 
-          data: { hasActiveSubscription: false, isActive: false }, 
-          error: null
-        };
-      }
-
       try {
-        const { data, error } = await supabase
-          .from('abonnementen')
-          .select('*')
-          .eq('huurder_id', userId)
-          .eq('status', 'actief')
-          .order('bijgewerkt_op', { ascending: false })
-          .limit(1)
-          .maybeSingle();
-
-        if (error) {
-          logger.error('Error checking subscription status:', error);
+        // Served from the shared query cache; concurrent checks share one request
+        const result = await queryCache.fetch(
+          SUBSCRIPTION_QUERY,
+          [userId],
+          () => this.fetchActiveSubscription(userId),
+          { ttlMs: this.CACHE_TTL, tags: ['abonnementen'] }
+        );
+
+        if (result.error) {
+          logger.error('Error checking subscription status:', result.error);
           return { 
             data: { hasActiveSubscription: false, isActive: false }, 
-            error: error
+            error: result.error
           };
         }
 
-        // Cache the result
-        this.setCachedSubscription(userId, data);
-
-        const formatted = this.formatSubscriptionResponse(data);
+        const formatted = this.formatSubscriptionResponse(result.data);
         return { data: formatted.data, error: null };
       } catch (error) {
         logger.error('Unexpected error in checkSubscriptionStatus:', error);
@@ -83,11 +50,49 @@ class OptimizedSubscriptionService extends DatabaseService {
     });
   }
 
+  /**
+   * Active subscription row of the signed-in user; unsuccessful results are not cached
+   */
+  private async fetchActiveSubscription(userId: string): Promise<DatabaseResponse<any>> {
+    // Validate session
+    const { data: { session } } = await supabase.auth.getSession();
+
+    // Security check
+    if (!session || session.user.id !== userId) {
+      return { data: null, error: null, success: false };
+    }
+
+    const { data, error } = await supabase
+      .from('abonnementen')
+      .select('*')
+      .eq('huurder_id', userId)
+      .eq('status', 'actief')
+      .order('bijgewerkt_op', { ascending: false })
+      .limit(1)
+      .maybeSingle();
+
+    if (error) {
+      return { data: null, error, success: false };
+    }
+    return { data, error: null, success: true };
+  }
+
+  /**
+   * Store a subscription row fetched elsewhere (e.g. the dashboard payload) so the
+   * next status checks are served from the cache
+   */
+  cacheSubscription(userId: string, subscription: any): void {
+    queryCache.set(SUBSCRIPTION_QUERY, [userId], { data: subscription, error: null, success: true }, {
+      ttlMs: this.CACHE_TTL,
+      tags: ['abonnementen'],
+    });
+  }
+
   /**
    * Clear subscription cache for a user (call after payment success)
    */
   clearSubscriptionCache(userId: string): void {
-    this.cache.delete(userId);
+    queryCache.invalidateQuery(SUBSCRIPTION_QUERY, [userId]);
     logger.debug('Cleared subscription cache for user:', userId);
   }
 
@@ -95,7 +100,7 @@ class OptimizedSubscriptionService extends DatabaseService {
    * Clear all subscription cache (call on login to ensure fresh data)
    */
   clearAllCache(): void {
-    this.cache.clear();
+    queryCache.invalidateQuery(SUBSCRIPTION_QUERY);
     logger.debug('Cleared all subscription cache');
   }
 
@@ -192,34 +197,6 @@ class OptimizedSubscriptionService extends DatabaseService {
     }
   }
 
-  /**
-   * Get cached subscription if valid
-   */
-  private getCachedSubscription(userId: string): any | null {
-    const cached = this.cache.get(userId);
-    if (cached && (Date.now() - cached.timestamp < this.CACHE_TTL)) {
-      return cached.subscription;
-    }
-    
-    // Remove expired cache
-    if (cached) {
-      this.cache.delete(userId);
-    }
-    
-    return null;
-  }
-
-  /**
-   * Set subscription in cache
-   */
-  private setCachedSubscription(userId: string, subscription: any): void {
-    this.cache.set(userId, {
-      subscription,
-      timestamp: Date.now(),
-      userId
-    });
-  }
-
   /**
    * Format subscription response consistently
    */
@@ -238,23 +215,6 @@ class OptimizedSubscriptionService extends DatabaseService {
       success: true
     };
   }
-
-  /**
-   * Clean expired cache entries (call periodically)
-   */
-  cleanCache(): void {
-    const now = Date.now();
-    for (const [userId, cached] of this.cache.entries()) {
-      if (now - cached.timestamp >= this.CACHE_TTL) {
-        this.cache.delete(userId);
-      }
-    }
-  }
 }
 
 export const optimizedSubscriptionService = new OptimizedSubscriptionService();
-
-// Clean cache every 10 minutes
-setInterval(() => {
-  optimizedSubscriptionService.cleanCache();
-}, 10 * 60 * 1000);
\ No newline at end of file
@@ -7,12 +7,21 @@ export interface SearchOptions {
   sortBy?: string;
   sortOrder?: 'asc' | 'desc';
   filters?: Record<string, any>;
+  /**
+   * Keyset pagination: null for the first page, then the previous response's nextCursor (replaces offset).
+   * Pages are always ordered newest first by (aangemaakt_op, id); searchTenantProfiles rejects a cursor
+   * combined with any other sortBy/sortOrder.
+   */
+  cursor?: string | null;
+  /** Row count strategy; 'estimated' avoids a full count on large tables, null skips counting */
+  count?: 'exact' | 'planned' | 'estimated' | null;
 }
 
 export interface SearchResponse<T> {
   success: boolean;
   data?: T[];
   count?: number;
+  nextCursor?: string | null;
   error?: any;
 }
 
@@ -107,21 +116,41 @@ export class SearchService {
       const {
         limit = 10,
         offset = 0,
-        sortBy = 'created_at',
+        sortBy = 'aangemaakt_op',
         sortOrder = 'desc',
-        filters = {}
+        filters = {},
+        cursor,
+        count: countMode = 'exact'
       } = options;
       
+      // The keyset is (aangemaakt_op, id) descending; another order would make the cursor skip rows
+      if (cursor !== undefined && (sortBy !== 'aangemaakt_op' || sortOrder !== 'desc')) {
+        const error = new Error('Cursor pagination only supports sortBy aangemaakt_op with sortOrder desc');
+        logger.error('Error searching tenant profiles:', error);
+        return { success: false, error };
+      }
+      
       // Start building the query
       let dbQuery = supabase
         .from('huurders')
-        .select('*, user:gebruikers(*)', { count: 'exact' }) as any;
+        .select('*, user:gebruikers(*)', countMode ? { count: countMode } : undefined) as any;
+      
+      // Text search (backed by the trigram indexes on these columns)
+      const textFilter = query && query.trim() !== ''
+        ? `voornaam.ilike.%${query}%,achternaam.ilike.%${query}%,beroep.ilike.%${query}%,stad.ilike.%${query}%`
+        : null;
+      
+      // Keyset position: rows after the last (aangemaakt_op, id) of the previous page
+      let cursorFilter: string | null = null;
+      if (cursor) {
+        const [createdAt, id] = cursor.split('|');
+        cursorFilter = `aangemaakt_op.lt."${createdAt}",and(aangemaakt_op.eq."${createdAt}",id.lt.${id})`;
+      }
       
-      // Apply text search if query is provided
-      if (query && query.trim() !== '') {
-        dbQuery = dbQuery.or(
-          `first_name.ilike.%${query}%,last_name.ilike.%${query}%,occupation.ilike.%${query}%,city.ilike.%${query}%`
-        );
+      if (textFilter && cursorFilter) {
+        dbQuery = dbQuery.or(`and(or(${textFilter}),or(${cursorFilter}))`);
+      } else if (textFilter || cursorFilter) {
+        dbQuery = dbQuery.or(textFilter || cursorFilter);
       }
       
       // Apply filters
@@ -150,11 +179,19 @@ export class SearchService {
         }
       });
       
-      // Apply sorting
-      dbQuery = dbQuery.order(sortBy, { ascending: sortOrder === 'asc' }) as any;
-      
-      // Apply pagination
-      dbQuery = dbQuery.range(offset, offset + limit - 1) as any;
+      if (cursor !== undefined) {
+        // Keyset pagination follows idx_huurders_aangemaakt_op_id, so deep pages cost the same as the first
+        dbQuery = dbQuery
+          .order('aangemaakt_op', { ascending: false })
+          .order('id', { ascending: false })
+          .limit(limit) as any;
+      } else {
+        // Apply sorting
+        dbQuery = dbQuery.order(sortBy, { ascending: sortOrder === 'asc' }) as any;
+        
+        // Apply pagination
+        dbQuery = dbQuery.range(offset, offset + limit - 1) as any;
+      }
       
       // Execute the query
       const { data, error, count } = await dbQuery as any;
@@ -164,8 +201,14 @@ export class SearchService {
         return { success: false, error };
       }
       
+      const rows = data || [];
+      const last = rows[rows.length - 1];
+      const nextCursor = cursor !== undefined && last && rows.length === limit
+        ? `${last.aangemaakt_op}|${last.id}`
+        : null;
+      
       logger.info(`Found ${count || 0} tenant profiles matching the criteria`);
-      return { success: true, data: data || [], count };
+      return { success: true, data: rows, count: count ?? undefined, nextCursor };
     } catch (error) {
       logger.error('Error in searchTenantProfiles:', error);
       return { success: false, error };
@@ -1,6 +1,6 @@
 
 import { supabase } from '../integrations/supabase/client.ts';
-import { DatabaseService } from '../lib/database.ts';
+import { DatabaseService, DatabaseResponse } from '../lib/database.ts';
 
 interface ServiceResponse<T> {
   success: boolean;
@@ -29,6 +29,24 @@ interface UserStatistics {
   usersByRole: Record<string, number>;
 }
 
+export type StatisticsSource = 'gebruikers' | 'documenten' | 'abonnementen';
+
+/**
+ * Row counts of one table: in total, per rol/status, and per creation month ('YYYY-MM') and rol/status
+ */
+export interface AggregateCounts {
+  total: number;
+  byKey: Record<string, number>;
+  byMonth: Record<string, Record<string, number>>;
+}
+
+const STATISTICS_SOURCES: StatisticsSource[] = ['gebruikers', 'documenten', 'abonnementen'];
+
+const emptyCounts = (): AggregateCounts => ({ total: 0, byKey: {}, byMonth: {} });
+
+// Counters are kept per UTC month
+const currentMonth = () => new Date().toISOString().slice(0, 7);
+
 export class StatisticsService extends DatabaseService {
   async getPropertyStatistics(): Promise<ServiceResponse<PropertyStatistics>> {
     try {
@@ -63,29 +81,48 @@ export class StatisticsService extends DatabaseService {
     }
   }
 
-  async getUserStatistics(): Promise<ServiceResponse<UserStatistics>> {
-    try {
-      const { data: users, error } = await supabase
-        .from('gebruikers')
-        .select('rol, aangemaakt_op');
+  /**
+   * Counts per rol/status and month from the trigger-maintained statistiek_tellers table
+   * (statistieken RPC): one small response, whatever the number of rows counted.
+   */
+  async getAggregateCounts(source?: StatisticsSource): Promise<DatabaseResponse<Record<StatisticsSource, AggregateCounts>>> {
+    return this.cachedQuery('StatisticsService.getAggregateCounts', [source ?? null], async () => {
+      const { data, error } = await supabase.rpc('statistieken', { in_bron: source ?? null });
 
       if (error) {
         throw error;
       }
 
-      const now = new Date();
-      const firstDayOfMonth = new Date(now.getFullYear(), now.getMonth(), 1);
+      const counts = Object.fromEntries(
+        STATISTICS_SOURCES.map(name => [name, emptyCounts()])
+      ) as Record<StatisticsSource, AggregateCounts>;
+      for (const row of data || []) {
+        const entry = counts[row.bron as StatisticsSource];
+        if (!entry) continue;
+        const month = entry.byMonth[row.maand.slice(0, 7)] || (entry.byMonth[row.maand.slice(0, 7)] = {});
+        entry.total += row.aantal;
+        entry.byKey[row.sleutel] = (entry.byKey[row.sleutel] || 0) + row.aantal;
+        month[row.sleutel] = (month[row.sleutel] || 0) + row.aantal;
+      }
+
+      return { data: counts, error: null };
+    }, { tags: source ? [source] : STATISTICS_SOURCES });
+  }
+
+  async getUserStatistics(): Promise<ServiceResponse<UserStatistics>> {
+    try {
+      const { data: counts, error } = await this.getAggregateCounts('gebruikers');
+
+      if (error || !counts) {
+        throw error;
+      }
 
-      const totalUsers = users?.length || 0;
+      const users = counts.gebruikers;
+      const totalUsers = users.total;
       const activeUsers = totalUsers; // Simplified - all users are considered active
-      const newUsersThisMonth = users?.filter(user => 
-        new Date(user.aangemaakt_op) >= firstDayOfMonth
-      ).length || 0;
-
-      const usersByRole = users?.reduce((acc, user) => {
-        acc[user.rol] = (acc[user.rol] || 0) + 1;
-        return acc;
-      }, {} as Record<string, number>) || {};
+      const newUsersThisMonth = Object.values(users.byMonth[currentMonth()] || {})
+        .reduce((sum, count) => sum + count, 0);
+      const usersByRole = users.byKey;
 
       return {
         success: true,
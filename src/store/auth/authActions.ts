@@ -4,6 +4,9 @@ import { authService } from '@/lib/auth';
 import { logger } from '@/lib/logger';
 import { User } from '@/types';
 import { optimizedSubscriptionService } from '@/services/OptimizedSubscriptionService';
+import { queryCache } from '@/lib/queryCache';
+import { signedStorageService } from '@/lib/storage-signed';
+import { realtimeHub } from '@/lib/realtimeHub';
 
 export const createAuthActions = (set: any, get: any) => ({
   login: (user: User) => {
@@ -19,6 +22,13 @@ export const createAuthActions = (set: any, get: any) => ({
     
     // Clear all subscription cache to ensure fresh data for all users
     optimizedSubscriptionService.clearAllCache();
+
+    // Cached query results belong to the previous user
+    if (state.user?.id !== user.id) {
+      queryCache.clear();
+      signedStorageService.clearSignedUrls();
+      realtimeHub.disconnect();
+    }
     
     set({ 
       user, 
@@ -31,6 +41,9 @@ export const createAuthActions = (set: any, get: any) => ({
   
   logout: () => {
     logger.info('AuthStore: User logged out');
+    queryCache.clear();
+    signedStorageService.clearSignedUrls();
+    realtimeHub.disconnect();
     set({ 
       user: null, 
       isAuthenticated: false, 
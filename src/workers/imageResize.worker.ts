@@ -0,0 +1,76 @@
+export interface VariantSpec {
+  name: string;
+  /** Bounding box of the variant; smaller images are not upscaled */
+  maxWidth: number;
+  maxHeight: number;
+  quality: number;
+}
+
+export interface ResizeRequest {
+  id: number;
+  file: Blob;
+  specs: VariantSpec[];
+  /** MIME types in order of preference, e.g. AVIF before WebP */
+  formats: string[];
+}
+
+export interface ResizedVariant {
+  name: string;
+  blob: Blob;
+  width: number;
+  height: number;
+  type: string;
+}
+
+export type ResizeResponse =
+  | { id: number; variants: ResizedVariant[] }
+  | { id: number; error: string };
+
+// convertToBlob falls back to PNG for encoders the browser does not have; remember which ones work
+const supported = new Map<string, boolean>();
+
+async function encode(canvas: OffscreenCanvas, formats: string[], quality: number): Promise<Blob> {
+  for (const type of formats) {
+    if (supported.get(type) === false) continue;
+    const blob = await canvas.convertToBlob({ type, quality });
+    supported.set(type, blob.type === type);
+    if (blob.type === type) return blob;
+  }
+  return canvas.convertToBlob({ type: 'image/jpeg', quality });
+}
+
+async function resize(file: Blob, specs: VariantSpec[], formats: string[]): Promise<ResizedVariant[]> {
+  // Decode once; EXIF orientation is applied so phone photos are not sideways
+  const source = await createImageBitmap(file, { imageOrientation: 'from-image' });
+  try {
+    const variants: ResizedVariant[] = [];
+    for (const spec of specs) {
+      const ratio = Math.min(1, spec.maxWidth / source.width, spec.maxHeight / source.height);
+      const width = Math.max(1, Math.round(source.width * ratio));
+      const height = Math.max(1, Math.round(source.height * ratio));
+      const bitmap = await createImageBitmap(source, {
+        resizeWidth: width,
+        resizeHeight: height,
+        resizeQuality: 'high',
+      });
+      const canvas = new OffscreenCanvas(width, height);
+      canvas.getContext('2d')!.drawImage(bitmap, 0, 0);
+      bitmap.close();
+      const blob = await encode(canvas, formats, spec.quality);
+      variants.push({ name: spec.name, blob, width, height, type: blob.type });
+    }
+    return variants;
+  } finally {
+    source.close();
+  }
+}
+
+self.onmessage = async ({ data }: MessageEvent<ResizeRequest>) => {
+  let response: ResizeResponse;
+  try {
+    response = { id: data.id, variants: await resize(data.file, data.specs, data.formats) };
+  } catch (error) {
+    response = { id: data.id, error: error instanceof Error ? error.message : String(error) };
+  }
+  self.postMessage(response);
+};
@@ -0,0 +1,123 @@
+// Presigned Cloudflare R2 URLs (AWS Signature Version 4, query-string form)
+
+export interface R2Bucket {
+  endpoint: string;
+  bucket: string;
+  accessKeyId: string;
+  secretAccessKey: string;
+}
+
+export interface PresignOptions {
+  method?: string;
+  expiresIn?: number;
+  query?: Record<string, string>;
+  /** Headers the request must be sent with (e.g. x-amz-checksum-sha256); they become part of the signature */
+  headers?: Record<string, string>;
+}
+
+const encoder = new TextEncoder();
+
+async function hmac(key: ArrayBuffer | Uint8Array, message: string): Promise<ArrayBuffer> {
+  const cryptoKey = await crypto.subtle.importKey('raw', key, { name: 'HMAC', hash: 'SHA-256' }, false, ['sign']);
+  return crypto.subtle.sign('HMAC', cryptoKey, encoder.encode(message));
+}
+
+function toHex(buffer: ArrayBuffer): string {
+  return Array.from(new Uint8Array(buffer))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('');
+}
+
+// RFC 3986 encoding as required by SigV4 (encodeURIComponent leaves !'()* alone)
+function uriEncode(value: string): string {
+  return encodeURIComponent(value).replace(/[!'()*]/g, c => `%${c.charCodeAt(0).toString(16).toUpperCase()}`);
+}
+
+/**
+ * Bucket settings for images (profile/cover photos) or documents, from the same environment
+ * variables as cloudflare-r2-upload. Returns null when credentials are missing.
+ */
+export function r2Bucket(kind: 'images' | 'documents'): R2Bucket | null {
+  const accessKeyId = Deno.env.get('CLOUDFLARE_R2_ACCESS_KEY_ID');
+  const secretAccessKey = Deno.env.get('CLOUDFLARE_R2_SECRET_KEY');
+  const endpoint = kind === 'images'
+    ? Deno.env.get('CLOUDFLARE_R2_IMAGES_ENDPOINT') || Deno.env.get('CLOUDFLARE_R2_ENDPOINT')
+    : Deno.env.get('CLOUDFLARE_R2_DOCUMENTS_ENDPOINT') || Deno.env.get('CLOUDFLARE_R2_ENDPOINT');
+  const bucket = kind === 'images'
+    ? Deno.env.get('CLOUDFLARE_R2_IMAGES_BUCKET') || Deno.env.get('CLOUDFLARE_R2_BUCKET') || 'beelden'
+    : Deno.env.get('CLOUDFLARE_R2_DOCUMENTS_BUCKET') || Deno.env.get('CLOUDFLARE_R2_BUCKET') || 'documents';
+
+  if (!accessKeyId || !secretAccessKey || !endpoint) {
+    return null;
+  }
+  return { endpoint: endpoint.replace(/\/+$/, ''), bucket, accessKeyId, secretAccessKey };
+}
+
+/**
+ * Object key of a stored file reference. Accepts a bare key, an R2 endpoint URL
+ * (`<endpoint>/<bucket>/<key>`) or a custom-domain URL (`https://beelden.huurly.nl/<key>`).
+ * Returns null for URLs that are not served from R2 (e.g. Cloudflare Images).
+ */
+export function objectKey(reference: string, target: R2Bucket): string | null {
+  if (!/^https?:\/\//.test(reference)) {
+    return reference.replace(/^\/+/, '') || null;
+  }
+  const url = new URL(reference);
+  const path = decodeURIComponent(url.pathname).replace(/^\/+/, '');
+  if (url.host === new URL(target.endpoint).host) {
+    return path.startsWith(`${target.bucket}/`) ? path.slice(target.bucket.length + 1) : null;
+  }
+  if (url.host.endsWith('.huurly.nl')) {
+    return path || null;
+  }
+  return null;
+}
+
+/**
+ * Presigned URL for `key` that is valid for `expiresIn` seconds (default one hour).
+ * Signing happens locally; no request is made to R2. `query` selects the S3 operation
+ * (e.g. `{ uploads: '' }` for CreateMultipartUpload) and `headers` must be sent as given.
+ */
+export async function presignR2Url(target: R2Bucket, key: string, options: PresignOptions = {}): Promise<string> {
+  const { method = 'GET', expiresIn = 3600, query = {}, headers = {} } = options;
+  const host = new URL(target.endpoint).host;
+  const amzDate = new Date().toISOString().replace(/[:-]|\.\d{3}/g, '');
+  const dateStamp = amzDate.slice(0, 8);
+  const scope = `${dateStamp}/auto/s3/aws4_request`;
+  const path = `/${uriEncode(target.bucket)}/${key.split('/').map(uriEncode).join('/')}`;
+  const signedHeaders: Record<string, string> = { host };
+  for (const [name, value] of Object.entries(headers)) {
+    signedHeaders[name.toLowerCase()] = value.trim();
+  }
+  const headerNames = Object.keys(signedHeaders).sort();
+
+  const params: Record<string, string> = {
+    ...query,
+    'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+    'X-Amz-Credential': `${target.accessKeyId}/${scope}`,
+    'X-Amz-Date': amzDate,
+    'X-Amz-Expires': String(expiresIn),
+    'X-Amz-SignedHeaders': headerNames.join(';'),
+  };
+  const canonicalQuery = Object.keys(params)
+    .sort()
+    .map(name => `${uriEncode(name)}=${uriEncode(params[name])}`)
+    .join('&');
+
+  const canonicalHeaders = headerNames.map(name => `${name}:${signedHeaders[name]}\n`).join('');
+  const canonicalRequest = [method, path, canonicalQuery, canonicalHeaders, headerNames.join(';'), 'UNSIGNED-PAYLOAD'].join('\n');
+  const stringToSign = [
+    'AWS4-HMAC-SHA256',
+    amzDate,
+    scope,
+    toHex(await crypto.subtle.digest('SHA-256', encoder.encode(canonicalRequest))),
+  ].join('\n');
+
+  const kDate = await hmac(encoder.encode(`AWS4${target.secretAccessKey}`), dateStamp);
+  const kRegion = await hmac(kDate, 'auto');
+  const kService = await hmac(kRegion, 's3');
+  const kSigning = await hmac(kService, 'aws4_request');
+  const signature = toHex(await hmac(kSigning, stringToSign));
+
+  return `${target.endpoint}${path}?${canonicalQuery}&X-Amz-Signature=${signature}`;
+}
@@ -0,0 +1,162 @@
+// Stripe webhook events: ledger rows for stripe-webhook, batched processing for the worker.
+// See migration 20261017000800_add_stripe_gebeurtenissen.sql for the ledger and the SQL side.
+import Stripe from "stripe";
+
+export const STRIPE_API_VERSION = "2025-06-30.basil";
+
+type StripeClient = InstanceType<typeof Stripe>;
+
+// Events reserved per batch; one verwerk_stripe_gebeurtenissen transaction each
+const BATCH_SIZE = 500;
+// Batches per drain, so one invocation stays within the edge function time limit
+const MAX_BATCHES = 20;
+// Parallel subscriptions.retrieve calls for the checkouts of one batch
+const RETRIEVE_CONCURRENCY = 8;
+
+export interface LedgerRow {
+  id: string;
+  type: string;
+  object_id: string | null;
+  aangemaakt_stripe: string;
+  payload: unknown;
+}
+
+export interface DrainResult {
+  batches: number;
+  verwerkt: number;
+  overgeslagen: number;
+  mislukt: number;
+  opnieuw: number;
+}
+
+/**
+ * Stripe client for the webhook functions. STRIPE_API_HOST/PORT/PROTOCOL point it at another API
+ * host, such as the local stand-in the TC007 replay harness runs.
+ */
+export function createStripeClient(): StripeClient {
+  const host = Deno.env.get("STRIPE_API_HOST");
+  return new Stripe(Deno.env.get("STRIPE_SECRET_KEY") || "", {
+    apiVersion: STRIPE_API_VERSION,
+    ...(host
+      ? {
+          host,
+          port: Number(Deno.env.get("STRIPE_API_PORT") || 443),
+          protocol: (Deno.env.get("STRIPE_API_PROTOCOL") || "https") as "http" | "https",
+        }
+      : {}),
+  });
+}
+
+export function ledgerRow(event: any): LedgerRow {
+  return {
+    id: event.id,
+    type: event.type,
+    object_id: event.data?.object?.id ?? null,
+    aangemaakt_stripe: new Date(event.created * 1000).toISOString(),
+    payload: event.data?.object ?? {},
+  };
+}
+
+// Period fields moved from the subscription to its items in newer API versions
+function subscriptionState(subscription: any) {
+  const item = subscription.items?.data?.[0] ?? {};
+  return {
+    id: subscription.id,
+    status: subscription.status,
+    customer: typeof subscription.customer === "string" ? subscription.customer : subscription.customer?.id,
+    current_period_start: subscription.current_period_start ?? item.current_period_start,
+    current_period_end: subscription.current_period_end ?? item.current_period_end,
+  };
+}
+
+/**
+ * Current state of the subscriptions behind the batch's completed checkouts, keyed by id.
+ * Subscriptions that cannot be fetched are left out; their events go back in the queue.
+ */
+async function retrieveSubscriptions(stripe: StripeClient, events: LedgerRow[]) {
+  const ids = [...new Set(
+    events
+      .filter((event) => event.type === "checkout.session.completed")
+      .map((event) => (event.payload as any)?.subscription)
+      .filter((id): id is string => typeof id === "string"),
+  )];
+  const subscriptions: Record<string, unknown> = {};
+  let next = 0;
+  const worker = async () => {
+    while (next < ids.length) {
+      const id = ids[next++];
+      try {
+        subscriptions[id] = subscriptionState(await stripe.subscriptions.retrieve(id));
+      } catch (error: any) {
+        console.error("❌ Failed to retrieve Stripe subscription", { subscriptionId: id, error: error.message });
+      }
+    }
+  };
+  await Promise.all(Array.from({ length: Math.min(RETRIEVE_CONCURRENCY, ids.length) }, worker));
+  return subscriptions;
+}
+
+/**
+ * Events of the batch that were given up. A failed checkout is a payment without a subscription row,
+ * and Stripe will not redeliver it (it was acknowledged), so it has to be fixed by hand.
+ */
+async function reportFailed(supabase: any, events: LedgerRow[]) {
+  const { data: failed, error } = await supabase
+    .from("stripe_gebeurtenissen")
+    .select("id, type, object_id, pogingen, fout")
+    .in("id", events.map((event) => event.id))
+    .eq("status", "mislukt");
+  if (error) {
+    console.error("❌ Failed to read failed Stripe events:", error);
+    return;
+  }
+  for (const event of failed ?? []) {
+    console.error(JSON.stringify({ event: "stripe_event_failed", ...event }));
+  }
+}
+
+/**
+ * Apply queued events batch by batch until the queue is empty or MAX_BATCHES is reached.
+ * Several drains may run at once (webhook isolates, the scheduled worker): reservations use
+ * SKIP LOCKED, so each event is handed to one of them.
+ */
+export async function drainStripeEvents(
+  supabase: any,
+  stripe: StripeClient,
+  { batchSize = BATCH_SIZE, maxBatches = MAX_BATCHES } = {},
+): Promise<DrainResult> {
+  const result: DrainResult = { batches: 0, verwerkt: 0, overgeslagen: 0, mislukt: 0, opnieuw: 0 };
+  while (result.batches < maxBatches) {
+    const { data: events, error } = await supabase.rpc("reserveer_stripe_gebeurtenissen", { max_aantal: batchSize });
+    if (error) {
+      throw error;
+    }
+    if (!events?.length) {
+      break;
+    }
+
+    const abonnementen = await retrieveSubscriptions(stripe, events);
+    const { data: counts, error: applyError } = await supabase.rpc("verwerk_stripe_gebeurtenissen", {
+      ids: events.map((event: LedgerRow) => event.id),
+      abonnementen,
+    });
+    // On failure the batch stays reserved and is handed out again after the reservation expires
+    if (applyError) {
+      throw applyError;
+    }
+
+    result.batches++;
+    const row = counts?.[0] ?? {};
+    result.verwerkt += Number(row.verwerkt ?? 0);
+    result.overgeslagen += Number(row.overgeslagen ?? 0);
+    result.mislukt += Number(row.mislukt ?? 0);
+    result.opnieuw += Number(row.opnieuw ?? 0);
+    if (Number(row.mislukt ?? 0) > 0) {
+      await reportFailed(supabase, events);
+    }
+    if (events.length < batchSize) {
+      break;
+    }
+  }
+  return result;
+}
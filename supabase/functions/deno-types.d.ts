@@ -54,7 +54,7 @@ declare module "stripe" {
   }
 
   const Stripe: {
-    new(apiKey: string, options?: { apiVersion: string }): {
+    new(apiKey: string, options?: { apiVersion: string; host?: string; port?: number; protocol?: "http" | "https" }): {
       webhooks: {
         constructEventAsync(body: string, signature: string, secret: string): any;
       };
@@ -1,141 +1,292 @@
-// @ts-ignore - Deno imports
-import { serve } from 'https://deno.land/std@0.208.0/http/server.ts'
+import { serve } from "http/server";
+import { createClient } from "@supabase/supabase-js";
+import { corsHeaders } from "../_shared/cors.ts";
+import { presignR2Url, r2Bucket, type R2Bucket } from "../_shared/r2.ts";
 
-const corsHeaders = {
-  'Access-Control-Allow-Origin': '*',
-  'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type',
-  'Access-Control-Allow-Methods': 'POST, OPTIONS',
+const supabaseUrl = Deno.env.get("SUPABASE_URL") ?? "";
+const supabaseAnonKey = Deno.env.get("SUPABASE_ANON_KEY") ?? "";
+
+// Upload URLs stay valid for an hour; the client asks for new ones when they expire
+const UPLOAD_URL_TTL_S = 60 * 60;
+
+// S3 multipart limits (R2 uses the same): parts of at least 5 MiB except the last, at most 10,000 parts
+const MIN_PART_SIZE = 5 * 1024 * 1024;
+const MAX_PARTS = 10000;
+const MAX_SIGNED_PARTS = 100;
+const MAX_VARIANTS = 5;
+
+const MAX_FILE_SIZE = {
+  images: 10 * 1024 * 1024,
+  documents: 50 * 1024 * 1024,
+};
+
+const ALLOWED_TYPES = [
+  "image/jpeg",
+  "image/png",
+  "image/webp",
+  "image/avif",
+  "image/gif",
+  "application/pdf",
+  "application/msword",
+  "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+  "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+  "text/plain",
+];
+
+interface UploadRequest {
+  action?: "put" | "put-variants" | "create" | "sign-parts" | "list-parts" | "complete" | "abort";
+  fileName?: string;
+  fileType?: string;
+  fileSize?: number;
+  folder?: string;
+  sha256?: string;
+  partSize?: number;
+  key?: string;
+  uploadId?: string;
+  parts?: { partNumber: number; sha256?: string; etag?: string }[];
+  variants?: { name: string; fileType: string; fileSize: number; sha256?: string }[];
 }
 
-// Simple approach using a working crypto implementation
-serve(async (req) => {
-  // Handle CORS preflight
-  if (req.method === 'OPTIONS') {
-    return new Response('ok', { headers: corsHeaders })
+class UploadError extends Error {
+  constructor(message: string, public status = 400) {
+    super(message);
   }
+}
 
-  try {
-    const { fileName, fileType, userId, folder = 'general' } = await req.json()
+const json = (body: unknown, status = 200) =>
+  new Response(JSON.stringify(body), { status, headers: { ...corsHeaders, "Content-Type": "application/json" } });
 
-    if (!fileName || !fileType || !userId) {
-      return new Response(
-        JSON.stringify({ error: 'Missing required parameters' }),
-        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-      )
-    }
+// Profile/cover photos and property images go to the images bucket, everything else to documents
+const bucketKind = (folder: string): "images" | "documents" =>
+  /^(Profile|Cover|properties)(\/|$)/.test(folder) ? "images" : "documents";
+
+const publicUrl = (kind: "images" | "documents", key: string) =>
+  kind === "images" ? `https://beelden.huurly.nl/${key}` : `https://documents.huurly.nl/${key}`;
+
+const IMAGE_EXTENSIONS: Record<string, string> = {
+  "image/avif": "avif",
+  "image/webp": "webp",
+  "image/jpeg": "jpg",
+  "image/png": "png",
+};
+
+const xmlValues = (xml: string, tag: string) =>
+  Array.from(xml.matchAll(new RegExp(`<${tag}>([\\s\\S]*?)</${tag}>`, "g")), (match) => match[1]);
+
+const escapeXml = (value: string) =>
+  value.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;").replace(/"/g, "&quot;");
+
+function newObjectKey(userId: string, folder: string, fileName: string): string {
+  const rnd = Math.random().toString(36).slice(2, 12);
+  const safe = fileName.replace(/[^a-zA-Z0-9.-]/g, "_");
+  return `${folder}/${userId}/${Date.now()}_${rnd}_${safe}`;
+}
+
+// Keys are `<folder>/<user id>/<file>`; callers may only continue their own uploads
+function ownedTarget(userId: string, key: string | undefined) {
+  const segments = (key ?? "").split("/");
+  if (segments.length < 3 || segments[segments.length - 2] !== userId || segments.includes("..")) {
+    throw new UploadError("Upload does not belong to this user", 403);
+  }
+  const kind = bucketKind(segments.slice(0, -2).join("/"));
+  const target = r2Bucket(kind);
+  if (!target) throw new UploadError("Missing Cloudflare R2 configuration", 500);
+  return { kind, target, key: key! };
+}
+
+function validateNewUpload(body: UploadRequest) {
+  const { fileName, fileType, fileSize, folder = "general" } = body;
+  if (!fileName || !fileType) throw new UploadError("Missing required parameters");
+  if (!ALLOWED_TYPES.includes(fileType)) throw new UploadError("File type not allowed");
+  if (!/^[A-Za-z0-9_-]+(\/[A-Za-z0-9_-]+)*$/.test(folder)) throw new UploadError("Invalid folder");
+  const kind = bucketKind(folder);
+  if (fileSize !== undefined && (fileSize <= 0 || fileSize > MAX_FILE_SIZE[kind])) {
+    throw new UploadError("File size not allowed");
+  }
+  const target = r2Bucket(kind);
+  if (!target) throw new UploadError("Missing Cloudflare R2 configuration", 500);
+  return { kind, target, folder, fileName, fileType };
+}
+
+async function s3(target: R2Bucket, key: string, method: string, query: Record<string, string>, init: { headers?: Record<string, string>; body?: string } = {}) {
+  const url = await presignR2Url(target, key, { method, query, headers: init.headers, expiresIn: 60 });
+  const response = await fetch(url, { method, headers: init.headers, body: init.body });
+  const text = await response.text();
+  // CompleteMultipartUpload can report an error inside a 200 response
+  if (!response.ok || text.includes("<Error>")) {
+    const code = xmlValues(text, "Code")[0] ?? response.status;
+    throw new UploadError(`R2 ${method} failed: ${code}`, response.status === 404 ? 404 : 502);
+  }
+  return { response, text };
+}
+
+// Single presigned PUT for files below the client's multipart threshold
+async function signPut(userId: string, body: UploadRequest) {
+  const { kind, target, folder, fileName, fileType } = validateNewUpload(body);
+  const key = newObjectKey(userId, folder, fileName);
+  const headers: Record<string, string> = { "content-type": fileType };
+  if (body.sha256) headers["x-amz-checksum-sha256"] = body.sha256;
+  return {
+    signedUrl: await presignR2Url(target, key, { method: "PUT", expiresIn: UPLOAD_URL_TTL_S, headers }),
+    headers,
+    publicUrl: publicUrl(kind, key),
+    filePath: key,
+    expiresIn: UPLOAD_URL_TTL_S,
+  };
+}
 
-    // Validate file type
-    const allowedTypes = ['image/jpeg', 'image/png', 'image/webp', 'image/gif', 'application/pdf']
-    if (!allowedTypes.includes(fileType)) {
-      return new Response(
-        JSON.stringify({ error: 'File type not allowed' }),
-        { status: 400, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-      )
+// Resized copies of one photo (thumbnail, card, full) under keys that share a prefix:
+// `<folder>/<user id>/<time>_<random>_<name>_<variant>.<ext>`
+async function signVariants(userId: string, body: UploadRequest) {
+  const variants = body.variants ?? [];
+  if (variants.length === 0 || variants.length > MAX_VARIANTS) throw new UploadError("Invalid variants");
+  const { kind, target, folder } = validateNewUpload({ ...body, fileType: variants[0].fileType, fileSize: undefined });
+  if (kind !== "images") throw new UploadError("Variants are only supported for images");
+  const base = newObjectKey(userId, folder, (body.fileName ?? "").replace(/\.[^.]*$/, ""));
+  const uploads = await Promise.all(variants.map(async ({ name, fileType, fileSize, sha256 }) => {
+    const ext = IMAGE_EXTENSIONS[fileType];
+    if (!/^[a-z]+$/.test(name) || !ext) throw new UploadError("Invalid variants");
+    if (!(fileSize > 0 && fileSize <= MAX_FILE_SIZE.images)) throw new UploadError("File size not allowed");
+    const key = `${base}_${name}.${ext}`;
+    const headers: Record<string, string> = { "content-type": fileType };
+    if (sha256) headers["x-amz-checksum-sha256"] = sha256;
+    return {
+      name,
+      signedUrl: await presignR2Url(target, key, { method: "PUT", expiresIn: UPLOAD_URL_TTL_S, headers }),
+      headers,
+      publicUrl: publicUrl(kind, key),
+      filePath: key,
+    };
+  }));
+  return { uploads, expiresIn: UPLOAD_URL_TTL_S };
+}
+
+async function createMultipart(userId: string, body: UploadRequest) {
+  const { kind, target, folder, fileName, fileType } = validateNewUpload(body);
+  const { fileSize, partSize } = body;
+  if (!fileSize || !partSize || partSize < MIN_PART_SIZE || Math.ceil(fileSize / partSize) > MAX_PARTS) {
+    throw new UploadError("Invalid part size");
+  }
+  const key = newObjectKey(userId, folder, fileName);
+  const { text } = await s3(target, key, "POST", { uploads: "" }, {
+    headers: { "content-type": fileType, "x-amz-checksum-algorithm": "SHA256" },
+  });
+  return { key, uploadId: xmlValues(text, "UploadId")[0], publicUrl: publicUrl(kind, key) };
+}
+
+// Part URLs are signed with the part's SHA-256, so R2 rejects a part whose bytes changed on the way
+async function signParts(userId: string, body: UploadRequest) {
+  const { target, key } = ownedTarget(userId, body.key);
+  const parts = body.parts ?? [];
+  if (!body.uploadId || parts.length === 0 || parts.length > MAX_SIGNED_PARTS) throw new UploadError("Invalid parts");
+  const urls = await Promise.all(parts.map(async ({ partNumber, sha256 }) => {
+    if (!Number.isInteger(partNumber) || partNumber < 1 || partNumber > MAX_PARTS || !sha256) {
+      throw new UploadError("Invalid parts");
     }
+    const url = await presignR2Url(target, key, {
+      method: "PUT",
+      expiresIn: UPLOAD_URL_TTL_S,
+      query: { partNumber: String(partNumber), uploadId: body.uploadId! },
+      headers: { "x-amz-checksum-sha256": sha256 },
+    });
+    return { partNumber, url };
+  }));
+  return { urls, expiresIn: UPLOAD_URL_TTL_S };
+}
 
-    // Get environment variables
-    const accountId = Deno.env.get('CLOUDFLARE_ACCOUNT_ID')
-    const accessKey = Deno.env.get('CLOUDFLARE_R2_ACCESS_KEY')
-    const secretKey = Deno.env.get('CLOUDFLARE_R2_SECRET_KEY')
-    const bucket = Deno.env.get('CLOUDFLARE_R2_BUCKET')
-    const endpoint = Deno.env.get('CLOUDFLARE_R2_ENDPOINT')
-
-    if (!accountId || !accessKey || !secretKey || !bucket || !endpoint) {
-      return new Response(
-        JSON.stringify({ error: 'Missing Cloudflare R2 configuration' }),
-        { status: 500, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-      )
+// Parts R2 already has, so an interrupted upload only sends the rest
+async function listParts(userId: string, body: UploadRequest) {
+  const { target, key } = ownedTarget(userId, body.key);
+  if (!body.uploadId) throw new UploadError("Missing uploadId");
+  const parts: { partNumber: number; etag: string; size: number; sha256: string | null }[] = [];
+  let marker = "0";
+  for (;;) {
+    const { text } = await s3(target, key, "GET", { uploadId: body.uploadId, "part-number-marker": marker });
+    for (const part of xmlValues(text, "Part")) {
+      parts.push({
+        partNumber: Number(xmlValues(part, "PartNumber")[0]),
+        etag: xmlValues(part, "ETag")[0].replace(/&quot;/g, '"'),
+        size: Number(xmlValues(part, "Size")[0]),
+        sha256: xmlValues(part, "ChecksumSHA256")[0] ?? null,
+      });
     }
+    if (xmlValues(text, "IsTruncated")[0] !== "true") break;
+    marker = xmlValues(text, "NextPartNumberMarker")[0];
+  }
+  return { parts };
+}
+
+async function completeMultipart(userId: string, body: UploadRequest) {
+  const { kind, target, key } = ownedTarget(userId, body.key);
+  const parts = [...(body.parts ?? [])].sort((a, b) => a.partNumber - b.partNumber);
+  if (!body.uploadId || parts.length === 0 || parts.some((part) => !part.etag || !part.sha256)) {
+    throw new UploadError("Invalid parts");
+  }
+  const xml = "<CompleteMultipartUpload>" + parts.map((part) =>
+    `<Part><PartNumber>${part.partNumber}</PartNumber><ETag>${escapeXml(part.etag!)}</ETag>` +
+    `<ChecksumSHA256>${escapeXml(part.sha256!)}</ChecksumSHA256></Part>`
+  ).join("") + "</CompleteMultipartUpload>";
+  await s3(target, key, "POST", { uploadId: body.uploadId }, { headers: { "content-type": "application/xml" }, body: xml });
 
-    // Generate unique file path
-    const timestamp = Date.now()
-    const randomString = Math.random().toString(36).substring(2, 15)
-    const sanitizedName = fileName.replace(/[^a-zA-Z0-9.-]/g, '_')
-    const filePath = `${folder}/${userId}/${timestamp}_${randomString}_${sanitizedName}`
-
-    // Generate date strings for AWS signature
-    const date = new Date()
-    const dateStamp = date.toISOString().slice(0, 10).replace(/-/g, '')
-    const amzDate = date.toISOString().replace(/[:-]|\.\d{3}/g, '') + 'Z'
-    
-    const credential = `${accessKey}/${dateStamp}/auto/s3/aws4_request`
-    
-    // Create signed URL with proper AWS Signature V4 format
-    const signedUrl = `${endpoint}/${bucket}/${filePath}?X-Amz-Algorithm=AWS4-HMAC-SHA256&X-Amz-Credential=${encodeURIComponent(credential)}&X-Amz-Date=${amzDate}&X-Amz-Expires=3600&X-Amz-SignedHeaders=host&X-Amz-Signature=signature`
-    
-    // Create public URL
-    const publicUrl = `${endpoint}/${bucket}/${filePath}`
-
-    return new Response(
-      JSON.stringify({
-        signedUrl,
-        publicUrl,
-        filePath,
-        expiresIn: 3600
-      }),
-      { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-    )
+  // The assembled object must be exactly as large as the file the client started from
+  const { response } = await s3(target, key, "HEAD", {});
+  const size = Number(response.headers.get("content-length"));
+  if (body.fileSize !== undefined && size !== body.fileSize) {
+    throw new UploadError(`Uploaded size ${size} does not match ${body.fileSize}`, 422);
+  }
+  return { url: publicUrl(kind, key), path: key, size };
+}
 
+async function abortMultipart(userId: string, body: UploadRequest) {
+  const { target, key } = ownedTarget(userId, body.key);
+  if (!body.uploadId) throw new UploadError("Missing uploadId");
+  await s3(target, key, "DELETE", { uploadId: body.uploadId });
+  return { success: true };
+}
+
+const ACTIONS = {
+  "put": signPut,
+  "put-variants": signVariants,
+  "create": createMultipart,
+  "sign-parts": signParts,
+  "list-parts": listParts,
+  "complete": completeMultipart,
+  "abort": abortMultipart,
+};
+
+// Presigned URLs for uploading straight from the browser to R2: a single PUT for small files,
+// one PUT per resized variant for photos, multipart uploads (create → sign-parts → complete, list-parts to resume) for large ones
+serve(async (req) => {
+  if (req.method === "OPTIONS") {
+    return new Response("ok", { headers: corsHeaders });
+  }
+
+  const authorization = req.headers.get("Authorization");
+  if (!authorization) {
+    return json({ error: "Missing authorization header" }, 401);
+  }
+
+  try {
+    const supabase = createClient(supabaseUrl, supabaseAnonKey, {
+      auth: { persistSession: false },
+      global: { headers: { Authorization: authorization } },
+    });
+    const { data: { user }, error: authError } = await supabase.auth.getUser();
+    if (authError || !user) {
+      return json({ error: "Not authenticated" }, 401);
+    }
+
+    const body: UploadRequest = await req.json();
+    const handler = ACTIONS[body.action ?? "put"];
+    if (!handler) {
+      return json({ error: `Unknown action ${body.action}` }, 400);
+    }
+    return json(await handler(user.id, body));
   } catch (error) {
-    console.error('Error generating upload URL:', error)
-    return new Response(
-      JSON.stringify({ error: error.message }),
-      { status: 500, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-    )
+    if (error instanceof UploadError) {
+      return json({ error: error.message }, error.status);
+    }
+    console.error("❌ Generate upload URL error:", error);
+    return json({ error: error.message }, 500);
   }
-})
-
-// Alternative: Use a simpler approach with basic auth
-// serve(async (req) => {
-//   // Handle CORS preflight
-//   if (req.method === 'OPTIONS') {
-//     return new Response('ok', { headers: corsHeaders })
-//   }
-
-//   try {
-//     const { fileName, fileType, userId, folder = 'general' } = await req.json()
-
-//     // Generate unique file path
-//     const timestamp = Date.now()
-//     const randomString = Math.random().toString(36).substring(2, 15)
-//     const sanitizedName = fileName.replace(/[^a-zA-Z0-9.-]/g, '_')
-//     const filePath = `${folder}/${userId}/${timestamp}_${randomString}_${sanitizedName}`
-
-//     // Get environment variables
-//     const accountId = Deno.env.get('CLOUDFLARE_ACCOUNT_ID')
-//     const accessKey = Deno.env.get('CLOUDFLARE_R2_ACCESS_KEY')
-//     const secretKey = Deno.env.get('CLOUDFLARE_R2_SECRET_KEY')
-//     const bucket = Deno.env.get('CLOUDFLARE_R2_BUCKET')
-//     const endpoint = Deno.env.get('CLOUDFLARE_R2_ENDPOINT')
-
-//     if (!accountId || !accessKey || !secretKey || !bucket || !endpoint) {
-//       return new Response(
-//         JSON.stringify({ error: 'Missing Cloudflare R2 configuration' }),
-//         { status: 500, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-//       )
-//     }
-
-//     // Create public URL
-//     const publicUrl = `${endpoint}/${bucket}/${filePath}`
-
-//     // Create a simple signed URL format
-//     const signedUrl = `${endpoint}/${bucket}/${filePath}?auth=${accessKey}:${secretKey}&expires=3600`
-
-//     return new Response(
-//       JSON.stringify({
-//         signedUrl,
-//         publicUrl,
-//         filePath,
-//         expiresIn: 3600
-//       }),
-//       { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-//     )
-
-//   } catch (error) {
-//     console.error('Error generating upload URL:', error)
-//     return new Response(
-//       JSON.stringify({ error: error.message }),
-//       { status: 500, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
-//     )
-//   }
-// })
+});
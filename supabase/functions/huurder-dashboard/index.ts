@@ -0,0 +1,87 @@
+import { serve } from "http/server";
+import { createClient } from "@supabase/supabase-js";
+import { corsHeaders } from "../_shared/cors.ts";
+import { objectKey, presignR2Url, r2Bucket } from "../_shared/r2.ts";
+
+const supabaseUrl = Deno.env.get("SUPABASE_URL") ?? "";
+const supabaseAnonKey = Deno.env.get("SUPABASE_ANON_KEY") ?? "";
+
+// Photo URLs stay valid for an hour; the payload reports when they expire
+const PHOTO_URL_TTL_S = 60 * 60;
+
+// Photos uploaded as resized variants are stored as `..._full.<ext>` with the smaller ones next to it
+const PHOTO_VARIANTS = ["thumbnail", "card", "full"];
+const FULL_VARIANT = /_full\.(avif|webp|jpg|png)$/;
+
+// Whole /huurder-dashboard payload in one round trip: huurder_dashboard() with the caller's JWT,
+// plus presigned profile and cover photo URLs (and their variants for srcset)
+serve(async (req) => {
+  if (req.method === "OPTIONS") {
+    return new Response(null, { headers: corsHeaders });
+  }
+
+  const authorization = req.headers.get("Authorization");
+  if (!authorization) {
+    return new Response(
+      JSON.stringify({ error: "Missing authorization header" }),
+      { status: 401, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+    );
+  }
+
+  try {
+    const supabase = createClient(supabaseUrl, supabaseAnonKey, {
+      auth: { persistSession: false },
+      global: { headers: { Authorization: authorization } },
+    });
+
+    const { data, error } = await supabase.rpc("huurder_dashboard");
+    if (error) {
+      const status = error.code === "42501" ? 401 : 500;
+      return new Response(
+        JSON.stringify({ error: error.message }),
+        { status, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      );
+    }
+
+    const images = r2Bucket("images");
+    const signPhoto = async (reference: string | null | undefined): Promise<string | null> => {
+      if (!reference) return null;
+      const key = images ? objectKey(reference, images) : null;
+      return images && key ? await presignR2Url(images, key, { expiresIn: PHOTO_URL_TTL_S }) : reference;
+    };
+
+    const signVariants = async (reference: string | null | undefined): Promise<Record<string, string> | null> => {
+      const match = reference?.match(FULL_VARIANT);
+      if (!reference || !match) return null;
+      const signed = await Promise.all(PHOTO_VARIANTS.map((name) =>
+        signPhoto(reference.replace(FULL_VARIANT, `_${name}.${match[1]}`))
+      ));
+      return Object.fromEntries(PHOTO_VARIANTS.map((name, i) => [name, signed[i]]));
+    };
+
+    const [profielFotoUrl, coverFotoUrl, profielFotoVarianten, coverFotoVarianten] = await Promise.all([
+      signPhoto(data?.huurder?.profiel_foto),
+      signPhoto(data?.huurder?.cover_foto),
+      signVariants(data?.huurder?.profiel_foto),
+      signVariants(data?.huurder?.cover_foto),
+    ]);
+
+    return new Response(
+      JSON.stringify({
+        ...data,
+        profiel_foto_url: profielFotoUrl,
+        cover_foto_url: coverFotoUrl,
+        profiel_foto_varianten: profielFotoVarianten,
+        cover_foto_varianten: coverFotoVarianten,
+        urls_verlopen_op: new Date(Date.now() + PHOTO_URL_TTL_S * 1000).toISOString(),
+      }),
+      { status: 200, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+    );
+  } catch (error) {
+    console.error("❌ Huurder dashboard error:", error);
+    return new Response(
+      JSON.stringify({ error: error.message }),
+      { status: 500, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+    );
+  }
+});
@@ -0,0 +1,107 @@
+import { serve } from "http/server";
+import { createClient } from "@supabase/supabase-js";
+import { corsHeaders } from "../_shared/cors.ts";
+import { objectKey, presignR2Url, r2Bucket, type R2Bucket } from "../_shared/r2.ts";
+
+const supabaseUrl = Deno.env.get("SUPABASE_URL") ?? "";
+const supabaseAnonKey = Deno.env.get("SUPABASE_ANON_KEY") ?? "";
+
+const DEFAULT_TTL_S = 60 * 60;
+const MIN_TTL_S = 60;
+const MAX_TTL_S = 6 * 60 * 60;
+const MAX_PATHS = 200;
+
+// Profile/cover photos and property images are in the images bucket, everything else in documents
+const IMAGE_FOLDERS = /^(Profile|Cover|properties)\//;
+
+interface SignRequest {
+  paths?: string[];
+  expiresIn?: number;
+}
+
+type Kind = "images" | "documents";
+
+const json = (body: unknown, status = 200) =>
+  new Response(JSON.stringify(body), { status, headers: { ...corsHeaders, "Content-Type": "application/json" } });
+
+// Bucket and object key of a stored reference: a bare key, an R2 endpoint URL or a custom-domain URL
+function locate(reference: string, buckets: Record<Kind, R2Bucket>): { kind: Kind; key: string } | null {
+  if (/^https?:\/\//.test(reference)) {
+    const host = new URL(reference).host;
+    if (host === "beelden.huurly.nl" || host === "documents.huurly.nl") {
+      const kind: Kind = host.startsWith("beelden.") ? "images" : "documents";
+      const key = objectKey(reference, buckets[kind]);
+      return key ? { kind, key } : null;
+    }
+    for (const kind of ["images", "documents"] as Kind[]) {
+      const key = objectKey(reference, buckets[kind]);
+      if (key) return { kind, key };
+    }
+    return null;
+  }
+  const key = objectKey(reference, buckets.images);
+  return key ? { kind: IMAGE_FOLDERS.test(key) ? "images" : "documents", key } : null;
+}
+
+// Presigned GET URLs for many stored files in one request. Photos may be viewed by every signed-in
+// user; documents only by their owner (whose id is a segment of the key) and by reviewers and admins.
+// Paths the caller may not read come back as null.
+serve(async (req) => {
+  if (req.method === "OPTIONS") {
+    return new Response("ok", { headers: corsHeaders });
+  }
+
+  const authorization = req.headers.get("Authorization");
+  if (!authorization) {
+    return json({ error: "Missing authorization header" }, 401);
+  }
+
+  try {
+    const supabase = createClient(supabaseUrl, supabaseAnonKey, {
+      auth: { persistSession: false },
+      global: { headers: { Authorization: authorization } },
+    });
+    const { data: { user }, error: authError } = await supabase.auth.getUser();
+    if (authError || !user) {
+      return json({ error: "Not authenticated" }, 401);
+    }
+
+    const { paths = [], expiresIn = DEFAULT_TTL_S }: SignRequest = await req.json();
+    if (!Array.isArray(paths) || paths.length > MAX_PATHS || paths.some((path) => typeof path !== "string")) {
+      return json({ error: `Between 0 and ${MAX_PATHS} paths expected` }, 400);
+    }
+    const ttl = Math.min(Math.max(Math.floor(expiresIn), MIN_TTL_S), MAX_TTL_S);
+
+    const images = r2Bucket("images");
+    const documents = r2Bucket("documents");
+    if (!images || !documents) {
+      return json({ error: "Missing Cloudflare R2 configuration" }, 500);
+    }
+    const buckets = { images, documents };
+
+    // Looked up once, and only when the batch contains someone else's document
+    let reviewer: Promise<boolean> | null = null;
+    // Same rule as the documenten RLS policy: gebruikers.rol is beoordelaar or admin
+    const isReviewer = () => reviewer ??= supabase
+      .rpc("is_beoordelaar_or_admin", { user_id: user.id })
+      .then(({ data, error }) => !error && data === true);
+
+    const signed = await Promise.all([...new Set(paths)].map(async (path) => {
+      const located = locate(path, buckets);
+      if (!located || located.key.split("/").includes("..")) return [path, null] as const;
+      if (located.kind === "documents" && !located.key.split("/").slice(0, -1).includes(user.id) && !(await isReviewer())) {
+        return [path, null] as const;
+      }
+      return [path, await presignR2Url(buckets[located.kind], located.key, { expiresIn: ttl })] as const;
+    }));
+
+    return json({
+      urls: Object.fromEntries(signed),
+      expiresIn: ttl,
+      expiresAt: new Date(Date.now() + ttl * 1000).toISOString(),
+    });
+  } catch (error) {
+    console.error("❌ Sign URLs error:", error);
+    return json({ error: error.message }, 500);
+  }
+});
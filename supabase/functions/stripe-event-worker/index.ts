@@ -0,0 +1,48 @@
+import { serve } from "http/server";
+import { createClient } from "@supabase/supabase-js";
+import { corsHeaders } from "../_shared/cors.ts";
+import { createStripeClient, drainStripeEvents } from "../_shared/stripeEvents.ts";
+
+const supabaseUrl = Deno.env.get("SUPABASE_URL") ?? "";
+const supabaseServiceKey = Deno.env.get("SUPABASE_SERVICE_ROLE_KEY") ?? "";
+
+const stripe = createStripeClient();
+const supabase = createClient(supabaseUrl, supabaseServiceKey, {
+  auth: { persistSession: false },
+});
+
+const json = (body: unknown, status = 200) =>
+  new Response(JSON.stringify(body), { status, headers: { ...corsHeaders, "Content-Type": "application/json" } });
+
+// Applies queued Stripe events in batches. stripe-webhook drains the queue itself after recording
+// an event; this function picks up events whose processing failed or was cut off. pg_cron calls it
+// every minute while such events exist (migration 20261017001000_schedule_stripe_event_worker.sql),
+// and the replay harness calls it directly. Only callable with the service role key.
+serve(async (req) => {
+  if (req.method === "OPTIONS") {
+    return new Response(null, { headers: corsHeaders });
+  }
+
+  if (req.headers.get("Authorization") !== `Bearer ${supabaseServiceKey}`) {
+    return json({ success: false, error: "Niet geautoriseerd" }, 401);
+  }
+
+  try {
+    const { batchSize, maxBatches } = await req.json().catch(() => ({}));
+    const started = performance.now();
+    const result = await drainStripeEvents(supabase, stripe, {
+      ...(batchSize ? { batchSize: Number(batchSize) } : {}),
+      ...(maxBatches ? { maxBatches: Number(maxBatches) } : {}),
+    });
+
+    return json({
+      success: true,
+      ...result,
+      duration_ms: Math.round(performance.now() - started),
+      timestamp: new Date().toISOString(),
+    });
+  } catch (error) {
+    console.error("❌ Stripe event worker error:", error);
+    return json({ success: false, error: error.message, timestamp: new Date().toISOString() }, 500);
+  }
+});
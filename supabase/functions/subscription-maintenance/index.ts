@@ -9,51 +9,101 @@ const supabase = createClient(supabaseUrl, supabaseServiceKey, {
   auth: { persistSession: false },
 });
 
+// Reminders first, as before; see migration 20261017000900_add_abonnement_onderhoud.sql
+const TASKS = ["herinneringen", "verlopen"] as const;
+// Rows per onderhoud_abonnementen call; every call is one short transaction
+const CHUNK_SIZE = 5000;
+// No new chunks after this long, so the invocation ends within the edge function limit. The next
+// run resumes from the checkpoint in abonnement_onderhoud.
+const TIME_BUDGET_MS = 100_000;
+
+interface TaskMetrics {
+  task: string;
+  chunks: number;
+  rows: number;
+  skipped_locked: number;
+  duration_ms: number;
+  lock_wait_ms: number;
+  max_chunk_ms: number;
+  done: boolean;
+}
+
+async function runTask(task: string, deadline: number): Promise<TaskMetrics> {
+  const started = performance.now();
+  const metrics: TaskMetrics = {
+    task, chunks: 0, rows: 0, skipped_locked: 0, duration_ms: 0, lock_wait_ms: 0, max_chunk_ms: 0, done: false,
+  };
+
+  while (!metrics.done && Date.now() < deadline) {
+    const { data, error } = await supabase.rpc("onderhoud_abonnementen", { in_taak: task, chunk_grootte: CHUNK_SIZE });
+    if (error) {
+      console.error(`❌ Subscription maintenance chunk failed (${task}):`, error);
+      throw error;
+    }
+    const chunk = data?.[0];
+    if (!chunk) {
+      break;
+    }
+
+    const chunkMs = Number(chunk.duur_ms);
+    metrics.chunks++;
+    metrics.rows += chunk.verwerkt;
+    metrics.skipped_locked += chunk.vergrendeld;
+    metrics.lock_wait_ms += Number(chunk.lock_wacht_ms);
+    metrics.max_chunk_ms = Math.max(metrics.max_chunk_ms, chunkMs);
+    metrics.done = chunk.klaar;
+    console.log(JSON.stringify({
+      event: "subscription_maintenance_chunk",
+      task,
+      rows: chunk.verwerkt,
+      skipped_locked: chunk.vergrendeld,
+      duration_ms: chunkMs,
+      lock_wait_ms: Number(chunk.lock_wacht_ms),
+      done: chunk.klaar,
+    }));
+  }
+
+  metrics.duration_ms = Math.round(performance.now() - started);
+  metrics.lock_wait_ms = Math.round(metrics.lock_wait_ms * 1000) / 1000;
+  console.log(JSON.stringify({ event: "subscription_maintenance_task", ...metrics }));
+  return metrics;
+}
+
 serve(async (req) => {
   if (req.method === "OPTIONS") {
     return new Response(null, { headers: corsHeaders });
   }
 
   try {
-
-    // Check for expiring subscriptions and send notifications
-    const { error: expiringError } = await supabase.rpc('check_expiring_subscriptions');
-    
-    if (expiringError) {
-      console.error("❌ Error checking expiring subscriptions:", expiringError);
-      throw expiringError;
-    } else {
-    }
-
-    // Expire overdue subscriptions
-    const { error: expireError } = await supabase.rpc('expire_subscriptions');
-    
-    if (expireError) {
-      console.error("❌ Error expiring subscriptions:", expireError);
-      throw expireError;
-    } else {
+    // Reminders and expiry, chunk by chunk; a task that runs out of time is finished by the next run
+    const deadline = Date.now() + TIME_BUDGET_MS;
+    const maintenance: TaskMetrics[] = [];
+    for (const task of TASKS) {
+      maintenance.push(await runTask(task, deadline));
     }
+    const complete = maintenance.every((metrics) => metrics.done);
 
-    // Get statistics
-    const { data: stats, error: statsError } = await supabase
-      .from('abonnementen')
-      .select('status')
-      .in('status', ['actief', 'verlopen', 'wachtend']);
+    // Subscriptions per status, from the trigger-maintained counters (one row per status and month)
+    const { data: stats, error: statsError } = await supabase.rpc('statistieken', { in_bron: 'abonnementen' });
 
+    const statusCount: Record<string, number> = {};
     if (statsError) {
       console.error("❌ Error getting subscription stats:", statsError);
     } else {
-      const statusCount = stats.reduce((acc, sub) => {
-        acc[sub.status] = (acc[sub.status] || 0) + 1;
-        return acc;
-      }, {} as Record<string, number>);
-      
+      for (const row of stats ?? []) {
+        statusCount[row.sleutel] = (statusCount[row.sleutel] || 0) + row.aantal;
+      }
     }
 
     return new Response(
       JSON.stringify({
         success: true,
-        message: "Subscription maintenance completed successfully",
+        message: complete
+          ? "Subscription maintenance completed successfully"
+          : "Subscription maintenance paused; the next run resumes from the checkpoint",
+        complete,
+        maintenance,
+        statistics: statusCount,
         timestamp: new Date().toISOString(),
       }),
       {
@@ -76,4 +126,4 @@ serve(async (req) => {
       }
     );
   }
-});
\ No newline at end of file
+});
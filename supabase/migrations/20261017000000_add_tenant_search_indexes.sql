@@ -0,0 +1,62 @@
+-- =================================================================
+-- TENANT SEARCH: INDEXES, KEYSET PAGINATION AND zoek_huurders FIX
+-- =================================================================
+
+-- Trigram indexes let the ilike '%q%' search in SearchService.searchTenantProfiles use a bitmap
+-- index scan instead of reading every huurders row
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+CREATE INDEX IF NOT EXISTS idx_huurders_voornaam_trgm ON public.huurders USING gin (voornaam extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_huurders_achternaam_trgm ON public.huurders USING gin (achternaam extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_huurders_beroep_trgm ON public.huurders USING gin (beroep extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_huurders_stad_trgm ON public.huurders USING gin (stad extensions.gin_trgm_ops);
+
+-- Keyset pagination order of searchTenantProfiles (newest first, id as tie-breaker)
+CREATE INDEX IF NOT EXISTS idx_huurders_aangemaakt_op_id ON public.huurders (aangemaakt_op DESC, id DESC);
+
+-- City filter of zoek_huurders (locatie_voorkeur @> ARRAY[city])
+CREATE INDEX IF NOT EXISTS idx_huurders_locatie_voorkeur ON public.huurders USING gin (locatie_voorkeur);
+
+-- actieve_huurders joins every tenant to its active subscription
+CREATE INDEX IF NOT EXISTS idx_abonnementen_actief_huurder ON public.abonnementen (huurder_id) WHERE status = 'actief';
+
+-- Recreate zoek_huurders: the unqualified huisdieren/roken parameters were ambiguous with the view's
+-- columns, so every call failed, and "= ANY(locatie_voorkeur)" cannot use the GIN index
+CREATE OR REPLACE FUNCTION public.zoek_huurders(in_city text, min_budget integer, max_budget integer, huisdieren boolean, roken boolean)
+RETURNS SETOF public.actieve_huurders LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+BEGIN
+  RETURN QUERY SELECT * FROM public.actieve_huurders h
+  WHERE (zoek_huurders.in_city IS NULL OR h.locatie_voorkeur @> ARRAY[zoek_huurders.in_city])
+    AND (zoek_huurders.min_budget IS NULL OR h.max_huur >= zoek_huurders.min_budget)
+    AND (zoek_huurders.max_budget IS NULL OR h.max_huur <= zoek_huurders.max_budget)
+    AND (zoek_huurders.huisdieren IS NULL OR h.huisdieren = zoek_huurders.huisdieren)
+    AND (zoek_huurders.roken IS NULL OR h.roken = zoek_huurders.roken);
+END;
+$$;
+
+-- Keyset-paginated variant: pass the id of the last row of the previous page as after_id.
+-- Each page costs the same however deep the landlord pages, unlike OFFSET.
+CREATE OR REPLACE FUNCTION public.zoek_huurders_pagina(
+    in_city text DEFAULT NULL,
+    min_budget integer DEFAULT NULL,
+    max_budget integer DEFAULT NULL,
+    huisdieren boolean DEFAULT NULL,
+    roken boolean DEFAULT NULL,
+    after_id uuid DEFAULT NULL,
+    page_size integer DEFAULT 20
+)
+RETURNS SETOF public.actieve_huurders LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+BEGIN
+  RETURN QUERY SELECT * FROM public.actieve_huurders h
+  WHERE (zoek_huurders_pagina.in_city IS NULL OR h.locatie_voorkeur @> ARRAY[zoek_huurders_pagina.in_city])
+    AND (zoek_huurders_pagina.min_budget IS NULL OR h.max_huur >= zoek_huurders_pagina.min_budget)
+    AND (zoek_huurders_pagina.max_budget IS NULL OR h.max_huur <= zoek_huurders_pagina.max_budget)
+    AND (zoek_huurders_pagina.huisdieren IS NULL OR h.huisdieren = zoek_huurders_pagina.huisdieren)
+    AND (zoek_huurders_pagina.roken IS NULL OR h.roken = zoek_huurders_pagina.roken)
+    AND (zoek_huurders_pagina.after_id IS NULL OR h.id > zoek_huurders_pagina.after_id)
+  ORDER BY h.id
+  LIMIT LEAST(GREATEST(COALESCE(zoek_huurders_pagina.page_size, 20), 1), 100);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.zoek_huurders_pagina(text, integer, integer, boolean, boolean, uuid, integer) TO authenticated;
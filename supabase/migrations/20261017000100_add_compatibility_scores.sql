@@ -0,0 +1,207 @@
+-- =================================================================
+-- PRECOMPUTED COMPATIBILITY SCORES PER SAVED LANDLORD SEARCH
+-- =================================================================
+-- computeCompatibility (src/lib/matching.ts) scores tenants on the client after a page of rows has
+-- arrived, so results cannot be ordered by score across pages. The same scoring now runs in the
+-- database: every saved search keeps one row per tenant with a non-zero score, refreshed by
+-- triggers when the search or a tenant's preferences change, and results are paged by score.
+
+-- Saved searches (already present in the generated types, created here for fresh databases)
+CREATE TABLE IF NOT EXISTS public.opgeslagen_zoekopdrachten (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    verhuurder_id uuid REFERENCES public.verhuurders(id) ON DELETE CASCADE,
+    naam text NOT NULL,
+    zoekfilters jsonb NOT NULL,
+    aangemaakt_op timestamptz NOT NULL DEFAULT now()
+);
+ALTER TABLE public.opgeslagen_zoekopdrachten ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Eigen zoekopdrachten" ON public.opgeslagen_zoekopdrachten;
+CREATE POLICY "Eigen zoekopdrachten" ON public.opgeslagen_zoekopdrachten
+  FOR ALL USING (auth.uid() = verhuurder_id OR auth.jwt() ->> 'role' = 'service_role')
+  WITH CHECK (auth.uid() = verhuurder_id OR auth.jwt() ->> 'role' = 'service_role');
+
+CREATE INDEX IF NOT EXISTS idx_opgeslagen_zoekopdrachten_verhuurder ON public.opgeslagen_zoekopdrachten (verhuurder_id);
+
+-- Port of computeCompatibility. zoekfilters is a serialized SearchCriteria
+-- ({city, minBudget, maxBudget, lifestyle: {huisdieren, roken}}); absent and null keys both count as
+-- undefined, which is what JSON.stringify produces. Math.round is floor(x + 0.5) on float8, like JS.
+CREATE OR REPLACE FUNCTION public.bereken_compatibiliteit(
+    locatie_voorkeur text[],
+    max_huur numeric,
+    huisdieren boolean,
+    roken boolean,
+    zoekfilters jsonb,
+    OUT locatie smallint,
+    OUT budget smallint,
+    OUT leefstijl smallint,
+    OUT totaal smallint
+) LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT floor(s.locatie + 0.5)::smallint,
+         floor(s.budget + 0.5)::smallint,
+         floor(s.leefstijl + 0.5)::smallint,
+         floor((s.locatie + s.budget + s.leefstijl) / 3 + 0.5)::smallint
+  FROM (
+    SELECT
+      CASE WHEN c.city <> '' AND c.city = ANY(c.locaties) THEN 100 ELSE 0 END::float8 AS locatie,
+      CASE
+        WHEN c.min_budget IS NULL AND c.max_budget IS NULL THEN 0
+        WHEN (c.min_budget IS NULL OR c.huur >= c.min_budget) AND (c.max_budget IS NULL OR c.huur <= c.max_budget) THEN 100
+        WHEN c.max_budget <> 0 THEN greatest(0, 100 - abs(c.huur - c.max_budget) / c.max_budget * 100)
+        ELSE 0
+      END::float8 AS budget,
+      CASE WHEN c.leefstijl_aantal = 0 THEN 0 ELSE c.leefstijl_score / c.leefstijl_aantal * 100 END::float8 AS leefstijl
+    FROM (
+      SELECT
+        $5 ->> 'city' AS city,
+        $1 AS locaties,
+        coalesce($2, 0)::float8 AS huur,
+        ($5 ->> 'minBudget')::float8 AS min_budget,
+        ($5 ->> 'maxBudget')::float8 AS max_budget,
+        (($5 -> 'lifestyle' ->> 'huisdieren') IS NOT NULL)::int::float8
+          + (($5 -> 'lifestyle' ->> 'roken') IS NOT NULL)::int::float8 AS leefstijl_aantal,
+        coalesce($3 = ($5 -> 'lifestyle' ->> 'huisdieren')::boolean, false)::int::float8
+          + coalesce($4 = ($5 -> 'lifestyle' ->> 'roken')::boolean, false)::int::float8 AS leefstijl_score
+    ) c
+  ) s
+$$;
+
+-- Score store: zero scores are not stored, they would only sort last
+CREATE TABLE IF NOT EXISTS public.compatibiliteit_scores (
+    zoekopdracht_id uuid NOT NULL REFERENCES public.opgeslagen_zoekopdrachten(id) ON DELETE CASCADE,
+    huurder_id uuid NOT NULL REFERENCES public.huurders(id) ON DELETE CASCADE,
+    locatie smallint NOT NULL,
+    budget smallint NOT NULL,
+    leefstijl smallint NOT NULL,
+    totaal smallint NOT NULL,
+    bijgewerkt_op timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (zoekopdracht_id, huurder_id)
+);
+ALTER TABLE public.compatibiliteit_scores ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Scores van eigen zoekopdrachten" ON public.compatibiliteit_scores;
+CREATE POLICY "Scores van eigen zoekopdrachten" ON public.compatibiliteit_scores
+  FOR SELECT USING (
+    auth.jwt() ->> 'role' = 'service_role'
+    OR EXISTS (
+      SELECT 1 FROM public.opgeslagen_zoekopdrachten z
+      WHERE z.id = compatibiliteit_scores.zoekopdracht_id AND z.verhuurder_id = auth.uid()
+    )
+  );
+
+-- Keyset order of huurders_voor_zoekopdracht (scanned backwards) and per-tenant refreshes
+CREATE INDEX IF NOT EXISTS idx_compatibiliteit_scores_rangorde ON public.compatibiliteit_scores (zoekopdracht_id, totaal, huurder_id);
+CREATE INDEX IF NOT EXISTS idx_compatibiliteit_scores_huurder ON public.compatibiliteit_scores (huurder_id);
+
+-- Full rebuild of one saved search, or of all of them (after bulk loads with triggers disabled)
+CREATE OR REPLACE FUNCTION public.ververs_compatibiliteit_scores(zoekopdracht uuid DEFAULT NULL)
+RETURNS bigint LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  aantal bigint;
+BEGIN
+  DELETE FROM public.compatibiliteit_scores s
+  WHERE ververs_compatibiliteit_scores.zoekopdracht IS NULL OR s.zoekopdracht_id = ververs_compatibiliteit_scores.zoekopdracht;
+
+  INSERT INTO public.compatibiliteit_scores (zoekopdracht_id, huurder_id, locatie, budget, leefstijl, totaal)
+  SELECT z.id, h.id, c.locatie, c.budget, c.leefstijl, c.totaal
+  FROM public.opgeslagen_zoekopdrachten z
+  CROSS JOIN public.huurders h
+  CROSS JOIN LATERAL public.bereken_compatibiliteit(h.locatie_voorkeur, h.max_huur, h.huisdieren, h.roken, z.zoekfilters) c
+  WHERE (ververs_compatibiliteit_scores.zoekopdracht IS NULL OR z.id = ververs_compatibiliteit_scores.zoekopdracht)
+    AND c.totaal > 0;
+  GET DIAGNOSTICS aantal = ROW_COUNT;
+  RETURN aantal;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.ververs_compatibiliteit_scores(uuid) FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION public.trg_zoekopdracht_scores()
+RETURNS trigger LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+BEGIN
+  PERFORM public.ververs_compatibiliteit_scores(NEW.id);
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS zoekopdracht_scores ON public.opgeslagen_zoekopdrachten;
+CREATE TRIGGER zoekopdracht_scores
+  AFTER INSERT OR UPDATE OF zoekfilters ON public.opgeslagen_zoekopdrachten
+  FOR EACH ROW EXECUTE FUNCTION public.trg_zoekopdracht_scores();
+
+-- Tenant side: statement-level with transition tables, so bulk updates rescore in one pass.
+-- Only tenants whose scored columns changed are touched.
+CREATE OR REPLACE FUNCTION public.trg_huurder_scores()
+RETURNS trigger LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO public.compatibiliteit_scores (zoekopdracht_id, huurder_id, locatie, budget, leefstijl, totaal)
+    SELECT z.id, n.id, c.locatie, c.budget, c.leefstijl, c.totaal
+    FROM nieuw n
+    CROSS JOIN public.opgeslagen_zoekopdrachten z
+    CROSS JOIN LATERAL public.bereken_compatibiliteit(n.locatie_voorkeur, n.max_huur, n.huisdieren, n.roken, z.zoekfilters) c
+    WHERE c.totaal > 0;
+    RETURN NULL;
+  END IF;
+
+  DELETE FROM public.compatibiliteit_scores s
+  USING nieuw n JOIN oud o ON o.id = n.id
+  WHERE s.huurder_id = n.id
+    AND (n.locatie_voorkeur, n.max_huur, n.huisdieren, n.roken) IS DISTINCT FROM (o.locatie_voorkeur, o.max_huur, o.huisdieren, o.roken);
+
+  INSERT INTO public.compatibiliteit_scores (zoekopdracht_id, huurder_id, locatie, budget, leefstijl, totaal)
+  SELECT z.id, n.id, c.locatie, c.budget, c.leefstijl, c.totaal
+  FROM nieuw n
+  JOIN oud o ON o.id = n.id
+  CROSS JOIN public.opgeslagen_zoekopdrachten z
+  CROSS JOIN LATERAL public.bereken_compatibiliteit(n.locatie_voorkeur, n.max_huur, n.huisdieren, n.roken, z.zoekfilters) c
+  WHERE (n.locatie_voorkeur, n.max_huur, n.huisdieren, n.roken) IS DISTINCT FROM (o.locatie_voorkeur, o.max_huur, o.huisdieren, o.roken)
+    AND c.totaal > 0;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS huurder_scores_insert ON public.huurders;
+CREATE TRIGGER huurder_scores_insert
+  AFTER INSERT ON public.huurders
+  REFERENCING NEW TABLE AS nieuw
+  FOR EACH STATEMENT EXECUTE FUNCTION public.trg_huurder_scores();
+
+DROP TRIGGER IF EXISTS huurder_scores_update ON public.huurders;
+CREATE TRIGGER huurder_scores_update
+  AFTER UPDATE ON public.huurders
+  REFERENCING OLD TABLE AS oud NEW TABLE AS nieuw
+  FOR EACH STATEMENT EXECUTE FUNCTION public.trg_huurder_scores();
+
+-- Active tenants of a saved search ordered by score; pass the totaal and huurder id of the last row
+-- of the previous page to get the next one
+CREATE OR REPLACE FUNCTION public.huurders_voor_zoekopdracht(
+    zoekopdracht uuid,
+    after_totaal integer DEFAULT NULL,
+    after_id uuid DEFAULT NULL,
+    page_size integer DEFAULT 20
+)
+RETURNS TABLE (huurder public.actieve_huurders, locatie smallint, budget smallint, leefstijl smallint, totaal smallint)
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM public.opgeslagen_zoekopdrachten z
+    WHERE z.id = huurders_voor_zoekopdracht.zoekopdracht
+      AND (z.verhuurder_id = auth.uid() OR auth.jwt() ->> 'role' = 'service_role')
+  ) THEN
+    RAISE EXCEPTION 'Zoekopdracht niet gevonden' USING ERRCODE = '42501';
+  END IF;
+
+  RETURN QUERY
+  SELECT h, s.locatie, s.budget, s.leefstijl, s.totaal
+  FROM public.compatibiliteit_scores s
+  JOIN public.actieve_huurders h ON h.id = s.huurder_id
+  WHERE s.zoekopdracht_id = huurders_voor_zoekopdracht.zoekopdracht
+    AND (huurders_voor_zoekopdracht.after_totaal IS NULL
+         OR (s.totaal, s.huurder_id) < (huurders_voor_zoekopdracht.after_totaal, huurders_voor_zoekopdracht.after_id))
+  ORDER BY s.totaal DESC, s.huurder_id DESC
+  LIMIT LEAST(GREATEST(COALESCE(huurders_voor_zoekopdracht.page_size, 20), 1), 100);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.huurders_voor_zoekopdracht(uuid, integer, uuid, integer) TO authenticated;
@@ -0,0 +1,24 @@
+-- =================================================================
+-- BATCH WONING RECOMMENDATIONS
+-- =================================================================
+-- Top-K listings per active tenant, scored with MatchingService.calculateMatchScore's weights by
+-- scripts/match_recommendations.py. The job rewrites a tenant's rows in one transaction, so the
+-- dashboard always reads either the previous or the new ranking.
+
+CREATE TABLE IF NOT EXISTS public.woning_aanbevelingen (
+    huurder_id uuid NOT NULL REFERENCES public.huurders(id) ON DELETE CASCADE,
+    rang smallint NOT NULL,
+    woning_id uuid NOT NULL REFERENCES public.woningen(id) ON DELETE CASCADE,
+    score smallint NOT NULL,
+    berekend_op timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (huurder_id, rang)
+);
+ALTER TABLE public.woning_aanbevelingen ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Eigen aanbevelingen" ON public.woning_aanbevelingen;
+CREATE POLICY "Eigen aanbevelingen" ON public.woning_aanbevelingen
+  FOR SELECT USING (auth.uid() = huurder_id OR auth.jwt() ->> 'role' = 'service_role');
+
+-- Cascading deletes of listings, and the job's cleanup of tenants that are no longer active
+CREATE INDEX IF NOT EXISTS idx_woning_aanbevelingen_woning ON public.woning_aanbevelingen (woning_id);
+CREATE INDEX IF NOT EXISTS idx_woning_aanbevelingen_berekend_op ON public.woning_aanbevelingen (berekend_op);
@@ -0,0 +1,39 @@
+-- =================================================================
+-- TENANT DASHBOARD IN ONE ROUND TRIP
+-- =================================================================
+-- huurder_dashboard() returns everything /huurder-dashboard renders for the signed-in tenant:
+-- the huurders and gebruikers rows, the documents (newest first) and the active subscription.
+-- The huurder-dashboard edge function adds signed photo URLs, so the page loads with one request
+-- instead of separate documenten/huurders/gebruikers/abonnementen queries.
+
+-- Document list of one tenant, newest first
+CREATE INDEX IF NOT EXISTS idx_documenten_huurder_aangemaakt_op ON public.documenten (huurder_id, aangemaakt_op DESC);
+
+CREATE OR REPLACE FUNCTION public.huurder_dashboard()
+RETURNS jsonb LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  gebruiker_id uuid := auth.uid();
+BEGIN
+  IF gebruiker_id IS NULL THEN
+    RAISE EXCEPTION 'Niet ingelogd' USING ERRCODE = '42501';
+  END IF;
+
+  RETURN jsonb_build_object(
+    'huurder', (SELECT to_jsonb(h) FROM public.huurders h WHERE h.id = gebruiker_id),
+    'gebruiker', (SELECT to_jsonb(g) FROM public.gebruikers g WHERE g.id = gebruiker_id),
+    'documenten', COALESCE((
+      SELECT jsonb_agg(to_jsonb(d) ORDER BY d.aangemaakt_op DESC)
+      FROM public.documenten d WHERE d.huurder_id = gebruiker_id
+    ), '[]'::jsonb),
+    'abonnement', (
+      SELECT to_jsonb(a) FROM public.abonnementen a
+      WHERE a.huurder_id = gebruiker_id AND a.status = 'actief'
+      ORDER BY a.bijgewerkt_op DESC
+      LIMIT 1
+    )
+  );
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.huurder_dashboard() FROM public, anon;
+GRANT EXECUTE ON FUNCTION public.huurder_dashboard() TO authenticated, service_role;
@@ -0,0 +1,22 @@
+-- =================================================================
+-- NOTIFICATIONS OVER REALTIME
+-- =================================================================
+-- src/lib/realtimeHub.ts keeps one Realtime channel per signed-in session with a postgres_changes
+-- binding per user table (filtered on the recipient), instead of a broadcast channel per
+-- notification. Realtime only streams tables in the supabase_realtime publication, and it checks
+-- every change against the subscriber's RLS policy, so notificaties rows still reach their owner only.
+
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime')
+     AND NOT EXISTS (
+       SELECT 1 FROM pg_publication_tables
+       WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'notificaties'
+     ) THEN
+    ALTER PUBLICATION supabase_realtime ADD TABLE public.notificaties;
+  END IF;
+END $$;
+
+-- Notification list and unread count of one user, newest first
+CREATE INDEX IF NOT EXISTS idx_notificaties_gebruiker_aangemaakt_op ON public.notificaties (gebruiker_id, aangemaakt_op DESC);
+CREATE INDEX IF NOT EXISTS idx_notificaties_gebruiker_ongelezen ON public.notificaties (gebruiker_id) WHERE gelezen = false;
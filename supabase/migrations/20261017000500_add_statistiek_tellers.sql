@@ -0,0 +1,116 @@
+-- =================================================================
+-- AGGREGATE COUNTS PER ROLE, STATUS AND MONTH
+-- =================================================================
+-- The admin statistics used to pull every gebruikers, documenten and abonnementen row into the
+-- browser (or into subscription-maintenance) and count there. statistiek_tellers keeps one
+-- counter per table, key (rol or status) and creation month instead. Statement-level triggers
+-- with transition tables apply the net change of each statement, so a bulk insert or status
+-- update touches a handful of counter rows. statistieken() returns the non-zero counters: a few
+-- hundred rows at most, however many users there are.
+
+CREATE TABLE IF NOT EXISTS public.statistiek_tellers (
+    bron text NOT NULL,
+    sleutel text NOT NULL,
+    maand date NOT NULL,
+    aantal bigint NOT NULL DEFAULT 0,
+    PRIMARY KEY (bron, sleutel, maand)
+);
+ALTER TABLE public.statistiek_tellers ENABLE ROW LEVEL SECURITY;
+-- No policies: read through statistieken(), written by the triggers below
+
+-- Net change of one statement. The counted column is passed as the trigger argument; rows
+-- without a value are counted as 'onbekend'. Groups are applied in key order so concurrent
+-- statements lock the counter rows in the same order.
+CREATE OR REPLACE FUNCTION public.trg_statistiek_tellers()
+RETURNS trigger LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  rij text := format('%L::text, COALESCE(%I::text, ''onbekend''), date_trunc(''month'', aangemaakt_op)::date',
+                     TG_TABLE_NAME, TG_ARGV[0]);
+  wijzigingen text;
+BEGIN
+  wijzigingen := CASE TG_OP
+    WHEN 'INSERT' THEN format('SELECT %s, 1 FROM nieuw', rij)
+    WHEN 'DELETE' THEN format('SELECT %s, -1 FROM oud', rij)
+    ELSE format('SELECT %s, 1 FROM nieuw UNION ALL SELECT %s, -1 FROM oud', rij, rij)
+  END;
+
+  EXECUTE format($sql$
+    INSERT INTO public.statistiek_tellers AS t (bron, sleutel, maand, aantal)
+    SELECT bron, sleutel, maand, sum(delta)
+    FROM (%s) AS w (bron, sleutel, maand, delta)
+    GROUP BY bron, sleutel, maand
+    HAVING sum(delta) <> 0
+    ORDER BY bron, sleutel, maand
+    ON CONFLICT (bron, sleutel, maand) DO UPDATE SET aantal = t.aantal + EXCLUDED.aantal
+  $sql$, wijzigingen);
+  RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+  bron record;
+BEGIN
+  FOR bron IN SELECT * FROM (VALUES ('gebruikers', 'rol'), ('documenten', 'status'), ('abonnementen', 'status')) AS b (tabel, kolom) LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS statistiek_tellers_insert ON public.%I', bron.tabel);
+    EXECUTE format('CREATE TRIGGER statistiek_tellers_insert AFTER INSERT ON public.%I'
+                   ' REFERENCING NEW TABLE AS nieuw FOR EACH STATEMENT EXECUTE FUNCTION public.trg_statistiek_tellers(%L)',
+                   bron.tabel, bron.kolom);
+    EXECUTE format('DROP TRIGGER IF EXISTS statistiek_tellers_update ON public.%I', bron.tabel);
+    EXECUTE format('CREATE TRIGGER statistiek_tellers_update AFTER UPDATE ON public.%I'
+                   ' REFERENCING OLD TABLE AS oud NEW TABLE AS nieuw FOR EACH STATEMENT EXECUTE FUNCTION public.trg_statistiek_tellers(%L)',
+                   bron.tabel, bron.kolom);
+    EXECUTE format('DROP TRIGGER IF EXISTS statistiek_tellers_delete ON public.%I', bron.tabel);
+    EXECUTE format('CREATE TRIGGER statistiek_tellers_delete AFTER DELETE ON public.%I'
+                   ' REFERENCING OLD TABLE AS oud FOR EACH STATEMENT EXECUTE FUNCTION public.trg_statistiek_tellers(%L)',
+                   bron.tabel, bron.kolom);
+  END LOOP;
+END $$;
+
+-- Full recount (initial fill, and after bulk loads with triggers disabled)
+CREATE OR REPLACE FUNCTION public.ververs_statistiek_tellers()
+RETURNS bigint LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  aantal bigint;
+BEGIN
+  LOCK TABLE public.statistiek_tellers IN EXCLUSIVE MODE;
+  DELETE FROM public.statistiek_tellers;
+
+  INSERT INTO public.statistiek_tellers (bron, sleutel, maand, aantal)
+  SELECT 'gebruikers', rol::text, date_trunc('month', aangemaakt_op)::date, count(*)
+  FROM public.gebruikers GROUP BY 2, 3
+  UNION ALL
+  SELECT 'documenten', COALESCE(status::text, 'onbekend'), date_trunc('month', aangemaakt_op)::date, count(*)
+  FROM public.documenten GROUP BY 2, 3
+  UNION ALL
+  SELECT 'abonnementen', status::text, date_trunc('month', aangemaakt_op)::date, count(*)
+  FROM public.abonnementen GROUP BY 2, 3;
+  GET DIAGNOSTICS aantal = ROW_COUNT;
+  RETURN aantal;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.ververs_statistiek_tellers() FROM PUBLIC, anon, authenticated;
+
+SELECT public.ververs_statistiek_tellers();
+
+-- Counters of one table (or all), optionally from a given month on; for reviewers, admins and the service role
+CREATE OR REPLACE FUNCTION public.statistieken(in_bron text DEFAULT NULL, vanaf date DEFAULT NULL)
+RETURNS TABLE (bron text, sleutel text, maand date, aantal bigint)
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+BEGIN
+  IF coalesce(auth.jwt() ->> 'role', '') <> 'service_role' AND NOT public.is_beoordelaar_or_admin(auth.uid()) THEN
+    RAISE EXCEPTION 'Geen toegang tot statistieken' USING ERRCODE = '42501';
+  END IF;
+
+  RETURN QUERY
+  SELECT t.bron, t.sleutel, t.maand, t.aantal
+  FROM public.statistiek_tellers t
+  WHERE (in_bron IS NULL OR t.bron = in_bron)
+    AND (vanaf IS NULL OR t.maand >= date_trunc('month', vanaf)::date)
+    AND t.aantal <> 0
+  ORDER BY t.bron, t.maand, t.sleutel;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.statistieken(text, date) TO authenticated, service_role;
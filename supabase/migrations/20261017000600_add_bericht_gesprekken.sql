@@ -0,0 +1,104 @@
+-- =================================================================
+-- MESSAGE THREADS AND PAGED CONVERSATIONS
+-- =================================================================
+-- MessageService.getMessageThreads downloaded every message the user ever sent or received,
+-- with sender, recipient and woning joined, to group them into threads in the browser.
+-- bericht_gesprekken() returns one row per thread (conversation partner + woning) instead:
+-- the latest message, the unread count and the partner's name, newest thread first, a page at a time.
+-- berichten_gesprek() pages through one conversation, newest message first.
+-- Both page by keyset: pass the aangemaakt_op and id of the last row of the previous page.
+
+-- A participant's messages, newest first (both sides of the inbox)
+CREATE INDEX IF NOT EXISTS idx_berichten_verzender_aangemaakt_op ON public.berichten (verzender_id, aangemaakt_op DESC);
+CREATE INDEX IF NOT EXISTS idx_berichten_ontvanger_aangemaakt_op ON public.berichten (ontvanger_id, aangemaakt_op DESC);
+-- One conversation regardless of direction, in keyset order
+CREATE INDEX IF NOT EXISTS idx_berichten_gesprek ON public.berichten (
+  LEAST(verzender_id, ontvanger_id), GREATEST(verzender_id, ontvanger_id), aangemaakt_op, id
+);
+-- Unread messages per sender, for the unread counts
+CREATE INDEX IF NOT EXISTS idx_berichten_ongelezen ON public.berichten (ontvanger_id, verzender_id, woning_id) WHERE gelezen = false;
+
+CREATE OR REPLACE FUNCTION public.bericht_gesprekken(
+    voor_op timestamptz DEFAULT NULL,
+    voor_id uuid DEFAULT NULL,
+    page_size integer DEFAULT 20
+)
+RETURNS TABLE (
+    other_user_id uuid,
+    other_user_name text,
+    other_user_email text,
+    latest_message_id uuid,
+    latest_message text,
+    latest_message_date timestamptz,
+    unread_count bigint,
+    woning_id uuid,
+    woning_titel text
+)
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  gebruiker_id uuid := auth.uid();
+BEGIN
+  IF gebruiker_id IS NULL THEN
+    RAISE EXCEPTION 'Niet ingelogd' USING ERRCODE = '42501';
+  END IF;
+
+  RETURN QUERY
+  WITH mijn_berichten AS (
+    SELECT b.id, b.ontvanger_id AS partner_id, b.woning_id, b.inhoud, b.aangemaakt_op
+    FROM public.berichten b WHERE b.verzender_id = gebruiker_id
+    UNION ALL
+    SELECT b.id, b.verzender_id, b.woning_id, b.inhoud, b.aangemaakt_op
+    FROM public.berichten b WHERE b.ontvanger_id = gebruiker_id AND b.verzender_id IS DISTINCT FROM gebruiker_id
+  ),
+  laatste AS (
+    SELECT DISTINCT ON (m.partner_id, m.woning_id) m.*
+    FROM mijn_berichten m
+    ORDER BY m.partner_id, m.woning_id, m.aangemaakt_op DESC, m.id DESC
+  ),
+  ongelezen AS (
+    SELECT b.verzender_id AS partner_id, b.woning_id, count(*) AS aantal
+    FROM public.berichten b
+    WHERE b.ontvanger_id = gebruiker_id AND b.gelezen = false
+    GROUP BY b.verzender_id, b.woning_id
+  )
+  SELECT l.partner_id, COALESCE(g.naam, 'Onbekend'), COALESCE(g.email, ''), l.id, l.inhoud, l.aangemaakt_op,
+         COALESCE(o.aantal, 0), l.woning_id, w.titel
+  FROM laatste l
+  LEFT JOIN public.gebruikers g ON g.id = l.partner_id
+  LEFT JOIN public.woningen w ON w.id = l.woning_id
+  LEFT JOIN ongelezen o ON o.partner_id = l.partner_id AND o.woning_id IS NOT DISTINCT FROM l.woning_id
+  WHERE bericht_gesprekken.voor_op IS NULL
+     OR (l.aangemaakt_op, l.id) < (bericht_gesprekken.voor_op, bericht_gesprekken.voor_id)
+  ORDER BY l.aangemaakt_op DESC, l.id DESC
+  LIMIT LEAST(GREATEST(COALESCE(bericht_gesprekken.page_size, 20), 1), 100);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.bericht_gesprekken(timestamptz, uuid, integer) TO authenticated;
+
+CREATE OR REPLACE FUNCTION public.berichten_gesprek(
+    ander uuid,
+    in_woning uuid DEFAULT NULL,
+    voor_op timestamptz DEFAULT NULL,
+    voor_id uuid DEFAULT NULL,
+    page_size integer DEFAULT 50
+)
+RETURNS SETOF public.berichten LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  gebruiker_id uuid := auth.uid();
+BEGIN
+  IF gebruiker_id IS NULL THEN
+    RAISE EXCEPTION 'Niet ingelogd' USING ERRCODE = '42501';
+  END IF;
+
+  RETURN QUERY SELECT b.* FROM public.berichten b
+  WHERE LEAST(b.verzender_id, b.ontvanger_id) = LEAST(gebruiker_id, berichten_gesprek.ander)
+    AND GREATEST(b.verzender_id, b.ontvanger_id) = GREATEST(gebruiker_id, berichten_gesprek.ander)
+    AND (berichten_gesprek.in_woning IS NULL OR b.woning_id = berichten_gesprek.in_woning)
+    AND (berichten_gesprek.voor_op IS NULL OR (b.aangemaakt_op, b.id) < (berichten_gesprek.voor_op, berichten_gesprek.voor_id))
+  ORDER BY b.aangemaakt_op DESC, b.id DESC
+  LIMIT LEAST(GREATEST(COALESCE(berichten_gesprek.page_size, 50), 1), 200);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.berichten_gesprek(uuid, uuid, timestamptz, uuid, integer) TO authenticated;
@@ -0,0 +1,120 @@
+-- =================================================================
+-- UNREAD COUNTERS PER USER
+-- =================================================================
+-- The unread badges (NotificationService.getUnreadCount, MessageService.getUnreadMessageCount)
+-- counted notificaties and berichten on every header render. ongelezen_tellers keeps one row per
+-- user with both unread counts instead, and ongelezen_aantallen() reads it by primary key.
+-- Statement-level triggers with transition tables apply each statement's net change, so
+-- markAllAsRead / markMessagesAsRead (one UPDATE of many rows) touch one counter row per user.
+-- Under concurrency the counter row lock serialises the increments, and an UPDATE only sees the
+-- rows it actually changed (a row already marked read by a concurrent statement is re-checked
+-- and skipped), so inserts and mark-as-read running in parallel keep the counters exact.
+
+CREATE TABLE IF NOT EXISTS public.ongelezen_tellers (
+    gebruiker_id uuid PRIMARY KEY,
+    notificaties bigint NOT NULL DEFAULT 0,
+    berichten bigint NOT NULL DEFAULT 0
+);
+-- No foreign key: deleting a user cascades to its notificaties and berichten, whose triggers
+-- then write to this table after the user row is gone
+ALTER TABLE public.ongelezen_tellers ENABLE ROW LEVEL SECURITY;
+-- No policies: read through ongelezen_aantallen(), written by the triggers below
+
+-- The counter column and the recipient column are passed as trigger arguments. Only rows with
+-- gelezen = false count, matching the badge queries. Users are applied in id order so concurrent
+-- statements lock the counter rows in the same order.
+CREATE OR REPLACE FUNCTION public.trg_ongelezen_tellers()
+RETURNS trigger LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  teller text := TG_ARGV[0];
+  ontvanger text := TG_ARGV[1];
+  wijzigingen text;
+BEGIN
+  wijzigingen := CASE TG_OP
+    WHEN 'INSERT' THEN format('SELECT %I, 1 FROM nieuw WHERE gelezen = false', ontvanger)
+    WHEN 'DELETE' THEN format('SELECT %I, -1 FROM oud WHERE gelezen = false', ontvanger)
+    ELSE format('SELECT %I, 1 FROM nieuw WHERE gelezen = false UNION ALL SELECT %I, -1 FROM oud WHERE gelezen = false',
+                ontvanger, ontvanger)
+  END;
+
+  EXECUTE format($sql$
+    INSERT INTO public.ongelezen_tellers AS t (gebruiker_id, %1$I)
+    SELECT gebruiker_id, sum(delta)
+    FROM (%2$s) AS w (gebruiker_id, delta)
+    WHERE gebruiker_id IS NOT NULL
+    GROUP BY gebruiker_id
+    HAVING sum(delta) <> 0
+    ORDER BY gebruiker_id
+    ON CONFLICT (gebruiker_id) DO UPDATE SET %1$I = t.%1$I + EXCLUDED.%1$I
+  $sql$, teller, wijzigingen);
+  RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+  bron record;
+BEGIN
+  FOR bron IN SELECT * FROM (VALUES ('notificaties', 'gebruiker_id'), ('berichten', 'ontvanger_id')) AS b (tabel, ontvanger) LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS ongelezen_tellers_insert ON public.%I', bron.tabel);
+    EXECUTE format('CREATE TRIGGER ongelezen_tellers_insert AFTER INSERT ON public.%I'
+                   ' REFERENCING NEW TABLE AS nieuw FOR EACH STATEMENT EXECUTE FUNCTION public.trg_ongelezen_tellers(%L, %L)',
+                   bron.tabel, bron.tabel, bron.ontvanger);
+    EXECUTE format('DROP TRIGGER IF EXISTS ongelezen_tellers_update ON public.%I', bron.tabel);
+    EXECUTE format('CREATE TRIGGER ongelezen_tellers_update AFTER UPDATE ON public.%I'
+                   ' REFERENCING OLD TABLE AS oud NEW TABLE AS nieuw FOR EACH STATEMENT EXECUTE FUNCTION public.trg_ongelezen_tellers(%L, %L)',
+                   bron.tabel, bron.tabel, bron.ontvanger);
+    EXECUTE format('DROP TRIGGER IF EXISTS ongelezen_tellers_delete ON public.%I', bron.tabel);
+    EXECUTE format('CREATE TRIGGER ongelezen_tellers_delete AFTER DELETE ON public.%I'
+                   ' REFERENCING OLD TABLE AS oud FOR EACH STATEMENT EXECUTE FUNCTION public.trg_ongelezen_tellers(%L, %L)',
+                   bron.tabel, bron.tabel, bron.ontvanger);
+  END LOOP;
+END $$;
+
+-- Full recount (initial fill, and after bulk loads with triggers disabled)
+CREATE OR REPLACE FUNCTION public.ververs_ongelezen_tellers()
+RETURNS bigint LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  aantal bigint;
+BEGIN
+  LOCK TABLE public.ongelezen_tellers IN EXCLUSIVE MODE;
+  DELETE FROM public.ongelezen_tellers;
+
+  INSERT INTO public.ongelezen_tellers (gebruiker_id, notificaties, berichten)
+  SELECT gebruiker_id, sum(notificaties), sum(berichten)
+  FROM (
+    SELECT gebruiker_id, count(*) AS notificaties, 0 AS berichten
+    FROM public.notificaties WHERE gelezen = false AND gebruiker_id IS NOT NULL GROUP BY gebruiker_id
+    UNION ALL
+    SELECT ontvanger_id, 0, count(*)
+    FROM public.berichten WHERE gelezen = false AND ontvanger_id IS NOT NULL GROUP BY ontvanger_id
+  ) AS t
+  GROUP BY gebruiker_id;
+  GET DIAGNOSTICS aantal = ROW_COUNT;
+  RETURN aantal;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.ververs_ongelezen_tellers() FROM PUBLIC, anon, authenticated;
+
+SELECT public.ververs_ongelezen_tellers();
+
+-- Both unread counts of the current user in one primary-key lookup (zeros without a counter row)
+CREATE OR REPLACE FUNCTION public.ongelezen_aantallen()
+RETURNS TABLE (notificaties bigint, berichten bigint)
+LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  huidige_gebruiker uuid := auth.uid();
+BEGIN
+  IF huidige_gebruiker IS NULL THEN
+    RAISE EXCEPTION 'Niet ingelogd' USING ERRCODE = '42501';
+  END IF;
+
+  RETURN QUERY
+  SELECT COALESCE(max(t.notificaties), 0)::bigint, COALESCE(max(t.berichten), 0)::bigint
+  FROM public.ongelezen_tellers t
+  WHERE t.gebruiker_id = huidige_gebruiker;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.ongelezen_aantallen() TO authenticated;
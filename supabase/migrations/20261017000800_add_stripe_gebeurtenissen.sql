@@ -0,0 +1,267 @@
+-- =================================================================
+-- STRIPE WEBHOOK EVENT LEDGER AND BATCHED PROCESSING
+-- =================================================================
+-- stripe-webhook handled every event inline (a Stripe API call, an upsert and a notification per
+-- request) and applied Stripe's retries and late deliveries again. It now only verifies the
+-- signature and records the event in stripe_gebeurtenissen, keyed by the Stripe event id: a retry
+-- hits the primary key and is acknowledged without doing anything. A worker (drainStripeEvents in
+-- supabase/functions/_shared/stripeEvents.ts) reserves queued events in batches and applies them
+-- with verwerk_stripe_gebeurtenissen(), set-based, in one transaction per batch.
+--
+-- Out-of-order delivery: abonnementen.stripe_event_op holds the creation time of the last event
+-- applied to the row; an older event is skipped instead of overwriting newer state. A checkout is
+-- applied with the subscription as the worker fetched it from Stripe, which already includes every
+-- event received before the checkout was reserved, so it is stamped with the newest of those (stand_op).
+--
+-- Retries: the webhook acknowledges before the event is applied, so Stripe no longer redelivers a
+-- checkout that fails. A failure that may pass later (the subscription could not be fetched, the
+-- huurder row does not exist yet, a worker that died holding the reservation) puts the event back
+-- in the queue with exponential backoff (volgende_poging_op, up to an hour apart). It is given up
+-- as 'mislukt' only after three days, Stripe's own retry window; a checkout that can never be
+-- applied (no user_id or subscription) fails at once. Every event that fails raises a WARNING.
+
+CREATE TABLE IF NOT EXISTS public.stripe_gebeurtenissen (
+    id text PRIMARY KEY,                          -- Stripe event id (evt_...)
+    type text NOT NULL,
+    object_id text,                               -- id of event.data.object (session or subscription)
+    aangemaakt_stripe timestamptz NOT NULL,       -- event.created
+    payload jsonb NOT NULL,                       -- event.data.object
+    status text NOT NULL DEFAULT 'wachtend'
+        CHECK (status IN ('wachtend', 'bezig', 'verwerkt', 'overgeslagen', 'mislukt')),
+    pogingen integer NOT NULL DEFAULT 0,
+    fout text,
+    ontvangen_op timestamptz NOT NULL DEFAULT now(),
+    geclaimd_op timestamptz,
+    verwerkt_op timestamptz,
+    stand_op timestamptz,                         -- checkout: newest event of its subscription at reservation
+    volgende_poging_op timestamptz NOT NULL DEFAULT now() -- not reserved before this time (backoff)
+);
+ALTER TABLE public.stripe_gebeurtenissen ENABLE ROW LEVEL SECURITY;
+-- No policies: written by stripe-webhook and the worker with the service role
+
+-- The queue: only unfinished events, in Stripe order
+CREATE INDEX IF NOT EXISTS idx_stripe_gebeurtenissen_wachtrij
+  ON public.stripe_gebeurtenissen (aangemaakt_stripe, id) WHERE status IN ('wachtend', 'bezig');
+-- Newest event received per subscription or session
+CREATE INDEX IF NOT EXISTS idx_stripe_gebeurtenissen_object ON public.stripe_gebeurtenissen (object_id, aangemaakt_stripe);
+
+ALTER TABLE public.abonnementen ADD COLUMN IF NOT EXISTS stripe_event_op timestamptz;
+CREATE INDEX IF NOT EXISTS idx_abonnementen_stripe_sessie_id ON public.abonnementen (stripe_sessie_id);
+
+CREATE OR REPLACE FUNCTION public.stripe_abonnement_status(stripe_status text)
+RETURNS public.abonnement_status LANGUAGE sql IMMUTABLE AS $$
+  SELECT (CASE stripe_status
+    WHEN 'active' THEN 'actief'
+    WHEN 'trialing' THEN 'actief'
+    WHEN 'canceled' THEN 'geannuleerd'
+    WHEN 'incomplete_expired' THEN 'verlopen'
+    WHEN 'past_due' THEN 'gepauzeerd'
+    WHEN 'unpaid' THEN 'gepauzeerd'
+    ELSE 'wachtend'
+  END)::public.abonnement_status;
+$$;
+
+-- Wait before the next attempt after the given number of attempts: 30 s, doubling, at most an hour
+CREATE OR REPLACE FUNCTION public.stripe_wachttijd(pogingen integer)
+RETURNS interval LANGUAGE sql IMMUTABLE AS $$
+  SELECT LEAST(interval '30 seconds' * power(2, LEAST(GREATEST(pogingen, 1), 8) - 1), interval '1 hour');
+$$;
+
+-- Unix seconds from a subscription object; newer API versions moved the period to the items
+CREATE OR REPLACE FUNCTION public.stripe_periode(abonnement jsonb, veld text)
+RETURNS timestamptz LANGUAGE sql IMMUTABLE AS $$
+  SELECT to_timestamp(COALESCE(abonnement ->> veld, abonnement -> 'items' -> 'data' -> 0 ->> veld)::bigint);
+$$;
+
+-- Reserve up to max_aantal queued events that are due, oldest first. Events reserved by a worker
+-- that did not finish within five minutes are handed out again after the backoff set here; once
+-- such an event is three days old it is marked failed.
+CREATE OR REPLACE FUNCTION public.reserveer_stripe_gebeurtenissen(max_aantal integer DEFAULT 500)
+RETURNS SETOF public.stripe_gebeurtenissen
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  opgegeven text[];
+BEGIN
+  WITH m AS (
+    UPDATE public.stripe_gebeurtenissen g
+    SET status = 'mislukt', fout = COALESCE(g.fout, 'Te veel pogingen'), verwerkt_op = now()
+    WHERE g.status = 'bezig' AND g.geclaimd_op < now() - interval '5 minutes' AND g.volgende_poging_op <= now()
+      AND g.ontvangen_op < now() - interval '3 days'
+    RETURNING g.id
+  )
+  SELECT array_agg(m.id) INTO opgegeven FROM m;
+  IF opgegeven IS NOT NULL THEN
+    RAISE WARNING 'Stripe-gebeurtenissen mislukt na verlopen reservering: %', opgegeven;
+  END IF;
+
+  RETURN QUERY
+  UPDATE public.stripe_gebeurtenissen g
+  SET status = 'bezig', pogingen = g.pogingen + 1, geclaimd_op = now(),
+      -- Applies if the worker never finishes; verwerk_stripe_gebeurtenissen sets its own on a retry
+      volgende_poging_op = now() + public.stripe_wachttijd(g.pogingen + 1),
+      -- Reserved before the worker fetches the subscription, so the fetch includes all of these
+      stand_op = CASE WHEN g.type = 'checkout.session.completed' THEN (
+        SELECT max(o.aangemaakt_stripe) FROM public.stripe_gebeurtenissen o WHERE o.object_id = g.payload ->> 'subscription'
+      ) END
+  WHERE g.id IN (
+    SELECT w.id FROM public.stripe_gebeurtenissen w
+    WHERE w.volgende_poging_op <= now()
+      AND (w.status = 'wachtend' OR (w.status = 'bezig' AND w.geclaimd_op < now() - interval '5 minutes'))
+    ORDER BY w.aangemaakt_stripe, w.id
+    LIMIT LEAST(GREATEST(COALESCE(max_aantal, 500), 1), 1000)
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING g.*;
+END;
+$$;
+
+-- Apply reserved events. abonnementen maps Stripe subscription id -> subscription object, fetched
+-- by the worker for checkout.session.completed (the session itself has no period or status).
+-- Per subscription or session only the newest event of the batch is applied; the others are
+-- 'overgeslagen', like events older than the row's stripe_event_op and events without a row.
+CREATE OR REPLACE FUNCTION public.verwerk_stripe_gebeurtenissen(ids text[], abonnementen jsonb DEFAULT '{}'::jsonb)
+RETURNS TABLE (verwerkt bigint, overgeslagen bigint, mislukt bigint, opnieuw bigint)
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  mislukte text[];
+BEGIN
+  -- Checkout without a valid user_id or a subscription can never be applied
+  WITH m AS (
+    UPDATE public.stripe_gebeurtenissen g
+    SET status = 'mislukt', verwerkt_op = now(),
+        fout = CASE WHEN g.payload -> 'metadata' ->> 'user_id' IS NULL THEN 'Geen user_id in metadata'
+                    WHEN g.payload ->> 'subscription' IS NULL THEN 'Geen subscription'
+                    ELSE 'Ongeldige user_id in metadata' END
+    WHERE g.id = ANY (ids) AND g.status = 'bezig' AND g.type = 'checkout.session.completed'
+      AND (g.payload -> 'metadata' ->> 'user_id' IS NULL OR g.payload ->> 'subscription' IS NULL
+           OR g.payload -> 'metadata' ->> 'user_id' !~* '^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$')
+    RETURNING g.id
+  )
+  SELECT array_agg(m.id) INTO mislukte FROM m;
+
+  -- Checkout whose huurder row does not exist yet or whose subscription the worker could not fetch:
+  -- back in the queue with backoff, failed once the event is three days old
+  WITH herhaling AS (
+    SELECT g.id, NOT EXISTS (
+             SELECT 1 FROM public.huurders h
+             WHERE h.id = CASE WHEN g.payload -> 'metadata' ->> 'user_id' ~* '^[0-9a-f]{8}-([0-9a-f]{4}-){3}[0-9a-f]{12}$'
+                               THEN (g.payload -> 'metadata' ->> 'user_id')::uuid END
+           ) AS zonder_huurder,
+           NOT verwerk_stripe_gebeurtenissen.abonnementen ? (g.payload ->> 'subscription') AS zonder_abonnement
+    FROM public.stripe_gebeurtenissen g
+    WHERE g.id = ANY (ids) AND g.status = 'bezig' AND g.type = 'checkout.session.completed'
+  ),
+  m AS (
+    UPDATE public.stripe_gebeurtenissen g
+    SET status = CASE WHEN g.ontvangen_op < now() - interval '3 days' THEN 'mislukt' ELSE 'wachtend' END,
+        verwerkt_op = CASE WHEN g.ontvangen_op < now() - interval '3 days' THEN now() END,
+        volgende_poging_op = now() + public.stripe_wachttijd(g.pogingen),
+        fout = CASE WHEN r.zonder_huurder THEN 'Onbekende huurder' ELSE 'Stripe abonnement niet opgehaald' END
+    FROM herhaling r
+    WHERE g.id = r.id AND (r.zonder_huurder OR r.zonder_abonnement)
+    RETURNING g.id, g.status
+  )
+  SELECT array_cat(mislukte, array_agg(m.id) FILTER (WHERE m.status = 'mislukt')) INTO mislukte FROM m;
+
+  -- === CHECKOUT SESSION COMPLETED ===
+  WITH kandidaten AS (
+    SELECT DISTINCT ON (g.payload ->> 'subscription') g.id, g.payload,
+           verwerk_stripe_gebeurtenissen.abonnementen -> (g.payload ->> 'subscription') AS abonnement,
+           GREATEST(g.aangemaakt_stripe, g.stand_op) AS aangemaakt_stripe
+    FROM public.stripe_gebeurtenissen g
+    WHERE g.id = ANY (ids) AND g.status = 'bezig' AND g.type = 'checkout.session.completed'
+    ORDER BY g.payload ->> 'subscription', g.aangemaakt_stripe DESC, g.id DESC
+  ),
+  toegepast AS (
+    INSERT INTO public.abonnementen AS t (huurder_id, status, stripe_subscription_id, stripe_customer_id, stripe_sessie_id,
+                                          start_datum, eind_datum, bedrag, currency, stripe_event_op)
+    SELECT (k.payload -> 'metadata' ->> 'user_id')::uuid, public.stripe_abonnement_status(k.abonnement ->> 'status'),
+           k.payload ->> 'subscription', k.abonnement ->> 'customer', k.payload ->> 'id',
+           COALESCE(public.stripe_periode(k.abonnement, 'current_period_start'), now()),
+           public.stripe_periode(k.abonnement, 'current_period_end'),
+           COALESCE((k.payload ->> 'amount_total')::numeric, 0), k.payload ->> 'currency', k.aangemaakt_stripe
+    FROM kandidaten k
+    ON CONFLICT (stripe_subscription_id) DO UPDATE SET
+      huurder_id = EXCLUDED.huurder_id, status = EXCLUDED.status, stripe_customer_id = EXCLUDED.stripe_customer_id,
+      stripe_sessie_id = EXCLUDED.stripe_sessie_id, start_datum = EXCLUDED.start_datum, eind_datum = EXCLUDED.eind_datum,
+      bedrag = EXCLUDED.bedrag, currency = EXCLUDED.currency, stripe_event_op = EXCLUDED.stripe_event_op, bijgewerkt_op = now()
+    WHERE t.stripe_event_op IS NULL OR t.stripe_event_op <= EXCLUDED.stripe_event_op
+    RETURNING t.huurder_id, t.stripe_subscription_id
+  ),
+  meldingen AS (
+    INSERT INTO public.notificaties (gebruiker_id, type, titel, inhoud, gelezen)
+    SELECT x.huurder_id, 'systeem', 'Betaling succesvol',
+           'Je jaarlijkse abonnement is geactiveerd. Je hebt nu toegang tot alle functies van Huurly.', false
+    FROM toegepast x
+  )
+  UPDATE public.stripe_gebeurtenissen g
+  SET status = CASE WHEN EXISTS (
+        SELECT 1 FROM kandidaten k JOIN toegepast x ON x.stripe_subscription_id = k.payload ->> 'subscription' WHERE k.id = g.id
+      ) THEN 'verwerkt' ELSE 'overgeslagen' END,
+      fout = NULL, verwerkt_op = now()
+  WHERE g.id = ANY (ids) AND g.status = 'bezig' AND g.type = 'checkout.session.completed';
+
+  -- === CHECKOUT SESSION FAILED / EXPIRED ===
+  WITH kandidaten AS (
+    SELECT DISTINCT ON (g.object_id) g.id, g.object_id, g.aangemaakt_stripe
+    FROM public.stripe_gebeurtenissen g
+    WHERE g.id = ANY (ids) AND g.status = 'bezig'
+      AND g.type IN ('checkout.session.async_payment_failed', 'checkout.session.expired')
+    ORDER BY g.object_id, g.aangemaakt_stripe DESC, g.id DESC
+  ),
+  toegepast AS (
+    UPDATE public.abonnementen t
+    SET status = 'geannuleerd', stripe_event_op = k.aangemaakt_stripe, bijgewerkt_op = now()
+    FROM kandidaten k
+    WHERE t.stripe_sessie_id = k.object_id AND (t.stripe_event_op IS NULL OR t.stripe_event_op <= k.aangemaakt_stripe)
+    RETURNING k.id
+  )
+  UPDATE public.stripe_gebeurtenissen g
+  SET status = CASE WHEN g.id IN (SELECT x.id FROM toegepast x) THEN 'verwerkt' ELSE 'overgeslagen' END, verwerkt_op = now()
+  WHERE g.id = ANY (ids) AND g.status = 'bezig'
+    AND g.type IN ('checkout.session.async_payment_failed', 'checkout.session.expired');
+
+  -- === SUBSCRIPTION UPDATED / CANCELLED ===
+  WITH kandidaten AS (
+    SELECT DISTINCT ON (g.object_id) g.id, g.object_id, g.aangemaakt_stripe, g.payload
+    FROM public.stripe_gebeurtenissen g
+    WHERE g.id = ANY (ids) AND g.status = 'bezig'
+      AND g.type IN ('customer.subscription.updated', 'customer.subscription.deleted')
+    ORDER BY g.object_id, g.aangemaakt_stripe DESC, g.id DESC
+  ),
+  toegepast AS (
+    UPDATE public.abonnementen t
+    SET status = public.stripe_abonnement_status(k.payload ->> 'status'),
+        start_datum = COALESCE(public.stripe_periode(k.payload, 'current_period_start'), t.start_datum),
+        eind_datum = COALESCE(public.stripe_periode(k.payload, 'current_period_end'), t.eind_datum),
+        stripe_event_op = k.aangemaakt_stripe, bijgewerkt_op = now()
+    FROM kandidaten k
+    WHERE t.stripe_subscription_id = k.object_id AND (t.stripe_event_op IS NULL OR t.stripe_event_op <= k.aangemaakt_stripe)
+    RETURNING k.id
+  )
+  UPDATE public.stripe_gebeurtenissen g
+  SET status = CASE WHEN g.id IN (SELECT x.id FROM toegepast x) THEN 'verwerkt' ELSE 'overgeslagen' END, verwerkt_op = now()
+  WHERE g.id = ANY (ids) AND g.status = 'bezig'
+    AND g.type IN ('customer.subscription.updated', 'customer.subscription.deleted');
+
+  -- Event types we do not handle
+  UPDATE public.stripe_gebeurtenissen g
+  SET status = 'overgeslagen', verwerkt_op = now()
+  WHERE g.id = ANY (ids) AND g.status = 'bezig';
+
+  IF mislukte IS NOT NULL THEN
+    RAISE WARNING 'Stripe-gebeurtenissen mislukt: %', mislukte;
+  END IF;
+
+  RETURN QUERY
+  SELECT count(*) FILTER (WHERE g.status = 'verwerkt'), count(*) FILTER (WHERE g.status = 'overgeslagen'),
+         count(*) FILTER (WHERE g.status = 'mislukt'), count(*) FILTER (WHERE g.status = 'wachtend')
+  FROM public.stripe_gebeurtenissen g
+  WHERE g.id = ANY (ids);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.reserveer_stripe_gebeurtenissen(integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.verwerk_stripe_gebeurtenissen(text[], jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reserveer_stripe_gebeurtenissen(integer) TO service_role;
+GRANT EXECUTE ON FUNCTION public.verwerk_stripe_gebeurtenissen(text[], jsonb) TO service_role;
@@ -0,0 +1,161 @@
+-- =================================================================
+-- CHUNKED SUBSCRIPTION MAINTENANCE WITH A CHECKPOINT
+-- =================================================================
+-- check_expiring_subscriptions() and expire_subscriptions() (20250103000006) each ran one statement
+-- over abonnementen. They compared eind_datum::date, which no index serves, so every run read every
+-- subscription. It also held the row locks of every reminded or expired subscription until the end
+-- of the run, so a checkout or webhook touching one of those rows waited for the whole job.
+--
+-- onderhoud_abonnementen() does one chunk per call instead (its own transaction when called through
+-- PostgREST), walking the partial index below in (eind_datum, id) order:
+-- * rows are locked with SKIP LOCKED, so the job never waits for a checkout; a skipped row is
+--   counted and picked up by the next run;
+-- * the keyset position and running totals are kept in abonnement_onderhoud, one row per task and
+--   day, written in the same transaction as the chunk. An interrupted run resumes after the last
+--   committed chunk, and a finished day is not run twice;
+-- * each call returns the rows processed and skipped, its duration and the time spent taking row
+--   locks, which subscription-maintenance logs per chunk.
+--
+-- Reminders now go to every active subscription that ends within 14 days and has not been reminded,
+-- instead of only those ending exactly 14 days from today. A day the job did not run, or a row that
+-- was locked, is caught up the next day rather than never getting its reminder.
+-- The old functions are left in place; harness.bench_maintenance compares both.
+
+-- Active subscriptions by end date: the only rows either task looks at
+CREATE INDEX IF NOT EXISTS idx_abonnementen_actief_eind_datum
+  ON public.abonnementen (eind_datum, id) WHERE status = 'actief';
+
+CREATE TABLE IF NOT EXISTS public.abonnement_onderhoud (
+    taak text NOT NULL CHECK (taak IN ('herinneringen', 'verlopen')),
+    peildatum date NOT NULL,
+    positie_eind timestamptz,                     -- keyset position: last row of the last chunk
+    positie_id uuid,
+    chunks integer NOT NULL DEFAULT 0,
+    totaal_verwerkt bigint NOT NULL DEFAULT 0,
+    totaal_vergrendeld bigint NOT NULL DEFAULT 0, -- skipped: locked by another transaction or changed meanwhile
+    totaal_duur_ms numeric NOT NULL DEFAULT 0,
+    totaal_lock_wacht_ms numeric NOT NULL DEFAULT 0,
+    gestart_op timestamptz NOT NULL DEFAULT now(),
+    bijgewerkt_op timestamptz NOT NULL DEFAULT now(),
+    voltooid_op timestamptz,
+    PRIMARY KEY (taak, peildatum)
+);
+ALTER TABLE public.abonnement_onderhoud ENABLE ROW LEVEL SECURITY;
+-- No policies: written by onderhoud_abonnementen() with the service role
+
+-- One chunk of 'herinneringen' (reminder notifications) or 'verlopen' (expire past end date) for
+-- in_peildatum. Returns klaar once the task has nothing left for that day.
+-- lock_timeout: a DDL lock on abonnementen fails the chunk instead of queueing checkouts behind it.
+CREATE OR REPLACE FUNCTION public.onderhoud_abonnementen(
+  in_taak text,
+  chunk_grootte integer DEFAULT 5000,
+  in_peildatum date DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (verwerkt integer, vergrendeld integer, duur_ms numeric, lock_wacht_ms numeric, klaar boolean)
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public SET lock_timeout = '2s' AS $$
+DECLARE
+  gestart timestamptz := clock_timestamp();
+  lock_gestart timestamptz;
+  grootte integer := LEAST(GREATEST(COALESCE(chunk_grootte, 5000), 1), 50000);
+  ondergrens timestamptz;
+  bovengrens timestamptz;
+  voortgang public.abonnement_onderhoud;
+  ids uuid[];
+  einden timestamptz[];
+  vastgezet uuid[];
+  aantal integer;
+BEGIN
+  IF in_taak IS NULL OR in_taak NOT IN ('herinneringen', 'verlopen') THEN
+    RAISE EXCEPTION 'Onbekende onderhoudstaak: %', in_taak USING ERRCODE = '22023';
+  END IF;
+
+  IF in_taak = 'verlopen' THEN
+    ondergrens := '-infinity';
+    bovengrens := in_peildatum;
+  ELSE
+    ondergrens := in_peildatum;
+    bovengrens := in_peildatum + 15;
+  END IF;
+
+  INSERT INTO public.abonnement_onderhoud (taak, peildatum) VALUES (in_taak, in_peildatum)
+  ON CONFLICT DO NOTHING;
+  -- NOWAIT: a second run of the same task fails at once instead of redoing the chunk after this one
+  SELECT * INTO voortgang FROM public.abonnement_onderhoud o
+  WHERE o.taak = in_taak AND o.peildatum = in_peildatum
+  FOR UPDATE NOWAIT;
+
+  IF voortgang.voltooid_op IS NOT NULL THEN
+    RETURN QUERY SELECT 0, 0, 0::numeric, 0::numeric, true;
+    RETURN;
+  END IF;
+
+  -- The next chunk after the checkpoint, read from idx_abonnementen_actief_eind_datum without locks
+  SELECT array_agg(k.id ORDER BY k.eind_datum, k.id), array_agg(k.eind_datum ORDER BY k.eind_datum, k.id)
+  INTO ids, einden
+  FROM (
+    SELECT a.id, a.eind_datum
+    FROM public.abonnementen a
+    WHERE a.status = 'actief'
+      AND (a.eind_datum, a.id) > (GREATEST(voortgang.positie_eind, ondergrens),
+                                  COALESCE(voortgang.positie_id, '00000000-0000-0000-0000-000000000000'))
+      AND a.eind_datum < bovengrens
+      AND (in_taak = 'verlopen' OR a.expiration_reminder_sent IS NOT TRUE)
+    ORDER BY a.eind_datum, a.id
+    LIMIT grootte
+  ) AS k;
+  aantal := COALESCE(array_length(ids, 1), 0);
+
+  -- Rows a checkout or webhook holds right now are skipped, not waited for. The conditions are
+  -- checked again on the locked row, so a subscription renewed meanwhile is left alone.
+  lock_gestart := clock_timestamp();
+  WITH vrij AS (
+    SELECT a.id FROM public.abonnementen a
+    WHERE a.id = ANY (ids) AND a.status = 'actief' AND a.eind_datum < bovengrens
+      AND (in_taak = 'verlopen' OR a.expiration_reminder_sent IS NOT TRUE)
+    FOR UPDATE SKIP LOCKED
+  )
+  SELECT array_agg(v.id) INTO vastgezet FROM vrij v;
+  lock_wacht_ms := round((extract(epoch FROM clock_timestamp() - lock_gestart) * 1000)::numeric, 3);
+
+  IF in_taak = 'verlopen' THEN
+    UPDATE public.abonnementen a
+    SET status = 'verlopen', bijgewerkt_op = now()
+    WHERE a.id = ANY (vastgezet);
+  ELSE
+    WITH herinnerd AS (
+      UPDATE public.abonnementen a
+      SET expiration_reminder_sent = true, expiration_reminder_sent_at = now()
+      WHERE a.id = ANY (vastgezet)
+      RETURNING a.huurder_id, a.eind_datum
+    )
+    INSERT INTO public.notificaties (gebruiker_id, type, titel, inhoud, gelezen)
+    SELECT h.huurder_id, 'systeem', 'Abonnement verloopt binnenkort',
+           'Je jaarlijkse abonnement verloopt op ' || h.eind_datum::date
+             || '. Verleng je abonnement om toegang te behouden tot alle functies.',
+           false
+    FROM herinnerd h;
+  END IF;
+  GET DIAGNOSTICS verwerkt = ROW_COUNT;
+
+  vergrendeld := aantal - COALESCE(array_length(vastgezet, 1), 0);
+  klaar := aantal < grootte;
+  duur_ms := round((extract(epoch FROM clock_timestamp() - gestart) * 1000)::numeric, 3);
+
+  UPDATE public.abonnement_onderhoud o
+  SET positie_eind = COALESCE(einden[aantal], o.positie_eind),
+      positie_id = COALESCE(ids[aantal], o.positie_id),
+      chunks = o.chunks + 1,
+      totaal_verwerkt = o.totaal_verwerkt + verwerkt,
+      totaal_vergrendeld = o.totaal_vergrendeld + vergrendeld,
+      totaal_duur_ms = o.totaal_duur_ms + duur_ms,
+      totaal_lock_wacht_ms = o.totaal_lock_wacht_ms + lock_wacht_ms,
+      bijgewerkt_op = now(),
+      voltooid_op = CASE WHEN klaar THEN now() END
+  WHERE o.taak = in_taak AND o.peildatum = in_peildatum;
+
+  RETURN NEXT;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.onderhoud_abonnementen(text, integer, date) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.onderhoud_abonnementen(text, integer, date) TO service_role;
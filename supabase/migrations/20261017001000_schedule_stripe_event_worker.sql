@@ -0,0 +1,46 @@
+-- =================================================================
+-- SCHEDULE THE STRIPE EVENT WORKER
+-- =================================================================
+-- stripe-webhook drains the event queue after recording an event. A drain that threw or was cut off
+-- leaves its events queued (or reserved until the reservation expires after five minutes), and
+-- without a schedule they would only be retried when the next webhook arrives. pg_cron calls the
+-- stripe-event-worker function every minute through pg_net, but only when the queue holds events
+-- that are due: waiting or with an expired reservation, and past their backoff (volgende_poging_op).
+--
+-- The project URL and service role key are read from Vault, as in Supabase's guide to scheduling
+-- edge functions. Set them once per project:
+--   SELECT vault.create_secret('https://<project-ref>.supabase.co', 'project_url');
+--   SELECT vault.create_secret('<service role key>', 'service_role_key');
+-- Until both exist the job does nothing.
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_cron')
+     OR NOT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_net') THEN
+    RAISE NOTICE 'pg_cron or pg_net is not available; stripe-event-worker is not scheduled';
+    RETURN;
+  END IF;
+
+  CREATE EXTENSION IF NOT EXISTS pg_cron;
+  CREATE EXTENSION IF NOT EXISTS pg_net WITH SCHEMA extensions;
+
+  -- Scheduling under an existing name replaces that job
+  PERFORM cron.schedule('stripe-event-worker', '* * * * *', $job$
+    SELECT net.http_post(
+      url := s.project_url || '/functions/v1/stripe-event-worker',
+      headers := jsonb_build_object('Content-Type', 'application/json', 'Authorization', 'Bearer ' || s.service_role_key),
+      body := '{}'::jsonb,
+      timeout_milliseconds := 150000
+    )
+    FROM (
+      SELECT (SELECT decrypted_secret FROM vault.decrypted_secrets WHERE name = 'project_url') AS project_url,
+             (SELECT decrypted_secret FROM vault.decrypted_secrets WHERE name = 'service_role_key') AS service_role_key
+    ) AS s
+    WHERE s.project_url IS NOT NULL AND s.service_role_key IS NOT NULL
+      AND EXISTS (
+        SELECT 1 FROM public.stripe_gebeurtenissen g
+        WHERE g.volgende_poging_op <= now()
+          AND (g.status = 'wachtend' OR (g.status = 'bezig' AND g.geclaimd_op < now() - interval '5 minutes'))
+      )
+  $job$);
+END $$;
@@ -1,35 +1,17 @@
 import asyncio
 from playwright import async_api
+from harness import config
+from harness.browser_pool import borrow_context
+from harness.tracing import click, fill
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+async def run_test(pool=None):
+    # Borrow an isolated browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool) as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -47,57 +29,40 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click on 'Profiel aanmaken' button to start the multi-step signup form.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/section/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/section/div/div/div/button')
         
 
         # Fill in 'Voornaam' and 'Achternaam' fields with valid data and click 'Volgende' to proceed to next step.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Soto')
+        await fill(frame, 'xpath=html/body/div[3]/form/div/input', 'Soto')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Crioyo')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[2]/input', 'Crioyo')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/form/div[3]/button')
         
 
         # Fill in email, password, confirm password fields with valid data and click 'Registreren' to submit registration.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
+        await fill(frame, 'xpath=html/body/div[3]/form/div/input', 'sotocrioyo@gmail.com')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[2]/input', 'Admin1290@@')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[3]/input', 'Admin1290@@')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[4]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/form/div[4]/button[2]')
         
 
         assert False, 'Test plan execution failed: registration process did not complete successfully.'
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
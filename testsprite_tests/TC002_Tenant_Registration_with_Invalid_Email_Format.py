@@ -1,35 +1,18 @@
 import asyncio
 from playwright import async_api
+from harness import config
+from harness.browser_pool import borrow_context
+from harness.tracing import click, fill
+from harness.waits import ready
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+async def run_test(pool=None):
+    # Borrow an isolated browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool) as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -47,63 +30,46 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click on 'Profiel aanmaken' button to open the multi-step signup form.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/section/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/section/div/div/div/button')
         
 
         # Fill in 'Voornaam' and 'Achternaam' fields with valid data and click 'Volgende' to proceed to step 2 where email input is expected.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('TestFirstName')
+        await fill(frame, 'xpath=html/body/div[3]/form/div/input', 'TestFirstName')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('TestLastName')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[2]/input', 'TestLastName')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/form/div[3]/button')
         
 
         # Enter an invalid email format in the email field, fill password and confirm password fields correctly, then attempt to submit the form.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('invalid-email-format')
+        await fill(frame, 'xpath=html/body/div[3]/form/div/input', 'invalid-email-format')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[2]/input', 'Admin1290@@')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[3]/input', 'Admin1290@@')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[4]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/form/div[4]/button[2]')
         
 
         # Assert that the form shows a validation error message for invalid email format
         error_locator = frame.locator('xpath=//div[contains(text(), "E-mailadres is ongeldig") or contains(text(), "ongeldig e-mailadres")]')
-        await page.wait_for_timeout(2000)  # wait for error message to appear
+        await ready(page, error_locator)  # wait for error message to appear
         assert await error_locator.is_visible(), "Expected validation error message for invalid email format is not visible"
         # Assert that the form does not proceed to the next step by checking the presence of the 'Registreren' button
         register_button = frame.locator('xpath=//button[contains(text(), "Registreren")]')
         assert await register_button.is_visible(), "Register button should still be visible, indicating form did not proceed"
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
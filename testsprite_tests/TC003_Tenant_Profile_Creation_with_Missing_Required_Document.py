@@ -1,35 +1,23 @@
 import asyncio
 from playwright import async_api
+from harness import config
+from harness.auth_state import wait_for_dashboard
+from harness.browser_pool import borrow_context
+from harness.bench_upload import assert_upload_budget
+from harness.budgets import assert_route_budget
+from harness.load import tiny_png
+from harness.responsiveness import assert_input_latency, measure_input_latency
+from harness.tracing import click, fill
+from harness.waits import ready
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+async def run_test(pool=None):
+    # Borrow an isolated, already signed-in browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool, role="huurder") as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,64 +33,63 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on 'Inloggen' button to start login process.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Start from the cached tenant session instead of logging in through the 'Inloggen' modal
+        await wait_for_dashboard(page)
         
 
-        # Fill email and password fields with provided tenant credentials and submit login form.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
+        # Check the tenant dashboard against its performance budget, including how many Supabase requests hydration makes.
+        await assert_route_budget(page, "/huurder-dashboard")
         
 
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Document uploads: parallel multipart must beat a single PUT on an emulated mobile link and resume after a disconnect.
+        await assert_upload_budget()
         
 
         # Click on 'Profiel Aanmaken' button to open profile creation modal.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/ol/li/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div/ol/li/button')
         
 
         # Click on 'Profiel bewerken' button (index 10) to open profile creation modal.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div/button')
         
 
         # Fill all required fields in step 1 and navigate through steps 2 to 7, skipping document upload, then attempt to submit the profile.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/div[2]/form/div/div/div[3]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Jayshuah')
+        await fill(frame, 'xpath=html/body/div[3]/div[2]/form/div/div/div[3]/div/input', 'Jayshuah')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/div[2]/form/div/div/div[3]/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Soto Garcia')
+        await fill(frame, 'xpath=html/body/div[3]/div[2]/form/div/div/div[3]/div[2]/input', 'Soto Garcia')
         
 
+        # Replace the profile photo with a 12 MP image through the 'Vervangen' button while typing in the surname field; typing must stay responsive during the resize and upload.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/div[2]/form/div/div/div[4]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('15/03/1990')
+        probe = frame.locator('xpath=html/body/div[3]/div[2]/form/div/div/div[3]/div[2]/input').nth(0)
+
+        async def replace_photo():
+            async with frame.expect_file_chooser(timeout=5000) as chooser_info:
+                await click(frame, 'xpath=html/body/div[3]/div[2]/form/div/div/div[2]/div/div/div[2]/button')
+            chooser = await chooser_info.value
+            await chooser.set_files({"name": "phone-photo.png", "mimeType": "image/png", "buffer": tiny_png(4000, 3000)})
+            await frame.get_by_role("button", name="Upload Profielfoto").click(timeout=5000)
+            await frame.get_by_text("Uploaden...").wait_for(state="hidden", timeout=15000)
+            await ready(frame, timeout_ms=15000)
+
+        assert_input_latency(await measure_input_latency(frame, replace_photo, probe))
+        
+
+        frame = context.pages[-1]
+        await fill(frame, 'xpath=html/body/div[3]/div[2]/form/div/div/div[4]/div/div/input', '15/03/1990')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/div[2]/form/div/div/div[4]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('+31 6 12345678')
+        await fill(frame, 'xpath=html/body/div[3]/div[2]/form/div/div/div[4]/div[2]/div/input', '+31 6 12345678')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/div[2]/form/div/div/div[5]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/div[2]/form/div/div/div[5]/div/button')
         
 
         # Scroll down or search for the 'Volgende' button to proceed to step 2 and continue filling the form.
@@ -114,21 +101,11 @@ async def run_test():
 
         # Click 'Volgende' button to proceed to step 2 (Werk & Inkomen) and continue filling required fields except document upload.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/div[2]/form/div[3]/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/div[2]/form/div[3]/div/button[2]')
         
 
         # Generic failing assertion since expected result is unknown and test plan execution failed.
         assert False, 'Test failed: Profile creation should not complete without required verification documents.'
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,35 +1,19 @@
 import asyncio
 from playwright import async_api
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+from harness import config
+from harness.auth_state import wait_for_dashboard
+from harness.browser_pool import borrow_context
+from harness.budgets import assert_query_budget
+from harness.tracing import click, fill
+
+async def run_test(pool=None):
+    # Borrow an isolated, already signed-in browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool, role="verhuurder") as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,73 +29,50 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on the 'Inloggen' button to start login as landlord.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Fill in email and password fields with landlord credentials and submit login form.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
+        # Start from the cached landlord session instead of logging in through the 'Inloggen' modal
+        await wait_for_dashboard(page)
         
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Page deep into the tenant search (50 keyset pages of 20): the deepest page must stay within the same budget as the first
+        await assert_query_budget(page, "zoek_huurders_pagina", {"in_city": "Amsterdam", "min_budget": 1000, "max_budget": 1600, "page_size": 20}, pages=50)
         
 
         # Click on 'Woningen zoeken' (index 12) to navigate to tenant search interface.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div/button[3]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div/button[3]')
         
 
         # Apply filter for location 'Amsterdam' in the location input (index 6) and verify results update accordingly.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Amsterdam')
+        await fill(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div/input', 'Amsterdam')
         
 
         # Apply minimum price filter to 1000 (index 7) and maximum price filter to 1600 (index 8) and verify results update accordingly.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1000')
+        await fill(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div[2]/input', '1000')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div[3]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1600')
+        await fill(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div[3]/input', '1600')
         
 
         # Open the 'Type Woning' dropdown (index 9) and select a type to apply the type filter.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div[4]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div[4]/button')
         
 
         # Select 'Appartement' (index 1) from the 'Type Woning' dropdown to apply the type filter and verify results update accordingly.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[2]/div/div/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[2]/div/div/div')
         
 
         # Click on the 'Filters Wissen' button (index 11) to clear filters and verify the full unfiltered list is restored.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[3]/button')
         
 
         # Click on the 'Type Woning' dropdown (index 9) to open it and select a sort order if available, or find sorting options to test sorting functionality.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div[4]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div[2]/div[2]/div[4]/button')
         
 
         # Check if there is a sorting dropdown or button on the page to apply sorting by price ascending or descending.
@@ -130,8 +91,7 @@ async def run_test():
 
         # Click on the 'Appartement' option (index 1) in the 'Type Woning' dropdown to apply the filter again and verify results update accordingly.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[2]/div/div/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[2]/div/div/div')
         
 
         # Assert that the user is logged in by checking the displayed user email in the header.
@@ -178,15 +138,6 @@ async def run_test():
         # Assert that after clearing filters, the total found results is greater than or equal to the filtered results count.
         total_found_text = await frame.locator('xpath=//div[contains(text(), "Totaal gevonden")]').text_content()
         assert total_found_text is None or int(''.join(filter(str.isdigit, total_found_text))) >= 3, "Total found results after clearing filters is less than expected."
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
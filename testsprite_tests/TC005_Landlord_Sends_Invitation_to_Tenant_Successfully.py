@@ -1,35 +1,18 @@
 import asyncio
 from playwright import async_api
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+from harness import config
+from harness.auth_state import wait_for_dashboard
+from harness.browser_pool import borrow_context
+from harness.tracing import click, fill
+
+async def run_test(pool=None):
+    # Borrow an isolated, already signed-in browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool, role="verhuurder") as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,84 +28,56 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on the 'Inloggen' button to start login process as landlord.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Input landlord email and password, then click login button.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Start from the cached landlord session instead of logging in through the 'Inloggen' modal
+        await wait_for_dashboard(page)
         
 
         # Navigate to 'Woningen zoeken' (Search Properties) or equivalent to find tenants to invite.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[4]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[4]/div/button')
         
 
         # Close the document upload modal and look for alternative navigation options to reach tenant or property search page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/div[2]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/div[2]/div[2]/button')
         
 
         # Look for alternative navigation options to reach tenant or property search page to invite tenant for viewing.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/header/div/div/div[2]/button[2]')
         
 
         # Click on 'Inloggen' button to try logging in again and attempt navigation to tenant or property search page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/header/div/div/div[2]/button')
         
 
         # Input landlord email and password, then click login button to attempt login again.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
+        await fill(frame, 'xpath=html/body/div[3]/form/div/input', 'sotocrioyo@gmail.com')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[2]/input', 'Admin1290@@')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/form/button')
         
 
         # Log out from tenant account to return to login page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[3]/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[3]/div/div/button')
         
 
         # Try to find an alternative logout option or profile menu to log out from tenant account.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div/button')
         
 
         # Close profile editing modal and look for any other logout or profile menu options to log out from tenant account.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/button')
         
 
         # Scroll down to look for any logout or profile menu options to log out from tenant account.
@@ -130,15 +85,6 @@ async def run_test():
         
 
         assert False, 'Test plan execution failed: generic failure assertion.'
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
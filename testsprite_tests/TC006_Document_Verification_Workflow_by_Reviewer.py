@@ -1,35 +1,20 @@
 import asyncio
 from playwright import async_api
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+from harness import config
+from harness.auth_state import wait_for_dashboard
+from harness.browser_pool import borrow_context
+from harness.query_cache import assert_cache_effective, reset_cache_stats
+from harness.signing import SigningCounter, assert_signing_budget
+from harness.tracing import click, fill
+
+async def run_test(pool=None):
+    # Borrow an isolated, already signed-in browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool, role="beoordelaar") as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,90 +30,73 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on 'Inloggen' button to start login as Reviewer.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Fill in email and password fields with Reviewer credentials and click login.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
+        # Start from the cached reviewer session instead of logging in through the 'Inloggen' modal
+        await wait_for_dashboard(page)
         
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Count the storage URL signing requests each page makes from here on
+        signing = SigningCounter(page)
         
 
         # Try clicking 'Woningen zoeken' (index 12) or 'Help & Support' (index 13) to check for alternative navigation to document review dashboard or look for other navigation elements.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div/button[3]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div/button[3]')
         
 
         # Click 'Terug naar Dashboard' button (index 4) to return to dashboard and look for document review navigation.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div/div/button')
         
 
         # Click 'Documenten beheren' button (index 11) to access tenant's uploaded documents queue for review.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div/button[2]')
         
 
         # Click 'Inloggen' button (index 2) to start login as Reviewer again.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/header/div/div/div[2]/button')
         
 
         # Input email and password for Reviewer and click login button.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
+        await fill(frame, 'xpath=html/body/div[3]/form/div/input', 'sotocrioyo@gmail.com')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[2]/input', 'Admin1290@@')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/form/button')
+        
+        # Count query cache hits from here on: reopening the dashboard and its modals should not refetch
+        await reset_cache_stats(page)
         
 
         # Click on 'Documenten beheren' button (index 11) to access tenant's uploaded documents queue.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div/button[2]')
         
 
         # Close the 'Documenten Uploaden' modal and navigate to the document review dashboard to review tenant uploaded documents.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/button')
         
 
         # Click 'Documenten beheren' button (index 11) again to try accessing tenant's uploaded documents queue for review.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div/button[2]')
         
 
         # Click the 'Sluiten' button (index 8) to close the 'Documenten Uploaden' modal and look for document review queue or alternative navigation for document approval/rejection.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/button')
+        
+
+        await assert_cache_effective(page)
+        
+        # Lists sign their photos and documents in one batch instead of one request per row
+        await assert_signing_budget(signing)
         
 
         # Scroll down to check for any hidden or lower page elements related to document review queue or document approval/rejection actions.
@@ -137,20 +105,10 @@ async def run_test():
 
         # Click 'Accepteren' button (index 16) to approve a valid document and verify notification and GDPR-compliant deletion.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[3]/div/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[3]/div/div/button[2]')
         
 
         assert False, 'Test plan execution failed: expected result unknown, forcing failure as per instructions.'
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,35 +1,19 @@
 import asyncio
 from playwright import async_api
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+from harness import config
+from harness.auth_state import wait_for_dashboard
+from harness.browser_pool import borrow_context
+from harness.stripe_replay import assert_webhook_budget
+from harness.tracing import click
+
+async def run_test(pool=None):
+    # Borrow an isolated, already signed-in browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool, role="huurder") as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,26 +29,11 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on 'Inloggen' button to start login process as tenant.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Input tenant email and password, then click login button.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
+        # Start from the cached tenant session instead of logging in through the 'Inloggen' modal
+        await wait_for_dashboard(page)
         
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Webhook ingestion: signed Stripe events, replayed with duplicates and out of order, are acknowledged within budget and leave every subscription in its latest state.
+        await assert_webhook_budget()
         
 
         # Locate and click on subscription or payment related section/button to start subscription payment process.
@@ -88,14 +57,12 @@ async def run_test():
 
         # Check for any hidden or less obvious subscription/payment related links or buttons, possibly in profile editing or other sections. If none found, report issue.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[3]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[3]/div/button')
         
 
         # Close the profile completion modal to return to tenant dashboard and search for subscription or payment related sections or buttons.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/button')
         
 
         # Check for any subscription or payment related links or buttons in the header, sidebar, or other navigation menus. If none found, try scrolling or searching for subscription management in account settings.
@@ -114,14 +81,12 @@ async def run_test():
 
         # Click on 'Profiel bewerken' button to check if subscription or payment options are available there.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/div/div/div[2]/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/div/div/div[2]/div/button')
         
 
         # Close the profile completion modal to return to tenant dashboard and search for subscription or payment related sections or buttons.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/button')
         
 
         # Scroll down to check for any subscription or payment related sections or buttons below the current viewport.
@@ -139,15 +104,6 @@ async def run_test():
         
 
         assert False, 'Test plan execution failed: Unable to verify subscription payment and status update.'
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
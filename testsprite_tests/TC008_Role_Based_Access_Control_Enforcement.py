@@ -1,35 +1,18 @@
 import asyncio
 from playwright import async_api
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+from harness import config
+from harness.auth_state import sign_in
+from harness.browser_pool import borrow_context
+from harness.tracing import click, fill
+
+async def run_test(pool=None):
+    # Borrow an isolated browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool) as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -47,90 +30,61 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click on 'Inloggen' button to start login as Tenant.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/header/div/div/div[2]/button')
         
 
         # Input Tenant email and password, then click login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('tenant@example.com')
+        await fill(frame, 'xpath=html/body/div[3]/form/div/input', 'tenant@example.com')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('TenantPass123')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[2]/input', 'TenantPass123')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/form/button')
         
 
         # Close login modal and try to login with valid Tenant credentials or request valid credentials.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/button')
         
 
-        # Click on 'Inloggen' button to open login modal.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Input Admin email and password, then click login.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Switch to the cached admin session instead of logging in through the 'Inloggen' modal.
+        await sign_in(page, "beheerder")
         
 
         # Attempt to access Admin dashboard URL directly to verify access control for Tenant role (simulate Tenant role access to Admin dashboard).
-        await page.goto('http://localhost:8080/admin-dashboard', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/admin-dashboard", timeout=10000)
         
 
         # Logout from Admin account and login as Landlord to test reviewer-only action restrictions.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/button')
         
 
         # Click on 'Inloggen' button to open login modal for Landlord login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/header/div/div/div[2]/button')
         
 
         # Input Landlord email and password, then click login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('landlord@example.com')
+        await fill(frame, 'xpath=html/body/div[3]/form/div/input', 'landlord@example.com')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('LandlordPass123')
+        await fill(frame, 'xpath=html/body/div[3]/form/div[2]/input', 'LandlordPass123')
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/form/button')
         
 
         # Close login modal and report lack of valid Landlord credentials for testing.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div[3]/button')
         
 
         # Assertion for Tenant trying to access Admin dashboard - verify access denied or redirected
@@ -143,15 +97,6 @@ async def run_test():
         error_message_locator = page.locator('text=You do not have permission to perform this action')
         error_message_count = await error_message_locator.count()
         assert error_message_count > 0, 'Landlord should see an error message when attempting reviewer-only actions'
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
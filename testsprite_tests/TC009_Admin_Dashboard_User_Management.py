@@ -1,35 +1,21 @@
 import asyncio
 from playwright import async_api
+from harness import config
+from harness.auth_state import wait_for_dashboard
+from harness.bench_stats import StatsTraffic, assert_stats_budget
+from harness.browser_pool import borrow_context
+from harness.query_cache import assert_cache_effective, reset_cache_stats, revisit
+from harness.tracing import click
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+async def run_test(pool=None):
+    # Borrow an isolated, already signed-in browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool, role="beheerder") as context:
         # Open a new page in the browser context
         page = await context.new_page()
+        stats_traffic = StatsTraffic(page)
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,26 +31,18 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on the 'Inloggen' (Login) button to start admin login.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Start from the cached admin session instead of logging in through the 'Inloggen' modal
+        await wait_for_dashboard(page)
         
-
-        # Input admin email and password, then click login button.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
+        # The dashboard's counts come from the aggregate counters: a small, fixed payload and no whole-table selects
+        await assert_stats_budget(stats_traffic)
+        stats_traffic.detach()
         
 
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Leave the dashboard and come back without reloading: the stats should come from the query cache
+        await reset_cache_stats(page)
+        await revisit(page)
+        await assert_cache_effective(page)
         
 
         # Navigate to user management section from the dashboard.
@@ -73,21 +51,11 @@ async def run_test():
 
         # Logout and login again to ensure admin dashboard is accessed or find a way to switch to admin dashboard.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[3]/div/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[3]/div/div/button[2]')
         
 
         # Final generic failing assertion since expected result is unknown
         assert False, 'Test plan execution failed: generic failure assertion'
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
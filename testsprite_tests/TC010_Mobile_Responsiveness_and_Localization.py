@@ -1,35 +1,18 @@
 import asyncio
 from playwright import async_api
+from harness import config
+from harness.browser_pool import borrow_context
+from harness.budgets import assert_route_budget
+from harness.tracing import click
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+async def run_test(pool=None):
+    # Borrow an isolated browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool) as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,43 +28,43 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
+        # Check the homepage against its performance budget (navigation timing, LCP, JS bytes, Supabase requests).
+        await assert_route_budget(page, "/")
+        
+
         # Change viewport to mobile device sizes and verify UI layout and Dutch text localization.
-        await page.goto('http://localhost:8080/', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/", timeout=10000)
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/section/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/section/div/div/div/button')
         
 
         # Simulate mobile viewport sizes and verify UI layout and Dutch text localization on the registration modal.
-        await page.goto('http://localhost:8080/', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/", timeout=10000)
         
 
         # Simulate mobile viewport sizes and verify UI layout and Dutch text localization on homepage and registration modal.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/section/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/section/div/div/div/button')
         
 
         # Simulate mobile viewport sizes and verify UI layout and Dutch text localization on the registration modal.
-        await page.goto('http://localhost:8080/', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/", timeout=10000)
         
 
         # Simulate mobile viewport sizes and verify UI layout and Dutch text localization on homepage and registration modal.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/section/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/section/div/div/div/button')
         
 
         # Simulate mobile viewport sizes and verify UI layout and Dutch text localization on the registration modal.
-        await page.goto('http://localhost:8080/', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/", timeout=10000)
         
 
         # Simulate mobile viewport sizes and verify UI layout and Dutch text localization on homepage and registration modal.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/section/div/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/section/div/div/div/button')
         
 
         # Assert that the page title and tagline are in Dutch and visible
@@ -112,15 +95,6 @@ async def run_test():
         assert await page.locator('xpath=//button[contains(text(),"Profiel aanmaken")]').is_visible()
         assert await page.locator('xpath=//section[contains(.,"Geverifieerde Profielen")]').is_visible()
         assert await page.locator('xpath=//footer').is_visible()
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
@@ -1,35 +1,18 @@
 import asyncio
 from playwright import async_api
+from harness import config
+from harness.auth_state import wait_for_dashboard
+from harness.browser_pool import borrow_context
+from harness.tracing import click
 
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
+async def run_test(pool=None):
+    # Borrow an isolated, already signed-in browser context from the shared pool (a private browser is launched when run standalone)
+    async with borrow_context(pool, role="huurder") as context:
         # Open a new page in the browser context
         page = await context.new_page()
         
         # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,47 +28,28 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on the 'Inloggen' button to open the login form.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/header/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # Fill in email and password fields and click the login button to authenticate and receive JWT token.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('sotocrioyo@gmail.com')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('Admin1290@@')
-        
-
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[3]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # Start from the cached tenant session instead of logging in through the 'Inloggen' modal
+        await wait_for_dashboard(page)
         
 
         # Manually tamper the JWT token or use expired token and attempt access to verify access denial.
-        await page.goto('http://localhost:8080/logout', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/logout", timeout=10000)
         
 
         # Click 'Terug naar home' button to return to home page and continue testing token tampering and expiration.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        await click(frame, 'xpath=html/body/div/div[2]/button')
         
 
         # Clear cookies and local storage to simulate token removal and then attempt to access the dashboard to verify access denial and redirection to login.
-        await page.goto('http://localhost:8080/huurder-dashboard', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/huurder-dashboard", timeout=10000)
         
 
-        await page.goto('http://localhost:8080/huurder-dashboard', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/huurder-dashboard", timeout=10000)
         
 
         # Attempt to access protected resource (dashboard) without login to verify access denial and redirection to login page.
-        await page.goto('http://localhost:8080/huurder-dashboard', timeout=10000)
+        await page.goto(f"{config.BASE_URL}/huurder-dashboard", timeout=10000)
         
 
         # Assertion: Verify access is granted with valid token by checking presence of dashboard element or user-specific content.
@@ -97,15 +61,6 @@ async def run_test():
         # Assertion: Ensure protected pages cannot be accessed after logout by checking redirection to login page or absence of dashboard elements.
         dashboard_element_after_logout = await page.locator('text=Dashboard').count()
         assert dashboard_element_after_logout == 0, 'Protected page accessible after logout, session not cleared.'
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+
+if __name__ == "__main__":
+    asyncio.run(run_test())
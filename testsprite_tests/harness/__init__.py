@@ -0,0 +1 @@
+"""Shared runtime support for the TestSprite Playwright scripts (TC001–TC015)."""
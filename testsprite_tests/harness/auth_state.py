@@ -0,0 +1,159 @@
+"""Per-role Supabase sessions cached as Playwright ``storage_state`` files.
+
+Logging in through the header 'Inloggen' modal costs every test several
+seconds and exercises nothing new after the first time. Instead each role
+signs in once against the Supabase password grant endpoint (the hosted
+project or a local stand-in); the resulting session is written into the same
+``localStorage`` key supabase-js uses and cached on disk until shortly before
+the access token expires.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlparse
+
+from harness import config, network_replay
+
+CACHE_DIR = Path(os.environ.get("TESTSPRITE_AUTH_CACHE", config.TESTS_DIR / ".auth"))
+# Re-authenticate when the cached access token has less than this left
+EXPIRY_MARGIN_S = 120
+
+# Default credentials are the account the generated TC scripts log in with
+DEFAULT_EMAIL = "sotocrioyo@gmail.com"
+DEFAULT_PASSWORD = "Admin1290@@"
+ROLES = ("huurder", "verhuurder", "beoordelaar", "beheerder")
+
+DASHBOARD_URL_RE = re.compile(r"/(huurder|verhuurder|beoordelaar|beheerder)-dashboard")
+
+_locks = {}
+
+
+class AuthError(RuntimeError):
+    pass
+
+
+def credentials(role):
+    """Email and password for ``role``, overridable via ``TESTSPRITE_<ROLE>_EMAIL`` / ``_PASSWORD``."""
+    if role not in ROLES:
+        raise ValueError(f"Unknown role {role!r}, expected one of {ROLES}")
+    prefix = f"TESTSPRITE_{role.upper()}"
+    return (
+        os.environ.get(f"{prefix}_EMAIL", DEFAULT_EMAIL),
+        os.environ.get(f"{prefix}_PASSWORD", DEFAULT_PASSWORD),
+    )
+
+
+def project_ref(supabase_url=None):
+    # Mirrors supabase-js: the first label of the API hostname
+    return urlparse(supabase_url or config.SUPABASE_URL).hostname.split(".")[0]
+
+
+def storage_key(supabase_url=None):
+    return f"sb-{project_ref(supabase_url)}-auth-token"
+
+
+def cache_path(role):
+    return CACHE_DIR / f"{project_ref()}-{role}.json"
+
+
+def password_grant(email, password):
+    """Sign in through GoTrue and return the session payload supabase-js would persist."""
+    if not config.SUPABASE_URL or not config.SUPABASE_ANON_KEY:
+        raise AuthError("VITE_SUPABASE_URL and VITE_SUPABASE_ANON_KEY must be set to cache sessions")
+    request = urllib.request.Request(
+        f"{config.SUPABASE_URL.rstrip('/')}/auth/v1/token?grant_type=password",
+        data=json.dumps({"email": email, "password": password}).encode(),
+        headers={"apikey": config.SUPABASE_ANON_KEY, "Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=15) as response:
+            session = json.load(response)
+    except urllib.error.HTTPError as exc:
+        raise AuthError(f"Login for {email} failed with HTTP {exc.code}: {exc.read().decode(errors='replace')}") from exc
+    session.setdefault("expires_at", int(time.time()) + int(session.get("expires_in", 3600)))
+    return session
+
+
+def build_storage_state(session, origin=None):
+    return {
+        "cookies": [],
+        "origins": [{
+            "origin": origin or config.BASE_URL,
+            "localStorage": [{"name": storage_key(), "value": json.dumps(session)}],
+        }],
+    }
+
+
+def _read_cache(role):
+    try:
+        cached = json.loads(cache_path(role).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if cached.get("expires_at", 0) - EXPIRY_MARGIN_S <= time.time():
+        return None
+    return cached["storage_state"]
+
+
+def _write_cache(role, session, state):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = cache_path(role)
+    # Write-then-rename so parallel workers never read a half-written file
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"expires_at": session["expires_at"], "storage_state": state}), encoding="utf-8")
+    tmp.replace(path)
+
+
+def recorded_session_path(role):
+    return network_replay.RECORDINGS_DIR / "auth" / f"{role}.json"
+
+
+def _replayed_session(role):
+    # The recorded token is long expired; push expires_at forward so supabase-js never tries to refresh it
+    try:
+        session = json.loads(recorded_session_path(role).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise AuthError(f"No recorded session for {role}, run once with TESTSPRITE_NETWORK=record") from exc
+    session["expires_at"] = int(time.time()) + 24 * 3600
+    return session
+
+
+async def storage_state_for(role):
+    """Return a Playwright ``storage_state`` dict with a live session for ``role``."""
+    if network_replay.MODE == "replay":
+        return build_storage_state(_replayed_session(role))
+    lock = _locks.setdefault(role, asyncio.Lock())
+    async with lock:
+        cached = _read_cache(role)
+        if cached is not None and network_replay.MODE != "record":
+            return cached
+        if cached is not None:
+            session = json.loads(cached["origins"][0]["localStorage"][0]["value"])
+        else:
+            session = await asyncio.to_thread(password_grant, *credentials(role))
+            _write_cache(role, session, build_storage_state(session))
+        if network_replay.MODE == "record":
+            path = recorded_session_path(role)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(session), encoding="utf-8")
+        return build_storage_state(session)
+
+
+async def sign_in(page, role):
+    """Swap the session of an already open page to ``role`` without going through the login modal."""
+    state = await storage_state_for(role)
+    entry = state["origins"][0]["localStorage"][0]
+    await page.goto(config.BASE_URL, wait_until="commit", timeout=10000)
+    await page.evaluate("([key, value]) => window.localStorage.setItem(key, value)", [entry["name"], entry["value"]])
+    await page.reload(wait_until="commit", timeout=10000)
+    await wait_for_dashboard(page)
+
+
+async def wait_for_dashboard(page, timeout_ms=10000):
+    # Index redirects an authenticated user to their role dashboard, just like after a UI login
+    await page.wait_for_url(DASHBOARD_URL_RE, timeout=timeout_ms)
@@ -0,0 +1,359 @@
+"""Nightly subscription maintenance over a million subscriptions.
+
+``subscription-maintenance`` used to call ``check_expiring_subscriptions()``
+and ``expire_subscriptions()``: one statement each over every ``abonnementen``
+row, holding the lock of every reminded or expired subscription until the end.
+It now calls ``onderhoud_abonnementen()`` (migration ``20261017000900``) chunk
+by chunk, walking a partial index on ``eind_datum`` with a checkpoint per task
+and day.
+
+``python -m harness.bench_maintenance`` loads synthetic subscriptions (1M by
+default, ending between 60 days ago and 340 days from now) into the local
+stand-in and runs each variant over a fresh load. Meanwhile checkout-like
+transactions run on other connections: new subscriptions, and renewals of
+subscriptions the job is about to remind or expire. Per variant it reports:
+
+* rows expired and reminded, wall time and rows/s; for the chunked run also
+  the chunk count, p95/max chunk duration, time spent taking row locks and rows
+  skipped because a checkout held them (all from the function's own output);
+* checkout latency during the run (p50/p95/max) and checkouts slower than
+  ``STALL_MS``, which is what the old statements did to checkout at this scale;
+* for the chunked run: one chunk is rolled back halfway, as when the function
+  is killed. The run must then continue from the committed checkpoint. At the
+  end no active subscription may be past its end date or unreminded inside the
+  window (except rows skipped as locked), and there must be exactly one
+  notification per reminded subscription.
+
+The synthetic rows, reminders and checkpoints are removed afterwards and the
+seeded subscriptions restored, so a run leaves the stand-in as it found it.
+
+Usage:
+    python -m harness.bench_maintenance                          # 1M subscriptions, both variants
+    python -m harness.bench_maintenance --subscriptions 100000 --variants chunked --chunk 2000
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+
+import psycopg
+
+from harness import config, datagen, local_db
+from harness.load import percentile
+
+logger = logging.getLogger("testsprite.bench_maintenance")
+
+SUBSCRIPTIONS = 1_000_000
+TENANTS = 10_000
+CHUNK = 5000
+VARIANTS = ("chunked", "legacy")
+TASKS = ("herinneringen", "verlopen")
+CHECKOUT_WORKERS = 4
+# Pause between one worker's transactions: a busy checkout day, not a flood
+CHECKOUT_PAUSE_S = 0.005
+RENEWAL_CANDIDATES = 2000
+# A rolled-back chunk is run after this many committed ones
+INTERRUPT_AFTER = 3
+STALL_MS = 1000
+# Subscriptions end between PAST_DAYS ago and SPREAD_DAYS - PAST_DAYS from today
+PAST_DAYS = 60
+SPREAD_DAYS = 400
+MARKER = "cus_bench_onderhoud"
+REMINDER_TITLE = "Abonnement verloopt binnenkort"
+OUTPUT_PATH = config.RESULTS_DIR / "bench-maintenance.json"
+
+LOAD_SQL = f"""
+    INSERT INTO public.abonnementen (huurder_id, status, start_datum, eind_datum, bedrag, currency, stripe_customer_id,
+                                     aangemaakt_op)
+    SELECT {local_db.tenant_id_sql('1 + n %% %(tenants)s')},
+           (CASE WHEN n %% 20 < 17 THEN 'actief' ELSE 'geannuleerd' END)::public.abonnement_status,
+           eind - interval '1 year', eind, %(price)s, 'eur', %(marker)s, eind - interval '1 year'
+    FROM (
+        SELECT n, CURRENT_DATE + ((n * 7919) %% %(spread)s - %(past)s) * interval '1 day' + (n %% 86400) * interval '1 second' AS eind
+        FROM generate_series(%(first)s, %(last)s) AS n
+    ) AS s
+"""
+CHUNK_SQL = "SELECT verwerkt, vergrendeld, duur_ms, lock_wacht_ms, klaar FROM public.onderhoud_abonnementen(%s, %s)"
+CHECKPOINT_SQL = "SELECT chunks, totaal_verwerkt, totaal_vergrendeld FROM public.abonnement_onderhoud WHERE taak = %s AND peildatum = CURRENT_DATE"
+SNAPSHOT_COLUMNS = ("status", "eind_datum", "expiration_reminder_sent", "expiration_reminder_sent_at", "bijgewerkt_op")
+
+
+def _without_triggers(conn, statements):
+    """Bulk statements on abonnementen without the audit and counter triggers; the counters are recounted after."""
+    conn.execute("ALTER TABLE public.abonnementen DISABLE TRIGGER USER")
+    try:
+        for sql, params in statements:
+            with conn.transaction():
+                conn.execute(sql, params)
+    finally:
+        conn.execute("ALTER TABLE public.abonnementen ENABLE TRIGGER USER")
+    if local_db.table_exists(conn, "statistiek_tellers"):
+        conn.execute("SELECT public.ververs_statistiek_tellers()")
+
+
+def snapshot(conn):
+    """Keep the seeded subscriptions' maintenance columns so ``unload`` can undo each variant."""
+    columns = ", ".join(SNAPSHOT_COLUMNS)
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS onderhoud_snapshot AS SELECT id, {columns} FROM public.abonnementen WITH NO DATA")
+    conn.execute("TRUNCATE onderhoud_snapshot")
+    conn.execute(f"INSERT INTO onderhoud_snapshot SELECT id, {columns} FROM public.abonnementen"
+                 " WHERE stripe_customer_id IS DISTINCT FROM %s", (MARKER,))
+
+
+def load(conn, subscriptions, tenants):
+    started = time.perf_counter()
+    step = local_db.SEED_CHUNK
+    _without_triggers(conn, [
+        (LOAD_SQL, {"first": first, "last": min(first + step - 1, subscriptions), "tenants": tenants,
+                    "price": datagen.SUBSCRIPTION_PRICE, "marker": MARKER, "spread": SPREAD_DAYS, "past": PAST_DAYS})
+        for first in range(1, subscriptions + 1, step)
+    ])
+    conn.execute("ANALYZE public.abonnementen")
+    return time.perf_counter() - started
+
+
+def unload(conn, started):
+    """Remove the synthetic subscriptions, this run's reminders and checkpoints, and restore the seeded rows."""
+    assignments = ", ".join(f"{column} = s.{column}" for column in SNAPSHOT_COLUMNS)
+    current = ", ".join(f"a.{column}" for column in SNAPSHOT_COLUMNS)
+    saved = ", ".join(f"s.{column}" for column in SNAPSHOT_COLUMNS)
+    _without_triggers(conn, [
+        ("DELETE FROM public.abonnementen WHERE stripe_customer_id = %s", (MARKER,)),
+        (f"UPDATE public.abonnementen a SET {assignments} FROM onderhoud_snapshot s"
+         f" WHERE a.id = s.id AND ({current}) IS DISTINCT FROM ({saved})", None),
+    ])
+    # With triggers, so the unread counters follow
+    conn.execute("DELETE FROM public.notificaties WHERE titel = %s AND aangemaakt_op >= %s", (REMINDER_TITLE, started))
+    conn.execute("DELETE FROM public.abonnement_onderhoud WHERE peildatum = CURRENT_DATE")
+
+
+def _checkout(conn, rng, tenants, renewals):
+    # verwerk_stripe_gebeurtenissen inserting the subscription of a completed checkout
+    conn.execute(
+        "INSERT INTO public.abonnementen (huurder_id, status, start_datum, eind_datum, bedrag, currency, stripe_customer_id)"
+        f" VALUES ({local_db.tenant_id_sql('%s')}, 'actief', now(), now() + interval '1 year', %s, 'eur', %s)",
+        (str(rng.randint(1, tenants)), datagen.SUBSCRIPTION_PRICE, MARKER),
+    )
+
+
+def _renewal(conn, rng, tenants, renewals):
+    # customer.subscription.updated after a renewal, on a row the job is about to remind or expire
+    conn.execute(
+        "UPDATE public.abonnementen SET status = 'actief', eind_datum = eind_datum + interval '1 year' WHERE id = %s",
+        (rng.choice(renewals),),
+    )
+
+
+class CheckoutTraffic:
+    """Checkouts and renewals on their own connections while the job runs; latency per transaction."""
+
+    def __init__(self, stack, tenants, renewals, workers=CHECKOUT_WORKERS):
+        self.stack, self.tenants, self.renewals = stack, tenants, renewals
+        self.stop = threading.Event()
+        self.latencies = [[] for _ in range(workers)]
+        self.errors = [0] * workers
+        self.threads = [threading.Thread(target=self._worker, args=(n,)) for n in range(workers)]
+
+    def _worker(self, worker):
+        rng = random.Random(f"{datagen.SEED}-maintenance-{worker}")
+        operations = (_checkout, _renewal) if self.renewals else (_checkout,)
+        with local_db.connect(self.stack) as conn:
+            while not self.stop.is_set():
+                operation = rng.choice(operations)
+                started = time.perf_counter()
+                try:
+                    operation(conn, rng, self.tenants, self.renewals)
+                    self.latencies[worker].append((time.perf_counter() - started) * 1000)
+                except (psycopg.errors.DeadlockDetected, psycopg.errors.LockNotAvailable):
+                    self.errors[worker] += 1
+                time.sleep(CHECKOUT_PAUSE_S)
+
+    def __enter__(self):
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+
+    def summary(self):
+        latencies = sorted(ms for worker in self.latencies for ms in worker)
+        return {
+            "checkouts": len(latencies),
+            "checkout_p50_ms": percentile(latencies, 50),
+            "checkout_p95_ms": percentile(latencies, 95),
+            "checkout_max_ms": latencies[-1] if latencies else 0.0,
+            "stalled_checkouts": sum(1 for ms in latencies if ms > STALL_MS),
+            "checkout_errors": sum(self.errors),
+        }
+
+
+def _chunk(conn, task, chunk):
+    verwerkt, vergrendeld, duur_ms, lock_wacht_ms, klaar = conn.execute(CHUNK_SQL, (task, chunk)).fetchone()
+    return {"task": task, "rows": verwerkt, "skipped_locked": vergrendeld, "duration_ms": float(duur_ms),
+            "lock_wait_ms": float(lock_wacht_ms), "done": klaar}
+
+
+def _interrupted_chunk(conn, task, chunk):
+    """A chunk whose transaction is rolled back, as when the function is killed halfway."""
+    with conn.transaction():
+        _chunk(conn, task, chunk)
+        raise psycopg.Rollback()
+
+
+def run_chunked(conn, chunk=CHUNK, interrupt_after=INTERRUPT_AFTER):
+    """Both tasks the way subscription-maintenance runs them, with one chunk rolled back along the way."""
+    conn.execute("DELETE FROM public.abonnement_onderhoud WHERE peildatum = CURRENT_DATE")
+    chunks, resumed = [], None
+    for task in TASKS:
+        done = False
+        while not done:
+            if resumed is None and len(chunks) == interrupt_after:
+                _interrupted_chunk(conn, task, chunk)
+                # The checkpoint still points after the last committed chunk
+                checkpoint = conn.execute(CHECKPOINT_SQL, (task,)).fetchone()
+                resumed = (checkpoint[0] if checkpoint else 0) == sum(1 for c in chunks if c["task"] == task)
+            chunks.append(_chunk(conn, task, chunk))
+            done = chunks[-1]["done"]
+    durations = sorted(c["duration_ms"] for c in chunks)
+    return {
+        "chunks": len(chunks),
+        "chunk_p95_ms": percentile(durations, 95),
+        "chunk_max_ms": durations[-1] if durations else 0.0,
+        "lock_wait_ms": sum(c["lock_wait_ms"] for c in chunks),
+        "lock_wait_max_ms": max((c["lock_wait_ms"] for c in chunks), default=0.0),
+        "skipped_locked": sum(c["skipped_locked"] for c in chunks),
+        "resumed_from_checkpoint": resumed,
+        "checkpoints": {task: dict(zip(("chunks", "rows", "skipped_locked"), conn.execute(CHECKPOINT_SQL, (task,)).fetchone()))
+                        for task in TASKS},
+        "chunk_log": chunks,
+    }
+
+
+def run_legacy(conn):
+    timings = {}
+    for function in ("check_expiring_subscriptions", "expire_subscriptions"):
+        started = time.perf_counter()
+        conn.execute(f"SELECT public.{function}()")
+        timings[f"{function}_ms"] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def processed(conn, started):
+    expired, reminded = conn.execute(
+        "SELECT count(*) FILTER (WHERE status = 'verlopen' AND bijgewerkt_op >= %(s)s),"
+        " count(*) FILTER (WHERE expiration_reminder_sent_at >= %(s)s) FROM public.abonnementen",
+        {"s": started}).fetchone()
+    return {"rows_expired": expired, "rows_reminded": reminded}
+
+
+def check(conn, started, skipped_locked):
+    """What the chunked run left undone or did twice; only rows skipped as locked may be left."""
+    missed_expiry, missed_reminders, notifications, reminded = conn.execute("""
+        SELECT
+          (SELECT count(*) FROM public.abonnementen WHERE status = 'actief' AND eind_datum < CURRENT_DATE),
+          (SELECT count(*) FROM public.abonnementen WHERE status = 'actief' AND eind_datum >= CURRENT_DATE
+             AND eind_datum < CURRENT_DATE + 15 AND expiration_reminder_sent IS NOT TRUE),
+          (SELECT count(*) FROM public.notificaties WHERE titel = %(titel)s AND aangemaakt_op >= %(s)s),
+          (SELECT count(*) FROM public.abonnementen WHERE expiration_reminder_sent_at >= %(s)s)
+        """, {"titel": REMINDER_TITLE, "s": started}).fetchone()
+    return {
+        "missed_expiry": missed_expiry,
+        "missed_reminders": missed_reminders,
+        "unexpected_misses": max(0, missed_expiry + missed_reminders - skipped_locked),
+        "reminder_mismatch": notifications - reminded,
+    }
+
+
+def bench_variant(stack, conn, variant, subscriptions, tenants, chunk, workers):
+    started = conn.execute("SELECT clock_timestamp()").fetchone()[0]
+    load_seconds = load(conn, subscriptions, tenants)
+    renewals = [row[0] for row in conn.execute(
+        "SELECT id FROM public.abonnementen WHERE stripe_customer_id = %s AND status = 'actief'"
+        " AND eind_datum < CURRENT_DATE + 15 ORDER BY random() LIMIT %s", (MARKER, RENEWAL_CANDIDATES))]
+    try:
+        with CheckoutTraffic(stack, tenants, renewals, workers) as traffic:
+            job_started = time.perf_counter()
+            metrics = run_chunked(conn, chunk) if variant == "chunked" else run_legacy(conn)
+            seconds = time.perf_counter() - job_started
+        result = {"variant": variant, "subscriptions": subscriptions, "load_seconds": load_seconds, "seconds": seconds,
+                  **processed(conn, started), **metrics, **traffic.summary()}
+        result["rows_per_s"] = (result["rows_expired"] + result["rows_reminded"]) / seconds if seconds else None
+        if variant == "chunked":
+            result.update(check(conn, started, metrics["skipped_locked"]))
+    finally:
+        unload(conn, started)
+    return result
+
+
+def failures(result):
+    if result["variant"] != "chunked":
+        return []
+    problems = [f"{name} {result[name]}" for name in ("unexpected_misses", "reminder_mismatch", "stalled_checkouts")
+                if result[name]]
+    # None: the run had fewer chunks than INTERRUPT_AFTER
+    if result["resumed_from_checkpoint"] is False:
+        problems.append("did not resume from the checkpoint")
+    return problems
+
+
+def run(subscriptions=SUBSCRIPTIONS, tenants=TENANTS, chunk=CHUNK, variants=VARIANTS, workers=CHECKOUT_WORKERS,
+        output=OUTPUT_PATH):
+    stack = local_db.up(tenants)
+    results = []
+    with local_db.connect(stack) as conn:
+        if not local_db.table_exists(conn, "abonnement_onderhoud"):
+            raise local_db.StackError("abonnement_onderhoud is missing; did migration 20261017000900 apply?")
+        # Leftovers of an interrupted run
+        _without_triggers(conn, [("DELETE FROM public.abonnementen WHERE stripe_customer_id = %s", (MARKER,))])
+        snapshot(conn)
+        for variant in variants:
+            logger.info("Running %s maintenance over %d synthetic subscriptions", variant, subscriptions)
+            results.append(bench_variant(stack, conn, variant, subscriptions, tenants, chunk, workers))
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({"chunk": chunk, "results": results}, indent=2, default=str), encoding="utf-8")
+    return results
+
+
+def format_table(results):
+    lines = ["| variant | expired | reminded | seconds | rows/s | chunks | chunk p95 ms | lock wait ms | skipped locked |"
+             " checkout p95 ms | checkout max ms | stalled checkouts |",
+             "|---|---|---|---|---|---|---|---|---|---|---|---|"]
+    for r in results:
+        if r["variant"] == "chunked":
+            chunks, chunk_p95, lock_wait, skipped = r["chunks"], f"{r['chunk_p95_ms']:.1f}", f"{r['lock_wait_ms']:.1f}", r["skipped_locked"]
+        else:
+            chunks, chunk_p95, lock_wait, skipped = 1, "–", "–", "–"
+        lines.append(
+            f"| {r['variant']} | {r['rows_expired']:,} | {r['rows_reminded']:,} | {r['seconds']:.1f} |"
+            f" {r['rows_per_s'] or 0:,.0f} | {chunks} | {chunk_p95} | {lock_wait} | {skipped} |"
+            f" {r['checkout_p95_ms']:.1f} | {r['checkout_max_ms']:.1f} | {r['stalled_checkouts']} |")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscriptions", type=int, default=SUBSCRIPTIONS, help="synthetic subscriptions per variant")
+    parser.add_argument("--tenants", type=int, default=TENANTS, help="seeded tenants the subscriptions belong to")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="rows per onderhoud_abonnementen call")
+    parser.add_argument("--workers", type=int, default=CHECKOUT_WORKERS, help="connections running checkouts")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+    results = run(args.subscriptions, args.tenants, args.chunk, args.variants, args.workers)
+    print(format_table(results))
+    failed = [f"{r['variant']}: {problem}" for r in results for problem in failures(r)]
+    for problem in failed:
+        print(f"FAIL {problem}")
+    print(f"Full results in {OUTPUT_PATH}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Scaling benchmark for the batch recommendation engine.
+
+``scripts/match_recommendations.py`` scores every active tenant against every
+listing with NumPy and keeps the top-K per tenant. This benchmark feeds it
+synthetic columns – cities drawn with ``harness.datagen``'s weights, budgets,
+room counts and categorical preferences including missing values – and
+times scoring plus top-K selection from 10k×1k up to 1M×50k pairs, once
+single-process and once with the worker pool.
+
+``--db`` additionally runs the full job (load, score, write
+``woning_aanbevelingen``) against the seeded local stand-in.
+
+Usage:
+    python -m harness.bench_matching
+    python -m harness.bench_matching --sizes 10000x1000 100000x10000 --workers 4
+    python -m harness.bench_matching --db 100000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from harness import config, datagen
+
+sys.path.insert(0, str(config.REPO_ROOT / "scripts"))
+import match_recommendations as engine  # noqa: E402
+
+SIZES = ((10_000, 1_000), (100_000, 10_000), (1_000_000, 50_000))
+OUTPUT_PATH = config.RESULTS_DIR / "bench-matching.json"
+
+
+def synthetic(tenant_count, listing_count, seed=0):
+    """Engine inputs with the seeded data's shape, generated column-wise."""
+    rng = np.random.default_rng(seed)
+    weights = np.array([weight for _, _, weight in datagen.CITIES], dtype=np.float64)
+    weights /= weights.sum()
+    city_count = len(weights)
+    listings = engine.Listings(
+        ids=[f"w{i}" for i in range(listing_count)],
+        rent=np.round(rng.uniform(600, 2800, listing_count) / 25) * 25,
+        city=rng.choice(city_count, listing_count, p=weights).astype(np.int32),
+        rooms=rng.integers(1, 6, listing_count).astype(np.float64),
+        furnished=rng.choice([engine.MISSING, 0, 1, 2], listing_count, p=[0.1, 0.4, 0.3, 0.2]).astype(np.int32),
+        kind=rng.choice(3, listing_count, p=[0.6, 0.25, 0.15]).astype(np.int32),
+        cities={name: i for i, name in enumerate(datagen.CITY_NAMES)},
+        furnishings={"ongemeubileerd": 0, "gestoffeerd": 1, "gemeubileerd": 2},
+        kinds={"appartement": 0, "huis": 1, "studio": 2},
+    )
+    preferred = rng.choice([1, 2, 3], tenant_count, p=[0.55, 0.3, 0.15])
+    indptr = np.concatenate([[0], np.cumsum(preferred)]).astype(np.int64)
+    tenants = engine.Tenants(
+        ids=[f"h{i}" for i in range(tenant_count)],
+        max_rent=np.round(rng.uniform(700, 2600, tenant_count) / 50) * 50,
+        min_rooms=rng.integers(1, 4, tenant_count).astype(np.float64),
+        furnished=rng.choice([engine.MISSING, 0, 1, 2], tenant_count, p=[0.5, 0.2, 0.2, 0.1]).astype(np.int32),
+        kind=rng.choice([engine.MISSING, 0, 1, 2], tenant_count, p=[0.3, 0.45, 0.15, 0.1]).astype(np.int32),
+        location_indptr=indptr,
+        location_indices=rng.choice(city_count, int(indptr[-1]), p=weights).astype(np.int32),
+    )
+    return tenants, listings
+
+
+def bench(tenant_count, listing_count, workers, k=engine.TOP_K, pair_block=engine.PAIR_BLOCK):
+    tenants, listings = synthetic(tenant_count, listing_count)
+    started = time.perf_counter()
+    blocks = stored = 0
+    for _, _, _, scores in engine.rank(tenants, listings, k, pair_block, workers):
+        blocks += 1
+        stored += int(np.count_nonzero(scores))
+    elapsed = time.perf_counter() - started
+    pairs = tenant_count * listing_count
+    return {
+        "tenants": tenant_count, "listings": listing_count, "pairs": pairs, "workers": workers,
+        "blocks": blocks, "block_tenants": engine.block_size(listing_count, pair_block),
+        "seconds": round(elapsed, 3), "pairs_per_s": round(pairs / elapsed), "stored": stored,
+    }
+
+
+def bench_db(tenants, k=engine.TOP_K, workers=engine.WORKERS):
+    from harness import local_db
+
+    stack = local_db.up(tenants)
+    with local_db.connect(stack) as conn:
+        return {"kind": "job", **engine.run(conn, k, workers=workers)}
+
+
+def format_table(results):
+    lines = ["| tenants × listings | workers | pairs | seconds | pairs/s |", "|---|---|---|---|---|"]
+    for result in results:
+        seconds = result.get("seconds", result.get("total_s"))
+        lines.append(f"| {result['tenants']:,} × {result['listings']:,} | {result.get('workers', '–')} | "
+                     f"{result['pairs']:,} | {seconds:.1f} | {result['pairs_per_s'] or 0:,.0f} |")
+    return "\n".join(lines)
+
+
+def _size(value):
+    tenants, _, listings = value.lower().partition("x")
+    return int(tenants), int(listings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=_size, nargs="+", default=SIZES, help="TENANTSxLISTINGS pairs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes of the parallel run")
+    parser.add_argument("--top-k", type=int, default=engine.TOP_K)
+    parser.add_argument("--db", type=int, metavar="TENANTS", help="also run the full job on the seeded stand-in")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+
+    results = []
+    for tenants, listings in args.sizes:
+        for workers in sorted({1, args.workers}):
+            results.append(bench(tenants, listings, workers, args.top_k))
+            logging.getLogger("testsprite.bench_matching").info(json.dumps(results[-1]))
+    if args.db:
+        results.append(bench_db(args.db, args.top_k, args.workers))
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_PATH.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(format_table(results))
+    print(f"\nFull results in {OUTPUT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""Notification delivery benchmark: hundreds of subscribers on the local Realtime stand-in.
+
+Replays what ``src/lib/realtimeHub.ts`` does in every browser tab against
+``harness.realtime_local``: each subscriber opens one WebSocket, joins its
+``huurly:<user id>`` channel with a ``postgres_changes`` binding on
+``notificaties`` filtered to its own rows, queues the pushes and hands them
+over in batches every 50 ms. A burst larger than the hub's queue (500) drops
+the oldest events and makes the consumer reload instead (a resync).
+
+The benchmark inserts notifications like ``createBulkNotifications`` does –
+one row per subscriber, 500 rows per request – a few times in a row, then
+floods a single user. For every notification it measures the time from the
+insert request until the subscriber's handler receives it, and reports
+p50/p95/p99, notifications that never arrived (and were not covered by a
+resync), and the pushes sent per notification.
+
+Modes:
+
+* ``multiplexed`` – one channel per session, batched delivery (the hub);
+* ``per_component`` – the old layout, three components with a channel each
+  and a callback per push.
+
+TC011 runs a small profile through ``assert_realtime_budget`` with limits
+from ``realtime`` in ``testsprite_perf_budgets.json``.
+
+Usage:
+    python -m harness.bench_realtime                        # 300 subscribers, both modes
+    python -m harness.bench_realtime --subscribers 800 --bursts 5 --modes multiplexed
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+
+from harness import config
+from harness.budgets import load_budgets, record_trend, violations
+from harness.load import percentile
+from harness.realtime_local import OP_CLOSE, OP_PING, OP_PONG, LocalRealtime, encode_frame, read_frame
+from harness.tracing import current_test_id
+
+TABLE = "notificaties"
+# realtimeHub.ts: BATCH_WINDOW_MS and MAX_QUEUE
+BATCH_WINDOW_MS = 50
+MAX_QUEUE = 500
+# NotificationService.ts: BULK_INSERT_CHUNK
+INSERT_CHUNK = 500
+COMPONENTS = 3
+SUBSCRIBERS = 300
+BURSTS = 3
+BURST_GAP_S = 0.2
+FLOOD = 600
+SETTLE_S = 1.0
+MODES = ("multiplexed", "per_component")
+OUTPUT_PATH = config.RESULTS_DIR / "bench-realtime.json"
+
+TC_PROFILE = {"subscribers": 200, "bursts": 2, "flood": FLOOD}
+
+
+class Subscriber:
+    """One browser session: a socket, its channel(s) and the hub's queue and batch window."""
+
+    def __init__(self, user_id, mode):
+        self.user_id = user_id
+        self.mode = mode
+        self.reader = self.writer = None
+        self.queue = []
+        self.overflowed = False
+        self.flush_handle = None
+        self.received = set()
+        self.latencies_ms = []
+        self.pushes = 0
+        self.batches = 0
+        self.resyncs = 0
+        self.joined = asyncio.Event()
+        self.pending_joins = 0
+
+    async def connect(self, url):
+        host, _, rest = url.removeprefix("ws://").partition("/")
+        hostname, _, port = host.partition(":")
+        self.reader, self.writer = await asyncio.open_connection(hostname, int(port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET /{rest}?vsn=1.0.0 HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\n"
+                           f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        status = await self.reader.readline()
+        if b" 101 " not in status:
+            raise ConnectionError(f"WebSocket upgrade refused: {status!r}")
+        while await self.reader.readline() not in (b"\r\n", b""):
+            pass
+        asyncio.ensure_future(self._listen())
+
+        topics = [f"realtime:huurly:{self.user_id}"] if self.mode == "multiplexed" else [
+            f"realtime:component-{n}:{self.user_id}" for n in range(COMPONENTS)]
+        self.pending_joins = len(topics)
+        for ref, topic in enumerate(topics, 1):
+            self._send({"topic": topic, "event": "phx_join", "ref": str(ref), "join_ref": str(ref), "payload": {
+                "config": {"postgres_changes": [
+                    {"event": "*", "schema": "public", "table": TABLE, "filter": f"gebruiker_id=eq.{self.user_id}"},
+                ]},
+            }})
+        await self.joined.wait()
+
+    def _send(self, message):
+        self.writer.write(encode_frame(json.dumps(message), mask=True))
+
+    async def _listen(self):
+        try:
+            while True:
+                opcode, payload = await read_frame(self.reader)
+                if opcode == OP_CLOSE:
+                    return
+                if opcode == OP_PING:
+                    self.writer.write(encode_frame(payload, OP_PONG, mask=True))
+                    continue
+                message = json.loads(payload)
+                if message["event"] == "phx_reply":
+                    self.pending_joins -= 1
+                    if self.pending_joins == 0:
+                        self.joined.set()
+                elif message["event"] == "postgres_changes":
+                    self.pushes += 1
+                    self._enqueue(message["payload"]["data"]["new"])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    def _enqueue(self, row):
+        if self.mode == "per_component":
+            # Every component handles every push it receives straight away
+            self.batches += 1
+            self._deliver([row])
+            return
+        self.queue.append(row)
+        if len(self.queue) > MAX_QUEUE:
+            del self.queue[:len(self.queue) - MAX_QUEUE]
+            self.overflowed = True
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(BATCH_WINDOW_MS / 1000, self._flush)
+
+    def _flush(self):
+        self.flush_handle = None
+        rows, self.queue = self.queue, []
+        self.batches += 1
+        if self.overflowed:
+            self.overflowed = False
+            self.resyncs += 1
+            return
+        self._deliver(rows)
+
+    def _deliver(self, rows):
+        now = time.time()
+        for row in rows:
+            if row["id"] not in self.received:
+                self.received.add(row["id"])
+                self.latencies_ms.append((now - row["verzonden_op"]) * 1000)
+
+    async def close(self):
+        if self.writer:
+            self.writer.write(encode_frame(b"", OP_CLOSE, mask=True))
+            self.writer.close()
+
+
+async def insert(rest_url, rows):
+    """``POST /rest/v1/notificaties`` with every row stamped with its send time."""
+    host, _, path = rest_url.removeprefix("http://").partition("/")
+    hostname, _, port = host.partition(":")
+    sent_at = time.time()
+    body = json.dumps([{**row, "verzonden_op": sent_at} for row in rows]).encode()
+    reader, writer = await asyncio.open_connection(hostname, int(port))
+    writer.write((f"POST /{path}/{TABLE} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Prefer: return=representation\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = await reader.readline()
+    await reader.read()
+    writer.close()
+    if b" 201 " not in status:
+        raise RuntimeError(f"insert failed: {status!r}")
+
+
+async def bulk(rest_url, user_ids, counter):
+    rows = [{"gebruiker_id": user_id, "type": "systeem", "titel": "Onderhoud", "inhoud": f"Bericht {n}", "gelezen": False}
+            for n, user_id in enumerate(user_ids)]
+    for start in range(0, len(rows), INSERT_CHUNK):
+        chunk = rows[start:start + INSERT_CHUNK]
+        await insert(rest_url, chunk)
+        counter.update(row["gebruiker_id"] for row in chunk)
+
+
+async def bench_mode(realtime, mode, subscribers, bursts, flood):
+    user_ids = [str(uuid.uuid4()) for _ in range(subscribers)]
+    clients = [Subscriber(user_id, mode) for user_id in user_ids]
+    started = time.perf_counter()
+    for start in range(0, len(clients), 100):
+        await asyncio.gather(*(client.connect(realtime.ws_url) for client in clients[start:start + 100]))
+    connect_s = time.perf_counter() - started
+
+    expected = Counter()
+    for _ in range(bursts):
+        await bulk(realtime.rest_url, user_ids, expected)
+        await asyncio.sleep(BURST_GAP_S)
+    if flood:
+        await bulk(realtime.rest_url, [user_ids[0]] * flood, expected)
+
+    # Wait until everything arrived, or until nothing arrives any more
+    deadline, last = time.monotonic() + 30, -1
+    while time.monotonic() < deadline:
+        done = sum(len(client.received) for client in clients)
+        if done == sum(expected.values()) or done == last:
+            break
+        last = done
+        await asyncio.sleep(SETTLE_S)
+    await asyncio.sleep(BATCH_WINDOW_MS / 1000 * 2)
+
+    latencies = sorted(ms for client in clients for ms in client.latencies_ms)
+    notifications = sum(expected.values())
+    lost = sum(expected[client.user_id] - len(client.received) for client in clients if not client.resyncs)
+    result = {
+        "mode": mode,
+        "subscribers": subscribers,
+        "notifications": notifications,
+        "connect_s": round(connect_s, 3),
+        "delivered": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "lost": lost,
+        "resyncs": sum(client.resyncs for client in clients),
+        "dropped_by_server": realtime.stats["dropped"],
+        "messages_per_notification": round(sum(client.pushes for client in clients) / notifications, 2) if notifications else 0.0,
+        "handler_calls_per_notification": round(sum(client.batches for client in clients) / notifications, 3) if notifications else 0.0,
+    }
+    await asyncio.gather(*(client.close() for client in clients))
+    return result
+
+
+async def bench(subscribers=SUBSCRIBERS, bursts=BURSTS, flood=FLOOD, modes=MODES, output=OUTPUT_PATH):
+    """Run every mode against a fresh stand-in; returns one result per mode."""
+    results = []
+    with LocalRealtime() as realtime:
+        for mode in modes:
+            results.append(await bench_mode(realtime, mode, subscribers, bursts, flood))
+            realtime.reset()
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({"subscribers": subscribers, "bursts": bursts, "flood": flood, "results": results},
+                                     indent=2), encoding="utf-8")
+    return results
+
+
+def format_table(results):
+    lines = ["| mode | subscribers | notifications | p50 ms | p95 ms | p99 ms | lost | resyncs | pushes/notification | handler calls/notification |",
+             "|---|---|---|---|---|---|---|---|---|---|"]
+    for r in results:
+        lines.append(f"| {r['mode']} | {r['subscribers']} | {r['notifications']} | {r['p50_ms']:.1f} | {r['p95_ms']:.1f} |"
+                     f" {r['p99_ms']:.1f} | {r['lost']} | {r['resyncs']} | {r['messages_per_notification']} |"
+                     f" {r['handler_calls_per_notification']} |")
+    return "\n".join(lines)
+
+
+async def assert_realtime_budget(budgets=None):
+    """Run the TC profile through the multiplexed hub and fail on slow, lost or duplicated pushes."""
+    test_id = current_test_id()
+    limits = (budgets or load_budgets()).get("realtime", {}).get(test_id, {})
+    results = await bench(**TC_PROFILE, modes=("multiplexed",), output=None)
+    metrics = results[0]
+    failed = violations(metrics, limits)
+    record_trend("realtime", test_id, metrics, limits, failed)
+    assert not failed, f"Realtime budget exceeded for {test_id}: " + ", ".join(failed) + "\n" + format_table(results)
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=SUBSCRIBERS)
+    parser.add_argument("--bursts", type=int, default=BURSTS, help="bulk notifications to every subscriber")
+    parser.add_argument("--flood", type=int, default=FLOOD, help="notifications to one subscriber at once (0 to skip)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args(argv)
+    results = asyncio.run(bench(args.subscribers, args.bursts, args.flood, args.modes))
+    print(format_table(results))
+    print(f"\nFull results in {OUTPUT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Landlord tenant-search benchmark against the seeded local stand-in.
+
+Grows the local stand-in to each size in turn (10k, 100k and 1M tenants by
+default, see ``harness.local_db``) and measures the two ways the frontend
+searches tenants:
+
+* ``zoek_huurders`` – the RPC over ``actieve_huurders`` (huurders ⋈
+  gebruikers ⋈ abonnementen), called through PostgREST for every filter
+  combination, plus its keyset variant ``zoek_huurders_pagina`` one page and
+  100 pages deep;
+* ``searchTenantProfiles`` – ``SearchService``'s ``huurders`` query: a
+  four-column ``ilike %q%`` OR over trigram-indexed columns, either with
+  ``.range()`` (OFFSET) pagination or with the ``(aangemaakt_op, id)``
+  keyset cursor, and an exact or estimated count.
+
+Latency is measured end to end through PostgREST with the service-role key
+(RLS would otherwise hide every tenant from an anonymous caller). Rows scanned
+and the plan come from ``EXPLAIN (ANALYZE, BUFFERS)`` of the equivalent SQL.
+
+Usage:
+    python -m harness.bench_search                    # 10k, 100k, 1M
+    python -m harness.bench_search --sizes 10000 --repeat 10
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from functools import partial
+
+from harness import config, local_db
+from harness.load import percentile
+
+SIZES = (10_000, 100_000, 1_000_000)
+REPEAT = int(os.environ.get("TESTSPRITE_BENCH_REPEAT", "5"))
+OUTPUT_PATH = config.RESULTS_DIR / "bench-search.json"
+SCAN_NODES = {"Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan", "Parallel Seq Scan"}
+
+# (name, in_city, min_budget, max_budget, huisdieren, roken)
+RPC_CASES = (
+    ("no filters", None, None, None, None, None),
+    ("city", "Amsterdam", None, None, None, None),
+    ("city + budget", "Amsterdam", 1000, 1600, None, None),
+    ("city + budget + pets", "Amsterdam", 1000, 1600, True, None),
+    ("all filters", "Utrecht", 800, 2000, False, False),
+    ("small city + budget", "Apeldoorn", 1000, 1600, None, None),
+)
+# (name, rpc case, page): keyset pages of zoek_huurders_pagina
+PAGED_RPC_CASES = (
+    ("city + budget, page 1", 2, 1),
+    ("city + budget, page 100", 2, 100),
+)
+# (name, query, page, keyset, count)
+SEARCH_CASES = (
+    ("browse", "", 1, False, "exact"),
+    ("browse, estimated count", "", 1, False, "estimated"),
+    ("city text", "Amsterdam", 1, False, "exact"),
+    ("name fragment", "jan", 1, False, "exact"),
+    ("occupation fragment", "ontwikkelaar", 1, False, "exact"),
+    ("city text, page 100", "Amsterdam", 100, False, "exact"),
+    ("city text, page 100 keyset", "Amsterdam", 100, True, None),
+    ("browse, page 100 keyset", "", 100, True, "estimated"),
+)
+PAGE_SIZE = 10
+RPC_ARGS = ("in_city", "min_budget", "max_budget", "huisdieren", "roken")
+SEARCH_COLUMNS = ("voornaam", "achternaam", "beroep", "stad")
+
+
+def rpc_sql(in_city, min_budget, max_budget, huisdieren, roken, after_id=None, page_size=None):
+    """Body of ``zoek_huurders``/``zoek_huurders_pagina`` (plpgsql hides its plan behind a Function Scan)."""
+    sql = (
+        "SELECT * FROM public.actieve_huurders h"
+        " WHERE (%(in_city)s::text IS NULL OR h.locatie_voorkeur @> ARRAY[%(in_city)s::text])"
+        " AND (%(min_budget)s::int IS NULL OR h.max_huur >= %(min_budget)s)"
+        " AND (%(max_budget)s::int IS NULL OR h.max_huur <= %(max_budget)s)"
+        " AND (%(huisdieren)s::bool IS NULL OR h.huisdieren = %(huisdieren)s)"
+        " AND (%(roken)s::bool IS NULL OR h.roken = %(roken)s)"
+    )
+    if page_size:
+        sql += " AND (%(after_id)s::uuid IS NULL OR h.id > %(after_id)s) ORDER BY h.id LIMIT %(page_size)s"
+    return sql, {"in_city": in_city, "min_budget": min_budget, "max_budget": max_budget,
+                 "huisdieren": huisdieren, "roken": roken, "after_id": after_id, "page_size": page_size}
+
+
+def _search_where(query):
+    return "(" + " OR ".join(f"h.{column} ILIKE %(pattern)s" for column in SEARCH_COLUMNS) + ")" if query else "true"
+
+
+def search_sql(query, offset, cursor=None, count="exact"):
+    """The data and count statements PostgREST issues for ``searchTenantProfiles``."""
+    where = _search_where(query)
+    params = {"pattern": f"%{query}%", "offset": offset, "limit": PAGE_SIZE}
+    select = "SELECT h.*, to_jsonb(g.*) AS user FROM public.huurders h LEFT JOIN public.gebruikers g ON g.id = h.id"
+    if cursor:
+        params["created_at"], params["id"] = cursor
+        data = (f"{select} WHERE {where} AND (h.aangemaakt_op, h.id) < (%(created_at)s, %(id)s)"
+                " ORDER BY h.aangemaakt_op DESC, h.id DESC LIMIT %(limit)s")
+    else:
+        data = f"{select} WHERE {where} ORDER BY h.aangemaakt_op DESC OFFSET %(offset)s LIMIT %(limit)s"
+    statements = [(data, params)]
+    if count == "exact":
+        # planned/estimated counts come from the planner's row estimate instead of a second scan
+        statements.append((f"SELECT count(*) FROM public.huurders h WHERE {where}", params))
+    return statements
+
+
+def search_cursor(conn, query, page):
+    """The keyset cursor a client holds after ``page - 1`` pages (looked up once, outside the timing)."""
+    if page <= 1:
+        return None
+    return conn.execute(
+        f"SELECT h.aangemaakt_op, h.id FROM public.huurders h WHERE {_search_where(query)}"
+        " ORDER BY h.aangemaakt_op DESC, h.id DESC OFFSET %(offset)s LIMIT 1",
+        {"pattern": f"%{query}%", "offset": (page - 1) * PAGE_SIZE - 1},
+    ).fetchone()
+
+
+def rpc_after_id(conn, args, page):
+    """The ``after_id`` of ``zoek_huurders_pagina`` page ``page``."""
+    if page <= 1:
+        return None
+    sql, params = rpc_sql(*args, page_size=(page - 1) * PAGE_SIZE)
+    rows = conn.execute(sql, params).fetchall()
+    return rows[-1][0] if rows else None
+
+
+def search_url(stack, query, offset, cursor=None):
+    params = {"select": "*,user:gebruikers(*)", "limit": PAGE_SIZE}
+    filters = []
+    if query:
+        filters.append("or(" + ",".join(f"{column}.ilike.*{query}*" for column in SEARCH_COLUMNS) + ")")
+    if cursor:
+        created_at, tenant_id = cursor[0].isoformat(), cursor[1]
+        filters.append(f'or(aangemaakt_op.lt."{created_at}",and(aangemaakt_op.eq."{created_at}",id.lt.{tenant_id}))')
+        params["order"] = "aangemaakt_op.desc,id.desc"
+    else:
+        params["order"] = "aangemaakt_op.desc"
+        params["offset"] = offset
+    if filters:
+        params["and"] = "(" + ",".join(filters) + ")"
+    return f"{stack.api_url.rstrip('/')}/rest/v1/huurders?{urllib.parse.urlencode(params)}"
+
+
+def _request(stack, url, payload=None, headers=None):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode() if payload is not None else None,
+        headers={"apikey": stack.service_role_key, "Authorization": f"Bearer {stack.service_role_key}",
+                 "Content-Type": "application/json", **(headers or {})},
+        method="POST" if payload is not None else "GET",
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as response:
+        rows = json.load(response)
+        content_range = response.headers.get("Content-Range", "")
+    return (time.perf_counter() - started) * 1000, rows, content_range
+
+
+def timed(call, repeat):
+    call()  # warm-up: plan cache, shared buffers
+    latencies = sorted(call()[0] for _ in range(repeat))
+    return {"p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95), "max_ms": latencies[-1]}
+
+
+def rows_scanned(plan):
+    """Rows read by every scan node of an ``EXPLAIN (ANALYZE, FORMAT JSON)`` plan, including filtered-out rows."""
+    total = 0
+    if plan.get("Node Type") in SCAN_NODES:
+        loops = plan.get("Actual Loops", 1)
+        total += (plan.get("Actual Rows", 0) + plan.get("Rows Removed by Filter", 0)) * loops
+    for child in plan.get("Plans", []):
+        total += rows_scanned(child)
+    return total
+
+
+def explain(conn, sql, params):
+    plan = conn.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params).fetchone()[0][0]
+    text = "\n".join(row[0] for row in conn.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params))
+    return {
+        "execution_ms": plan["Execution Time"],
+        "rows_scanned": rows_scanned(plan["Plan"]),
+        "shared_buffers": plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0),
+        "plan": text,
+    }
+
+
+def measure(stack, url, repeat, payload=None, headers=None):
+    """Latency percentiles plus the rows of one more call; a failing endpoint is reported, not raised."""
+    call = partial(_request, stack, url, payload, headers)
+    try:
+        latency = timed(call, repeat)
+        _, rows, content_range = call()
+    except urllib.error.HTTPError as exc:
+        return {"error": f"HTTP {exc.code}: {exc.read().decode(errors='replace')[:300]}", "rows": 0}
+    return {**latency, "rows": len(rows), "count": content_range.rpartition("/")[2] or None}
+
+
+def bench_size(stack, conn, size, repeat):
+    results = []
+    rpc_url = f"{stack.api_url.rstrip('/')}/rest/v1/rpc/zoek_huurders"
+    for name, *args in RPC_CASES:
+        payload = dict(zip(RPC_ARGS, args))
+        results.append({"size": size, "kind": "zoek_huurders", "case": name,
+                        **measure(stack, rpc_url, repeat, payload=payload),
+                        "explain": [explain(conn, *rpc_sql(*args))]})
+    for name, case, page in PAGED_RPC_CASES:
+        args = RPC_CASES[case][1:]
+        after_id = rpc_after_id(conn, args, page)
+        payload = {**dict(zip(RPC_ARGS, args)), "after_id": str(after_id) if after_id else None, "page_size": PAGE_SIZE}
+        results.append({"size": size, "kind": "zoek_huurders_pagina", "case": name,
+                        **measure(stack, f"{rpc_url}_pagina", repeat, payload=payload),
+                        "explain": [explain(conn, *rpc_sql(*args, after_id=after_id, page_size=PAGE_SIZE))]})
+    for name, query, page, keyset, count in SEARCH_CASES:
+        offset = (page - 1) * PAGE_SIZE
+        cursor = search_cursor(conn, query, page) if keyset else None
+        headers = {"Prefer": f"count={count}"} if count else None
+        results.append({"size": size, "kind": "searchTenantProfiles", "case": name,
+                        **measure(stack, search_url(stack, query, offset, cursor), repeat, headers=headers),
+                        "explain": [explain(conn, sql, params) for sql, params in search_sql(query, offset, cursor, count)]})
+    return results
+
+
+def format_table(results):
+    lines = ["| size | query | case | rows | p50 ms | p95 ms | rows scanned | db ms |",
+             "|---|---|---|---|---|---|---|---|"]
+    for result in results:
+        scanned = sum(entry["rows_scanned"] for entry in result["explain"])
+        db_ms = sum(entry["execution_ms"] for entry in result["explain"])
+        if "error" in result:
+            latency = f" {result['error'].split(':')[0]} | – |"
+        else:
+            latency = f" {result['p50_ms']:.1f} | {result['p95_ms']:.1f} |"
+        lines.append(f"| {result['size']:,} | {result['kind']} | {result['case']} | {result.get('count') or result['rows']} |"
+                     f"{latency} {scanned:,} | {db_ms:.1f} |")
+    return "\n".join(lines)
+
+
+def run(sizes=SIZES, repeat=REPEAT, output=OUTPUT_PATH):
+    results = []
+    for size in sorted(sizes):
+        stack = local_db.up(size)
+        with local_db.connect(stack) as conn:
+            results.extend(bench_size(stack, conn, size, repeat))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="tenant counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed calls per case (after one warm-up)")
+    parser.add_argument("--plans", action="store_true", help="print the EXPLAIN output of every case")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+    results = run(args.sizes, args.repeat)
+    print(format_table(results))
+    if args.plans:
+        for result in results:
+            for entry in result["explain"]:
+                print(f"\n## {result['size']:,} {result['kind']} – {result['case']}\n{entry['plan']}")
+    print(f"\nFull results in {OUTPUT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""Admin statistics: trigger-maintained counters vs. counting rows in the client.
+
+The admin dashboard, ``StatisticsService`` and ``DocumentService.getDocumentStats``
+read their counts from the ``statistieken`` RPC over ``statistiek_tellers``
+(one counter per table, rol/status and month). Before that they selected
+``gebruikers.rol, aangemaakt_op``, ``documenten.status`` and
+``abonnementen.status`` for every row and counted in the browser.
+
+``python -m harness.bench_stats`` grows the local stand-in (``harness.local_db``)
+to each size in turn and measures both through PostgREST with the service-role
+key: latency, response bytes and rows returned. It also checks that the
+counters equal a ``count(*) ... GROUP BY`` over the tables, and that the counter
+query scans the same number of rows at every size. The RPC should stay flat
+while the old selects grow with the tables (PostgREST's ``max-rows`` may cap
+them, which only means the old counts were wrong as well).
+
+``StatsTraffic`` is the TC side: it sums the bytes of the statistics requests
+the admin dashboard makes while it loads, and flags selects that read a whole
+table. TC009 checks it against the ``stats`` budget in
+``testsprite_perf_budgets.json``; every measurement is appended to
+``results/perf-trend.jsonl``.
+
+Usage:
+    python -m harness.bench_stats                     # 10k, 100k, 1M
+    python -m harness.bench_stats --sizes 10000 --repeat 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import urllib.request
+from collections import Counter
+from urllib.parse import parse_qs, urlparse
+
+from harness import config, local_db
+from harness.bench_search import rows_scanned
+from harness.budgets import load_budgets, record_trend, violations
+from harness.load import percentile
+from harness.tracing import current_test_id
+
+SIZES = (10_000, 100_000, 1_000_000)
+REPEAT = int(os.environ.get("TESTSPRITE_BENCH_REPEAT", "5"))
+OUTPUT_PATH = config.RESULTS_DIR / "bench-stats.json"
+
+STATS_TABLES = {"gebruikers": "rol", "documenten": "status", "abonnementen": "status"}
+RPC_PATH = "/rest/v1/rpc/statistieken"
+# What the services selected before the counters existed
+LEGACY_QUERIES = {
+    "gebruikers": "select=rol,aangemaakt_op",
+    "documenten": "select=status",
+    "abonnementen": "select=status",
+}
+COUNTER_SQL = "SELECT bron, sleutel, maand, aantal FROM public.statistiek_tellers WHERE aantal <> 0"
+
+
+def _request(stack, path, payload=None, headers=None):
+    request = urllib.request.Request(
+        f"{stack.api_url.rstrip('/')}{path}",
+        data=json.dumps(payload).encode() if payload is not None else None,
+        headers={"apikey": stack.service_role_key, "Authorization": f"Bearer {stack.service_role_key}",
+                 "Content-Type": "application/json", **(headers or {})},
+        method="POST" if payload is not None else "GET",
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=300) as response:
+        body = response.read()
+        content_range = response.headers.get("Content-Range", "")
+    return (time.perf_counter() - started) * 1000, body, content_range
+
+
+def measure(calls, repeat):
+    """Latency of running every call in ``calls`` once, plus the bytes and rows of the last run."""
+    def run_all():
+        return [call() for call in calls]
+
+    run_all()  # warm-up: plan cache, shared buffers
+    totals = []
+    for _ in range(repeat):
+        responses = run_all()
+        totals.append(sum(ms for ms, _, _ in responses))
+    totals.sort()
+    return {
+        "p50_ms": percentile(totals, 50),
+        "p95_ms": percentile(totals, 95),
+        "requests": len(calls),
+        "bytes": sum(len(body) for _, body, _ in responses),
+        "rows": sum(len(json.loads(body)) for _, body, _ in responses),
+        "table_rows": sum(int(cr.rpartition("/")[2]) for _, _, cr in responses if cr.rpartition("/")[2].isdigit()) or None,
+    }
+
+
+def counters_match(conn):
+    """Tables whose counters differ from a fresh ``count(*)`` per key and month (empty when all match)."""
+    stored = Counter()
+    for bron, sleutel, maand, aantal in conn.execute(COUNTER_SQL):
+        stored[(bron, sleutel, maand)] += aantal
+    actual = Counter()
+    for table, column in STATS_TABLES.items():
+        for sleutel, maand, aantal in conn.execute(
+            f"SELECT COALESCE({column}::text, 'onbekend'), date_trunc('month', aangemaakt_op)::date, count(*)"
+            f" FROM public.{table} GROUP BY 1, 2"
+        ):
+            actual[(table, sleutel, maand)] += aantal
+    return sorted({key[0] for key in (stored - actual) + (actual - stored)})
+
+
+def explain_counters(conn):
+    plan = conn.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {COUNTER_SQL}").fetchone()[0][0]
+    return {"execution_ms": plan["Execution Time"], "rows_scanned": rows_scanned(plan["Plan"])}
+
+
+def bench_size(stack, conn, size, repeat):
+    rpc = measure([lambda: _request(stack, RPC_PATH, {})], repeat)
+    legacy = measure([
+        lambda table=table, query=query: _request(stack, f"/rest/v1/{table}?{query}", headers={"Prefer": "count=exact"})
+        for table, query in LEGACY_QUERIES.items()
+    ], repeat)
+    return [
+        {"size": size, "case": "statistieken RPC", **rpc, **explain_counters(conn), "mismatched": counters_match(conn)},
+        {"size": size, "case": "select + count in client", **legacy},
+    ]
+
+
+def format_table(results):
+    lines = ["| size | case | requests | p50 ms | p95 ms | bytes | rows returned | rows counted | counter rows scanned | counters match |",
+             "|---|---|---|---|---|---|---|---|---|---|"]
+    for r in results:
+        scanned = f"{r['rows_scanned']:,}" if "rows_scanned" in r else "–"
+        match = ("yes" if not r["mismatched"] else "no: " + ", ".join(r["mismatched"])) if "mismatched" in r else "–"
+        lines.append(f"| {r['size']:,} | {r['case']} | {r['requests']} | {r['p50_ms']:.1f} | {r['p95_ms']:.1f} |"
+                     f" {r['bytes']:,} | {r['rows']:,} | {r['table_rows'] or '–'} | {scanned} | {match} |")
+    return "\n".join(lines)
+
+
+def growth(results):
+    """How much the RPC's latency and payload grew from the smallest to the largest size."""
+    rpc = sorted((r for r in results if r["case"] == "statistieken RPC"), key=lambda r: r["size"])
+    if len(rpc) < 2:
+        return {}
+    first, last = rpc[0], rpc[-1]
+    return {
+        "rows_growth": last["size"] / first["size"],
+        "latency_growth": last["p50_ms"] / first["p50_ms"] if first["p50_ms"] else None,
+        "bytes_growth": last["bytes"] / first["bytes"] if first["bytes"] else None,
+    }
+
+
+def run(sizes=SIZES, repeat=REPEAT, output=OUTPUT_PATH):
+    results = []
+    for size in sorted(sizes):
+        stack = local_db.up(size)
+        with local_db.connect(stack) as conn:
+            results.extend(bench_size(stack, conn, size, repeat))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"results": results, "growth": growth(results)}, indent=2, default=str), encoding="utf-8")
+    return results
+
+
+# -- TC side -------------------------------------------------------------------------------------
+
+
+def _stats_request(url):
+    """``'rpc'``, ``'full_table'`` for a select of a counted table without filter or limit, else None."""
+    parsed = urlparse(url)
+    if parsed.path.endswith(RPC_PATH):
+        return "rpc"
+    table = parsed.path.rpartition("/rest/v1/")[2]
+    if table not in STATS_TABLES:
+        return None
+    params = parse_qs(parsed.query)
+    filtered = any(name not in ("select", "order", "offset") for name in params)
+    return None if filtered else "full_table"
+
+
+class StatsTraffic:
+    """Bytes the page downloads for its statistics, from creation until ``detach()``."""
+
+    def __init__(self, page):
+        self.page = page
+        self.requests = Counter()
+        self.bytes = Counter()
+        self._pending = set()
+        page.on("requestfinished", self._on_finished)
+
+    def _on_finished(self, request):
+        kind = _stats_request(request.url)
+        if kind is None or request.method == "HEAD":
+            return
+        task = asyncio.ensure_future(self._measure(kind, request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _measure(self, kind, request):
+        sizes = await request.sizes()
+        self.requests[kind] += 1
+        self.bytes[kind] += sizes.get("responseBodySize", 0)
+
+    def detach(self):
+        self.page.remove_listener("requestfinished", self._on_finished)
+
+    async def metrics(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        return {
+            "stats_bytes": sum(self.bytes.values()),
+            "full_table_reads": self.requests["full_table"],
+            "rpc_requests": self.requests["rpc"],
+        }
+
+
+async def assert_stats_budget(traffic, budgets=None):
+    """Fail when the dashboard's statistics cost more bytes than allowed or read a whole table."""
+    test_id = current_test_id()
+    limits = (budgets or load_budgets()).get("stats", {}).get(test_id, {})
+    metrics = await traffic.metrics()
+    failed = violations(metrics, limits)
+    record_trend("stats", test_id, metrics, limits, failed)
+    assert not failed, f"Statistics budget exceeded for {test_id}: " + ", ".join(failed)
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="tenant counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per case (after one warm-up)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+    results = run(args.sizes, args.repeat)
+    print(format_table(results))
+    spread = growth(results)
+    if spread:
+        print(f"\nRows ×{spread['rows_growth']:.0f}: statistieken latency ×{spread['latency_growth']:.2f},"
+              f" payload ×{spread['bytes_growth']:.2f}")
+    print(f"\nFull results in {OUTPUT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
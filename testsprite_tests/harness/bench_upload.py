@@ -0,0 +1,444 @@
+"""Upload throughput benchmark: one PUT vs. parallel, resumable multipart uploads.
+
+Replays the protocol of ``src/lib/multipartUpload.ts`` – SHA-256 per part,
+parts uploaded by a pool of workers with retries, ListParts to resume,
+CompleteMultipartUpload with the part checksums – against the local S3
+stand-in (``harness.s3_local``) with an emulated mobile uplink, or against a
+real S3-compatible endpoint (R2, MinIO) with presigned SigV4 URLs when
+``TESTSPRITE_S3_URL``, ``_ACCESS_KEY``, ``_SECRET_KEY`` and ``_BUCKET`` are set.
+
+For every file size it measures:
+
+* ``single`` – the whole file in one PUT, like the old edge-function upload;
+* ``multipart ×N`` – parts uploaded by N workers;
+* ``resume`` – the upload is cut off halfway, then resumed with ListParts;
+  reports how much of the file had to be sent again;
+* integrity – a part sent with the wrong checksum must be rejected and the
+  completed object must hash to the file's SHA-256.
+
+TC003 and TC012 run a small profile through ``assert_upload_budget`` with
+limits from ``uploads`` in ``testsprite_perf_budgets.json``.
+
+Usage:
+    python -m harness.bench_upload                         # 10, 25, 50 MiB over 16/64 Mbit/s, 60 ms RTT
+    python -m harness.bench_upload --sizes 50 --concurrency 1 4 8 --drop-rate 0.05
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from urllib.parse import quote, urlparse
+
+from harness import config
+from harness.budgets import load_budgets, record_trend
+from harness.s3_local import LocalS3
+from harness.tracing import current_test_id
+
+MiB = 1024 * 1024
+CHUNK = 64 * 1024
+SIZES_MIB = (10, 25, 50)
+PART_MIB = 8
+CONCURRENCY = (1, 2, 4, 6)
+MAX_ATTEMPTS = 4
+RETRY_BASE_S = 0.2
+OUTPUT_PATH = config.RESULTS_DIR / "bench-upload.json"
+
+# Mobile uplink: one TCP stream reaches ~16 Mbit/s over a 60 ms radio link, the cell allows ~64 Mbit/s
+LINK = {"link_mbps": 16, "uplink_mbps": 64, "rtt_ms": 60}
+# Small enough to add only a few seconds to a TC
+TC_PROFILE = {"size_mib": 12, "part_mib": 5, "concurrency": 4, "link_mbps": 32, "uplink_mbps": 128, "rtt_ms": 40}
+
+
+class Interrupted(Exception):
+    """The simulated disconnect: raised while a request body is being sent."""
+
+
+class UploadFailed(Exception):
+    def __init__(self, status, body):
+        code = re.search(rb"<Code>(.*?)</Code>", body or b"")
+        super().__init__(f"HTTP {status} {code.group(1).decode() if code else ''}".strip())
+        self.status = status
+
+
+# -- S3 client -------------------------------------------------------------------------------
+
+
+def presign(endpoint, bucket, key, method, access_key, secret_key, query=None, headers=None, expires=3600, now=None):
+    """Query-string SigV4 URL, the same signing as ``supabase/functions/_shared/r2.ts``."""
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    scope = f"{amz_date[:8]}/auto/s3/aws4_request"
+    host = urlparse(endpoint).netloc
+    path = f"/{quote(bucket, safe='')}/" + "/".join(quote(segment, safe="") for segment in key.split("/"))
+    signed = {"host": host, **{name.lower(): value.strip() for name, value in (headers or {}).items()}}
+    names = sorted(signed)
+    params = {
+        **(query or {}),
+        "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+        "X-Amz-Credential": f"{access_key}/{scope}",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(expires),
+        "X-Amz-SignedHeaders": ";".join(names),
+    }
+    canonical_query = "&".join(f"{quote(k, safe='')}={quote(params[k], safe='')}" for k in sorted(params))
+    canonical_request = "\n".join([
+        method, path, canonical_query, "".join(f"{name}:{signed[name]}\n" for name in names),
+        ";".join(names), "UNSIGNED-PAYLOAD",
+    ])
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+    key_bytes = f"AWS4{secret_key}".encode()
+    for part in (amz_date[:8], "auto", "s3", "aws4_request"):
+        key_bytes = hmac.new(key_bytes, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key_bytes, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return f"{endpoint}{path}?{canonical_query}&X-Amz-Signature={signature}"
+
+
+@dataclass
+class S3Target:
+    endpoint: str
+    bucket: str
+    access_key: str = ""
+    secret_key: str = ""
+
+    @classmethod
+    def from_env(cls):
+        endpoint = os.environ.get("TESTSPRITE_S3_URL")
+        if not endpoint:
+            return None
+        return cls(endpoint.rstrip("/"), os.environ.get("TESTSPRITE_S3_BUCKET", "documents"),
+                   os.environ.get("TESTSPRITE_S3_ACCESS_KEY", ""), os.environ.get("TESTSPRITE_S3_SECRET_KEY", ""))
+
+    def url(self, key, method, query=None, headers=None):
+        if self.access_key:
+            return presign(self.endpoint, self.bucket, key, method, self.access_key, self.secret_key, query, headers)
+        suffix = "&".join(f"{quote(k, safe='')}={quote(v, safe='')}" if v else quote(k, safe="") for k, v in (query or {}).items())
+        return f"{self.endpoint}/{self.bucket}/{quote(key)}" + (f"?{suffix}" if suffix else "")
+
+
+class S3Client:
+    """Minimal S3 client over ``http.client`` with one keep-alive connection per thread."""
+
+    def __init__(self, target):
+        self.target = target
+        self._local = threading.local()
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def _connection(self, url):
+        parsed = urlparse(url)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or (connection.host, connection.port) != (parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80)):
+            factory = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+            connection = self._local.connection = factory(parsed.hostname, parsed.port, timeout=300)
+        return connection
+
+    def _chunks(self, body, disconnect):
+        for start in range(0, len(body), CHUNK):
+            if disconnect and disconnect.is_set():
+                raise Interrupted()
+            chunk = body[start:start + CHUNK]
+            with self._lock:
+                self.bytes_sent += len(chunk)
+            yield chunk
+
+    def request(self, method, key, query=None, body=b"", headers=None, disconnect=None):
+        """Send one request; setting the ``disconnect`` event cuts the body off mid-transfer."""
+        headers = headers or {}
+        url = self.target.url(key, method, query, headers)
+        parsed = urlparse(url)
+        connection = self._connection(url)
+        with self._lock:
+            self.requests += 1
+        try:
+            connection.request(method, f"{parsed.path}?{parsed.query}" if parsed.query else parsed.path,
+                               body=self._chunks(body, disconnect) if body else b"",
+                               headers={**headers, "Content-Length": str(len(body))})
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException, Interrupted):
+            connection.close()
+            self._local.connection = None
+            raise
+        if response.status >= 300 or b"<Error>" in data[:200]:
+            raise UploadFailed(response.status, data)
+        return response, data
+
+
+def _sha256_b64(data):
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def _tag(xml, name):
+    return [value.decode() for value in re.findall(rb"<%s>(.*?)</%s>" % (name.encode(), name.encode()), xml, re.S)]
+
+
+def with_retries(call):
+    """Retry network errors and 403/5xx responses with exponential backoff; returns (result, retries)."""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return call(), attempt - 1
+        except (OSError, http.client.HTTPException, UploadFailed) as exc:
+            retryable = not isinstance(exc, UploadFailed) or exc.status == 403 or exc.status >= 500
+            if not retryable or attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(RETRY_BASE_S * 2 ** (attempt - 1))
+
+
+# -- upload strategies -----------------------------------------------------------------------
+
+
+def upload_single(client, key, data):
+    _, retries = with_retries(lambda: client.request("PUT", key, body=data, headers={"x-amz-checksum-sha256": _sha256_b64(data)}))
+    return {"retries": retries}
+
+
+def split(data, part_size):
+    return [{"number": n + 1, "start": start, "end": min(start + part_size, len(data)),
+             "sha256": _sha256_b64(data[start:start + part_size])}
+            for n, start in enumerate(range(0, len(data), part_size))]
+
+
+def create_upload(client, key):
+    _, body = client.request("POST", key, {"uploads": ""}, headers={"x-amz-checksum-algorithm": "SHA256"})
+    return _tag(body, "UploadId")[0]
+
+
+def list_parts(client, key, upload_id):
+    parts, marker = {}, "0"
+    while True:
+        _, body = client.request("GET", key, {"uploadId": upload_id, "part-number-marker": marker})
+        for part in re.findall(rb"<Part>(.*?)</Part>", body, re.S):
+            number = int(_tag(part, "PartNumber")[0])
+            parts[number] = {"etag": _tag(part, "ETag")[0].replace("&quot;", '"'), "size": int(_tag(part, "Size")[0]),
+                             "sha256": (_tag(part, "ChecksumSHA256") or [None])[0]}
+        if _tag(body, "IsTruncated")[0] != "true":
+            return parts
+        marker = _tag(body, "NextPartNumberMarker")[0]
+
+
+def upload_multipart(client, key, data, part_size, concurrency, upload_id=None, disconnect_at=None):
+    """Upload ``data`` in parts; with ``upload_id`` the parts already on the server are skipped.
+
+    ``disconnect_at`` simulates losing the connection once that many bytes were sent: the parts
+    in flight are cut off and the upload is left unfinished. Returns the upload id and counters.
+    """
+    parts = split(data, part_size)
+    skipped = 0
+    if upload_id:
+        remote = list_parts(client, key, upload_id)
+        for part in parts:
+            existing = remote.get(part["number"])
+            if existing and existing["sha256"] == part["sha256"] and existing["size"] == part["end"] - part["start"]:
+                part["etag"] = existing["etag"]
+                skipped += 1
+    else:
+        upload_id = create_upload(client, key)
+
+    disconnect = threading.Event()
+    started_at = client.bytes_sent
+    retries = []
+
+    def watch():
+        while not disconnect.wait(0.01):
+            if client.bytes_sent - started_at >= disconnect_at:
+                disconnect.set()
+
+    def send(part):
+        body = data[part["start"]:part["end"]]
+        query = {"partNumber": str(part["number"]), "uploadId": upload_id}
+        try:
+            (response, _), tries = with_retries(lambda: client.request(
+                "PUT", key, query, body, {"x-amz-checksum-sha256": part["sha256"]}, disconnect))
+        except Interrupted:
+            return
+        part["etag"] = response.getheader("ETag")
+        retries.append(tries)
+
+    if disconnect_at is not None:
+        threading.Thread(target=watch, daemon=True).start()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, [part for part in parts if "etag" not in part]))
+    result = {"upload_id": upload_id, "parts": len(parts), "skipped_parts": skipped, "retries": sum(retries)}
+    if any("etag" not in part for part in parts):
+        return {**result, "completed": False}
+    disconnect.set()
+
+    xml = "<CompleteMultipartUpload>" + "".join(
+        f"<Part><PartNumber>{p['number']}</PartNumber><ETag>{p['etag'].replace(chr(34), '&quot;')}</ETag>"
+        f"<ChecksumSHA256>{p['sha256']}</ChecksumSHA256></Part>" for p in parts
+    ) + "</CompleteMultipartUpload>"
+    client.request("POST", key, {"uploadId": upload_id}, xml.encode(), {"Content-Type": "application/xml"})
+    return {**result, "completed": True}
+
+
+def verify_object(client, key, data):
+    _, body = client.request("GET", key)
+    return hashlib.sha256(body).digest() == hashlib.sha256(data).digest()
+
+
+def corrupt_part_rejected(client, key, data, part_size):
+    """Send part 1 with the checksum of different bytes; R2 (and the stand-in) must refuse it."""
+    upload_id = create_upload(client, key)
+    body = data[:part_size]
+    try:
+        client.request("PUT", key, {"partNumber": "1", "uploadId": upload_id}, body,
+                       {"x-amz-checksum-sha256": _sha256_b64(body[::-1])})
+        return False
+    except UploadFailed as exc:
+        return exc.status == 400
+    finally:
+        client.request("DELETE", key, {"uploadId": upload_id})
+
+
+# -- benchmark -------------------------------------------------------------------------------
+
+
+def _timed(call):
+    started = time.perf_counter()
+    result = call()
+    return time.perf_counter() - started, result
+
+
+def bench_size(client, size_mib, part_mib, concurrency_levels):
+    data = os.urandom(size_mib * MiB)
+    part_size = part_mib * MiB
+    mbit = len(data) * 8 / 1_000_000
+    results = []
+
+    def measure(case, key, call, **extra):
+        before = client.bytes_sent
+        seconds, outcome = _timed(call)
+        outcome.pop("upload_id", None)
+        results.append({"size_mib": size_mib, "case": case, "seconds": round(seconds, 3),
+                        "throughput_mbps": round(mbit / seconds, 2), "resent_ratio": None,
+                        **extra, **outcome, "bytes_sent": client.bytes_sent - before,
+                        "verified": verify_object(client, key, data)})
+        return results[-1]
+
+    single = measure("single", f"bench/{size_mib}/single", lambda: upload_single(client, f"bench/{size_mib}/single", data))
+    for workers in concurrency_levels:
+        key = f"bench/{size_mib}/multipart-{workers}"
+        timing = measure(f"multipart ×{workers}", key, lambda: upload_multipart(client, key, data, part_size, workers))
+        timing["speedup"] = round(single["seconds"] / timing["seconds"], 2)
+
+    # Connection lost halfway: the resumed upload should only send what R2 does not have yet
+    workers = max(concurrency_levels)
+    key = f"bench/{size_mib}/resume"
+    interrupted_s, interrupted = _timed(lambda: upload_multipart(client, key, data, part_size, workers, disconnect_at=len(data) // 2))
+    resumed = measure("resume", key, lambda: upload_multipart(client, key, data, part_size, workers, upload_id=interrupted["upload_id"]),
+                      interrupted_after_s=round(interrupted_s, 3))
+    resumed["resent_ratio"] = round(resumed["bytes_sent"] / len(data), 3)
+
+    results.append({"size_mib": size_mib, "case": "corrupt part",
+                    "rejected": corrupt_part_rejected(client, f"bench/{size_mib}/corrupt", data, part_size)})
+    return results
+
+
+def run(sizes_mib=SIZES_MIB, part_mib=PART_MIB, concurrency=CONCURRENCY, link=LINK, drop_rate=0.0, output=OUTPUT_PATH):
+    """Benchmark against ``TESTSPRITE_S3_URL`` if set, otherwise against a throttled local stand-in."""
+    target = S3Target.from_env()
+    results = []
+    if target:
+        client = S3Client(target)
+        for size in sizes_mib:
+            results.extend(bench_size(client, size, part_mib, concurrency))
+    else:
+        with LocalS3(drop_rate=drop_rate, **link) as s3:
+            client = S3Client(S3Target(s3.url, s3.bucket))
+            for size in sizes_mib:
+                results.extend(bench_size(client, size, part_mib, concurrency))
+                results[-1]["server"] = dict(s3.stats)
+                s3.reset()
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps({"link": None if target else {**link, "drop_rate": drop_rate},
+                                      "part_mib": part_mib, "results": results}, indent=2), encoding="utf-8")
+    return results
+
+
+def format_table(results):
+    lines = ["| size | case | seconds | Mbit/s | speedup | retries | resent | verified |",
+             "|---|---|---|---|---|---|---|---|"]
+    for r in results:
+        if r["case"] == "corrupt part":
+            lines.append(f"| {r['size_mib']} MiB | corrupt part | – | – | – | – | – | rejected: {r['rejected']} |")
+            continue
+        lines.append(f"| {r['size_mib']} MiB | {r['case']} | {r['seconds']:.2f} | {r['throughput_mbps']:.1f} |"
+                     f" {r.get('speedup', '–')} | {r.get('retries', 0)} | {r['resent_ratio'] if r['resent_ratio'] is not None else '–'} | {r['verified']} |")
+    return "\n".join(lines)
+
+
+def summarize(results):
+    """TC metrics: the fastest multipart run against the single PUT, resume and integrity checks."""
+    by_case = {r["case"]: r for r in results}
+    multipart = max((r for r in results if r["case"].startswith("multipart")), key=lambda r: r["speedup"])
+    return {
+        "single_s": by_case["single"]["seconds"],
+        "multipart_s": multipart["seconds"],
+        "throughput_mbps": multipart["throughput_mbps"],
+        "speedup": multipart["speedup"],
+        "resent_ratio": by_case["resume"]["resent_ratio"],
+        "verified": all(r["verified"] for r in results if "verified" in r),
+        "corrupt_part_rejected": by_case["corrupt part"]["rejected"],
+    }
+
+
+async def assert_upload_budget(budgets=None):
+    """Run the TC upload profile and fail on a speedup, throughput or resume regression or an integrity failure."""
+    test_id = current_test_id()
+    limits = (budgets or load_budgets()).get("uploads", {}).get(test_id, {})
+    profile = TC_PROFILE
+    link = {name: profile[name] for name in ("link_mbps", "uplink_mbps", "rtt_ms")}
+    results = await asyncio.to_thread(run, (profile["size_mib"],), profile["part_mib"], (profile["concurrency"],), link, 0.0, None)
+    metrics = summarize(results)
+    failed = []
+    if "min_speedup" in limits and metrics["speedup"] < limits["min_speedup"]:
+        failed.append(f"speedup {metrics['speedup']:.2f} < {limits['min_speedup']}")
+    if "min_throughput_mbps" in limits and metrics["throughput_mbps"] < limits["min_throughput_mbps"]:
+        failed.append(f"throughput_mbps {metrics['throughput_mbps']:.1f} < {limits['min_throughput_mbps']}")
+    if "max_resent_ratio" in limits and metrics["resent_ratio"] > limits["max_resent_ratio"]:
+        failed.append(f"resent_ratio {metrics['resent_ratio']:.2f} > {limits['max_resent_ratio']}")
+    if not metrics["verified"]:
+        failed.append("an uploaded object does not match the file")
+    if not metrics["corrupt_part_rejected"]:
+        failed.append("a part with a wrong checksum was accepted")
+    record_trend("upload", test_id, metrics, limits, failed)
+    assert not failed, f"Upload budget exceeded for {test_id}: " + ", ".join(failed) + "\n" + format_table(results)
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES_MIB, help="file sizes in MiB")
+    parser.add_argument("--part-mib", type=int, default=PART_MIB, help="multipart part size (at least 5)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=CONCURRENCY, help="parallel part uploads to compare")
+    parser.add_argument("--link-mbps", type=float, default=LINK["link_mbps"], help="throughput of one connection")
+    parser.add_argument("--uplink-mbps", type=float, default=LINK["uplink_mbps"], help="total upstream bandwidth")
+    parser.add_argument("--rtt-ms", type=float, default=LINK["rtt_ms"])
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of uploads (PUTs and parts) cut off halfway")
+    args = parser.parse_args(argv)
+    if args.part_mib < 5:
+        parser.error("S3 parts must be at least 5 MiB")
+    link = {"link_mbps": args.link_mbps, "uplink_mbps": args.uplink_mbps, "rtt_ms": args.rtt_ms}
+    results = run(args.sizes, args.part_mib, args.concurrency, link, args.drop_rate)
+    print(format_table(results))
+    print(f"\nFull results in {OUTPUT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
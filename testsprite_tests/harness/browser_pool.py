@@ -0,0 +1,116 @@
+"""Session-scoped Chromium pool.
+
+Launching Chromium is the most expensive part of every TC script, while a
+``BrowserContext`` is cheap and fully isolated (own cookies, storage and
+cache). The pool starts Playwright and the browser once and hands out a fresh
+context per test.
+"""
+from contextlib import asynccontextmanager
+
+from playwright import async_api
+
+from harness import config, network_replay, tracing
+from harness.auth_state import storage_state_for
+from harness.waits import track_network
+
+
+class BrowserPool:
+    """Owns one Playwright driver and one Chromium instance for a whole run."""
+
+    def __init__(self, playwright, browser):
+        self._playwright = playwright
+        self._browser = browser
+        self._contexts = set()
+
+    @classmethod
+    async def start(cls, headless=None, args=None):
+        playwright = await async_api.async_playwright().start()
+        try:
+            browser = await playwright.chromium.launch(
+                headless=config.HEADLESS if headless is None else headless,
+                args=config.LAUNCH_ARGS if args is None else args,
+            )
+        except Exception:
+            await playwright.stop()
+            raise
+        return cls(playwright, browser)
+
+    @property
+    def browser(self):
+        return self._browser
+
+    @property
+    def playwright(self):
+        return self._playwright
+
+    async def new_context(self, role=None, **kwargs):
+        """Create an isolated context (like an incognito window) on the shared browser.
+
+        With ``role`` the context starts out signed in with that role's cached session.
+        """
+        if role is not None:
+            kwargs["storage_state"] = await storage_state_for(role)
+        context = await self._browser.new_context(**kwargs)
+        context.set_default_timeout(config.DEFAULT_TIMEOUT_MS)
+        track_network(context)
+        tracing.attach(context)
+        await network_replay.install(context)
+        self._contexts.add(context)
+        context.on("close", lambda _: self._on_close(context))
+        return context
+
+    def _on_close(self, context):
+        self._contexts.discard(context)
+        tracing.export(context)
+        network_replay.finish(context)
+
+    @asynccontextmanager
+    async def context(self, **kwargs):
+        context = await self.new_context(**kwargs)
+        try:
+            yield context
+        finally:
+            await context.close()
+
+    async def close(self):
+        # Contexts a crashed test forgot to close would otherwise keep the browser alive
+        for context in list(self._contexts):
+            try:
+                await context.close()
+            except async_api.Error:
+                pass
+        self._contexts.clear()
+        await self._browser.close()
+        await self._playwright.stop()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+@asynccontextmanager
+async def borrow_pool(pool=None):
+    """Yield ``pool``, or a private pool that lives only as long as this block."""
+    if pool is not None:
+        yield pool
+        return
+    pool = await BrowserPool.start()
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+
+@asynccontextmanager
+async def borrow_context(pool=None, **kwargs):
+    """Yield a fresh context from ``pool``.
+
+    When a TC script is run on its own (no pool passed in) a private pool is
+    started and torn down around the single test, which keeps the scripts
+    runnable as standalone files.
+    """
+    async with borrow_pool(pool) as pool:
+        async with pool.context(**kwargs) as context:
+            yield context
@@ -0,0 +1,212 @@
+"""Performance budgets for routes and whole TC flows.
+
+Limits live in ``testsprite_perf_budgets.json`` next to the test plan:
+
+* ``routes`` – per path: navigation time, Largest Contentful Paint, total
+  JavaScript bytes and the number of Supabase requests the page makes until
+  the network settles (catches a dashboard fetching the same data repeatedly).
+  Requests are counted with Playwright's ``request`` event, so calls answered
+  by ``network_replay`` count too, and a failure lists them per endpoint.
+* ``flows`` – per TC id: maximum wall-clock duration of the whole script.
+* ``queries`` – per paginated RPC: latency of the first page and of the
+  deepest page reached by following the keyset cursor page after page.
+* ``caches`` – per TC id: minimum share of service reads served from the
+  app's query cache (checked by ``harness.query_cache``).
+* ``uploads`` – per TC id: multipart speedup over a single PUT, throughput
+  and the share of a file re-sent after a disconnect (``harness.bench_upload``).
+* ``interactions`` – per TC id: worst input latency, input delay, long task and
+  timer lag while a photo is resized and uploaded (``harness.responsiveness``).
+* ``signing`` – per TC id: most ``sign-urls`` requests made on one page
+  (``harness.signing``).
+* ``realtime`` – per TC id: notification delivery latency (p95/p99) to a few
+  hundred subscribers, lost notifications and pushes per notification
+  (``harness.bench_realtime``).
+* ``stats`` – per TC id: bytes the page downloads for its statistics and the
+  number of selects that read a whole counted table (``harness.bench_stats``).
+* ``webhooks`` – per TC id: acknowledgement latency (p95/p99) and event
+  throughput of ``stripe-webhook`` under replayed duplicate and out-of-order
+  deliveries, and events left queued, lost or applied wrongly
+  (``harness.stripe_replay``).
+
+Every measurement is appended to ``results/perf-trend.jsonl`` so regressions
+can be followed across runs.
+"""
+import json
+import os
+import time
+import weakref
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlparse
+
+from harness import config
+from harness.auth_state import storage_key
+from harness.tracing import current_test
+from harness.waits import ready
+
+BUDGETS_PATH = Path(os.environ.get("TESTSPRITE_BUDGETS", config.TESTS_DIR / "testsprite_perf_budgets.json"))
+TREND_PATH = Path(os.environ.get("TESTSPRITE_TREND_FILE", config.RESULTS_DIR / "perf-trend.jsonl"))
+
+# Installed before any page script runs: keeps the latest LCP candidate and
+# enlarges the resource timing buffer (the Vite dev server serves hundreds of modules)
+OBSERVER_JS = """
+performance.setResourceTimingBufferSize(10000);
+window.__testspriteLcp = null;
+new PerformanceObserver((list) => {
+  const entries = list.getEntries();
+  window.__testspriteLcp = entries[entries.length - 1].startTime;
+}).observe({ type: 'largest-contentful-paint', buffered: true });
+"""
+
+METRICS_JS = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  const resources = performance.getEntriesByType('resource');
+  const isScript = (r) => r.initiatorType === 'script' || /\\.(m?js|jsx|tsx?)(\\?|$)/.test(new URL(r.name).pathname + new URL(r.name).search);
+  return {
+    navigation_ms: nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd || nav.responseEnd) - nav.startTime : null,
+    lcp_ms: window.__testspriteLcp,
+    js_bytes: resources.filter(isScript).reduce((sum, r) => sum + Math.max(r.transferSize, r.encodedBodySize), 0),
+  };
+}
+"""
+
+# Walks a keyset-paginated RPC from the page, with the signed-in session, so the
+# requests go through the same routing (and recording) as the application's own
+PAGED_RPC_JS = """
+async ([url, anonKey, storageKey, args, pages]) => {
+  const session = JSON.parse(window.localStorage.getItem(storageKey) || 'null');
+  const headers = {
+    apikey: anonKey,
+    Authorization: `Bearer ${session ? session.access_token : anonKey}`,
+    'Content-Type': 'application/json',
+  };
+  const timings = [];
+  let afterId = null;
+  for (let n = 0; n < pages; n++) {
+    const started = performance.now();
+    const response = await fetch(url, { method: 'POST', headers, body: JSON.stringify({ ...args, after_id: afterId }) });
+    const rows = response.ok ? await response.json() : null;
+    timings.push(performance.now() - started);
+    if (!rows) return { status: response.status, timings };
+    if (rows.length === 0) break;
+    afterId = rows[rows.length - 1].id;
+  }
+  return { status: 200, timings };
+}
+"""
+
+_observed = weakref.WeakSet()
+
+
+def load_budgets(path=None):
+    with open(path or BUDGETS_PATH, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def violations(metrics, limits):
+    """Names and values of every metric above its limit; unmeasured metrics are skipped."""
+    found = []
+    for name, limit in limits.items():
+        value = metrics.get(name)
+        if value is not None and value > limit:
+            found.append(f"{name} {value:.0f} > {limit}")
+    return found
+
+
+def record_trend(kind, target, metrics, limits, failed, path=None):
+    path = Path(path or TREND_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": os.environ.get("GITHUB_SHA") or os.environ.get("CI_COMMIT_SHA"),
+        "test_id": current_test.get(),
+        "kind": kind,
+        "target": target,
+        "metrics": metrics,
+        "limits": limits,
+        "violations": failed,
+    }
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry) + "\n")
+
+
+def supabase_endpoint(url):
+    """Short name of a Supabase request for the per-endpoint breakdown, e.g. ``rest documenten`` or ``function huurder-dashboard``."""
+    parts = urlparse(url).path.strip("/").split("/")
+    if parts[:2] == ["rest", "v1"]:
+        return f"rpc {parts[3]}" if len(parts) > 3 and parts[2] == "rpc" else f"rest {'/'.join(parts[2:])}"
+    if parts[:2] == ["functions", "v1"]:
+        return f"function {'/'.join(parts[2:])}"
+    return " ".join(part for part in (parts[0], parts[2] if len(parts) > 2 else "") if part)
+
+
+async def measure_route(page, route):
+    """Navigate ``page`` to ``route`` in a fresh document and collect the budgeted metrics."""
+    context = page.context
+    if context not in _observed:
+        await context.add_init_script(OBSERVER_JS)
+        _observed.add(context)
+    supabase_host = urlparse(config.SUPABASE_URL).netloc if config.SUPABASE_URL else ""
+    endpoints = Counter()
+
+    def count(request):
+        if supabase_host and request.method != "OPTIONS" and urlparse(request.url).netloc == supabase_host:
+            endpoints[supabase_endpoint(request.url)] += 1
+
+    page.on("request", count)
+    try:
+        await page.goto(config.BASE_URL.rstrip("/") + route, wait_until="load", timeout=15000)
+        # Hydration and data loading count towards the route: wait until the dashboard stops fetching
+        await ready(page, timeout_ms=10000)
+    finally:
+        page.remove_listener("request", count)
+    metrics = await page.evaluate(METRICS_JS)
+    metrics["supabase_requests"] = sum(endpoints.values())
+    metrics["supabase_endpoints"] = dict(endpoints.most_common())
+    return metrics
+
+
+async def assert_route_budget(page, route, budgets=None):
+    """Measure ``route`` and fail when any of its limits is exceeded."""
+    limits = (budgets or load_budgets())["routes"][route]
+    metrics = await measure_route(page, route)
+    failed = violations(metrics, limits)
+    record_trend("route", route, metrics, limits, failed)
+    if any(violation.startswith("supabase_requests") for violation in failed):
+        failed.append("requests: " + ", ".join(f"{name} ×{n}" for name, n in metrics["supabase_endpoints"].items()))
+    assert not failed, f"Performance budget exceeded for {route}: " + ", ".join(failed)
+    return metrics
+
+
+async def measure_paged_query(page, rpc, args, pages):
+    """Fetch up to ``pages`` keyset pages of ``rpc`` and time the first and the deepest one."""
+    url = f"{config.SUPABASE_URL.rstrip('/')}/rest/v1/rpc/{rpc}"
+    walk = await page.evaluate(PAGED_RPC_JS, [url, config.SUPABASE_ANON_KEY, storage_key(), args, pages])
+    assert walk["status"] == 200, f"{rpc} failed with HTTP {walk['status']} on page {len(walk['timings'])}"
+    timings = walk["timings"]
+    return {"first_page_ms": timings[0], "deep_page_ms": timings[-1], "pages": len(timings)}
+
+
+async def assert_query_budget(page, rpc, args, pages, budgets=None):
+    """Page through ``rpc`` and fail when the first or the deepest page exceeds its limit."""
+    limits = (budgets or load_budgets())["queries"][rpc]
+    metrics = await measure_paged_query(page, rpc, args, pages)
+    failed = violations(metrics, limits)
+    record_trend("query", rpc, metrics, limits, failed)
+    assert not failed, f"Performance budget exceeded for {rpc} (page {metrics['pages']}): " + ", ".join(failed)
+    return metrics
+
+
+def check_flow_budget(result, budgets=None):
+    """Flow budget for a finished ``TestResult``; returns the violations (empty when within budget)."""
+    try:
+        limits = (budgets or load_budgets())["flows"].get(result.test_id)
+    except OSError:
+        return []
+    if not limits:
+        return []
+    metrics = {"duration_s": result.duration_s}
+    failed = violations(metrics, limits)
+    record_trend("flow", result.test_id, metrics, limits, failed)
+    return failed
@@ -0,0 +1,49 @@
+"""Environment-driven settings shared by the TC scripts and the suite runner."""
+import os
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = TESTS_DIR.parent
+# Run artefacts (reports, traces, trend files); ignored by git
+RESULTS_DIR = Path(os.environ.get("TESTSPRITE_RESULTS_DIR", TESTS_DIR / "results"))
+
+
+def _dotenv(path=REPO_ROOT / ".env"):
+    """Values from the repo's ``.env`` so the suite talks to the same project as ``npm run dev``."""
+    values = {}
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return values
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            key, _, value = line.partition("=")
+            values[key.strip()] = value.strip().strip("'\"")
+    return values
+
+
+def _env(name, default=None):
+    return os.environ.get(name) or _DOTENV.get(name) or default
+
+
+_DOTENV = _dotenv()
+
+# Frontend under test (Vite dev server by default)
+BASE_URL = _env("TESTSPRITE_BASE_URL", "http://localhost:8080")
+
+# Browser settings that every TC script used to hard-code in its own launch call
+HEADLESS = os.environ.get("TESTSPRITE_HEADLESS", "1") != "0"
+LAUNCH_ARGS = [
+    "--window-size=1280,720",         # Set the browser window size
+    "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
+    "--ipc=host",                     # Use host-level IPC for better stability
+    "--single-process",               # Run the browser in a single process mode
+]
+
+# Default action timeout applied to every borrowed context (ms)
+DEFAULT_TIMEOUT_MS = int(os.environ.get("TESTSPRITE_DEFAULT_TIMEOUT_MS", "5000"))
+
+# Supabase project the frontend is built against (or a local stand-in)
+SUPABASE_URL = _env("VITE_SUPABASE_URL", "")
+SUPABASE_ANON_KEY = _env("VITE_SUPABASE_ANON_KEY", "")
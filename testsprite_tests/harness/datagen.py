@@ -0,0 +1,295 @@
+"""Streaming generator of realistic Dutch tenants, landlords, properties and documents.
+
+Every entity is derived from its sequence number alone (``random.Random``
+seeded with ``<seed>-<kind>-<n>``), so any slice of a large population can be
+regenerated on its own: ``load_tenants(conn, 100_000, start=10_001)`` extends a
+10k seed instead of rebuilding it, and two runs with the same seed produce the
+same rows. Ids match ``md5('huurder-' || n)::uuid`` (see ``local_db``).
+
+Rows are produced lazily and written per batch with ``COPY … FROM STDIN``, one
+transaction per batch, so memory stays bounded by ``batch_size`` regardless of
+how many millions of rows are generated.
+"""
+import hashlib
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate
+
+from psycopg.types.json import Jsonb
+
+SEED = "huurly"
+BATCH_SIZE = 5000
+SEED_DOMAIN = "seed.huurly.test"
+INSTANCE_ID = "00000000-0000-0000-0000-000000000000"
+# Annual subscription incl. 21% BTW, as charged through Stripe (src/lib/stripe-config.ts)
+SUBSCRIPTION_PRICE = 65
+
+# (city, province, weight): weights roughly follow the size of the rental market
+CITIES = (
+    ("Amsterdam", "Noord-Holland", 18), ("Rotterdam", "Zuid-Holland", 12), ("Den Haag", "Zuid-Holland", 10),
+    ("Utrecht", "Utrecht", 9), ("Eindhoven", "Noord-Brabant", 6), ("Groningen", "Groningen", 5),
+    ("Tilburg", "Noord-Brabant", 4), ("Almere", "Flevoland", 4), ("Breda", "Noord-Brabant", 3),
+    ("Nijmegen", "Gelderland", 4), ("Arnhem", "Gelderland", 3), ("Haarlem", "Noord-Holland", 3),
+    ("Enschede", "Overijssel", 2), ("Amersfoort", "Utrecht", 2), ("Zwolle", "Overijssel", 2),
+    ("Leiden", "Zuid-Holland", 3), ("Maastricht", "Limburg", 2), ("Delft", "Zuid-Holland", 2),
+    ("Den Bosch", "Noord-Brabant", 2), ("Apeldoorn", "Gelderland", 1),
+)
+CITY_NAMES = [city for city, _, _ in CITIES]
+PROVINCES = {city: province for city, province, _ in CITIES}
+CITY_WEIGHTS = list(accumulate(weight for _, _, weight in CITIES))
+# First digits of the postcode area per city (postcodes are 4 digits + 2 letters)
+POSTCODE_PREFIX = {
+    "Amsterdam": 10, "Rotterdam": 30, "Den Haag": 25, "Utrecht": 35, "Eindhoven": 56, "Groningen": 97,
+    "Tilburg": 50, "Almere": 13, "Breda": 48, "Nijmegen": 65, "Arnhem": 68, "Haarlem": 20, "Enschede": 75,
+    "Amersfoort": 38, "Zwolle": 80, "Leiden": 23, "Maastricht": 62, "Delft": 26, "Den Bosch": 52, "Apeldoorn": 73,
+}
+
+FIRST_NAMES = {
+    "man": ("Daan", "Sem", "Lucas", "Levi", "Finn", "Milan", "Bram", "Thijs", "Jesse", "Ruben", "Mohamed", "Noah",
+            "Lars", "Jeroen", "Pieter", "Sander", "Tim", "Wouter", "Youssef", "Kevin"),
+    "vrouw": ("Emma", "Julia", "Sophie", "Tess", "Anna", "Fleur", "Lotte", "Sanne", "Lisa", "Eva", "Noor", "Fatima",
+              "Femke", "Iris", "Laura", "Marloes", "Anouk", "Esther", "Yasmin", "Sara"),
+}
+LAST_NAMES = (
+    "de Jong", "Jansen", "de Vries", "van den Berg", "van Dijk", "Bakker", "Janssen", "Visser", "Smit", "Meijer",
+    "de Boer", "Mulder", "de Groot", "Bos", "Vos", "Peters", "Hendriks", "van Leeuwen", "Dekker", "Brouwer",
+    "de Wit", "Dijkstra", "Smits", "de Graaf", "van der Meer", "Yilmaz", "El Amrani", "Kaya", "Verhoeven", "Kok",
+)
+STREETS = (
+    "Kerkstraat", "Schoolstraat", "Molenweg", "Dorpsstraat", "Stationsweg", "Julianastraat", "Beatrixlaan",
+    "Wilhelminastraat", "Prinsengracht", "Nieuwstraat", "Parallelweg", "Kastanjelaan", "Eikenlaan", "Marktplein",
+    "Oranjestraat", "Emmastraat", "Industrieweg", "Havenkade", "Lindelaan", "Vondelstraat",
+)
+# (beroep, dienstverband, monthly gross income range)
+OCCUPATIONS = (
+    ("Software ontwikkelaar", "full-time", (3800, 7000)), ("Verpleegkundige", "full-time", (2800, 4200)),
+    ("Leraar basisonderwijs", "full-time", (3000, 4500)), ("Accountmanager", "full-time", (3200, 6000)),
+    ("Student", "student", (400, 1200)), ("Promovendus", "full-time", (2800, 3600)),
+    ("Grafisch ontwerper", "zzp", (2200, 5500)), ("Kapper", "part-time", (1600, 2600)),
+    ("Consultant", "full-time", (4000, 8000)), ("Logistiek medewerker", "full-time", (2300, 3100)),
+    ("Huisarts", "full-time", (7000, 11000)), ("Barista", "part-time", (1200, 2000)),
+    ("Data analist", "full-time", (3500, 6000)), ("Freelance fotograaf", "zzp", (1800, 4500)),
+    ("Werkzoekende", "werkloos", (1000, 1600)),
+)
+EMPLOYERS = ("ASML", "Philips", "ING", "Rabobank", "Albert Heijn", "Gemeente", "UMC", "Universiteit", "Coolblue",
+             "KPN", "NS", "Booking.com", "Eigen onderneming", "Basisschool De Regenboog", "PostNL")
+NATIONALITIES = (("Nederlandse", 78), ("Duitse", 4), ("Belgische", 3), ("Turkse", 3), ("Marokkaanse", 3),
+                 ("Poolse", 3), ("Indiase", 2), ("Italiaanse", 2), ("Spaanse", 2))
+NATIONALITY_WEIGHTS = list(accumulate(weight for _, weight in NATIONALITIES))
+MOVE_REASONS = ("Nieuwe baan", "Samenwonen", "Studie", "Gezinsuitbreiding", "Kleiner wonen", "Dichter bij familie",
+                "Huur wordt te hoog", "Eerste eigen woning")
+EXTRA_INCOME = ("Bijbaan in de horeca", "Huurinkomsten", "Freelance opdrachten", "Alimentatie", "Studiefinanciering")
+AMENITIES = ("balkon", "tuin", "lift", "parkeerplaats", "berging", "vaatwasser", "wasmachine", "vloerverwarming",
+             "dakterras", "fietsenstalling")
+# Het appartement / het huis / de studio
+ADJECTIVE = {"appartement": "Licht", "huis": "Ruim", "studio": "Compacte"}
+DOCUMENT_FOLDERS = {
+    "identiteit": "documents/identity", "inkomen": "documents/income", "referentie": "documents/reference",
+    "uittreksel_bkr": "documents/bkr", "arbeidscontract": "documents/contract",
+}
+
+TENANT_USER_COLUMNS = ("instance_id", "id", "aud", "role", "email", "email_confirmed_at", "created_at", "updated_at")
+GEBRUIKER_COLUMNS = ("id", "email", "naam", "telefoon", "rol", "profiel_compleet", "aangemaakt_op")
+ROL_COLUMNS = ("user_id", "role")
+HUURDER_COLUMNS = (
+    "id", "voornaam", "achternaam", "geboortedatum", "leeftijd", "geslacht", "nationaliteit", "burgerlijke_staat",
+    "beroep", "werkgever", "dienstverband", "inkomen", "maandinkomen", "inkomensbewijs_beschikbaar",
+    "locatie_voorkeur", "stad", "min_budget", "max_huur", "min_kamers", "max_kamers", "slaapkamers",
+    "voorkeur_woningtype", "woningtype", "huisdieren", "huisdier_details", "roken", "rook_details", "partner",
+    "heeft_kinderen", "aantal_kinderen", "kinderen_leeftijden", "partner_inkomen", "extra_inkomen",
+    "extra_inkomen_beschrijving", "borgsteller_beschikbaar", "borgsteller_details", "beschikbaarheid_flexibel",
+    "vroegste_verhuisdatum", "thuiswerken", "parkeren_vereist", "aantal_huisgenoten", "huidige_woonsituatie",
+    "reden_verhuizing", "verhuurgeschiedenis_jaren", "beschrijving", "motivatie", "aangemaakt_op",
+)
+ABONNEMENT_COLUMNS = ("huurder_id", "status", "start_datum", "eind_datum", "bedrag", "currency", "stripe_customer_id",
+                      "stripe_subscription_id")
+DOCUMENT_COLUMNS = ("huurder_id", "bestandsnaam", "bestand_url", "type", "status", "aangemaakt_op")
+VERHUURDER_COLUMNS = ("id", "bedrijfsnaam", "beschrijving", "aantal_woningen", "website")
+WONING_COLUMNS = (
+    "verhuurder_id", "titel", "beschrijving", "adres", "stad", "provincie", "postcode", "huurprijs", "oppervlakte",
+    "aantal_kamers", "aantal_slaapkamers", "woning_type", "meubilering", "voorzieningen", "beschikbaar_vanaf",
+    "status", "is_actief",
+)
+
+
+def seeded_id(kind, n):
+    """Same value as ``md5('<kind>-' || n)::uuid`` in SQL."""
+    return uuid.UUID(hashlib.md5(f"{kind}-{n}".encode()).hexdigest())
+
+
+def _rng(kind, n, seed=SEED):
+    return random.Random(f"{seed}-{kind}-{n}")
+
+
+def _city(rng):
+    return rng.choices(CITY_NAMES, cum_weights=CITY_WEIGHTS)[0]
+
+
+def _phone(rng):
+    return f"06{rng.randrange(10_000_000, 99_999_999)}"
+
+
+def tenant(n, now=None, seed=SEED):
+    """All rows belonging to tenant ``n``: auth user, gebruiker, huurder, subscription and documents."""
+    rng = _rng("huurder", n, seed)
+    now = now or datetime.now(timezone.utc)
+    tenant_id = seeded_id("huurder", n)
+    geslacht = rng.choices(("man", "vrouw", "anders"), weights=(48, 48, 4))[0]
+    voornaam = rng.choice(FIRST_NAMES["vrouw" if geslacht == "vrouw" else "man"])
+    achternaam = rng.choice(LAST_NAMES)
+    email = f"huurder{n}@{SEED_DOMAIN}"
+    created = now - timedelta(days=rng.randrange(0, 730), seconds=rng.randrange(86400))
+
+    beroep, dienstverband, (low, high) = rng.choice(OCCUPATIONS)
+    age = 19 + int(rng.betavariate(2, 4) * 50) if dienstverband != "student" else rng.randrange(18, 27)
+    birth = date(now.year - age, rng.randrange(1, 13), rng.randrange(1, 29))
+    income = round(rng.uniform(low, high), -1)
+    staat = rng.choices(("single", "samenwonend", "getrouwd", "gescheiden"), weights=(50, 25, 20, 5))[0]
+    partner = staat in ("samenwonend", "getrouwd")
+    partner_income = round(rng.uniform(1500, 5000), -1) if partner and rng.random() < 0.8 else 0
+    children = rng.choices(range(4), weights=(70, 13, 12, 5))[0] if age > 25 else 0
+    child_ages = sorted(rng.randrange(0, min(25, age - 17)) for _ in range(children))
+    extra = round(rng.uniform(100, 800), -1) if rng.random() < 0.15 else 0
+
+    # Budget follows the usual "rent at most a third of household income" rule, snapped to 25 euros
+    household = income + partner_income + extra
+    max_huur = max(500, min(4000, round(household / 3 / 25) * 25))
+    cities = [_city(rng)]
+    for _ in range(rng.choices((0, 1, 2), weights=(55, 30, 15))[0]):
+        other = _city(rng)
+        if other not in cities:
+            cities.append(other)
+    woningtype = rng.choices(("appartement", "huis", "studio"), weights=(60, 25, 15))[0]
+    min_kamers = 1 if woningtype == "studio" else rng.randrange(1, 3 + children)
+    pets = rng.random() < 0.25
+    smokes = rng.random() < 0.12
+    move_date = (now + timedelta(days=rng.randrange(7, 180))).date().isoformat()
+
+    huurder = (
+        tenant_id, voornaam, achternaam, birth, age, geslacht, rng.choices([nat for nat, _ in NATIONALITIES],
+                                                                            cum_weights=NATIONALITY_WEIGHTS)[0],
+        staat, beroep, rng.choice(EMPLOYERS) if dienstverband not in ("student", "werkloos") else None,
+        dienstverband, income, income, rng.random() < 0.9,
+        cities, cities[0], max(400, max_huur - rng.choice((250, 400, 600))), max_huur, min_kamers, min_kamers + rng.randrange(0, 3),
+        min_kamers, woningtype, woningtype,
+        pets, rng.choice(("Kat", "Hond", "Twee katten", "Konijn")) if pets else None,
+        smokes, "Alleen buiten" if smokes else None, partner,
+        children > 0, children, child_ages, partner_income, extra,
+        rng.choice(EXTRA_INCOME) if extra else "",
+        rng.random() < 0.4, Jsonb({}), rng.random() < 0.6,
+        move_date, rng.random() < 0.35, rng.random() < 0.3,
+        rng.randrange(0, 3), rng.choice(("studentenkamer", "studio", "appartement", "huis", "bij_familie", "anders")),
+        rng.choice(MOVE_REASONS), rng.randrange(0, 15),
+        f"Ik ben {voornaam}, {age} jaar en werk als {beroep.lower()}. Op zoek naar een {woningtype} in {cities[0]}.",
+        f"Betrouwbare huurder met een vast inkomen, {'met' if pets else 'zonder'} huisdieren.",
+        created,
+    )
+
+    status = rng.choices(("actief", "verlopen", "geannuleerd", "wachtend"), weights=(60, 20, 10, 10))[0]
+    start = created + timedelta(days=rng.randrange(0, 30))
+    abonnement = (
+        tenant_id, status, start, start + timedelta(days=365), SUBSCRIPTION_PRICE, "eur",
+        f"cus_seed{n}" if status != "wachtend" else None, f"sub_seed{n}" if status != "wachtend" else None,
+    )
+
+    documents = []
+    for doc_type in rng.sample(list(DOCUMENT_FOLDERS), rng.randrange(1, len(DOCUMENT_FOLDERS) + 1)):
+        uploaded = created + timedelta(hours=rng.randrange(1, 24 * 30))
+        name = f"{doc_type}_{achternaam.replace(' ', '_')}.pdf"
+        path = f"{DOCUMENT_FOLDERS[doc_type]}/{tenant_id}/{int(uploaded.timestamp() * 1000)}_{rng.getrandbits(40):x}_{name}"
+        doc_status = rng.choices(("wachtend", "goedgekeurd", "afgekeurd"), weights=(25, 65, 10))[0]
+        documents.append((tenant_id, name, path, doc_type, doc_status, uploaded))
+
+    return {
+        "auth_user": (INSTANCE_ID, tenant_id, "authenticated", "authenticated", email, created, created, created),
+        "gebruiker": (tenant_id, email, f"{voornaam} {achternaam}", _phone(rng), "huurder", rng.random() < 0.85, created),
+        "rol": (tenant_id, "huurder"),
+        "huurder": huurder,
+        "abonnement": abonnement,
+        "documenten": documents,
+    }
+
+
+def landlord(n, seed=SEED):
+    """Rows of landlord ``n``: auth user, gebruiker, verhuurder and their properties."""
+    rng = _rng("verhuurder", n, seed)
+    now = datetime.now(timezone.utc)
+    landlord_id = seeded_id("verhuurder", n)
+    email = f"verhuurder{n}@{SEED_DOMAIN}"
+    created = now - timedelta(days=rng.randrange(0, 1000))
+    # Mostly private landlords with one or two homes, a long tail of property managers
+    count = min(200, int(rng.paretovariate(1.3)))
+    company = f"{rng.choice(LAST_NAMES)} Vastgoed B.V." if count > 3 else None
+    home_city = _city(rng)
+
+    properties = []
+    for _ in range(count):
+        city = home_city if rng.random() < 0.7 else _city(rng)
+        woning_type = rng.choices(("appartement", "huis", "studio"), weights=(60, 25, 15))[0]
+        rooms = 1 if woning_type == "studio" else rng.randrange(2, 6)
+        area = rng.randrange(25, 45) if woning_type == "studio" else rooms * rng.randrange(18, 30)
+        street = rng.choice(STREETS)
+        properties.append((
+            landlord_id, f"{woning_type.capitalize()} aan de {street} in {city}", f"{ADJECTIVE[woning_type]} {woning_type} van {area} m² in {city}.",
+            f"{street} {rng.randrange(1, 250)}", city, PROVINCES[city],
+            f"{POSTCODE_PREFIX[city]}{rng.randrange(10, 100)} {rng.choice('ABCDEGHJKLMNPRSTVWXZ')}{rng.choice('ABCDEGHJKLMNPRSTVWXZ')}",
+            round(area * rng.uniform(16, 32) / 25) * 25, area, rooms, max(1, rooms - 1), woning_type,
+            rng.choice(("ongemeubileerd", "gestoffeerd", "gemeubileerd")), rng.sample(AMENITIES, rng.randrange(0, 5)),
+            (now + timedelta(days=rng.randrange(0, 120))).date().isoformat(),
+            rng.choices(("actief", "verhuurd", "inactief"), weights=(70, 25, 5))[0], rng.random() < 0.9,
+        ))
+
+    return {
+        "auth_user": (INSTANCE_ID, landlord_id, "authenticated", "authenticated", email, created, created, created),
+        "gebruiker": (landlord_id, email, company or f"{rng.choice(FIRST_NAMES['man'] + FIRST_NAMES['vrouw'])} {rng.choice(LAST_NAMES)}",
+                      _phone(rng), "verhuurder", True, created),
+        "rol": (landlord_id, "verhuurder"),
+        "verhuurder": (landlord_id, company, "Particuliere verhuurder" if company is None else "Vastgoedbeheer",
+                       count, f"https://{company.split()[0].lower()}vastgoed.nl" if company else None),
+        "woningen": properties,
+    }
+
+
+def copy_rows(cursor, table, columns, rows):
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def _batches(first, last, batch_size):
+    for start in range(first, last + 1, batch_size):
+        yield range(start, min(start + batch_size - 1, last) + 1)
+
+
+def load_tenants(conn, last, start=1, batch_size=BATCH_SIZE, seed=SEED):
+    """Generate tenants ``start``..``last`` and COPY them in per-batch transactions; returns rows per second."""
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    for numbers in _batches(start, last, batch_size):
+        batch = [tenant(n, now, seed) for n in numbers]
+        with conn.transaction(), conn.cursor() as cursor:
+            copy_rows(cursor, "auth.users", TENANT_USER_COLUMNS, (t["auth_user"] for t in batch))
+            copy_rows(cursor, "public.gebruikers", GEBRUIKER_COLUMNS, (t["gebruiker"] for t in batch))
+            copy_rows(cursor, "public.gebruiker_rollen", ROL_COLUMNS, (t["rol"] for t in batch))
+            copy_rows(cursor, "public.huurders", HUURDER_COLUMNS, (t["huurder"] for t in batch))
+            copy_rows(cursor, "public.abonnementen", ABONNEMENT_COLUMNS, (t["abonnement"] for t in batch))
+            copy_rows(cursor, "public.documenten", DOCUMENT_COLUMNS, (doc for t in batch for doc in t["documenten"]))
+    total = max(0, last - start + 1)
+    return total / max(time.perf_counter() - started, 1e-9)
+
+
+def load_landlords(conn, last, start=1, batch_size=BATCH_SIZE // 5, seed=SEED):
+    """Generate landlords ``start``..``last`` with their properties, COPY-ing one batch per transaction."""
+    started = time.perf_counter()
+    for numbers in _batches(start, last, batch_size):
+        batch = [landlord(n, seed) for n in numbers]
+        with conn.transaction(), conn.cursor() as cursor:
+            copy_rows(cursor, "auth.users", TENANT_USER_COLUMNS, (entry["auth_user"] for entry in batch))
+            copy_rows(cursor, "public.gebruikers", GEBRUIKER_COLUMNS, (entry["gebruiker"] for entry in batch))
+            copy_rows(cursor, "public.gebruiker_rollen", ROL_COLUMNS, (entry["rol"] for entry in batch))
+            copy_rows(cursor, "public.verhuurders", VERHUURDER_COLUMNS, (entry["verhuurder"] for entry in batch))
+            copy_rows(cursor, "public.woningen", WONING_COLUMNS, (woning for entry in batch for woning in entry["woningen"]))
+    total = max(0, last - start + 1)
+    return total / max(time.perf_counter() - started, 1e-9)
@@ -0,0 +1,229 @@
+"""Concurrent virtual-user load generator.
+
+A load run mixes a few real browser contexts (full rendering cost of the
+Vite frontend) with many lightweight HTTP users that replay the same
+login → profile edit → upload journey directly against Supabase through
+Playwright's ``APIRequestContext``. Users are started evenly over the ramp-up
+window and repeat their journey until the run ends; every step's latency is
+recorded so the summary can report p50/p95/p99 and throughput per step.
+"""
+import asyncio
+import json
+import struct
+import time
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from harness import config
+from harness.auth_state import credentials
+
+
+@dataclass
+class LoadProfile:
+    http_users: int = 100
+    browser_users: int = 3
+    ramp_up_s: float = 30.0
+    duration_s: float = 60.0
+    role: str = "huurder"
+    upload: bool = True
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+@dataclass
+class StepStats:
+    latencies_ms: list = field(default_factory=list)
+    errors: int = 0
+    last_error: str = ""
+
+    def summary(self, elapsed_s):
+        ordered = sorted(self.latencies_ms)
+        count = len(ordered) + self.errors
+        return {
+            "count": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "throughput_per_s": len(ordered) / elapsed_s if elapsed_s else 0.0,
+            "p50_ms": percentile(ordered, 50),
+            "p95_ms": percentile(ordered, 95),
+            "p99_ms": percentile(ordered, 99),
+            "max_ms": ordered[-1] if ordered else 0.0,
+            "last_error": self.last_error,
+        }
+
+
+class LoadRun:
+    """Collects per-step samples from every virtual user of one run."""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.steps = {}
+        self.journeys = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @asynccontextmanager
+    async def step(self, name):
+        stats = self.steps.setdefault(name, StepStats())
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as exc:
+            stats.errors += 1
+            stats.last_error = f"{type(exc).__name__}: {exc}"[:300]
+            raise
+        stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    @property
+    def elapsed_s(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self):
+        elapsed_s = self.elapsed_s
+        return {
+            "profile": asdict(self.profile),
+            "elapsed_s": elapsed_s,
+            "journeys": self.journeys,
+            "journeys_per_s": self.journeys / elapsed_s if elapsed_s else 0.0,
+            "steps": {name: stats.summary(elapsed_s) for name, stats in self.steps.items()},
+        }
+
+
+class StepFailed(RuntimeError):
+    pass
+
+
+def tiny_png(width=64, height=64):
+    """A valid grey PNG, generated so the upload step needs no fixture file."""
+    raw = b"".join(b"\x00" + b"\x80" * width for _ in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+async def _expect_ok(response, step):
+    if not response.ok:
+        body = (await response.text())[:200]
+        raise StepFailed(f"{step}: HTTP {response.status} {body}")
+    return response
+
+
+async def http_journey(run, api, email, password):
+    """login → profile load → profile edit → photo upload, straight against Supabase."""
+    async with run.step("http:login"):
+        response = await _expect_ok(await api.post(
+            "auth/v1/token?grant_type=password", data={"email": email, "password": password}
+        ), "login")
+        session = await response.json()
+    user_id = session["user"]["id"]
+    authorized = {"Authorization": f"Bearer {session['access_token']}"}
+
+    async with run.step("http:profile_load"):
+        await _expect_ok(await api.get(f"rest/v1/huurders?id=eq.{user_id}&select=*", headers=authorized), "profile_load")
+
+    async with run.step("http:profile_edit"):
+        await _expect_ok(await api.patch(
+            f"rest/v1/huurders?id=eq.{user_id}",
+            headers={**authorized, "Prefer": "return=minimal"},
+            data={"bijgewerkt_op": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+        ), "profile_edit")
+
+    if run.profile.upload:
+        async with run.step("http:upload"):
+            await _expect_ok(await api.post("functions/v1/cloudflare-r2-upload", headers=authorized, multipart={
+                "file": {"name": "loadtest.png", "mimeType": "image/png", "buffer": tiny_png()},
+                "userId": user_id,
+                "folder": "Profile",
+            }), "upload")
+
+
+async def _http_user(run, pool, deadline):
+    email, password = credentials(run.profile.role)
+    api = await pool.playwright.request.new_context(
+        base_url=config.SUPABASE_URL.rstrip("/") + "/",
+        extra_http_headers={"apikey": config.SUPABASE_ANON_KEY},
+    )
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                await http_journey(run, api, email, password)
+            except Exception:
+                # Already counted against the failing step; back off briefly and start a new journey
+                await asyncio.sleep(0.5)
+                continue
+            run.journeys += 1
+    finally:
+        await api.dispose()
+
+
+async def _browser_user(run, pool, deadline, browser_journey):
+    async with pool.context(role=run.profile.role) as context:
+        page = await context.new_page()
+        while time.perf_counter() < deadline:
+            try:
+                await browser_journey(run, page)
+            except Exception:
+                await asyncio.sleep(0.5)
+                continue
+            run.journeys += 1
+
+
+async def run_load(pool, profile, browser_journey=None):
+    """Drive ``profile`` against the app and return the finished ``LoadRun``.
+
+    ``browser_journey(run, page)`` is supplied by the calling TC script, since
+    it depends on that script's selectors; without it only HTTP users run.
+    """
+    run = LoadRun(profile)
+    deadline = run.started + profile.ramp_up_s + profile.duration_s
+    # Interleave browser users evenly among the HTTP users so both kinds see the whole ramp
+    kinds = ["http"] * profile.http_users
+    browser_users = profile.browser_users if browser_journey else 0
+    stride = max(1, profile.http_users // max(1, browser_users))
+    for index in range(browser_users):
+        kinds.insert(min(index * (stride + 1), len(kinds)), "browser")
+    spacing = profile.ramp_up_s / max(1, len(kinds))
+
+    async def start_user(index, kind):
+        await asyncio.sleep(index * spacing)
+        if kind == "browser":
+            await _browser_user(run, pool, deadline, browser_journey)
+        else:
+            await _http_user(run, pool, deadline)
+
+    await asyncio.gather(*(start_user(index, kind) for index, kind in enumerate(kinds)), return_exceptions=True)
+    run.finished = time.perf_counter()
+    return run
+
+
+def format_summary(summary):
+    lines = [
+        f"{summary['journeys']} journeys in {summary['elapsed_s']:.1f}s ({summary['journeys_per_s']:.2f}/s)",
+        f"{'step':<22}{'count':>7}{'err%':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}",
+    ]
+    for name, step in sorted(summary["steps"].items()):
+        lines.append(
+            f"{name:<22}{step['count']:>7}{step['error_rate'] * 100:>6.1f}%{step['throughput_per_s']:>8.2f}"
+            f"{step['p50_ms']:>8.0f}ms{step['p95_ms']:>7.0f}ms{step['p99_ms']:>7.0f}ms"
+        )
+    return "\n".join(lines)
+
+
+def write_summary(summary, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,317 @@
+"""Local Supabase stand-in with the repo's schema and bulk synthetic data.
+
+The hosted project only holds a handful of real accounts, which says nothing
+about how search, dashboards or subscription maintenance behave with a
+production-sized tenant base. This module brings up a local stack, applies
+``supabase/migrations`` and seeds it with 10k–1M tenants generated by
+``harness.datagen``:
+
+* ``TESTSPRITE_DB_URL`` set – use that Postgres (e.g. an already running
+  ``supabase start`` on port 54322) together with ``TESTSPRITE_API_URL``,
+  ``TESTSPRITE_ANON_KEY`` and ``TESTSPRITE_SERVICE_ROLE_KEY``.
+* otherwise – start Postgres, PostgREST and GoTrue with the Supabase CLI in a
+  scratch workdir under ``results/local-supabase``. The CLI is given an empty
+  migrations folder so the migrations are applied here, one transaction per
+  file. The files were written against the hosted schema and are not all in
+  dependency order, so failed files are retried until nothing changes; the
+  few that never apply (the admin row without an ``auth.users`` entry, a
+  table created twice) are reported and skipped instead of aborting the stack.
+
+Usage:
+    python -m harness.local_db up --tenants 100000   # prints the VITE_* env for `npm run dev`
+    python -m harness.local_db down
+
+``run_suite.py --local-db`` does the same before running the TC scripts.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+
+import psycopg
+
+from harness import config, datagen
+from harness.auth_state import ROLES, credentials
+
+logger = logging.getLogger("testsprite.local_db")
+
+MIGRATIONS_DIR = config.REPO_ROOT / "supabase" / "migrations"
+STACK_DIR = config.RESULTS_DIR / "local-supabase"
+STACK_PROJECT_ID = "huurly-testsprite"
+# Services the TC scripts never talk to; skipping them halves the stack's start-up time
+EXCLUDED_SERVICES = "studio,imgproxy,logflare,vector,supavisor"
+
+SEED_TENANTS = int(os.environ.get("TESTSPRITE_SEED_TENANTS", "10000"))
+# Landlords per saved-profiles INSERT ... SELECT generate_series statement, each committed separately
+SEED_CHUNK = int(os.environ.get("TESTSPRITE_SEED_CHUNK", "50000"))
+
+# gebruikers.rol uses 'admin' where the suite says 'beheerder'
+DB_ROLES = {"huurder": "huurder", "verhuurder": "verhuurder", "beoordelaar": "beoordelaar", "beheerder": "admin"}
+SEEDED_TABLES = ("gebruikers", "huurders", "verhuurders", "woningen", "documenten", "abonnementen")
+
+class StackError(RuntimeError):
+    pass
+
+
+@dataclass
+class Stack:
+    db_url: str
+    api_url: str
+    anon_key: str
+    service_role_key: str
+    managed: bool = False
+
+
+def _supabase(*args, check=True):
+    if shutil.which("supabase") is None:
+        raise StackError("Supabase CLI not found; install it or point TESTSPRITE_DB_URL at a running Postgres")
+    return subprocess.run(["supabase", *args, "--workdir", str(STACK_DIR)], check=check, capture_output=True, text=True)
+
+
+def _prepare_workdir():
+    (STACK_DIR / "supabase" / "migrations").mkdir(parents=True, exist_ok=True)
+    source = (config.REPO_ROOT / "supabase" / "config.toml").read_text(encoding="utf-8")
+    # Own project id so the containers never collide with a developer's `supabase start`
+    lines = [f'project_id = "{STACK_PROJECT_ID}"' if line.startswith("project_id") else line for line in source.splitlines()]
+    (STACK_DIR / "supabase" / "config.toml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def start():
+    """Return the stand-in to use, starting one through the Supabase CLI when needed."""
+    if os.environ.get("TESTSPRITE_DB_URL"):
+        return Stack(
+            db_url=os.environ["TESTSPRITE_DB_URL"],
+            api_url=os.environ.get("TESTSPRITE_API_URL", "http://127.0.0.1:54321"),
+            anon_key=os.environ.get("TESTSPRITE_ANON_KEY", ""),
+            service_role_key=os.environ.get("TESTSPRITE_SERVICE_ROLE_KEY", ""),
+        )
+    _prepare_workdir()
+    started = time.perf_counter()
+    # Benchmarks call up() once per size; a stack that is already running is reused as is
+    status = _status()
+    if status is None:
+        result = _supabase("start", "-x", EXCLUDED_SERVICES, check=False)
+        if result.returncode != 0:
+            raise StackError(f"supabase start failed:\n{result.stderr or result.stdout}")
+        status = _status()
+        logger.info("Local Supabase up in %.1fs at %s", time.perf_counter() - started, status["API_URL"])
+    return Stack(status["DB_URL"], status["API_URL"], status["ANON_KEY"], status["SERVICE_ROLE_KEY"], managed=True)
+
+
+def _status():
+    result = _supabase("status", "-o", "env", check=False)
+    if result.returncode != 0:
+        return None
+    status = dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+    return {key: value.strip('"') for key, value in status.items()}
+
+
+def stop():
+    _supabase("stop", "--no-backup", check=False)
+
+
+def connect(stack):
+    return psycopg.connect(stack.db_url, autocommit=True)
+
+
+def _apply(conn, path):
+    try:
+        with conn.transaction():
+            conn.execute(path.read_text(encoding="utf-8"))
+    except psycopg.Error as exc:
+        return str(exc).strip().splitlines()[0]
+    return None
+
+
+def apply_migrations(conn, strict=False):
+    """Apply every migration not applied before; returns ``{file: error}`` for the ones that never applied.
+
+    Files go in name order, but some reference tables created by later files
+    (``create_core_tables`` uses ``gebruiker_rollen`` from the next one), so
+    failed files are retried after each pass until a pass makes no progress.
+    """
+    conn.execute("CREATE SCHEMA IF NOT EXISTS testsprite")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS testsprite.migrations (name text PRIMARY KEY, applied_at timestamptz DEFAULT now(), error text)"
+    )
+    applied = {row[0] for row in conn.execute("SELECT name FROM testsprite.migrations WHERE error IS NULL")}
+    pending = [path for path in sorted(MIGRATIONS_DIR.glob("*.sql")) if path.name not in applied]
+    failures = {}
+    while pending:
+        failures = {}
+        for path in pending:
+            error = _apply(conn, path)
+            if error is not None:
+                failures[path.name] = error
+            conn.execute(
+                "INSERT INTO testsprite.migrations (name, error) VALUES (%s, %s)"
+                " ON CONFLICT (name) DO UPDATE SET applied_at = now(), error = excluded.error",
+                (path.name, error),
+            )
+        if strict and failures:
+            name, error = next(iter(failures.items()))
+            raise StackError(f"Migration {name} failed: {error}")
+        if len(failures) == len(pending):
+            break
+        pending = [path for path in pending if path.name in failures]
+    for name, error in failures.items():
+        logger.warning("Migration %s skipped: %s", name, error)
+    return failures
+
+
+def table_exists(conn, name):
+    return conn.execute("SELECT to_regclass(%s) IS NOT NULL", (f"public.{name}",)).fetchone()[0]
+
+
+def tenant_id_sql(expr):
+    # Deterministic ids so benchmarks and later runs can address the n-th seeded tenant
+    return f"md5('huurder-' || ({expr}))::uuid"
+
+
+def landlord_id_sql(expr):
+    return f"md5('verhuurder-' || ({expr}))::uuid"
+
+
+def _chunks(total):
+    for first in range(1, total + 1, SEED_CHUNK):
+        yield first, min(first + SEED_CHUNK - 1, total)
+
+
+def seeded_count(conn, role):
+    return conn.execute(
+        "SELECT count(*) FROM public.gebruikers WHERE rol = %s AND email LIKE %s",
+        (role, f"%@{datagen.SEED_DOMAIN}"),
+    ).fetchone()[0]
+
+
+def _seed_saved_profiles(conn, first_landlord, landlords, tenants):
+    if not table_exists(conn, "opgeslagen_profielen"):
+        logger.warning("opgeslagen_profielen is not created by the migrations; skipping saved profiles")
+        return
+    for first, last in _chunks(landlords):
+        if last < first_landlord:
+            continue
+        first = max(first, first_landlord)
+        with conn.transaction():
+            conn.execute(f"""
+                INSERT INTO public.opgeslagen_profielen (verhuurder_id, huurder_id)
+                SELECT {landlord_id_sql('l')}, {tenant_id_sql('1 + floor(random() * %(tenants)s)::int')}
+                FROM generate_series(%(first)s, %(last)s) AS l, generate_series(1, 5)""",
+                {"first": first, "last": last, "tenants": tenants})
+
+
+def seed(conn, tenants=None, landlords=None):
+    """Bring the seeded population up to ``tenants`` huurders and ``landlords`` verhuurders.
+
+    Only the missing sequence numbers are generated, so growing a 10k seed to
+    100k keeps the first 10k rows as they are.
+    """
+    tenants = tenants or SEED_TENANTS
+    landlords = landlords or max(1, tenants // 50)
+    have_tenants, have_landlords = seeded_count(conn, "huurder"), seeded_count(conn, "verhuurder")
+    if have_tenants >= tenants and have_landlords >= landlords:
+        return {"tenants": have_tenants, "landlords": have_landlords, "seconds": 0.0}
+    started = time.perf_counter()
+    conn.execute("SELECT setseed(0.42)")
+    # Audit and auto-profile triggers would fire per row and double the work; constraint triggers stay active
+    for table in SEEDED_TABLES:
+        conn.execute(f"ALTER TABLE public.{table} DISABLE TRIGGER USER")
+    try:
+        datagen.load_landlords(conn, landlords, start=have_landlords + 1)
+        rate = datagen.load_tenants(conn, tenants, start=have_tenants + 1)
+        if have_landlords < landlords:
+            _seed_saved_profiles(conn, have_landlords + 1, landlords, tenants)
+    finally:
+        for table in SEEDED_TABLES:
+            conn.execute(f"ALTER TABLE public.{table} ENABLE TRIGGER USER")
+    # The score store is trigger-maintained, so rescore any saved searches for the bulk-loaded tenants
+    if table_exists(conn, "compatibiliteit_scores"):
+        conn.execute("SELECT public.ververs_compatibiliteit_scores()")
+    # Same for the statistics counters
+    if table_exists(conn, "statistiek_tellers"):
+        conn.execute("SELECT public.ververs_statistiek_tellers()")
+    conn.execute("ANALYZE")
+    elapsed = time.perf_counter() - started
+    logger.info("Seeded up to %d tenants (%.0f/s) and %d landlords in %.1fs", tenants, rate, landlords, elapsed)
+    return {"tenants": tenants, "landlords": landlords, "seconds": elapsed}
+
+
+def _admin_request(stack, method, path, payload=None):
+    request = urllib.request.Request(
+        f"{stack.api_url.rstrip('/')}/auth/v1/{path}",
+        data=json.dumps(payload).encode() if payload is not None else None,
+        headers={"apikey": stack.service_role_key, "Authorization": f"Bearer {stack.service_role_key}",
+                 "Content-Type": "application/json"},
+        method=method,
+    )
+    with urllib.request.urlopen(request, timeout=15) as response:
+        return json.load(response)
+
+
+def create_role_accounts(conn, stack):
+    """Create a GoTrue account per suite role so ``auth_state`` can sign in against the stand-in."""
+    for role in ROLES:
+        email, password = credentials(role)
+        # All roles share one account by default; suffix the address so every role gets its own user
+        if sum(credentials(other)[0] == email for other in ROLES) > 1:
+            email = email.replace("@", f"+{role}@")
+            os.environ[f"TESTSPRITE_{role.upper()}_EMAIL"] = email
+        try:
+            user = _admin_request(stack, "POST", "admin/users", {"email": email, "password": password, "email_confirm": True})
+            user_id = user["id"]
+        except urllib.error.HTTPError as exc:
+            if exc.code != 422:
+                raise StackError(f"Creating {email} failed with HTTP {exc.code}") from exc
+            user_id = conn.execute("SELECT id FROM auth.users WHERE email = %s", (email,)).fetchone()[0]
+        conn.execute(
+            "INSERT INTO public.gebruikers (id, email, naam, rol, profiel_compleet) VALUES (%s, %s, %s, %s, true)"
+            " ON CONFLICT (id) DO NOTHING",
+            (user_id, email, f"Test {role}", DB_ROLES[role]),
+        )
+        conn.execute("INSERT INTO public.gebruiker_rollen (user_id, role) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                     (user_id, DB_ROLES[role]))
+
+
+def use(stack):
+    """Point this process, its workers and a Vite dev server started from it at ``stack``."""
+    os.environ["VITE_SUPABASE_URL"] = config.SUPABASE_URL = stack.api_url
+    os.environ["VITE_SUPABASE_ANON_KEY"] = config.SUPABASE_ANON_KEY = stack.anon_key
+
+
+def up(tenants=None, strict=False):
+    """Start (or reuse) the stand-in, migrate and seed it, and point the suite at it."""
+    stack = start()
+    with connect(stack) as conn:
+        apply_migrations(conn, strict=strict)
+        seed(conn, tenants)
+        if stack.service_role_key:
+            create_role_accounts(conn, stack)
+    use(stack)
+    return stack
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("up", "down"))
+    parser.add_argument("-n", "--tenants", type=int, default=SEED_TENANTS, help="tenant profiles to seed")
+    parser.add_argument("--strict", action="store_true", help="stop at the first migration that fails")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+    if args.command == "down":
+        stop()
+        return 0
+    stack = up(args.tenants, strict=args.strict)
+    print(f"VITE_SUPABASE_URL={stack.api_url}")
+    print(f"VITE_SUPABASE_ANON_KEY={stack.anon_key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
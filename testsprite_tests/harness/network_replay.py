@@ -0,0 +1,186 @@
+"""Record and replay Supabase and R2 traffic through Playwright routing.
+
+``TESTSPRITE_NETWORK`` selects the mode:
+
+* ``live`` (default) – requests go to the real backends untouched.
+* ``record`` – every Supabase REST/RPC/auth/edge-function/storage and R2
+  request is forwarded with ``route.fetch()`` and its response saved to
+  ``recordings/<TC>.json`` (a HAR-like list of entries).
+* ``replay`` – the same requests are answered from the recording without any
+  network access, after an injected latency. Unknown requests get a 504 so a
+  missing recording shows up as a test failure rather than a hang.
+
+Requests are matched on method, path and query. When several recorded
+responses share a key, they are served in recorded order; an identical
+request body is preferred so repeated RPC calls with different arguments
+replay correctly. The Vite frontend itself is never intercepted, which makes
+replay mode a way to benchmark the frontend on its own.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+import weakref
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from harness import config
+from harness.tracing import current_test_id
+
+logger = logging.getLogger("testsprite.network")
+
+MODE = os.environ.get("TESTSPRITE_NETWORK", "live")
+RECORDINGS_DIR = Path(os.environ.get("TESTSPRITE_RECORDINGS_DIR", config.TESTS_DIR / "recordings"))
+# Replay latency: a fixed number of milliseconds, or "recorded" to reproduce the original timings
+REPLAY_LATENCY = os.environ.get("TESTSPRITE_REPLAY_LATENCY_MS", "0")
+REPLAY_JITTER_MS = float(os.environ.get("TESTSPRITE_REPLAY_JITTER_MS", "0"))
+
+BACKEND_URL_RE = re.compile(
+    r"^https?://([^/]+\.supabase\.co|[^/]+\.r2\.cloudflarestorage\.com|beelden\.huurly\.nl|documents\.huurly\.nl)/"
+)
+# Query parameters that change on every run and must not take part in matching
+VOLATILE_PARAMS = {"t", "timestamp", "_", "X-Amz-Date", "X-Amz-Signature", "X-Amz-Credential", "X-Amz-Expires"}
+
+_stores = {}
+_installed = weakref.WeakKeyDictionary()
+
+
+def _backend_pattern():
+    # A local stand-in (see VITE_SUPABASE_URL) is recorded alongside the hosted services
+    if config.SUPABASE_URL:
+        local = re.escape(config.SUPABASE_URL.rstrip("/")) + "/"
+        return re.compile(f"{BACKEND_URL_RE.pattern}|^{local}")
+    return BACKEND_URL_RE
+
+
+def request_key(method, url):
+    parsed = urlparse(url)
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k not in VOLATILE_PARAMS)
+    return f"{method} {parsed.netloc}{parsed.path}?{urlencode(query)}"
+
+
+def body_hash(body):
+    return hashlib.sha1(body).hexdigest() if body else ""
+
+
+class RecordingStore:
+    """Recorded exchanges of one TC, keyed by ``request_key``."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = []
+        self._cursor = {}
+
+    @classmethod
+    def load(cls, path):
+        store = cls(path)
+        try:
+            store.entries = json.loads(store.path.read_text(encoding="utf-8"))["log"]["entries"]
+        except (OSError, ValueError, KeyError):
+            logger.warning("No recording at %s, every backend request will fail in replay mode", path)
+        return store
+
+    def add(self, method, url, request_body, status, headers, body, elapsed_ms):
+        self.entries.append({
+            "request": {"method": method, "url": url, "key": request_key(method, url), "bodyHash": body_hash(request_body)},
+            "response": {"status": status, "headers": headers, "body": base64.b64encode(body).decode()},
+            "time": elapsed_ms,
+        })
+
+    def match(self, method, url, request_body):
+        key = request_key(method, url)
+        candidates = [entry for entry in self.entries if entry["request"]["key"] == key]
+        if not candidates:
+            return None
+        wanted = body_hash(request_body)
+        exact = [entry for entry in candidates if entry["request"]["bodyHash"] == wanted]
+        pool = exact or candidates
+        # Serve repeated calls in recorded order and keep returning the last response once exhausted
+        cursor_key = (key, wanted if exact else None)
+        index = self._cursor.get(cursor_key, 0)
+        self._cursor[cursor_key] = index + 1
+        return pool[min(index, len(pool) - 1)]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"log": {"version": "1.2", "entries": self.entries}}), encoding="utf-8")
+
+
+def _store_for_current_test():
+    test_id = current_test_id()
+    if test_id not in _stores:
+        path = RECORDINGS_DIR / f"{test_id}.json"
+        _stores[test_id] = RecordingStore.load(path) if MODE == "replay" else RecordingStore(path)
+    return _stores[test_id]
+
+
+async def _replay_delay(entry):
+    if REPLAY_LATENCY == "recorded":
+        delay_ms = entry["time"]
+    else:
+        delay_ms = float(REPLAY_LATENCY)
+    delay_ms += random.uniform(0, REPLAY_JITTER_MS)
+    if delay_ms > 0:
+        await asyncio.sleep(delay_ms / 1000)
+
+
+def _recording_handler(store):
+    async def handle(route):
+        request = route.request
+        started = time.perf_counter()
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception as exc:
+            logger.warning("record: %s %s failed: %s", request.method, request.url, exc)
+            await route.abort()
+            return
+        store.add(
+            request.method, request.url, request.post_data_buffer, response.status,
+            response.headers, body, (time.perf_counter() - started) * 1000,
+        )
+        await route.fulfill(response=response, body=body)
+    return handle
+
+
+def _replay_handler(store):
+    async def handle(route):
+        request = route.request
+        entry = store.match(request.method, request.url, request.post_data_buffer)
+        if entry is None:
+            logger.warning("replay: no recording for %s %s", request.method, request.url)
+            await route.fulfill(status=504, content_type="application/json",
+                                body=json.dumps({"message": "Not recorded", "url": request.url}))
+            return
+        await _replay_delay(entry)
+        response = entry["response"]
+        await route.fulfill(status=response["status"], headers=response["headers"],
+                            body=base64.b64decode(response["body"]))
+    return handle
+
+
+async def install(context, mode=None):
+    """Route backend traffic of ``context`` according to ``mode`` (defaults to ``TESTSPRITE_NETWORK``)."""
+    mode = mode or MODE
+    if mode == "live":
+        return None
+    if mode not in ("record", "replay"):
+        raise ValueError(f"TESTSPRITE_NETWORK must be live, record or replay, not {mode!r}")
+    store = _store_for_current_test()
+    handler = _recording_handler(store) if mode == "record" else _replay_handler(store)
+    await context.route(_backend_pattern(), handler)
+    _installed[context] = store
+    return store
+
+
+def finish(context):
+    """Persist the recording of ``context``'s test; called when the context closes."""
+    # Close handlers run outside the test's task, so the store is looked up by context, not by current_test
+    store = _installed.pop(context, None)
+    if store is not None and MODE == "record":
+        store.save()
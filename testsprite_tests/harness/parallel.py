@@ -0,0 +1,64 @@
+"""Shard TC scripts across worker processes, each with its own browser pool."""
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+from harness.suite import TestResult, run_cases
+
+
+def load_durations(results_path):
+    """Per-test durations from a previous run's results JSON, used to balance shards."""
+    try:
+        with open(results_path, encoding="utf-8") as handle:
+            return {item["test_id"]: item["duration_s"] for item in json.load(handle)["results"]}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def shard(cases, workers, durations=None):
+    """Split ``cases`` into ``workers`` shards, longest tests first onto the least loaded shard.
+
+    Without historical durations every test weighs the same, which degrades to round-robin.
+    """
+    durations = durations or {}
+    shards = [[] for _ in range(max(1, min(workers, len(cases))))]
+    loads = [0.0] * len(shards)
+    for case in sorted(cases, key=lambda c: durations.get(c.test_id, 1.0), reverse=True):
+        target = loads.index(min(loads))
+        shards[target].append(case)
+        loads[target] += durations.get(case.test_id, 1.0)
+    return shards
+
+
+def _run_shard(cases, contexts_per_worker):
+    # Runs in a worker process: one event loop, one browser, N concurrent contexts
+    results = asyncio.run(run_cases(cases, concurrency=contexts_per_worker))
+    return [asdict(result) for result in results]
+
+
+def run_sharded(cases, workers, contexts_per_worker=1, durations=None):
+    """Run ``cases`` across ``workers`` processes and merge the results back into discovery order."""
+    shards = shard(cases, workers, durations)
+    if len(shards) == 1:
+        return asyncio.run(run_cases(shards[0], concurrency=contexts_per_worker))
+
+    merged = {}
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [executor.submit(_run_shard, cases_in_shard, contexts_per_worker) for cases_in_shard in shards]
+        for cases_in_shard, future in zip(shards, futures):
+            try:
+                for item in future.result():
+                    merged[item["test_id"]] = TestResult(**item)
+            except Exception as exc:
+                # A crashed worker (e.g. the browser died) must not hide the other shards' results
+                for case in cases_in_shard:
+                    merged[case.test_id] = TestResult(
+                        test_id=case.test_id,
+                        name=case.name,
+                        path=case.path.name,
+                        status="error",
+                        duration_s=0.0,
+                        error=f"Worker process failed: {exc!r}",
+                    )
+    return [merged[case.test_id] for case in cases]
@@ -0,0 +1,74 @@
+"""Effectiveness of the app's shared query cache (``src/lib/queryCache.ts``).
+
+The services cache their reads per method and arguments, serve results
+stale while they revalidate, and share one request between concurrent
+identical calls. The app exposes the counters as
+``window.__huurlyQueryCache``; this module reads them so a TC can assert
+that going back and forth between dashboard and modals is served from the
+cache instead of refetching.
+
+Minimum hit ratios per TC live under ``caches`` in
+``testsprite_perf_budgets.json``. A hit is a fresh hit, a stale hit or a call
+that joined an identical request in flight; every measurement is appended
+to ``results/perf-trend.jsonl``.
+"""
+from harness.budgets import load_budgets, record_trend
+from harness.tracing import current_test_id
+from harness.waits import ready
+
+STATS_JS = "() => window.__huurlyQueryCache ? window.__huurlyQueryCache.stats() : null"
+RESET_JS = "() => window.__huurlyQueryCache && window.__huurlyQueryCache.resetStats()"
+
+# Client-side navigation through React Router keeps the JavaScript heap (and with it the cache),
+# unlike page.goto, which reloads the app
+NAVIGATE_JS = """
+(path) => {
+  window.history.pushState({}, '', path);
+  window.dispatchEvent(new PopStateEvent('popstate', { state: {} }));
+}
+"""
+
+
+async def cache_stats(page):
+    """Current counters, or None when the app does not expose the cache."""
+    return await page.evaluate(STATS_JS)
+
+
+async def reset_cache_stats(page):
+    await page.evaluate(RESET_JS)
+
+
+def hit_ratio(stats):
+    served = stats["hits"] + stats["staleHits"] + stats["deduplicated"]
+    total = served + stats["misses"]
+    return served / total if total else None
+
+
+async def revisit(page, times=3, away="/"):
+    """Leave the current route for ``away`` and come back ``times`` times without reloading."""
+    path = await page.evaluate("() => window.location.pathname")
+    for _ in range(times):
+        await page.evaluate(NAVIGATE_JS, away)
+        await ready(page)
+        await page.evaluate(NAVIGATE_JS, path)
+        await ready(page)
+
+
+async def assert_cache_effective(page, budgets=None):
+    """Fail when fewer reads than the TC's ``min_hit_ratio`` were served from the query cache."""
+    test_id = current_test_id()
+    limits = (budgets or load_budgets()).get("caches", {}).get(test_id, {})
+    stats = await cache_stats(page)
+    assert stats is not None, "window.__huurlyQueryCache is not available; is the app built from this tree?"
+    ratio = hit_ratio(stats)
+    metrics = {key: stats[key] for key in ("hits", "staleHits", "misses", "deduplicated", "revalidations", "invalidations")}
+    metrics["hit_ratio"] = ratio
+    failed = []
+    minimum = limits.get("min_hit_ratio")
+    if minimum is not None and (ratio is None or ratio < minimum):
+        failed.append(f"hit_ratio {0 if ratio is None else ratio:.2f} < {minimum}")
+    record_trend("cache", test_id, metrics, limits, failed)
+    misses = sorted(((q, c["misses"]) for q, c in stats["byQuery"].items() if c["misses"]), key=lambda item: -item[1])
+    assert not failed, (f"Query cache less effective than budgeted for {test_id}: " + ", ".join(failed)
+                        + "; misses: " + ", ".join(f"{query} ×{n}" for query, n in misses))
+    return stats
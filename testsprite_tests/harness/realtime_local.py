@@ -0,0 +1,297 @@
+"""Local stand-in for Supabase Realtime ``postgres_changes``.
+
+Speaks enough of the Phoenix channel protocol that ``@supabase/realtime-js``
+uses – ``phx_join`` with a ``postgres_changes`` config, ``heartbeat``,
+``phx_leave`` and the ``postgres_changes`` push – over a minimal RFC 6455
+WebSocket server (``/realtime/v1/websocket``). Rows are inserted with
+``POST /rest/v1/<table>`` (one object or an array, like PostgREST) on the same
+port; every insert is pushed to each channel binding whose table and
+``column=eq.value`` filter match, like Realtime does after the commit.
+
+Each connection has a bounded send queue. A client that does not read fast
+enough loses the pushes that do not fit (counted as ``dropped``) instead of
+slowing down the fan-out to everyone else.
+
+Usage:
+    with LocalRealtime() as realtime:
+        ...  # realtime.ws_url, realtime.rest_url, realtime.stats
+    python -m harness.realtime_local --port 4000   # serve until interrupted
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+WS_PATH = "/realtime/v1/websocket"
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+SEND_QUEUE = 1000
+
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+# -- WebSocket framing (shared with the benchmark clients) ------------------------------------
+
+
+def encode_frame(payload, opcode=OP_TEXT, mask=False):
+    """One final frame; clients must mask what they send, servers must not."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack(">H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack(">Q", length)
+    if not mask:
+        return bytes(header) + payload
+    key = os.urandom(4)
+    return bytes(header) + key + bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+
+
+async def read_frame(reader):
+    """``(opcode, payload)`` of the next message; continuation frames are joined."""
+    chunks, message_opcode = [], None
+    while True:
+        first, second = await reader.readexactly(2)
+        opcode, final = first & 0x0F, first & 0x80
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack(">H", await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack(">Q", await reader.readexactly(8))
+        key = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if key:
+            payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        if opcode >= OP_CLOSE:
+            # Control frames may arrive between the fragments of a message
+            return opcode, payload
+        if message_opcode is None:
+            message_opcode = opcode
+        chunks.append(payload)
+        if final:
+            return message_opcode, b"".join(chunks)
+
+
+def accept_key(client_key):
+    return base64.b64encode(hashlib.sha1(client_key.encode() + WS_GUID).digest()).decode()
+
+
+def matches(binding, table, row):
+    """Whether an insert into ``table`` passes a ``postgres_changes`` binding and its ``col=eq.value`` filter."""
+    if binding.get("table") not in (table, "*") or binding.get("event", "*") not in ("*", "INSERT"):
+        return False
+    column, _, condition = (binding.get("filter") or "").partition("=")
+    if not column:
+        return True
+    operator, _, value = condition.partition(".")
+    return operator == "eq" and str(row.get(column)) == value
+
+
+# -- server ---------------------------------------------------------------------------------------
+
+
+class Connection:
+    def __init__(self, writer, limit):
+        self.writer = writer
+        self.queue = asyncio.Queue(limit)
+        # topic -> [(binding id, binding)]
+        self.channels = {}
+
+
+class LocalRealtime:
+    """Realtime and PostgREST-insert stand-in on ``127.0.0.1``; use as a context manager."""
+
+    def __init__(self, port=0, send_queue=SEND_QUEUE):
+        self.port = port
+        self.send_queue = send_queue
+        self.rows = defaultdict(list)
+        self.stats = Counter()
+        self.connections = set()
+        self._binding_ids = itertools.count(1)
+        self._loop = None
+        self._server = None
+        self._stopping = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def ws_url(self):
+        return f"ws://127.0.0.1:{self.port}{WS_PATH}"
+
+    @property
+    def rest_url(self):
+        return f"http://127.0.0.1:{self.port}/rest/v1"
+
+    def reset(self):
+        self.rows.clear()
+        self.stats.clear()
+
+    # -- HTTP ------------------------------------------------------------------------------------
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode().split()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                return
+            method, path = request_line[0], request_line[1].split("?")[0]
+            if headers.get("upgrade", "").lower() == "websocket" and path == WS_PATH:
+                await self._websocket(reader, writer, headers)
+            elif method == "POST" and path.startswith("/rest/v1/"):
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                await self._insert(writer, path.rsplit("/", 1)[-1], json.loads(body or b"[]"))
+            else:
+                self._respond(writer, 404, b'{"error":"not found"}')
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, writer, status, body):
+        writer.write(f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+
+    async def _insert(self, writer, table, payload):
+        rows = payload if isinstance(payload, list) else [payload]
+        committed_at = time.time()
+        inserted = [{"id": str(uuid.uuid4()), "aangemaakt_op": committed_at, **row} for row in rows]
+        self.rows[table].extend(inserted)
+        self.stats["inserted"] += len(inserted)
+        for row in inserted:
+            self._fan_out(table, row, committed_at)
+        self._respond(writer, 201, json.dumps(inserted).encode())
+        await writer.drain()
+
+    def _fan_out(self, table, row, committed_at):
+        for connection in self.connections:
+            for topic, bindings in connection.channels.items():
+                ids = [binding_id for binding_id, binding in bindings if matches(binding, table, row)]
+                if not ids:
+                    continue
+                message = {"topic": topic, "event": "postgres_changes", "ref": None, "payload": {
+                    "ids": ids,
+                    "data": {"schema": "public", "table": table, "type": "INSERT", "eventType": "INSERT",
+                             "commit_timestamp": committed_at, "new": row, "old": {}, "errors": None},
+                }}
+                try:
+                    connection.queue.put_nowait(encode_frame(json.dumps(message)))
+                    self.stats["pushed"] += 1
+                except asyncio.QueueFull:
+                    self.stats["dropped"] += 1
+
+    # -- WebSocket --------------------------------------------------------------------------------
+
+    async def _websocket(self, reader, writer, headers):
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept_key(headers['sec-websocket-key'])}\r\n\r\n").encode())
+        connection = Connection(writer, self.send_queue)
+        self.connections.add(connection)
+        self.stats["connections"] += 1
+        sender = asyncio.ensure_future(self._send(connection))
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == OP_CLOSE:
+                    break
+                if opcode == OP_PING:
+                    connection.queue.put_nowait(encode_frame(payload, OP_PONG))
+                elif opcode == OP_TEXT:
+                    self._message(connection, json.loads(payload))
+        finally:
+            self.connections.discard(connection)
+            sender.cancel()
+
+    async def _send(self, connection):
+        while True:
+            frame = await connection.queue.get()
+            connection.writer.write(frame)
+            await connection.writer.drain()
+
+    def _reply(self, connection, message, response=None):
+        reply = {"topic": message["topic"], "event": "phx_reply", "ref": message.get("ref"),
+                 "join_ref": message.get("join_ref"), "payload": {"status": "ok", "response": response or {}}}
+        connection.queue.put_nowait(encode_frame(json.dumps(reply)))
+
+    def _message(self, connection, message):
+        event, topic = message.get("event"), message.get("topic")
+        self.stats[f"event:{event}"] += 1
+        if event == "phx_join":
+            bindings = (message.get("payload", {}).get("config", {}) or {}).get("postgres_changes", [])
+            connection.channels[topic] = [(next(self._binding_ids), binding) for binding in bindings]
+            self.stats["channels"] += 1
+            self._reply(connection, message, {"postgres_changes": [
+                {"id": binding_id, **binding} for binding_id, binding in connection.channels[topic]
+            ]})
+        elif event == "phx_leave":
+            connection.channels.pop(topic, None)
+            self._reply(connection, message)
+        elif event == "heartbeat":
+            self._reply(connection, message)
+
+    # -- lifecycle -------------------------------------------------------------------------------
+
+    async def _serve(self):
+        self._stopping = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._stopping.wait()
+        # Closed sockets end every connection handler
+        self._server.close()
+        for connection in list(self.connections):
+            connection.writer.close()
+        await asyncio.sleep(0.1)
+
+    def start(self):
+        loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=loop.run_until_complete, args=(self._serve(),), name="local-realtime", daemon=True)
+        self._loop = loop
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self):
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+            self._thread.join(5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--send-queue", type=int, default=SEND_QUEUE, help="pushes buffered per connection")
+    args = parser.parse_args(argv)
+    realtime = LocalRealtime(args.port, args.send_queue)
+    print(f"Realtime stand-in on {realtime.ws_url}, inserts via {realtime.rest_url}/<table>")
+    try:
+        asyncio.run(realtime._serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
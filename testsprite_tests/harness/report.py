@@ -0,0 +1,152 @@
+"""Merged run output: a results JSON plus a Markdown report in the TestSprite MCP layout."""
+import json
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import date
+from pathlib import Path
+
+PROJECT_NAME = "Huurly_1.0"
+PROJECT_VERSION = "1.0.0"
+
+# Requirement each TC script validates, used to group the report like testsprite-mcp-test-report.md
+REQUIREMENTS = OrderedDict([
+    ("User Registration", {
+        "description": "Tenants can register through the multi-step signup form with validated input.",
+        "tests": ["TC001", "TC002"],
+    }),
+    ("Tenant Profile & Documents", {
+        "description": "Tenant profile creation requires verification documents and validates uploaded files.",
+        "tests": ["TC003", "TC012"],
+    }),
+    ("Landlord Tenant Search & Invitations", {
+        "description": "Landlords search verified tenants with filters and invite them to viewings.",
+        "tests": ["TC004", "TC005"],
+    }),
+    ("Document Verification", {
+        "description": "Reviewers approve or reject uploaded tenant documents.",
+        "tests": ["TC006"],
+    }),
+    ("Subscription Payments", {
+        "description": "Tenants pay for their subscription through Stripe and see the updated status.",
+        "tests": ["TC007"],
+    }),
+    ("Access Control & Session Security", {
+        "description": "Role-based routes and JWT sessions deny access to unauthorised users.",
+        "tests": ["TC008", "TC014"],
+    }),
+    ("Admin User Management", {
+        "description": "Administrators manage users and roles from the admin dashboard.",
+        "tests": ["TC009"],
+    }),
+    ("Mobile & Localization", {
+        "description": "The UI is responsive on mobile viewports and fully localized in Dutch.",
+        "tests": ["TC010"],
+    }),
+    ("Notifications", {
+        "description": "Users receive real-time notifications and can manage their preferences.",
+        "tests": ["TC011"],
+    }),
+    ("Performance", {
+        "description": "Core flows stay responsive under concurrent load.",
+        "tests": ["TC013"],
+    }),
+    ("Property Management", {
+        "description": "Landlords create, update and delete their property listings.",
+        "tests": ["TC015"],
+    }),
+])
+
+STATUS_LABELS = {"passed": "✅ Passed", "failed": "❌ Failed", "error": "❌ Failed"}
+
+
+def group_by_requirement(results):
+    by_id = {result.test_id: result for result in results}
+    groups = OrderedDict()
+    for requirement, spec in REQUIREMENTS.items():
+        matched = [by_id.pop(test_id) for test_id in spec["tests"] if test_id in by_id]
+        if matched:
+            groups[requirement] = (spec["description"], matched)
+    # Scripts added after this table was written still show up under their own name
+    for result in by_id.values():
+        groups[result.name] = ("", [result])
+    return groups
+
+
+def render_markdown(results, run_info=None):
+    run_info = run_info or {}
+    groups = group_by_requirement(results)
+    lines = [
+        "# TestSprite AI Testing Report(MCP)",
+        "",
+        "---",
+        "",
+        "## 1️⃣ Document Metadata",
+        f"- **Project Name:** {PROJECT_NAME}",
+        f"- **Version:** {PROJECT_VERSION}",
+        f"- **Date:** {run_info.get('date', date.today().isoformat())}",
+        "- **Prepared by:** testsprite_tests/run_suite.py",
+    ]
+    if "workers" in run_info:
+        lines.append(
+            f"- **Execution:** {run_info['workers']} worker(s) × {run_info['contexts_per_worker']} context(s), "
+            f"{run_info['wall_clock_s']:.1f}s wall clock"
+        )
+    lines += ["", "---", "", "## 2️⃣ Requirement Validation Summary", ""]
+
+    for requirement, (description, group) in groups.items():
+        lines.append(f"### Requirement: {requirement}")
+        if description:
+            lines.append(f"- **Description:** {description}")
+        lines.append("")
+        for index, result in enumerate(group, start=1):
+            lines += [
+                f"#### Test {index}",
+                f"- **Test ID:** {result.test_id}",
+                f"- **Test Name:** {result.name}",
+                f"- **Test Code:** [{result.path}](./{result.path})",
+            ]
+            if result.error:
+                lines.append(f"- **Test Error:** {result.error.strip().splitlines()[-1]}")
+            lines += [
+                f"- **Duration:** {result.duration_s:.1f}s",
+                f"- **Status:** {STATUS_LABELS[result.status]}",
+                f"- **Severity:** {'Low' if result.passed else 'High'}",
+                "",
+                "---",
+                "",
+            ]
+
+    total = len(results)
+    passed = sum(result.passed for result in results)
+    passed_pct = round(100 * passed / total) if total else 0
+    lines += [
+        "## 3️⃣ Coverage & Matching Metrics",
+        "",
+        f"- **{passed_pct}% of tests passed**",
+        "",
+        "| Requirement                    | Total Tests | ✅ Passed | ⚠️ Partial | ❌ Failed |",
+        "|--------------------------------|-------------|-----------|-------------|------------|",
+    ]
+    for requirement, (_, group) in groups.items():
+        group_passed = sum(result.passed for result in group)
+        lines.append(
+            f"| {requirement:<30} | {len(group):<11} | {group_passed:<9} | {0:<11} | {len(group) - group_passed:<10} |"
+        )
+
+    failed = [result for result in results if not result.passed]
+    lines += ["", "---", "", "## 4️⃣ Summary", ""]
+    if failed:
+        lines.append(f"{len(failed)} of {total} tests failed: " + ", ".join(result.test_id for result in failed) + ".")
+    else:
+        lines.append(f"All {total} tests passed.")
+    return "\n".join(lines) + "\n"
+
+
+def write_outputs(results, output_dir, run_info=None):
+    """Write ``results.json`` (machine-readable, reused for shard balancing) and ``report.md``."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    payload = {"run": run_info or {}, "results": [asdict(result) for result in results]}
+    (output_dir / "results.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    (output_dir / "report.md").write_text(render_markdown(results, run_info), encoding="utf-8")
+    return output_dir / "report.md"
@@ -0,0 +1,127 @@
+"""Main-thread responsiveness while the app does heavy work, such as a photo upload.
+
+Photos are resized in a Web Worker (``src/workers/imageResize.worker.ts``),
+so typing in the profile form must stay smooth while a 12 MP image is
+decoded, resized and uploaded. ``measure_input_latency`` runs an action and
+keeps typing into a form field until it finishes. Meanwhile the page records:
+
+* Event Timing entries (every input that took 16 ms or more from the key
+  press to the next paint) and their input delay,
+* long tasks (main-thread work of more than 50 ms),
+* how late a 50 ms heartbeat timer fires.
+
+It also times each key press as Playwright sees it. Limits per TC live under
+``interactions`` in ``testsprite_perf_budgets.json``, and every measurement
+is appended to ``results/perf-trend.jsonl``.
+"""
+import asyncio
+import time
+
+from harness.budgets import load_budgets, record_trend, violations
+from harness.tracing import current_test_id
+
+HEARTBEAT_MS = 50
+KEY_INTERVAL_MS = 100
+
+START_JS = """
+(heartbeatMs) => {
+  const state = { events: [], longTasks: [], maxLag: 0, observers: [], timer: null };
+  const supported = PerformanceObserver.supportedEntryTypes || [];
+  if (supported.includes('event')) {
+    const observer = new PerformanceObserver(list => {
+      for (const entry of list.getEntries()) {
+        state.events.push({ duration: entry.duration, inputDelay: entry.processingStart - entry.startTime });
+      }
+    });
+    observer.observe({ type: 'event', durationThreshold: 16 });
+    state.observers.push(observer);
+  }
+  if (supported.includes('longtask')) {
+    const observer = new PerformanceObserver(list => {
+      for (const entry of list.getEntries()) state.longTasks.push(entry.duration);
+    });
+    observer.observe({ type: 'longtask' });
+    state.observers.push(observer);
+  }
+  let last = performance.now();
+  state.timer = setInterval(() => {
+    const now = performance.now();
+    state.maxLag = Math.max(state.maxLag, now - last - heartbeatMs);
+    last = now;
+  }, heartbeatMs);
+  window.__huurlyResponsiveness = state;
+  return { eventTiming: supported.includes('event'), longTasks: supported.includes('longtask') };
+}
+"""
+
+STOP_JS = """
+() => {
+  const state = window.__huurlyResponsiveness;
+  if (!state) return null;
+  clearInterval(state.timer);
+  for (const observer of state.observers) observer.disconnect();
+  delete window.__huurlyResponsiveness;
+  const max = values => values.length ? Math.max(...values) : 0;
+  return {
+    events: state.events.length,
+    max_event_ms: max(state.events.map(event => event.duration)),
+    max_input_delay_ms: max(state.events.map(event => event.inputDelay)),
+    long_tasks: state.longTasks.length,
+    max_long_task_ms: max(state.longTasks),
+    long_task_total_ms: state.longTasks.reduce((sum, duration) => sum + duration, 0),
+    max_heartbeat_lag_ms: Math.max(0, state.maxLag),
+  };
+}
+"""
+
+
+async def measure_input_latency(page, during, probe):
+    """Await ``during()`` while typing into the ``probe`` locator; returns the worst latencies seen.
+
+    The probe keeps its original value afterwards.
+    """
+    original = await probe.input_value()
+    await page.evaluate(START_JS, HEARTBEAT_MS)
+    task = asyncio.ensure_future(during())
+    key_presses = []
+    try:
+        await probe.focus()
+        while not task.done():
+            started = time.perf_counter()
+            await probe.press("End")
+            await probe.press("a")
+            key_presses.append((time.perf_counter() - started) * 1000 / 2)
+            await asyncio.wait([task], timeout=KEY_INTERVAL_MS / 1000)
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+        metrics = await page.evaluate(STOP_JS) or {}
+    await probe.fill(original)
+    metrics["key_presses"] = len(key_presses)
+    metrics["max_key_press_ms"] = max(key_presses, default=0)
+    return metrics
+
+
+def worst(samples):
+    """Per metric the worst of several measurements, e.g. of every virtual user in a load test."""
+    merged = {}
+    for sample in samples:
+        for name, value in sample.items():
+            merged[name] = max(merged.get(name, value), value)
+    return merged
+
+
+def check_input_latency(metrics, budgets=None, target="upload"):
+    """Record ``metrics`` against the TC's ``interactions`` limits and return the violations."""
+    test_id = current_test_id()
+    limits = (budgets or load_budgets()).get("interactions", {}).get(test_id, {})
+    failed = violations(metrics, limits)
+    record_trend("input", f"{test_id}:{target}", metrics, limits, failed)
+    return failed
+
+
+def assert_input_latency(metrics, budgets=None, target="upload"):
+    failed = check_input_latency(metrics, budgets, target)
+    assert not failed, f"Input latency during {target} exceeded for {current_test_id()}: " + ", ".join(failed)
+    return metrics
@@ -0,0 +1,346 @@
+"""Local S3-compatible stand-in for R2 uploads.
+
+Implements the part of the S3 API the upload path uses – PutObject,
+CreateMultipartUpload, UploadPart, ListParts, CompleteMultipartUpload,
+AbortMultipartUpload, HeadObject and GetObject – on a threaded HTTP server
+that keeps objects in memory. ``x-amz-checksum-sha256`` is verified like R2
+does (a part whose bytes do not match is rejected with ``BadDigest``);
+signatures are not checked, so presigned and plain URLs both work.
+
+To make upload strategies comparable on one machine, the server can emulate
+a mobile uplink:
+
+* ``link_mbps`` – throughput of a single connection (what one TCP stream
+  reaches over a high-latency radio link);
+* ``uplink_mbps`` – total upstream bandwidth shared by all connections;
+* ``rtt_ms`` – added before every response;
+* ``drop_rate`` – share of uploads (single PUTs and parts) whose connection
+  is cut halfway through the body, to exercise retries and resume.
+
+Usage:
+    with LocalS3(link_mbps=16, uplink_mbps=64, rtt_ms=60) as s3:
+        ...  # s3.url, s3.bucket, s3.stats
+    python -m harness.s3_local --port 9000 --link-mbps 16   # serve until interrupted
+"""
+import argparse
+import base64
+import hashlib
+import random
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+CHUNK = 64 * 1024
+
+
+class Link:
+    """Bandwidth slots: every chunk reserves time on its connection and on the shared uplink."""
+
+    def __init__(self, link_mbps=None, uplink_mbps=None):
+        self.link_bps = link_mbps * 1_000_000 / 8 if link_mbps else None
+        self.uplink_bps = uplink_mbps * 1_000_000 / 8 if uplink_mbps else None
+        self._uplink_free_at = 0.0
+        self._lock = threading.Lock()
+
+    def transfer(self, connection, size):
+        now = time.monotonic()
+        ready = now
+        if self.link_bps:
+            start = max(now, connection.get("free_at", 0.0))
+            connection["free_at"] = start + size / self.link_bps
+            ready = connection["free_at"]
+        if self.uplink_bps:
+            with self._lock:
+                start = max(now, self._uplink_free_at)
+                self._uplink_free_at = start + size / self.uplink_bps
+                ready = max(ready, self._uplink_free_at)
+        if ready > now:
+            time.sleep(ready - now)
+
+
+def _xml(root, **fields):
+    body = "".join(f"<{name}>{value}</{name}>" for name, value in fields.items())
+    return f'<?xml version="1.0" encoding="UTF-8"?><{root}>{body}</{root}>'.encode()
+
+
+def _sha256_b64(data):
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+class S3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "LocalS3"
+
+    def log_message(self, format, *args):  # noqa: A002 – keep benchmark output readable
+        pass
+
+    # -- plumbing ------------------------------------------------------------------------------
+
+    def setup(self):
+        super().setup()
+        self.connection_state = {}
+
+    @property
+    def s3(self):
+        return self.server.s3
+
+    def _target(self):
+        url = urlparse(self.path)
+        bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+        query = {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+        return bucket, key, query
+
+    def _read_body(self, drop=False):
+        remaining = int(self.headers.get("Content-Length") or 0)
+        cut_at = remaining // 2 if drop else None
+        chunks = []
+        while remaining:
+            chunk = self.rfile.read(min(CHUNK, remaining))
+            if not chunk:
+                # The client went away mid-body (like a phone losing its connection)
+                self.s3.count("client_disconnects")
+                self.close_connection = True
+                raise ConnectionAbortedError("client disconnected")
+            self.s3.link.transfer(self.connection_state, len(chunk))
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            if cut_at is not None and remaining <= cut_at:
+                self.s3.count("dropped")
+                self.close_connection = True
+                raise ConnectionAbortedError("connection dropped by stand-in")
+        data = b"".join(chunks)
+        self.s3.count("bytes_received", len(data))
+        return data
+
+    def _reply(self, status, body=b"", headers=None):
+        if self.s3.rtt_s:
+            time.sleep(self.s3.rtt_s)
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, status, code, message=""):
+        self.s3.count(f"error:{code}")
+        self._reply(status, _xml("Error", Code=code, Message=message), {"Content-Type": "application/xml"})
+
+    def _checksum_ok(self, data):
+        expected = self.headers.get("x-amz-checksum-sha256")
+        return expected is None or expected == _sha256_b64(data)
+
+    def _dispatch(self, operations):
+        bucket, key, query = self._target()
+        for name, matches, handler in operations:
+            if matches(query):
+                self.s3.count(name)
+                try:
+                    return handler(bucket, key, query)
+                except (ConnectionAbortedError, ConnectionResetError, BrokenPipeError):
+                    self.close_connection = True
+                    return None
+        return self._error(400, "NotImplemented", f"{self.command} {self.path}")
+
+    # -- operations ----------------------------------------------------------------------------
+
+    def do_PUT(self):
+        self._dispatch((
+            ("UploadPart", lambda q: "uploadId" in q, self._upload_part),
+            ("PutObject", lambda q: True, self._put_object),
+        ))
+
+    def do_POST(self):
+        self._dispatch((
+            ("CreateMultipartUpload", lambda q: "uploads" in q, self._create),
+            ("CompleteMultipartUpload", lambda q: "uploadId" in q, self._complete),
+        ))
+
+    def do_GET(self):
+        self._dispatch((
+            ("ListParts", lambda q: "uploadId" in q, self._list_parts),
+            ("GetObject", lambda q: True, self._get_object),
+        ))
+
+    def do_HEAD(self):
+        self._dispatch((("HeadObject", lambda q: True, self._get_object),))
+
+    def do_DELETE(self):
+        self._dispatch((
+            ("AbortMultipartUpload", lambda q: "uploadId" in q, self._abort),
+            ("DeleteObject", lambda q: True, self._delete_object),
+        ))
+
+    def _dropped(self):
+        return self.s3.drop_rate and self.s3.random.random() < self.s3.drop_rate
+
+    def _put_object(self, bucket, key, query):
+        data = self._read_body(drop=self._dropped())
+        if not self._checksum_ok(data):
+            return self._error(400, "BadDigest", "x-amz-checksum-sha256 does not match the body")
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self.s3.lock:
+            self.s3.objects[(bucket, key)] = data
+        return self._reply(200, headers={"ETag": etag})
+
+    def _create(self, bucket, key, query):
+        self._read_body()
+        upload_id = uuid.uuid4().hex
+        with self.s3.lock:
+            self.s3.uploads[upload_id] = {
+                "bucket": bucket, "key": key, "parts": {},
+                "checksum": (self.headers.get("x-amz-checksum-algorithm") or "").upper() or None,
+            }
+        return self._reply(200, _xml("InitiateMultipartUploadResult", Bucket=bucket, Key=key, UploadId=upload_id),
+                           {"Content-Type": "application/xml"})
+
+    def _upload(self, bucket, key, query):
+        upload = self.s3.uploads.get(query["uploadId"])
+        return upload if upload and (upload["bucket"], upload["key"]) == (bucket, key) else None
+
+    def _upload_part(self, bucket, key, query):
+        upload = self._upload(bucket, key, query)
+        data = self._read_body(drop=self._dropped())
+        if upload is None:
+            return self._error(404, "NoSuchUpload")
+        if not self._checksum_ok(data):
+            return self._error(400, "BadDigest", "x-amz-checksum-sha256 does not match the part")
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self.s3.lock:
+            upload["parts"][int(query["partNumber"])] = {"data": data, "etag": etag, "sha256": _sha256_b64(data)}
+        return self._reply(200, headers={"ETag": etag})
+
+    def _list_parts(self, bucket, key, query):
+        upload = self._upload(bucket, key, query)
+        if upload is None:
+            return self._error(404, "NoSuchUpload")
+        marker = int(query.get("part-number-marker") or 0)
+        limit = int(query.get("max-parts") or 1000)
+        numbers = sorted(n for n in upload["parts"] if n > marker)
+        page, truncated = numbers[:limit], len(numbers) > limit
+        parts = "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>{upload['parts'][n]['etag'].replace(chr(34), '&quot;')}</ETag>"
+            f"<Size>{len(upload['parts'][n]['data'])}</Size><ChecksumSHA256>{upload['parts'][n]['sha256']}</ChecksumSHA256></Part>"
+            for n in page
+        )
+        fields = {"Bucket": bucket, "Key": key, "UploadId": query["uploadId"], "IsTruncated": str(truncated).lower()}
+        if truncated:
+            fields["NextPartNumberMarker"] = page[-1]
+        body = _xml("ListPartsResult", **fields).replace(b"</ListPartsResult>", parts.encode() + b"</ListPartsResult>")
+        return self._reply(200, body, {"Content-Type": "application/xml"})
+
+    def _complete(self, bucket, key, query):
+        requested = ET.fromstring(self._read_body())
+        upload = self._upload(bucket, key, query)
+        if upload is None:
+            return self._error(404, "NoSuchUpload")
+        chunks, last = [], 0
+        for part in requested.iter("Part"):
+            number = int(part.findtext("PartNumber"))
+            stored = upload["parts"].get(number)
+            if number <= last:
+                return self._error(400, "InvalidPartOrder")
+            if stored is None or stored["etag"] != part.findtext("ETag"):
+                return self._error(400, "InvalidPart", f"part {number}")
+            if upload["checksum"] == "SHA256" and part.findtext("ChecksumSHA256") != stored["sha256"]:
+                return self._error(400, "InvalidPart", f"checksum of part {number}")
+            chunks.append(stored["data"])
+            last = number
+        data = b"".join(chunks)
+        with self.s3.lock:
+            self.s3.objects[(bucket, key)] = data
+            self.s3.uploads.pop(query["uploadId"], None)
+        etag = f'"{hashlib.md5(b"".join(hashlib.md5(c).digest() for c in chunks)).hexdigest()}-{len(chunks)}"'
+        return self._reply(200, _xml("CompleteMultipartUploadResult", Bucket=bucket, Key=key, ETag=etag.replace('"', "&quot;")),
+                           {"Content-Type": "application/xml"})
+
+    def _abort(self, bucket, key, query):
+        with self.s3.lock:
+            self.s3.uploads.pop(query["uploadId"], None)
+        return self._reply(204)
+
+    def _get_object(self, bucket, key, query):
+        data = self.s3.objects.get((bucket, key))
+        if data is None:
+            return self._error(404, "NoSuchKey")
+        return self._reply(200, data, {"Content-Type": "application/octet-stream"})
+
+    def _delete_object(self, bucket, key, query):
+        with self.s3.lock:
+            self.s3.objects.pop((bucket, key), None)
+        return self._reply(204)
+
+
+class LocalS3:
+    """In-memory S3 stand-in on ``127.0.0.1``; use as a context manager."""
+
+    def __init__(self, port=0, bucket="documents", link_mbps=None, uplink_mbps=None, rtt_ms=0, drop_rate=0.0, seed=0):
+        self.bucket = bucket
+        self.link = Link(link_mbps, uplink_mbps)
+        self.rtt_s = rtt_ms / 1000
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.objects = {}
+        self.uploads = {}
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), S3Handler)
+        self._server.daemon_threads = True
+        self._server.s3 = self
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def reset(self):
+        with self.lock:
+            self.objects.clear()
+            self.uploads.clear()
+            self.stats.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-s3", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--bucket", default="documents")
+    parser.add_argument("--link-mbps", type=float, help="throughput of one connection")
+    parser.add_argument("--uplink-mbps", type=float, help="total upstream bandwidth")
+    parser.add_argument("--rtt-ms", type=float, default=0)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of uploads cut off halfway")
+    args = parser.parse_args(argv)
+    s3 = LocalS3(args.port, args.bucket, args.link_mbps, args.uplink_mbps, args.rtt_ms, args.drop_rate)
+    print(f"S3 stand-in on {s3.url}/{args.bucket}")
+    try:
+        s3._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
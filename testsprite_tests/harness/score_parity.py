@@ -0,0 +1,220 @@
+"""Ranking parity between the database score store and the TypeScript scoring.
+
+``compatibiliteit_scores`` (migration ``20261017000100``) precomputes
+``computeCompatibility`` from ``src/lib/matching.ts`` for every saved landlord
+search. This harness checks that the port ranks tenants exactly like the
+client:
+
+1. the seeded stand-in (``harness.local_db``) gets a set of generated saved
+   searches for one landlord – city, budget range, budget ceiling only, one or
+   both lifestyle flags, and the empty search;
+2. ``src/lib/matching.ts`` is transpiled with the repo's ``typescript``
+   package and run under Node on the same tenant rows;
+3. per search, every component score must match and the ordering by
+   ``(totaal DESC, huurder_id DESC)`` must be identical (tenants scoring 0
+   are not stored and must score 0 in TypeScript too);
+4. a sample of tenants is then updated in one statement and the comparison
+   repeated, which exercises the incremental refresh triggers. The original
+   values are restored afterwards.
+
+Usage:
+    python -m harness.score_parity                       # 100k tenants, 40 searches
+    python -m harness.score_parity --tenants 10000 --searches 10
+"""
+import argparse
+import json
+import logging
+import random
+import subprocess
+import sys
+
+from harness import config, datagen, local_db
+
+logger = logging.getLogger("testsprite.score_parity")
+
+TENANTS = 100_000
+SEARCHES = 40
+MUTATIONS = 2_000
+SEARCH_NAME_PREFIX = "parity-"
+OUTPUT_PATH = config.RESULTS_DIR / "score-parity.json"
+
+# Evaluates computeCompatibility for {tenants, criteria} on stdin and prints one [location, budget,
+# lifestyle, total] row per tenant for every criteria object
+SCORE_JS = r"""
+const fs = require('fs');
+const path = require('path');
+const ts = require(path.resolve('node_modules', 'typescript'));
+const source = fs.readFileSync(path.resolve('src', 'lib', 'matching.ts'), 'utf8');
+const compiled = ts.transpileModule(source, {
+  compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2020 },
+}).outputText;
+const mod = { exports: {} };
+new Function('module', 'exports', 'require', compiled)(mod, mod.exports, require);
+const { tenants, criteria } = JSON.parse(fs.readFileSync(0, 'utf8'));
+const scores = criteria.map((c) => tenants.map((t) => {
+  const r = mod.exports.computeCompatibility(t, c);
+  return [r.location, r.budget, r.lifestyle, r.total];
+}));
+process.stdout.write(JSON.stringify(scores));
+"""
+
+
+class ParityError(RuntimeError):
+    pass
+
+
+def generate_criteria(count, seed=datagen.SEED):
+    """Saved-search filters shaped like ``SearchCriteria``; undefined keys are omitted as JSON.stringify does."""
+    rng = random.Random(f"{seed}-criteria")
+    criteria = [{}]
+    while len(criteria) < count:
+        c = {}
+        if rng.random() < 0.8:
+            c["city"] = rng.choice(datagen.CITY_NAMES)
+        shape = rng.random()
+        if shape < 0.5:
+            c["minBudget"] = rng.randrange(600, 1600, 50)
+            c["maxBudget"] = c["minBudget"] + rng.randrange(200, 1200, 50)
+        elif shape < 0.7:
+            c["maxBudget"] = rng.randrange(800, 2600, 50)
+        elif shape < 0.8:
+            c["minBudget"] = rng.randrange(600, 1600, 50)
+        lifestyle = {}
+        if rng.random() < 0.5:
+            lifestyle["huisdieren"] = rng.random() < 0.5
+        if rng.random() < 0.5:
+            lifestyle["roken"] = rng.random() < 0.2
+        if lifestyle:
+            c["lifestyle"] = lifestyle
+        criteria.append(c)
+    return criteria
+
+
+def ts_scores(tenants, criteria):
+    try:
+        completed = subprocess.run(
+            ["node", "-e", SCORE_JS], cwd=config.REPO_ROOT, check=True, capture_output=True,
+            input=json.dumps({"tenants": tenants, "criteria": criteria}).encode(),
+        )
+    except FileNotFoundError as exc:
+        raise ParityError("node is not installed") from exc
+    except subprocess.CalledProcessError as exc:
+        raise ParityError(f"TypeScript scoring failed (run `npm install` first?): {exc.stderr.decode()[-500:]}") from exc
+    return json.loads(completed.stdout)
+
+
+def load_tenants(conn):
+    rows = conn.execute(
+        "SELECT id::text, locatie_voorkeur, max_huur::float8, huisdieren, roken FROM public.huurders ORDER BY id"
+    ).fetchall()
+    return [{"id": r[0], "locatie_voorkeur": r[1], "max_huur": r[2], "huisdieren": r[3], "roken": r[4]} for r in rows]
+
+
+def create_searches(conn, landlord_id, criteria):
+    with conn.transaction():
+        conn.execute("DELETE FROM public.opgeslagen_zoekopdrachten WHERE naam LIKE %s", (f"{SEARCH_NAME_PREFIX}%",))
+        return [
+            conn.execute(
+                "INSERT INTO public.opgeslagen_zoekopdrachten (verhuurder_id, naam, zoekfilters) VALUES (%s, %s, %s)"
+                " RETURNING id::text",
+                (landlord_id, f"{SEARCH_NAME_PREFIX}{n}", json.dumps(c)),
+            ).fetchone()[0]
+            for n, c in enumerate(criteria)
+        ]
+
+
+def ranking(scores):
+    return [tenant_id for tenant_id, _ in sorted(scores.items(), key=lambda item: (item[1][3], item[0]), reverse=True)]
+
+
+def compare(conn, search_ids, criteria, tenants):
+    """Mismatch report per saved search; an empty list means full parity."""
+    expected_all = ts_scores(tenants, criteria)
+    report = []
+    for search_id, c, expected_rows in zip(search_ids, criteria, expected_all):
+        expected = {t["id"]: tuple(row) for t, row in zip(tenants, expected_rows) if row[3] > 0}
+        stored = {
+            row[0]: tuple(row[1:])
+            for row in conn.execute(
+                "SELECT huurder_id::text, locatie, budget, leefstijl, totaal FROM public.compatibiliteit_scores"
+                " WHERE zoekopdracht_id = %s", (search_id,))
+        }
+        wrong = sorted(tenant_id for tenant_id in expected.keys() | stored.keys()
+                       if expected.get(tenant_id) != stored.get(tenant_id))
+        expected_rank, stored_rank = ranking(expected), ranking(stored)
+        first_divergence = next((i for i, (a, b) in enumerate(zip(expected_rank, stored_rank)) if a != b),
+                                None if len(expected_rank) == len(stored_rank) else min(len(expected_rank), len(stored_rank)))
+        if wrong or first_divergence is not None:
+            report.append({
+                "criteria": c, "scored": len(expected), "stored": len(stored), "mismatches": len(wrong),
+                "first_divergent_rank": first_divergence,
+                "examples": [{"huurder_id": t, "typescript": expected.get(t), "database": stored.get(t)} for t in wrong[:5]],
+            })
+    return report
+
+
+def mutate(conn, tenants, count, seed=datagen.SEED):
+    """Change budget, cities and lifestyle of ``count`` tenants in one UPDATE; returns the original rows."""
+    rng = random.Random(f"{seed}-mutations")
+    sample = rng.sample(tenants, min(count, len(tenants)))
+    changes = [(t["id"], rng.choice([None, rng.randrange(500, 3000, 25)]),
+                rng.sample(datagen.CITY_NAMES, rng.randint(0, 3)) or None,
+                rng.choice([None, True, False]), rng.choice([None, True, False])) for t in sample]
+    _apply_rows(conn, changes)
+    return [(t["id"], t["max_huur"], t["locatie_voorkeur"], t["huisdieren"], t["roken"]) for t in sample]
+
+
+def _apply_rows(conn, rows):
+    with conn.transaction(), conn.cursor() as cursor:
+        cursor.execute("CREATE TEMP TABLE parity_rows (id uuid, max_huur numeric, locatie_voorkeur text[],"
+                       " huisdieren boolean, roken boolean) ON COMMIT DROP")
+        with cursor.copy("COPY parity_rows FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+        cursor.execute(
+            "UPDATE public.huurders h SET max_huur = r.max_huur, locatie_voorkeur = r.locatie_voorkeur,"
+            " huisdieren = r.huisdieren, roken = r.roken FROM parity_rows r WHERE h.id = r.id"
+        )
+
+
+def run(tenants=TENANTS, searches=SEARCHES, mutations=MUTATIONS, output=OUTPUT_PATH):
+    stack = local_db.up(tenants)
+    criteria = generate_criteria(searches)
+    with local_db.connect(stack) as conn:
+        landlord_id = conn.execute(f"SELECT {local_db.landlord_id_sql('1')}").fetchone()[0]
+        search_ids = create_searches(conn, landlord_id, criteria)
+        rows = load_tenants(conn)
+        logger.info("Comparing %d searches over %d tenants", len(search_ids), len(rows))
+        result = {"tenants": len(rows), "searches": len(search_ids), "initial": compare(conn, search_ids, criteria, rows)}
+        originals = mutate(conn, rows, mutations)
+        try:
+            result["after_updates"] = compare(conn, search_ids, criteria, load_tenants(conn))
+        finally:
+            _apply_rows(conn, originals)
+            conn.execute("DELETE FROM public.opgeslagen_zoekopdrachten WHERE naam LIKE %s", (f"{SEARCH_NAME_PREFIX}%",))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=TENANTS, help="seeded tenant profiles")
+    parser.add_argument("--searches", type=int, default=SEARCHES, help="generated saved searches")
+    parser.add_argument("--mutations", type=int, default=MUTATIONS, help="tenants updated for the incremental check")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+    result = run(args.tenants, args.searches, args.mutations)
+    for phase in ("initial", "after_updates"):
+        failures = result[phase]
+        status = "parity" if not failures else f"{len(failures)} searches differ"
+        print(f"{phase}: {status} ({result['searches']} searches x {result['tenants']:,} tenants)")
+        for failure in failures[:5]:
+            print(f"  {json.dumps(failure['criteria'])}: {failure['mismatches']} mismatches, "
+                  f"first divergent rank {failure['first_divergent_rank']}")
+    print(f"Full results in {OUTPUT_PATH}")
+    return 1 if result["initial"] or result["after_updates"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""How often a page asks the ``sign-urls`` edge function for presigned storage URLs.
+
+``src/lib/storage-signed.ts`` collects the paths a page needs within one tick
+into a single request and reuses URLs (in memory and in sessionStorage) until
+shortly before they expire. A list that signs its rows one by one shows up
+here as many requests on the same page.
+
+``SigningCounter`` listens to the page's requests and groups the sign
+requests by the path the page was on; the app's own counters are exposed as
+``window.__huurlySignedUrls``. Limits per TC live under ``signing`` in
+``testsprite_perf_budgets.json``, and every measurement is appended to
+``results/perf-trend.jsonl``.
+"""
+import json
+from collections import Counter
+from urllib.parse import urlparse
+
+from harness.budgets import load_budgets, record_trend, violations
+from harness.tracing import current_test_id
+
+SIGN_ENDPOINT = "/functions/v1/sign-urls"
+
+STATS_JS = "() => window.__huurlySignedUrls ? window.__huurlySignedUrls.stats() : null"
+
+
+class SigningCounter:
+    """Counts sign requests (and the paths in them) per page path from creation until ``detach()``."""
+
+    def __init__(self, page):
+        self.page = page
+        self.requests = Counter()
+        self.paths = Counter()
+        page.on("request", self._on_request)
+
+    def _on_request(self, request):
+        if request.method != "POST" or not urlparse(request.url).path.endswith(SIGN_ENDPOINT):
+            return
+        page_path = urlparse(self.page.url).path or "/"
+        self.requests[page_path] += 1
+        try:
+            self.paths[page_path] += len(json.loads(request.post_data or "{}").get("paths", []))
+        except ValueError:
+            pass
+
+    def detach(self):
+        self.page.remove_listener("request", self._on_request)
+
+    def metrics(self):
+        return {
+            "sign_requests": sum(self.requests.values()),
+            "max_requests_per_page": max(self.requests.values(), default=0),
+            "signed_paths": sum(self.paths.values()),
+            "by_page": {path: {"requests": n, "paths": self.paths[path]} for path, n in self.requests.items()},
+        }
+
+
+async def assert_signing_budget(counter, budgets=None):
+    """Fail when a page made more sign requests than the TC's ``max_requests_per_page``."""
+    test_id = current_test_id()
+    limits = (budgets or load_budgets()).get("signing", {}).get(test_id, {})
+    metrics = counter.metrics()
+    metrics["cache"] = await counter.page.evaluate(STATS_JS)
+    failed = violations(metrics, limits)
+    record_trend("signing", test_id, metrics, limits, failed)
+    assert not failed, (f"Too many URL signing requests for {test_id}: " + ", ".join(failed) + "; per page: "
+                        + ", ".join(f"{path} ×{entry['requests']} ({entry['paths']} paths)"
+                                    for path, entry in metrics["by_page"].items()))
+    return metrics
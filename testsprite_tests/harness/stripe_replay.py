@@ -0,0 +1,428 @@
+"""Replay of signed Stripe webhook events against a local ``stripe-webhook``.
+
+``stripe-webhook`` records each event in ``stripe_gebeurtenissen`` (keyed by
+the Stripe event id) and acknowledges it; the subscription changes are applied
+afterwards in batches (``_shared/stripeEvents.ts``, migration
+``20261017000800``). This harness checks both halves with thousands of events:
+
+1. fixtures: per seeded tenant a completed checkout, then zero to three
+   ``customer.subscription.updated`` events and sometimes a ``deleted``, plus
+   expired sessions that never completed;
+2. delivery: events are sent roughly in creation order with random jitter, so
+   neighbours arrive out of order, and a share is sent twice (Stripe retries),
+   from many connections at once, each signed like Stripe does
+   (``Stripe-Signature: t=...,v1=HMAC-SHA256``);
+3. ``LocalStripe`` answers the worker's ``subscriptions.retrieve`` with the
+   state of the newest event sent so far for that subscription, like Stripe's
+   API would;
+4. once the queue is drained every subscription must have the state of its
+   newest event, every event id must be in the ledger exactly once, every
+   retry must have been acknowledged as a duplicate and every checkout must
+   have produced exactly one notification.
+
+On a stand-in started by ``harness.local_db`` the edge functions are served
+with ``supabase functions serve``; with ``TESTSPRITE_DB_URL`` the functions
+must already be served with the environment printed by ``--print-env``.
+TC007 checks the result against the ``webhooks`` budget in
+``testsprite_perf_budgets.json``.
+
+Usage:
+    python -m harness.stripe_replay                          # 2000 subscriptions
+    python -m harness.stripe_replay --subscriptions 5000 --concurrency 64
+    python -m harness.stripe_replay --print-env              # env for `supabase functions serve`
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from harness import config, datagen, local_db
+from harness.budgets import load_budgets, record_trend, violations
+from harness.load import percentile
+from harness.tracing import current_test_id
+
+logger = logging.getLogger("testsprite.stripe_replay")
+
+TENANTS = 10_000
+SUBSCRIPTIONS = 2_000
+CONCURRENCY = 32
+DUPLICATE_RATIO = 0.1
+# Events are sent in creation order plus up to this much random delay, so neighbours swap places
+JITTER_S = 900
+DRAIN_TIMEOUT_S = 300
+WEBHOOK_SECRET = os.environ.get("TESTSPRITE_STRIPE_WEBHOOK_SECRET", "whsec_testsprite_replay")
+STRIPE_PORT = int(os.environ.get("TESTSPRITE_STRIPE_PORT", "12111"))
+# Where the edge runtime (a container on a managed stand-in) reaches LocalStripe
+STRIPE_HOST = os.environ.get("TESTSPRITE_STRIPE_HOST", "host.docker.internal")
+PREFIX = "replay"
+NOTIFICATION_TITLE = "Betaling succesvol"
+OUTPUT_PATH = config.RESULTS_DIR / "stripe-replay.json"
+# What TC007 replays: small enough for a suite run, large enough for stable percentiles
+TC_PROFILE = {"subscriptions": 500, "concurrency": 32}
+
+# Stripe status -> abonnement_status, as stripe_abonnement_status() maps it
+STATUS_MAP = {"active": "actief", "trialing": "actief", "canceled": "geannuleerd", "incomplete_expired": "verlopen",
+              "past_due": "gepauzeerd", "unpaid": "gepauzeerd"}
+YEAR_S = 365 * 24 * 3600
+
+
+def tenant_id(n):
+    # Same as local_db.tenant_id_sql: md5('huurder-' || n)::uuid
+    return str(uuid.UUID(hashlib.md5(f"huurder-{n}".encode()).hexdigest()))
+
+
+# -- fixtures ---------------------------------------------------------------------------------------
+
+
+def _event(kind, created, obj):
+    return {"id": f"evt_{PREFIX}_{uuid.uuid4().hex}", "object": "event", "type": kind, "created": created,
+            "api_version": "2025-06-30.basil", "livemode": False, "data": {"object": obj}}
+
+
+def _subscription(sub_id, customer, status, start):
+    return {"id": sub_id, "object": "subscription", "customer": customer, "status": status,
+            "current_period_start": start, "current_period_end": start + YEAR_S,
+            "items": {"object": "list", "data": [{"current_period_start": start, "current_period_end": start + YEAR_S}]}}
+
+
+def generate_events(subscriptions, seed=datagen.SEED):
+    """``(events, expected)``: fixture events in creation order and the final subscription per id."""
+    rng = random.Random(f"{seed}-stripe-replay")
+    start = int(time.time()) - 2 * 24 * 3600
+    events, expected = [], {}
+    for n in range(1, subscriptions + 1):
+        sub_id, customer = f"sub_{PREFIX}_{n}", f"cus_{PREFIX}_{n}"
+        created = start + n
+        subscription = _subscription(sub_id, customer, "active", created)
+        events.append(_event("checkout.session.completed", created, {
+            "id": f"cs_{PREFIX}_{n}", "object": "checkout.session", "mode": "subscription", "payment_status": "paid",
+            "subscription": sub_id, "customer": customer, "amount_total": 6500, "currency": "eur",
+            "metadata": {"user_id": tenant_id(n)},
+        }))
+        events[-1]["_subscription"] = subscription
+        for step in range(rng.choice([0, 1, 1, 2, 3])):
+            created += rng.randint(30, 600)
+            subscription = _subscription(sub_id, customer, rng.choice(["active", "past_due", "unpaid", "active"]),
+                                         created if rng.random() < 0.5 else subscription["current_period_start"])
+            events.append(_event("customer.subscription.updated", created, subscription))
+        if rng.random() < 0.1:
+            created += rng.randint(30, 600)
+            subscription = {**subscription, "status": "canceled"}
+            events.append(_event("customer.subscription.deleted", created, subscription))
+        expected[sub_id] = {"status": STATUS_MAP[subscription["status"]], "eind_datum": subscription["current_period_end"]}
+        if rng.random() < 0.05:
+            events.append(_event("checkout.session.expired", start + n, {
+                "id": f"cs_{PREFIX}_open_{n}", "object": "checkout.session", "status": "expired", "subscription": None,
+            }))
+    events.sort(key=lambda event: event["created"])
+    return events, expected
+
+
+def delivery_order(events, duplicate_ratio=DUPLICATE_RATIO, jitter_s=JITTER_S, seed=datagen.SEED):
+    """Events as Stripe might deliver them: out of order within ``jitter_s`` and some of them twice."""
+    rng = random.Random(f"{seed}-stripe-delivery")
+    sends = [(event["created"] + rng.uniform(0, jitter_s), event) for event in events]
+    # A retry arrives a little after the first attempt
+    sends += [(at + rng.uniform(1, jitter_s), event) for at, event in rng.sample(sends, int(len(sends) * duplicate_ratio))]
+    sends.sort(key=lambda send: send[0])
+    return [event for _, event in sends]
+
+
+def sign(payload, secret=WEBHOOK_SECRET, timestamp=None):
+    timestamp = int(timestamp or time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+# -- Stripe API stand-in ----------------------------------------------------------------------------
+
+
+class LocalStripe:
+    """``GET /v1/subscriptions/<id>`` with the state of the newest event sent for that subscription."""
+
+    def __init__(self, port=STRIPE_PORT):
+        self.port = port
+        self.subscriptions = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def observe(self, event):
+        """Called when an event is sent: from then on Stripe's state includes it."""
+        obj = event.get("_subscription") or event["data"]["object"]
+        if obj.get("object") != "subscription":
+            return
+        with self._lock:
+            current = self.subscriptions.get(obj["id"])
+            if current is None or current[0] <= event["created"]:
+                self.subscriptions[obj["id"]] = (event["created"], obj)
+
+    def _handler(self):
+        stripe = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stripe.requests += 1
+                sub_id = self.path.split("?")[0].rstrip("/").rpartition("/")[2]
+                with stripe._lock:
+                    found = stripe.subscriptions.get(sub_id)
+                status, body = (200, found[1]) if found else (404, {"error": {"type": "invalid_request_error",
+                                                                              "message": f"No such subscription: '{sub_id}'"}})
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("0.0.0.0", self.port), self._handler())
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="local-stripe", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# -- functions --------------------------------------------------------------------------------------
+
+
+def function_env(stripe_port=STRIPE_PORT):
+    return {
+        "STRIPE_SECRET_KEY": "sk_test_testsprite",
+        "STRIPE_WEBHOOK_SECRET": WEBHOOK_SECRET,
+        "STRIPE_API_HOST": STRIPE_HOST,
+        "STRIPE_API_PORT": str(stripe_port),
+        "STRIPE_API_PROTOCOL": "http",
+    }
+
+
+def function_url(stack, name):
+    base = os.environ.get("TESTSPRITE_FUNCTIONS_URL") or f"{stack.api_url.rstrip('/')}/functions/v1"
+    return f"{base}/{name}"
+
+
+@contextlib.contextmanager
+def serve_functions(stack, stripe_port):
+    """Serve the repo's edge functions on a managed stand-in for the duration of the block."""
+    if not stack.managed:
+        yield
+        return
+    functions_dir = local_db.STACK_DIR / "supabase" / "functions"
+    if not functions_dir.exists():
+        functions_dir.symlink_to(config.REPO_ROOT / "supabase" / "functions", target_is_directory=True)
+    env_file = local_db.STACK_DIR / "stripe-replay.env"
+    env_file.write_text("".join(f"{k}={v}\n" for k, v in function_env(stripe_port).items()), encoding="utf-8")
+    process = subprocess.Popen(
+        ["supabase", "functions", "serve", "--workdir", str(local_db.STACK_DIR), "--env-file", str(env_file)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                urllib.request.urlopen(urllib.request.Request(function_url(stack, "stripe-webhook"), method="OPTIONS"), timeout=5)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise local_db.StackError("supabase functions serve did not come up")
+                time.sleep(1)
+        yield
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+# -- replay -----------------------------------------------------------------------------------------
+
+
+def _send(url, event):
+    payload = json.dumps({k: v for k, v in event.items() if not k.startswith("_")}).encode()
+    request = urllib.request.Request(url, data=payload, method="POST",
+                                     headers={"Content-Type": "application/json", "Stripe-Signature": sign(payload)})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            body = json.loads(response.read() or b"{}")
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        body, status = {}, exc.code
+    except (urllib.error.URLError, ConnectionError):
+        body, status = {}, 0
+    return (time.perf_counter() - started) * 1000, status, bool(body.get("duplicate"))
+
+
+def _invoke_worker(stack):
+    request = urllib.request.Request(function_url(stack, "stripe-event-worker"), data=b"{}", method="POST",
+                                     headers={"Authorization": f"Bearer {stack.service_role_key}",
+                                              "Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, ConnectionError) as exc:
+        logger.warning("stripe-event-worker failed: %s", exc)
+        return None
+
+
+def cleanup(conn, subscriptions):
+    with conn.transaction():
+        conn.execute("DELETE FROM public.stripe_gebeurtenissen WHERE id LIKE %s", (f"evt_{PREFIX}_%",))
+        conn.execute("DELETE FROM public.abonnementen WHERE stripe_subscription_id LIKE %s", (f"sub_{PREFIX}_%",))
+        conn.execute("DELETE FROM public.notificaties WHERE titel = %s AND gebruiker_id = ANY(%s::uuid[])",
+                     (NOTIFICATION_TITLE, [tenant_id(n) for n in range(1, subscriptions + 1)]))
+
+
+def pending(conn):
+    return conn.execute("SELECT count(*) FROM public.stripe_gebeurtenissen WHERE id LIKE %s AND status IN ('wachtend', 'bezig')",
+                        (f"evt_{PREFIX}_%",)).fetchone()[0]
+
+
+def check(conn, events, expected, sends, flagged_duplicates):
+    """Correctness of the ledger and the subscriptions after the queue drained."""
+    unique = {event["id"] for event in events}
+    ledger = dict(conn.execute("SELECT status, count(*) FROM public.stripe_gebeurtenissen WHERE id LIKE %s GROUP BY 1",
+                               (f"evt_{PREFIX}_%",)).fetchall())
+    stored = {
+        sub_id: {"status": status, "eind_datum": int(eind.timestamp()) if eind else None}
+        for sub_id, status, eind in conn.execute(
+            "SELECT stripe_subscription_id, status::text, eind_datum FROM public.abonnementen WHERE stripe_subscription_id LIKE %s",
+            (f"sub_{PREFIX}_%",))
+    }
+    wrong = sorted(sub_id for sub_id, state in expected.items() if stored.get(sub_id) != state)
+    notifications = conn.execute("SELECT count(*) FROM public.notificaties WHERE titel = %s AND gebruiker_id = ANY(%s::uuid[])",
+                                 (NOTIFICATION_TITLE, [tenant_id(n) for n in range(1, len(expected) + 1)])).fetchone()[0]
+    return {
+        "ledger": ledger,
+        "ledger_mismatch": abs(sum(ledger.values()) - len(unique)),
+        "duplicate_not_flagged": (len(sends) - len(unique)) - flagged_duplicates,
+        "wrong_state": len(wrong),
+        "wrong_examples": [{"subscription": s, "expected": expected[s], "stored": stored.get(s)} for s in wrong[:5]],
+        "extra_notifications": abs(notifications - len(expected)),
+        "failed_events": ledger.get("mislukt", 0),
+    }
+
+
+def replay(stack, subscriptions=SUBSCRIPTIONS, concurrency=CONCURRENCY, drain_timeout=DRAIN_TIMEOUT_S):
+    events, expected = generate_events(subscriptions)
+    sends = delivery_order(events)
+    url = function_url(stack, "stripe-webhook")
+    with local_db.connect(stack) as conn, LocalStripe() as stripe, serve_functions(stack, stripe.port):
+        cleanup(conn, subscriptions)
+        logger.info("Replaying %d deliveries of %d events for %d subscriptions", len(sends), len(events), subscriptions)
+
+        def deliver(event):
+            stripe.observe(event)
+            return _send(url, event)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(deliver, sends))
+        send_s = time.perf_counter() - started
+
+        # The webhook drains the queue itself; the worker picks up whatever an isolate left behind
+        remaining = pending(conn)
+        deadline = time.monotonic() + drain_timeout
+        while remaining and time.monotonic() < deadline:
+            _invoke_worker(stack)
+            time.sleep(0.5)
+            remaining = pending(conn)
+        drain_s = time.perf_counter() - started
+
+        latencies = sorted(ms for ms, status, _ in results if 200 <= status < 300)
+        metrics = {
+            "subscriptions": subscriptions,
+            "events": len(events),
+            "deliveries": len(sends),
+            "failed_acks": sum(1 for _, status, _ in results if not 200 <= status < 300),
+            "ack_p50_ms": percentile(latencies, 50) if latencies else None,
+            "ack_p95_ms": percentile(latencies, 95) if latencies else None,
+            "ack_p99_ms": percentile(latencies, 99) if latencies else None,
+            "events_per_s": len(sends) / send_s if send_s else None,
+            "drain_s": drain_s,
+            "applied_per_s": len(events) / drain_s if drain_s else None,
+            "pending": remaining,
+            "stripe_requests": stripe.requests,
+            **check(conn, events, expected, sends, sum(1 for _, _, duplicate in results if duplicate)),
+        }
+        cleanup(conn, subscriptions)
+    return metrics
+
+
+def run(tenants=TENANTS, subscriptions=SUBSCRIPTIONS, concurrency=CONCURRENCY, output=OUTPUT_PATH):
+    stack = local_db.up(max(tenants, subscriptions))
+    metrics = replay(stack, subscriptions, concurrency)
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(metrics, indent=2, default=str), encoding="utf-8")
+    return metrics
+
+
+def webhook_violations(metrics, limits):
+    """``violations`` for the upper limits plus the ``min_`` throughput floor."""
+    failed = violations(metrics, {name: limit for name, limit in limits.items() if not name.startswith("min_")})
+    if "min_events_per_s" in limits and (metrics["events_per_s"] or 0) < limits["min_events_per_s"]:
+        failed.append(f"events_per_s {metrics['events_per_s'] or 0:.0f} < {limits['min_events_per_s']}")
+    return failed
+
+
+async def assert_webhook_budget(budgets=None):
+    """Replay the TC profile against the local stand-in and fail on slow acks, lost or misapplied events."""
+    test_id = current_test_id()
+    limits = (budgets or load_budgets()).get("webhooks", {}).get(test_id, {})
+    metrics = await asyncio.to_thread(run, output=None, **TC_PROFILE)
+    failed = webhook_violations(metrics, limits)
+    record_trend("webhooks", test_id, {k: v for k, v in metrics.items() if k not in ("ledger", "wrong_examples")}, limits, failed)
+    assert not failed, f"Webhook budget exceeded for {test_id}: " + ", ".join(failed)
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=TENANTS, help="seeded tenant profiles")
+    parser.add_argument("--subscriptions", type=int, default=SUBSCRIPTIONS, help="subscriptions to generate events for")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="parallel webhook deliveries")
+    parser.add_argument("--print-env", action="store_true", help="print the function env for an unmanaged stand-in and exit")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+    if args.print_env:
+        for key, value in function_env().items():
+            print(f"{key}={value}")
+        return 0
+    metrics = run(args.tenants, args.subscriptions, args.concurrency)
+    print(f"{metrics['deliveries']:,} deliveries ({metrics['events']:,} events, {metrics['subscriptions']:,} subscriptions):"
+          f" ack p50 {metrics['ack_p50_ms'] or 0:.1f} ms, p95 {metrics['ack_p95_ms'] or 0:.1f} ms,"
+          f" p99 {metrics['ack_p99_ms'] or 0:.1f} ms, {metrics['events_per_s'] or 0:.0f} events/s")
+    print(f"Drained in {metrics['drain_s']:.1f}s ({metrics['applied_per_s'] or 0:.0f} events/s), pending {metrics['pending']},"
+          f" ledger {metrics['ledger']}")
+    problems = {k: metrics[k] for k in ("failed_acks", "ledger_mismatch", "duplicate_not_flagged", "wrong_state",
+                                        "extra_notifications", "failed_events", "pending") if metrics[k]}
+    print("Correct" if not problems else f"Problems: {problems}")
+    for example in metrics["wrong_examples"]:
+        print(f"  {json.dumps(example)}")
+    print(f"Full results in {OUTPUT_PATH}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
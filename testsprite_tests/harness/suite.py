@@ -0,0 +1,101 @@
+"""Discovery and in-process execution of the TC scripts."""
+import asyncio
+import importlib.util
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+
+from harness.browser_pool import BrowserPool
+from harness.budgets import check_flow_budget
+from harness.config import TESTS_DIR
+from harness.tracing import current_test
+
+
+@dataclass
+class TestCase:
+    test_id: str
+    name: str
+    path: Path
+
+
+@dataclass
+class TestResult:
+    test_id: str
+    name: str
+    path: str
+    status: str  # "passed" | "failed" | "error"
+    duration_s: float
+    error: str = ""
+
+    @property
+    def passed(self):
+        return self.status == "passed"
+
+
+def discover(selectors=None, tests_dir=TESTS_DIR):
+    """Return every ``TC*.py`` script, optionally filtered by id or name prefix (e.g. ``TC004``)."""
+    cases = []
+    for path in sorted(Path(tests_dir).glob("TC*.py")):
+        test_id, _, rest = path.stem.partition("_")
+        if selectors and not any(path.stem.startswith(s) or test_id == s for s in selectors):
+            continue
+        cases.append(TestCase(test_id=test_id, name=rest.replace("_", " "), path=path))
+    return cases
+
+
+def load_module(case):
+    # The scripts only run themselves under ``__main__``, so importing them is side-effect free
+    spec = importlib.util.spec_from_file_location(case.path.stem, case.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def run_case(case, pool):
+    started = time.perf_counter()
+    current_test.set(case.test_id)
+    try:
+        module = load_module(case)
+        await module.run_test(pool)
+    except AssertionError as exc:
+        status, error = "failed", str(exc) or traceback.format_exc(limit=3)
+    except Exception:
+        status, error = "error", traceback.format_exc(limit=5)
+    else:
+        status, error = "passed", ""
+    result = TestResult(
+        test_id=case.test_id,
+        name=case.name,
+        path=case.path.name,
+        status=status,
+        duration_s=time.perf_counter() - started,
+        error=error,
+    )
+    over_budget = check_flow_budget(result)
+    if over_budget and result.passed:
+        result.status = "failed"
+        result.error = "Flow budget exceeded: " + ", ".join(over_budget)
+    return result
+
+
+async def run_cases(cases, pool=None, concurrency=1):
+    """Run ``cases`` in this event loop against a single shared browser.
+
+    At most ``concurrency`` tests hold a context at the same time; results come
+    back in the order of ``cases``.
+    """
+    owns_pool = pool is None
+    if owns_pool:
+        pool = await BrowserPool.start()
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_in_slot(case):
+        async with slots:
+            return await run_case(case, pool)
+
+    try:
+        return list(await asyncio.gather(*(run_in_slot(case) for case in cases)))
+    finally:
+        if owns_pool:
+            await pool.close()
@@ -0,0 +1,202 @@
+"""Per-step timing, network attribution and trace export for the TC scripts.
+
+``click()`` and ``fill()`` wrap the generated ``frame.locator(...).nth(0)``
+pattern. Every call becomes a step that records the readiness wait, the
+action's wall time and the requests the action triggered. A request belongs
+to the step whose action most recently started, so requests fired by a click
+are counted for that click even when they finish during the next step's
+readiness wait. Requests issued before the first action are reported under
+``initial load``.
+
+When a context is closed its steps are written to ``<test>.jsonl`` (one step
+per line) and ``<test>.trace.json`` (Chrome trace-event format, open in
+``chrome://tracing`` or Perfetto) under ``TESTSPRITE_TRACE_DIR``.
+"""
+import contextvars
+from collections import Counter
+import json
+import os
+import sys
+import time
+import weakref
+from pathlib import Path
+
+from harness import config
+from harness.waits import ready
+
+TRACE_ENABLED = os.environ.get("TESTSPRITE_TRACE", "1") != "0"
+TRACE_DIR = Path(os.environ.get("TESTSPRITE_TRACE_DIR", config.RESULTS_DIR / "traces"))
+
+# Set by the suite runner so traces are named after the TC being run
+current_test = contextvars.ContextVar("current_test", default=None)
+
+
+def current_test_id():
+    """The TC being run: set by the suite runner, or taken from the script name when run standalone."""
+    return current_test.get() or Path(sys.argv[0]).stem.split("_")[0] or "standalone"
+
+
+_tracers = weakref.WeakKeyDictionary()
+_trace_names = Counter()
+
+
+class StepTracer:
+    """Collects the steps and requests of one browser context."""
+
+    def __init__(self, test_id):
+        self.test_id = test_id
+        self.origin = time.perf_counter()
+        self.steps = [self._new_step(0, "initial load", "load", None, self.origin)]
+        self.requests = {}
+
+    def _new_step(self, index, name, action, selector, started):
+        return {
+            "test_id": self.test_id,
+            "index": index,
+            "name": name,
+            "action": action,
+            "selector": selector,
+            "start_ms": (started - self.origin) * 1000,
+            "wait_ms": 0.0,
+            "action_ms": 0.0,
+            "duration_ms": 0.0,
+            "requests": 0,
+            "failed_requests": 0,
+            "bytes_sent": 0,
+            "bytes_received": 0,
+            "status": "ok",
+        }
+
+    def begin(self, name, action, selector, started):
+        step = self._new_step(len(self.steps), name, action, selector, started)
+        self.steps.append(step)
+        return step
+
+    def on_request(self, request):
+        self.requests[request] = {"step": self.steps[-1], "started": time.perf_counter(), "url": request.url}
+
+    async def on_request_finished(self, request):
+        entry = self.requests.get(request)
+        if entry is None:
+            return
+        entry["ended"] = time.perf_counter()
+        step = entry["step"]
+        step["requests"] += 1
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        entry["bytes"] = sizes["requestBodySize"] + sizes["requestHeadersSize"] + sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        step["bytes_sent"] += sizes["requestBodySize"] + sizes["requestHeadersSize"]
+        step["bytes_received"] += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+
+    def on_request_failed(self, request):
+        entry = self.requests.get(request)
+        if entry is None:
+            return
+        entry["ended"] = time.perf_counter()
+        entry["step"]["requests"] += 1
+        entry["step"]["failed_requests"] += 1
+
+    def finish_initial_load(self):
+        # The initial load has no action of its own; it lasts until the first step starts
+        initial = self.steps[0]
+        end_ms = self.steps[1]["start_ms"] if len(self.steps) > 1 else (time.perf_counter() - self.origin) * 1000
+        initial["duration_ms"] = initial["action_ms"] = end_ms
+
+    def trace_events(self):
+        """Steps and requests as Chrome trace events (complete events, microseconds)."""
+        pid = os.getpid()
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.test_id}},
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": 1, "args": {"name": "steps"}},
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": 2, "args": {"name": "network"}},
+        ]
+        for step in self.steps:
+            events.append({
+                "name": step["name"], "cat": step["action"], "ph": "X", "pid": pid, "tid": 1,
+                "ts": step["start_ms"] * 1000, "dur": step["duration_ms"] * 1000,
+                "args": {key: step[key] for key in ("wait_ms", "action_ms", "requests", "bytes_sent", "bytes_received", "status")},
+            })
+        for entry in self.requests.values():
+            if "ended" not in entry:
+                continue
+            events.append({
+                "name": entry["url"].split("?")[0], "cat": "network", "ph": "X", "pid": pid, "tid": 2,
+                "ts": (entry["started"] - self.origin) * 1e6, "dur": (entry["ended"] - entry["started"]) * 1e6,
+                "args": {"url": entry["url"], "bytes": entry.get("bytes", 0), "step": entry["step"]["index"]},
+            })
+        return events
+
+    def export(self, directory=None):
+        directory = Path(directory or TRACE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.finish_initial_load()
+        with open(directory / f"{self.test_id}.jsonl", "w", encoding="utf-8") as handle:
+            for step in self.steps:
+                handle.write(json.dumps(step) + "\n")
+        (directory / f"{self.test_id}.trace.json").write_text(
+            json.dumps({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}), encoding="utf-8"
+        )
+        return directory
+
+
+def attach(context):
+    """Start tracing ``context``; called by the browser pool for every new context."""
+    if not TRACE_ENABLED:
+        return None
+    test_id = current_test_id()
+    # Tests that open several contexts (e.g. TC013's browser users) get one trace per context
+    sequence = _trace_names[test_id]
+    _trace_names[test_id] += 1
+    tracer = StepTracer(test_id if sequence == 0 else f"{test_id}-{sequence}")
+    context.on("request", tracer.on_request)
+    context.on("requestfinished", tracer.on_request_finished)
+    context.on("requestfailed", tracer.on_request_failed)
+    _tracers[context] = tracer
+    return tracer
+
+
+def export(context):
+    tracer = _tracers.pop(context, None)
+    if tracer is not None:
+        tracer.export()
+    return tracer
+
+
+def _page_of(frame):
+    # ``context.pages[-1]`` is a Page; iframes hand us a Frame that knows its page
+    return getattr(frame, "page", frame)
+
+
+async def _run_step(frame, selector, action, perform, label=None):
+    page = _page_of(frame)
+    elem = frame.locator(selector).nth(0)
+    tracer = _tracers.get(page.context)
+    started = time.perf_counter()
+    wait_ms = await ready(page, elem)
+    if tracer is None:
+        await perform(elem)
+        return
+    step = tracer.begin(label or f"{action} {selector.removeprefix('xpath=')}", action, selector, started)
+    action_started = time.perf_counter()
+    try:
+        await perform(elem)
+    except Exception:
+        step["status"] = "error"
+        raise
+    finally:
+        ended = time.perf_counter()
+        step["wait_ms"] = wait_ms
+        step["action_ms"] = (ended - action_started) * 1000
+        step["duration_ms"] = (ended - started) * 1000
+
+
+async def click(frame, selector, label=None, timeout=5000):
+    """Wait until ``selector`` is ready, click its first match and record the step."""
+    await _run_step(frame, selector, "click", lambda elem: elem.click(timeout=timeout), label)
+
+
+async def fill(frame, selector, value, label=None):
+    """Wait until ``selector`` is ready, fill its first match with ``value`` and record the step."""
+    await _run_step(frame, selector, "fill", lambda elem: elem.fill(value), label)
@@ -0,0 +1,231 @@
+"""Consistency of the unread counters under concurrent writes.
+
+``ongelezen_tellers`` (migration ``20261017000700``) keeps each user's unread
+notificaties and berichten, maintained by statement-level triggers, and backs
+the header badges. This harness hammers a small set of seeded users from
+several connections at once and then checks every counter against a fresh
+``count(*)``:
+
+* single and bulk inserts of unread notifications and messages;
+* ``markAllAsRead`` (every unread notification of a user in one UPDATE),
+  ``markAsRead`` of one notification and ``markMessagesAsRead`` of one
+  conversation, racing with the inserts and with each other;
+* marking read messages unread again, deleting notifications, and
+  transactions that insert and mark read and are then rolled back.
+
+The rows it writes are removed afterwards and the counters are checked once
+more, so a run leaves the stand-in as it found it.
+
+Usage:
+    python -m harness.unread_counters                       # 8 workers x 500 operations
+    python -m harness.unread_counters --workers 16 --operations 2000 --users 5
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+import psycopg
+
+from harness import config, datagen, local_db
+
+logger = logging.getLogger("testsprite.unread_counters")
+
+TENANTS = 10_000
+USERS = 10
+WORKERS = 8
+OPERATIONS = 500
+MARKER = "unread-check"
+OUTPUT_PATH = config.RESULTS_DIR / "unread-counters.json"
+
+MISMATCH_SQL = """
+    WITH feitelijk AS (
+        SELECT gebruiker_id, sum(notificaties) AS notificaties, sum(berichten) AS berichten
+        FROM (
+            SELECT gebruiker_id, count(*) AS notificaties, 0 AS berichten
+            FROM public.notificaties WHERE gelezen = false AND gebruiker_id IS NOT NULL GROUP BY gebruiker_id
+            UNION ALL
+            SELECT ontvanger_id, 0, count(*)
+            FROM public.berichten WHERE gelezen = false AND ontvanger_id IS NOT NULL GROUP BY ontvanger_id
+        ) AS t
+        GROUP BY gebruiker_id
+    )
+    SELECT COALESCE(f.gebruiker_id, t.gebruiker_id)::text,
+           COALESCE(t.notificaties, 0), COALESCE(f.notificaties, 0),
+           COALESCE(t.berichten, 0), COALESCE(f.berichten, 0)
+    FROM feitelijk f
+    FULL JOIN public.ongelezen_tellers t ON t.gebruiker_id = f.gebruiker_id
+    WHERE COALESCE(t.notificaties, 0) <> COALESCE(f.notificaties, 0)
+       OR COALESCE(t.berichten, 0) <> COALESCE(f.berichten, 0)
+"""
+
+
+def mismatches(conn):
+    """Users whose counters differ from a fresh count (empty when all match)."""
+    return [
+        {"gebruiker_id": user, "notificaties": {"counter": nc, "actual": na}, "berichten": {"counter": bc, "actual": ba}}
+        for user, nc, na, bc, ba in conn.execute(MISMATCH_SQL)
+    ]
+
+
+def _insert_notifications(conn, rng, users, senders):
+    user, count = rng.choice(users), rng.choice([1, 1, 1, rng.randint(2, 50)])
+    conn.execute(
+        "INSERT INTO public.notificaties (gebruiker_id, type, titel, inhoud, gelezen)"
+        " SELECT %s, 'systeem', %s, 'test', false FROM generate_series(1, %s)",
+        (user, MARKER, count),
+    )
+
+
+def _insert_messages(conn, rng, users, senders):
+    sender, user, count = rng.choice(senders), rng.choice(users), rng.choice([1, 1, rng.randint(2, 20)])
+    conn.execute(
+        "INSERT INTO public.berichten (verzender_id, ontvanger_id, onderwerp, inhoud, gelezen)"
+        " SELECT %s, %s, %s, 'test', false FROM generate_series(1, %s)",
+        (sender, user, MARKER, count),
+    )
+
+
+def _mark_all_notifications(conn, rng, users, senders):
+    # NotificationService.markAllAsRead
+    conn.execute("UPDATE public.notificaties SET gelezen = true WHERE gebruiker_id = %s AND gelezen = false",
+                 (rng.choice(users),))
+
+
+def _mark_one_notification(conn, rng, users, senders):
+    # NotificationService.markAsRead
+    conn.execute(
+        "UPDATE public.notificaties SET gelezen = true WHERE id = ("
+        " SELECT id FROM public.notificaties WHERE gebruiker_id = %s AND titel = %s AND gelezen = false LIMIT 1)",
+        (rng.choice(users), MARKER),
+    )
+
+
+def _mark_conversation(conn, rng, users, senders):
+    # MessageService.markMessagesAsRead
+    conn.execute(
+        "UPDATE public.berichten SET gelezen = true WHERE verzender_id = %s AND ontvanger_id = %s AND gelezen = false",
+        (rng.choice(senders), rng.choice(users)),
+    )
+
+
+def _mark_messages_unread(conn, rng, users, senders):
+    conn.execute(
+        "UPDATE public.berichten SET gelezen = false WHERE id IN ("
+        " SELECT id FROM public.berichten WHERE ontvanger_id = %s AND onderwerp = %s AND gelezen = true LIMIT %s)",
+        (rng.choice(users), MARKER, rng.randint(1, 10)),
+    )
+
+
+def _delete_notifications(conn, rng, users, senders):
+    conn.execute(
+        "DELETE FROM public.notificaties WHERE id IN ("
+        " SELECT id FROM public.notificaties WHERE gebruiker_id = %s AND titel = %s LIMIT %s)",
+        (rng.choice(users), MARKER, rng.randint(1, 5)),
+    )
+
+
+def _rolled_back(conn, rng, users, senders):
+    with conn.transaction():
+        _insert_notifications(conn, rng, users, senders)
+        _mark_all_notifications(conn, rng, users, senders)
+        _insert_messages(conn, rng, users, senders)
+        raise psycopg.Rollback()
+
+
+# Weighted like the app: mostly new notifications and messages, then reads
+OPERATION_MIX = [
+    (_insert_notifications, 30), (_insert_messages, 20), (_mark_all_notifications, 15),
+    (_mark_one_notification, 10), (_mark_conversation, 10), (_mark_messages_unread, 5),
+    (_delete_notifications, 5), (_rolled_back, 5),
+]
+
+
+def _worker(stack, worker, operations, users, senders, start, tally):
+    """Runs in its own thread with its own connection; ``tally`` is this worker's own Counter."""
+    rng = random.Random(f"{datagen.SEED}-unread-{worker}")
+    functions, weights = zip(*OPERATION_MIX)
+    with local_db.connect(stack) as conn:
+        start.wait()
+        for _ in range(operations):
+            operation = rng.choices(functions, weights)[0]
+            try:
+                operation(conn, rng, users, senders)
+                tally[operation.__name__.lstrip("_")] += 1
+            except (psycopg.errors.DeadlockDetected, psycopg.errors.SerializationFailure):
+                tally["retried"] += 1
+
+
+def hammer(stack, users, senders, workers=WORKERS, operations=OPERATIONS):
+    """Run ``operations`` random writes on each of ``workers`` connections at once; returns counts per operation."""
+    tallies = [Counter() for _ in range(workers)]
+    start = threading.Barrier(workers)
+    threads = [threading.Thread(target=_worker, args=(stack, n, operations, users, senders, start, tallies[n]))
+               for n in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(tallies, Counter())
+
+
+def cleanup(conn):
+    with conn.transaction():
+        conn.execute("DELETE FROM public.notificaties WHERE titel = %s", (MARKER,))
+        conn.execute("DELETE FROM public.berichten WHERE onderwerp = %s", (MARKER,))
+
+
+def run(tenants=TENANTS, users=USERS, workers=WORKERS, operations=OPERATIONS, output=OUTPUT_PATH):
+    stack = local_db.up(tenants)
+    with local_db.connect(stack) as conn:
+        if not local_db.table_exists(conn, "ongelezen_tellers"):
+            raise local_db.StackError("ongelezen_tellers is missing; did migration 20261017000700 apply?")
+        recipients = [row[0] for row in conn.execute(
+            f"SELECT {local_db.tenant_id_sql('n')}::text FROM generate_series(1, %s) AS n", (users,))]
+        senders = [row[0] for row in conn.execute(
+            f"SELECT {local_db.landlord_id_sql('n')}::text FROM generate_series(1, %s) AS n", (max(1, users // 2),))]
+        cleanup(conn)
+        result = {"users": users, "workers": workers, "operations": workers * operations, "before": mismatches(conn)}
+        started = time.perf_counter()
+        tally = hammer(stack, recipients, senders, workers, operations)
+        result["seconds"] = time.perf_counter() - started
+        result["executed"] = dict(tally)
+        result["after_writes"] = mismatches(conn)
+        result["unread_written"] = conn.execute(
+            "SELECT (SELECT count(*) FROM public.notificaties WHERE titel = %(m)s AND gelezen = false)"
+            " + (SELECT count(*) FROM public.berichten WHERE onderwerp = %(m)s AND gelezen = false)",
+            {"m": MARKER}).fetchone()[0]
+        cleanup(conn)
+        result["after_cleanup"] = mismatches(conn)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=TENANTS, help="seeded tenant profiles")
+    parser.add_argument("--users", type=int, default=USERS, help="recipients the workers compete for")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="concurrent connections")
+    parser.add_argument("--operations", type=int, default=OPERATIONS, help="writes per connection")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+    result = run(args.tenants, args.users, args.workers, args.operations)
+    print(f"{result['operations']:,} writes on {result['workers']} connections for {result['users']} users"
+          f" in {result['seconds']:.1f}s ({result['unread_written']:,} unread rows left before cleanup)")
+    print("  " + ", ".join(f"{name} {count}" for name, count in sorted(result["executed"].items())))
+    for phase in ("before", "after_writes", "after_cleanup"):
+        failures = result[phase]
+        print(f"{phase}: {'consistent' if not failures else f'{len(failures)} users differ'}")
+        for failure in failures[:5]:
+            print(f"  {json.dumps(failure)}")
+    print(f"Full results in {OUTPUT_PATH}")
+    return 1 if result["before"] or result["after_writes"] or result["after_cleanup"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
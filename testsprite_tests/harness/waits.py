@@ -0,0 +1,112 @@
+"""Event-driven readiness waits.
+
+Replaces the fixed ``page.wait_for_timeout(3000)`` the generated scripts put in
+front of every action. ``ready()`` returns as soon as the React tree is
+mounted, no requests are in flight and the target locator is visible, and
+never waits longer than ``TESTSPRITE_WAIT_TIMEOUT_MS``. Hitting the bound is
+not an error: the action that follows still applies Playwright's own
+actionability checks and fails with a precise message if the page is not
+ready.
+"""
+import asyncio
+import logging
+import os
+import time
+import weakref
+
+from playwright import async_api
+
+logger = logging.getLogger("testsprite.waits")
+
+# Upper bound for a single readiness wait; the old fixed sleep was 3000 ms
+WAIT_TIMEOUT_MS = int(os.environ.get("TESTSPRITE_WAIT_TIMEOUT_MS", "3000"))
+# How long the network must stay quiet before it counts as idle
+NETWORK_QUIET_MS = int(os.environ.get("TESTSPRITE_NETWORK_QUIET_MS", "250"))
+
+HYDRATED_JS = "() => { const root = document.getElementById('root'); return !!root && root.childElementCount > 0; }"
+
+_trackers = weakref.WeakKeyDictionary()
+
+
+class NetworkTracker:
+    """Counts in-flight requests for one browser context."""
+
+    def __init__(self):
+        self.inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._last_change = time.perf_counter()
+
+    def _started(self, _request):
+        self.inflight += 1
+        self._idle.clear()
+        self._last_change = time.perf_counter()
+
+    def _finished(self, _request):
+        self.inflight = max(0, self.inflight - 1)
+        self._last_change = time.perf_counter()
+        if self.inflight == 0:
+            self._idle.set()
+
+    async def wait_quiet(self, deadline, quiet_ms=NETWORK_QUIET_MS):
+        """Wait until nothing has been in flight for ``quiet_ms``; returns False when ``deadline`` passes first."""
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            if not self._idle.is_set():
+                try:
+                    await asyncio.wait_for(self._idle.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return False
+                continue
+            quiet_for = time.perf_counter() - self._last_change
+            if quiet_for * 1000 >= quiet_ms:
+                return True
+            await asyncio.sleep(min(quiet_ms / 1000 - quiet_for, remaining))
+
+
+def track_network(context):
+    """Start counting requests on ``context``; called by the browser pool for every new context."""
+    tracker = NetworkTracker()
+    context.on("request", tracker._started)
+    context.on("requestfinished", tracker._finished)
+    context.on("requestfailed", tracker._finished)
+    _trackers[context] = tracker
+    return tracker
+
+
+async def ready(page, locator=None, timeout_ms=None, network=True):
+    """Wait until the page is hydrated, the network is quiet and ``locator`` (if given) is visible.
+
+    Returns the time spent waiting in milliseconds.
+    """
+    timeout_ms = WAIT_TIMEOUT_MS if timeout_ms is None else timeout_ms
+    started = time.perf_counter()
+    deadline = started + timeout_ms / 1000
+    unmet = []
+
+    def remaining_ms():
+        return max(1, (deadline - time.perf_counter()) * 1000)
+
+    try:
+        await page.wait_for_function(HYDRATED_JS, timeout=remaining_ms())
+    except async_api.Error:
+        unmet.append("hydration")
+
+    if locator is not None:
+        try:
+            await locator.wait_for(state="visible", timeout=remaining_ms())
+        except async_api.Error:
+            unmet.append("locator")
+
+    tracker = _trackers.get(page.context)
+    if network and tracker is not None and not await tracker.wait_quiet(deadline):
+        unmet.append(f"network ({tracker.inflight} in flight)")
+
+    waited_ms = (time.perf_counter() - started) * 1000
+    if unmet:
+        logger.warning("ready() hit %d ms bound after %.0f ms, unmet: %s", timeout_ms, waited_ms, ", ".join(unmet))
+    else:
+        logger.debug("ready() resolved in %.0f ms", waited_ms)
+    return waited_ms
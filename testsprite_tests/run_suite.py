@@ -0,0 +1,76 @@
+"""Run the TC scripts through shared browser pools and write a merged report.
+
+Usage:
+    python testsprite_tests/run_suite.py                       # every TC*.py, one browser
+    python testsprite_tests/run_suite.py TC004 TC006
+    python testsprite_tests/run_suite.py -w 8 -c 2             # 8 worker processes, 2 contexts each
+    python testsprite_tests/run_suite.py --local-db 100000     # against a seeded local Supabase stand-in
+"""
+import argparse
+import logging
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+from harness.parallel import load_durations, run_sharded
+from harness.report import write_outputs
+from harness.config import RESULTS_DIR
+from harness.suite import discover
+
+STATUS_ICONS = {"passed": "✅", "failed": "❌", "error": "💥"}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tests", nargs="*", help="test ids or file name prefixes to run (default: all)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes, each with its own browser")
+    parser.add_argument("-c", "--contexts", type=int, default=1, help="concurrent browser contexts per worker")
+    parser.add_argument("-o", "--output", type=Path, default=RESULTS_DIR,
+                        help="directory for results.json and report.md")
+    parser.add_argument("--local-db", type=int, nargs="?", const=0, metavar="TENANTS",
+                        help="run against the local Supabase stand-in seeded with TENANTS profiles (see harness/local_db.py)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log how long every readiness wait took")
+    return parser.parse_args(argv)
+
+
+def print_summary(results, wall_clock_s):
+    for result in results:
+        print(f"{STATUS_ICONS[result.status]} {result.test_id} {result.name} ({result.duration_s:.1f}s)")
+        if result.error:
+            print("    " + result.error.strip().splitlines()[-1])
+    passed = sum(result.passed for result in results)
+    test_s = sum(result.duration_s for result in results)
+    print(f"\n{passed}/{len(results)} passed in {wall_clock_s:.1f}s wall clock ({test_s:.1f}s of test time)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format="%(name)s %(message)s")
+    cases = discover(args.tests)
+    if not cases:
+        print("No TC scripts matched", args.tests, file=sys.stderr)
+        return 2
+    if args.local_db is not None:
+        # Imported lazily: only this mode needs psycopg and the Supabase CLI
+        from harness import local_db
+        stack = local_db.up(args.local_db or None)
+        print(f"Using local Supabase at {stack.api_url}; start the frontend with VITE_SUPABASE_URL={stack.api_url}")
+
+    started = time.perf_counter()
+    results = run_sharded(cases, args.workers, args.contexts, durations=load_durations(args.output / "results.json"))
+    wall_clock_s = time.perf_counter() - started
+
+    print_summary(results, wall_clock_s)
+    report = write_outputs(results, args.output, {
+        "date": date.today().isoformat(),
+        "workers": args.workers,
+        "contexts_per_worker": args.contexts,
+        "wall_clock_s": wall_clock_s,
+    })
+    print(f"Report written to {report}")
+    return 0 if all(result.passed for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())